@@ -0,0 +1,537 @@
+"""
+数组化的紧凑单元存储
+用共享顶点池 + CSR偏移/索引数组代替 "每个单元一个字典" 的列表
+"""
+
+import itertools
+import numpy as np
+
+
+def csr_from_lists(lists):
+    """把列表的列表转换为 CSR (offsets, values)"""
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    values = np.fromiter(itertools.chain.from_iterable(lists), dtype=np.int64,
+                         count=int(offsets[-1]))
+    return offsets, values
+
+
+def csr_take(offsets, values, rows):
+    """按行号批量提取CSR子集，返回新的 (offsets, values)"""
+    rows = np.asarray(rows, dtype=np.int64)
+    lengths = offsets[rows + 1] - offsets[rows]
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    # 每个元素在原数组中的位置 = 所在行起点 + 行内序号
+    positions = (np.repeat(offsets[rows] - new_offsets[:-1], lengths)
+                 + np.arange(new_offsets[-1]))
+    return new_offsets, values[positions]
+
+
+def csr_row_ids(offsets):
+    """CSR中每个元素所属的行号"""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+class CellTable:
+    """
+    紧凑单元表
+
+    几何:
+        vertices            (V, 3)  共享顶点池 (m)
+        cell_offsets        (C+1,)  单元 → 顶点 CSR 偏移
+        cell_vertices       (K,)    单元 → 顶点索引
+        face_offsets        (F+1,)  面 → 顶点 CSR 偏移（每个面的顶点按环形顺序排列）
+        face_vertices       (L,)    面 → 顶点索引
+        face_seeds          (F, 2)  面两侧的种子编号（-1 表示支架边界/镜像种子），
+                                    面的法向按顶点环顺序指向 face_seeds[:, 1] 一侧
+        cell_face_offsets   (C+1,)  单元 → 面 CSR 偏移
+        cell_faces          (M,)    单元 → 面索引
+    列:
+        centers        (C, 3)  种子坐标
+        seed_index     (C,)    种子编号
+        layer_ids      (C,)    所属层 (0 皮质骨, 1 过渡层, 2 松质骨)
+        pore_sizes     (C,)    等效孔径 (μm)，未计算时为 NaN
+        volumes        (C,)    单元体积 (m³)      ┐
+        surface_areas  (C,)    单元表面积 (m²)    ├ 由 compute_statistics() 填写
+        centroids      (C, 3)  单元质心 (m)       ┘
+
+    只由numpy数组组成，可直接pickle，也可通过 to_shared_memory() 在进程间零拷贝共享。
+    同时提供兼容视图：len()、迭代、table[i]['vertices'] / table[i]['center'] 与旧的字典列表用法一致，
+    因此 plot_* / visualize_* 等函数无需修改。
+    """
+
+    COLUMN_FIELDS = ('centers', 'seed_index', 'layer_ids', 'pore_sizes',
+                     'volumes', 'surface_areas', 'centroids')
+    ARRAY_FIELDS = ('vertices', 'cell_offsets', 'cell_vertices', 'face_offsets', 'face_vertices',
+                    'face_seeds', 'cell_face_offsets', 'cell_faces') + COLUMN_FIELDS
+
+    def __init__(self, vertices, cell_offsets, cell_vertices, face_offsets, face_vertices,
+                 face_seeds, cell_face_offsets, cell_faces, centers, seed_index,
+                 layer_ids=None, pore_sizes=None, volumes=None, surface_areas=None,
+                 centroids=None):
+        self.vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        self.cell_offsets = np.asarray(cell_offsets, dtype=np.int64)
+        self.cell_vertices = np.asarray(cell_vertices, dtype=np.int64)
+        self.face_offsets = np.asarray(face_offsets, dtype=np.int64)
+        self.face_vertices = np.asarray(face_vertices, dtype=np.int64)
+        self.face_seeds = np.asarray(face_seeds, dtype=np.int64).reshape(-1, 2)
+        self.cell_face_offsets = np.asarray(cell_face_offsets, dtype=np.int64)
+        self.cell_faces = np.asarray(cell_faces, dtype=np.int64)
+        self.centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+        self.seed_index = np.asarray(seed_index, dtype=np.int64)
+        n_cells = len(self.seed_index)
+        self.layer_ids = (np.zeros(n_cells, dtype=np.int8) if layer_ids is None
+                          else np.asarray(layer_ids, dtype=np.int8))
+        self.pore_sizes = (np.full(n_cells, np.nan) if pore_sizes is None
+                           else np.asarray(pore_sizes, dtype=float))
+        self.volumes = (np.full(n_cells, np.nan) if volumes is None
+                        else np.asarray(volumes, dtype=float))
+        self.surface_areas = (np.full(n_cells, np.nan) if surface_areas is None
+                              else np.asarray(surface_areas, dtype=float))
+        self.centroids = (np.full((n_cells, 3), np.nan) if centroids is None
+                          else np.asarray(centroids, dtype=float).reshape(-1, 3))
+
+    # ------------------------------------------------------------------
+    # 构造
+    # ------------------------------------------------------------------
+    @classmethod
+    def empty(cls):
+        """空表"""
+        zero = np.zeros(1, dtype=np.int64)
+        none = np.zeros(0, dtype=np.int64)
+        return cls(np.zeros((0, 3)), zero, none, zero, none, np.zeros((0, 2)),
+                   zero, none, np.zeros((0, 3)), none)
+
+    @classmethod
+    def from_voronoi(cls, vor, cell_points, point_ids=None, layer_boundaries=None):
+        """
+        从 scipy Voronoi 结果构造单元表
+
+        cell_points: 要收录的 vor.points 下标（这些点的单元必须有界）
+        point_ids: vor.points 下标 → 全局种子编号的映射（-1 表示镜像种子），默认恒等
+        layer_boundaries: 分层Z边界 (m)，用于计算 layer_ids
+
+        面直接取自 ridge_points / ridge_vertices（三维时qhull给出的顶点已按环形排列），
+        每个面只存储一次，并记录其两侧的种子
+        """
+        cell_points = np.asarray(cell_points, dtype=np.int64)
+        if point_ids is None:
+            point_ids = np.arange(len(vor.points))
+        point_ids = np.asarray(point_ids, dtype=np.int64)
+        if len(cell_points) == 0:
+            return cls.empty()
+
+        # 单元 → 顶点
+        regions = [vor.regions[r] for r in vor.point_region[cell_points]]
+        cell_offsets, cell_vertices = csr_from_lists(regions)
+
+        # 面：至少一侧是收录单元的有界ridge
+        row_of_point = np.full(len(vor.points), -1, dtype=np.int64)
+        row_of_point[cell_points] = np.arange(len(cell_points))
+        ridge_points = np.asarray(vor.ridge_points, dtype=np.int64)
+        ridge_rows = row_of_point[ridge_points]
+        selected = np.flatnonzero((ridge_rows >= 0).any(axis=1))
+        ridge_lists = [vor.ridge_vertices[r] for r in selected]
+        face_offsets, face_vertices = csr_from_lists(ridge_lists)
+        bounded = ~np.logical_or.reduceat(face_vertices < 0, face_offsets[:-1]) \
+            if len(face_vertices) else np.zeros(0, dtype=bool)
+        keep = np.flatnonzero(bounded)
+        face_offsets, face_vertices = csr_take(face_offsets, face_vertices, keep)
+        selected = selected[keep]
+        face_rows = ridge_rows[selected]
+        face_seeds = point_ids[ridge_points[selected]]
+
+        # 面的朝向：法向指向 face_seeds[:, 1]
+        points = vor.points[ridge_points[selected]]
+        normals = _polygon_normals(vor.vertices, face_offsets, face_vertices)
+        flip = np.einsum('ij,ij->i', normals, points[:, 1] - points[:, 0]) < 0
+        face_vertices = _reverse_rows(face_offsets, face_vertices, flip)
+
+        # 单元 → 面
+        side_rows = face_rows.ravel()
+        side_faces = np.repeat(np.arange(len(selected)), 2)
+        valid = side_rows >= 0
+        order = np.argsort(side_rows[valid], kind='stable')
+        cell_faces = side_faces[valid][order]
+        cell_face_offsets = np.zeros(len(cell_points) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(side_rows[valid], minlength=len(cell_points)),
+                  out=cell_face_offsets[1:])
+
+        # 压缩顶点池：只保留被引用的顶点
+        used, inverse = np.unique(np.concatenate([cell_vertices, face_vertices]),
+                                  return_inverse=True)
+        cell_vertices = inverse[:len(cell_vertices)]
+        face_vertices = inverse[len(cell_vertices):]
+
+        centers = vor.points[cell_points]
+        layer_ids = None
+        if layer_boundaries is not None:
+            layer_ids = np.searchsorted(np.asarray(layer_boundaries), centers[:, 2], side='right')
+
+        return cls(vor.vertices[used], cell_offsets, cell_vertices, face_offsets, face_vertices,
+                   face_seeds, cell_face_offsets, cell_faces, centers, point_ids[cell_points],
+                   layer_ids=layer_ids)
+
+    @classmethod
+    def concatenate(cls, tables):
+        """
+        拼接多个单元表（例如分块剖分的各子区域），按种子编号排序；
+        两侧种子相同的重复面只保留一个（各表的顶点池直接拼接，不做合并）
+        """
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.empty()
+
+        v_shift = np.cumsum([0] + [len(t.vertices) for t in tables[:-1]])
+        f_shift = np.cumsum([0] + [t.n_faces for t in tables[:-1]])
+
+        def stack_csr(offsets_name, values_name, shifts):
+            offsets = [np.zeros(1, dtype=np.int64)]
+            values = []
+            base = 0
+            for t, shift in zip(tables, shifts):
+                offsets.append(getattr(t, offsets_name)[1:] + base)
+                values.append(getattr(t, values_name) + shift)
+                base += getattr(t, offsets_name)[-1]
+            return np.concatenate(offsets), np.concatenate(values)
+
+        cell_offsets, cell_vertices = stack_csr('cell_offsets', 'cell_vertices', v_shift)
+        face_offsets, face_vertices = stack_csr('face_offsets', 'face_vertices', v_shift)
+        cell_face_offsets, cell_faces = stack_csr('cell_face_offsets', 'cell_faces', f_shift)
+        face_seeds = np.vstack([t.face_seeds for t in tables])
+
+        # 去除重复面（两侧种子相同）
+        key = np.sort(face_seeds, axis=1)
+        internal = key[:, 0] >= 0
+        face_key = np.where(internal[:, None], key,
+                            np.stack([np.full(len(key), -1), -1 - np.arange(len(key))], axis=1))
+        _, first, inverse = np.unique(face_key, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        keep = np.sort(first)
+        new_id = np.empty(len(face_key), dtype=np.int64)
+        new_id[keep] = np.arange(len(keep))
+        face_map = new_id[first[inverse]]
+        face_offsets, face_vertices = csr_take(face_offsets, face_vertices, keep)
+        face_seeds = face_seeds[keep]
+        cell_faces = face_map[cell_faces]
+
+        columns = {name: np.concatenate([getattr(t, name) for t in tables])
+                   for name in cls.COLUMN_FIELDS}
+        table = cls(np.vstack([t.vertices for t in tables]), cell_offsets, cell_vertices,
+                    face_offsets, face_vertices, face_seeds, cell_face_offsets, cell_faces,
+                    **columns)
+        return table.subset(np.argsort(table.seed_index, kind='stable'))
+
+    def subset(self, rows):
+        """按行号或布尔掩码提取子表（顶点池和面表随之压缩）"""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        rows = rows.astype(np.int64)
+
+        cell_offsets, cell_vertices = csr_take(self.cell_offsets, self.cell_vertices, rows)
+        cell_face_offsets, cell_faces = csr_take(self.cell_face_offsets, self.cell_faces, rows)
+        used_faces, cell_faces = np.unique(cell_faces, return_inverse=True)
+        face_offsets, face_vertices = csr_take(self.face_offsets, self.face_vertices, used_faces)
+
+        used, inverse = np.unique(np.concatenate([cell_vertices, face_vertices]),
+                                  return_inverse=True)
+        columns = {name: getattr(self, name)[rows] for name in self.COLUMN_FIELDS}
+        return CellTable(self.vertices[used], cell_offsets, inverse[:len(cell_vertices)],
+                         face_offsets, inverse[len(cell_vertices):], self.face_seeds[used_faces],
+                         cell_face_offsets, cell_faces.ravel(), **columns)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    @property
+    def n_cells(self):
+        return len(self.seed_index)
+
+    @property
+    def n_faces(self):
+        return len(self.face_offsets) - 1
+
+    @property
+    def face_cells(self):
+        """(F, 2) 面两侧单元在本表中的行号，-1 表示该侧不是表内单元"""
+        if self.n_cells == 0:
+            return np.full((self.n_faces, 2), -1, dtype=np.int64)
+        row_of_seed = np.full(max(self.seed_index.max(), self.face_seeds.max()) + 2, -1,
+                              dtype=np.int64)
+        row_of_seed[self.seed_index] = np.arange(self.n_cells)
+        return row_of_seed[self.face_seeds]
+
+    def face_triangles(self):
+        """
+        把每个多边形面扇形三角化（以面的第一个顶点为扇心）
+        返回 (triangles, face_ids)：triangles 为 (T, 3) 顶点索引，朝向与面一致
+        """
+        counts = np.maximum(np.diff(self.face_offsets) - 2, 0)
+        face_ids = np.repeat(np.arange(self.n_faces), counts)
+        # 三角形在面内的序号 1..k-2
+        local = np.arange(len(face_ids)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+        start = self.face_offsets[:-1][face_ids]
+        triangles = np.stack([self.face_vertices[start],
+                              self.face_vertices[start + local],
+                              self.face_vertices[start + local + 1]], axis=1)
+        return triangles, face_ids
+
+    def cell_polygons(self, rows=None, scale=1.0):
+        """
+        rows 中单元的全部平面多边形面（默认全部单元），每个唯一面只出现一次
+        两个相邻单元都在 rows 中时，它们的公共面只返回一次（不再重复绘制）
+
+        返回 (polygons, faces, owners)：
+            polygons - 顶点坐标 (k_i, 3) × scale 的列表，顶点按环形顺序排列，
+                       可直接交给 Poly3DCollection
+            faces    - 面编号
+            owners   - 面所属单元的行号（两侧都在 rows 中时取第0侧），用于按单元着色
+        """
+        rows = np.arange(self.n_cells) if rows is None else np.asarray(rows, dtype=np.int64)
+        _, faces = csr_take(self.cell_face_offsets, self.cell_faces, rows)
+        faces = np.unique(faces)
+        selected = np.zeros(self.n_cells + 1, dtype=bool)        # 末位对应 -1（表外）
+        selected[rows] = True
+        sides = self.face_cells[faces]
+        owners = np.where(selected[sides[:, 0]], sides[:, 0], sides[:, 1])
+        offsets, indices = csr_take(self.face_offsets, self.face_vertices, faces)
+        polygons = np.split(self.vertices[indices] * scale, offsets[1:-1])
+        return polygons, faces, owners
+
+    def face_normals(self, faces=None):
+        """单位面法向 (F, 3)，按顶点环顺序指向 face_seeds[:, 1] 一侧"""
+        if faces is None:
+            faces = np.arange(self.n_faces)
+        offsets, indices = csr_take(self.face_offsets, self.face_vertices, faces)
+        normals = _polygon_normals(self.vertices, offsets, indices)
+        return normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-300)
+
+    def face_measures(self):
+        """
+        每个面的面积 (m²)、周长 (m) 与顶点平均坐标 (F, 3)
+        面积取 Newell 法向量的模，周长为环上相邻顶点距离之和，均按CSR一次性向量化
+        """
+        areas = np.linalg.norm(_polygon_normals(self.vertices, self.face_offsets,
+                                                self.face_vertices), axis=1)
+        row_ids = csr_row_ids(self.face_offsets)
+        nxt = np.arange(len(self.face_vertices)) + 1
+        nxt[self.face_offsets[1:] - 1] = self.face_offsets[:-1]
+        points = self.vertices[self.face_vertices]
+        perimeters = np.bincount(row_ids, weights=np.linalg.norm(points[nxt] - points, axis=1),
+                                 minlength=self.n_faces)
+        counts = np.maximum(np.diff(self.face_offsets), 1)
+        centers = np.stack([np.bincount(row_ids, weights=points[:, k], minlength=self.n_faces)
+                            for k in range(3)], axis=1) / counts[:, None]
+        return areas, perimeters, centers
+
+    def iter_cell_triangles(self, chunk_size=100000, return_owners=False):
+        """
+        逐块生成每个单元的封闭表面三角形坐标 (T, 3, 3)，法向朝单元外
+        相邻单元共享的面对两个单元各输出一次（方向相反），与逐单元网格化的结果一致
+        chunk_size: 每块的单元数
+        return_owners: True 时每块产出 (triangles, rows)，rows 为每个三角形所属单元的行号
+        """
+        triangles, face_ids = self.face_triangles()
+        tri_offsets = np.zeros(self.n_faces + 1, dtype=np.int64)
+        np.cumsum(np.bincount(face_ids, minlength=self.n_faces), out=tri_offsets[1:])
+        face_cells = self.face_cells
+
+        for start in range(0, self.n_cells, chunk_size):
+            rows = np.arange(start, min(start + chunk_size, self.n_cells))
+            face_offsets, faces = csr_take(self.cell_face_offsets, self.cell_faces, rows)
+            owners = np.repeat(rows, np.diff(face_offsets))
+            tri_face_offsets, tris = csr_take(tri_offsets, np.arange(len(triangles)), faces)
+            tri_owner = np.repeat(owners, np.diff(tri_face_offsets))
+            chunk = triangles[tris]
+            # 面法向指向第1侧单元，对该单元需要翻转
+            flip = face_cells[face_ids[tris], 0] != tri_owner
+            chunk[flip] = chunk[flip][:, ::-1]
+            if return_owners:
+                yield self.vertices[chunk], tri_owner
+            else:
+                yield self.vertices[chunk]
+
+    def polyhedron_sizes(self):
+        """每个单元在VTK多面体面流中的长度：1（面数）+ Σ(1 + 面顶点数)"""
+        lengths = np.diff(self.face_offsets)[self.cell_faces]
+        vertex_counts = np.bincount(csr_row_ids(self.cell_face_offsets), weights=lengths,
+                                    minlength=self.n_cells).astype(np.int64)
+        return 1 + np.diff(self.cell_face_offsets) + vertex_counts
+
+    def polyhedron_faces(self, rows):
+        """
+        rows 中单元的VTK多面体面流 (VTK_POLYHEDRON)：每个单元依次为
+        [面数, 面0顶点数, 面0顶点..., 面1顶点数, 面1顶点..., ...]，顶点为 vertices 中的编号，
+        面顶点环按右手法则朝单元外（与 iter_cell_triangles 一致）
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cell_face_offsets, faces = csr_take(self.cell_face_offsets, self.cell_faces, rows)
+        local_owner = csr_row_ids(cell_face_offsets)
+        face_offsets, indices = csr_take(self.face_offsets, self.face_vertices, faces)
+        # 面法向指向第1侧单元，对该单元需要反转顶点环
+        indices = _reverse_rows(face_offsets, indices,
+                                self.face_cells[faces, 0] != rows[local_owner])
+        lengths = np.diff(face_offsets)
+        n_faces = np.diff(cell_face_offsets)
+
+        # 每个面块 [顶点数, 顶点...] 的起点 = 单元起点 + 1 + 单元内之前各面块的长度
+        block = 1 + lengths
+        before = np.cumsum(block) - block
+        cell_size = 1 + n_faces + np.bincount(local_owner, weights=lengths,
+                                              minlength=len(rows)).astype(np.int64)
+        cell_start = np.cumsum(cell_size) - cell_size
+        block_start = (cell_start[local_owner] + 1 + before -
+                       before[cell_face_offsets[:-1][local_owner]])
+        stream = np.empty(int(cell_size.sum()), dtype=np.int64)
+        stream[cell_start] = n_faces
+        stream[block_start] = lengths
+        vertex_rows = csr_row_ids(face_offsets)
+        stream[block_start[vertex_rows] + 1 + np.arange(len(indices)) -
+               face_offsets[:-1][vertex_rows]] = indices
+        return stream
+
+    def compute_statistics(self):
+        """
+        一次性批量计算所有单元的体积、等效孔径、表面积和质心，写入对应列
+
+        每个面三角形与单元种子构成一个四面体（Voronoi单元关于其种子是星形的），
+        带符号体积按面的朝向区分两侧单元，最后用 np.bincount 按单元归约。
+        """
+        n_cells = self.n_cells
+        if n_cells == 0:
+            return self
+        triangles, face_ids = self.face_triangles()
+        a = self.vertices[triangles[:, 0]]
+        b = self.vertices[triangles[:, 1]]
+        c = self.vertices[triangles[:, 2]]
+        cross = np.cross(b - a, c - a)
+        tri_area = 0.5 * np.linalg.norm(cross, axis=1)
+
+        volumes = np.zeros(n_cells)
+        areas = np.zeros(n_cells)
+        moments = np.zeros((n_cells, 3))
+        tri_cells = self.face_cells[face_ids]
+        for side, sign in ((0, 1.0), (1, -1.0)):
+            mask = tri_cells[:, side] >= 0
+            rows = tri_cells[mask, side]
+            apex = self.centers[rows]
+            # 面法向指向 face_seeds[:, 1]，对第0侧单元为外法向
+            tet_volume = sign * np.einsum('ij,ij->i', cross[mask], apex - a[mask]) / -6.0
+            tet_centroid = (apex + a[mask] + b[mask] + c[mask]) / 4.0
+            volumes += np.bincount(rows, weights=tet_volume, minlength=n_cells)
+            areas += np.bincount(rows, weights=tri_area[mask], minlength=n_cells)
+            for axis in range(3):
+                moments[:, axis] += np.bincount(rows, weights=tet_volume * tet_centroid[:, axis],
+                                                minlength=n_cells)
+
+        self.volumes = volumes
+        self.surface_areas = areas
+        self.centroids = moments / np.where(volumes > 0, volumes, np.nan)[:, None]
+        self.pore_sizes = np.cbrt(6 * volumes / np.pi) * 1e6
+        return self
+
+    def cell_vertex_coords(self, i):
+        """第i个单元的顶点坐标 (n, 3)"""
+        return self.vertices[self.cell_vertices[self.cell_offsets[i]:self.cell_offsets[i + 1]]]
+
+    # ------------------------------------------------------------------
+    # 兼容旧的 "字典列表" 用法
+    # ------------------------------------------------------------------
+    def __len__(self):
+        return self.n_cells
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.n_cells))]
+        i = int(index)
+        if i < 0:
+            i += self.n_cells
+        if not 0 <= i < self.n_cells:
+            raise IndexError("单元索引越界")
+        return {
+            'vertices': self.cell_vertex_coords(i),
+            'center': self.centers[i],
+            'seed_index': int(self.seed_index[i]),
+            'layer_id': int(self.layer_ids[i]),
+            'pore_size': float(self.pore_sizes[i]),
+        }
+
+    def __iter__(self):
+        for i in range(self.n_cells):
+            yield self[i]
+
+    def __repr__(self):
+        return (f"CellTable({self.n_cells} cells, {self.n_faces} faces, "
+                f"{len(self.vertices)} vertices)")
+
+    # ------------------------------------------------------------------
+    # 进程间零拷贝共享
+    # ------------------------------------------------------------------
+    def to_shared_memory(self):
+        """
+        把全部数组打包进一块共享内存
+        返回 (shm, descriptor)：descriptor 很小，可发送给子进程后用 from_shared_memory 还原；
+        调用方负责在使用完毕后 shm.close() / shm.unlink()
+        """
+        from multiprocessing import shared_memory
+
+        layout = []
+        offset = 0
+        for name in self.ARRAY_FIELDS:
+            array = getattr(self, name)
+            offset = (offset + 63) // 64 * 64          # 64字节对齐
+            layout.append((name, array.dtype.str, array.shape, offset))
+            offset += array.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, dtype, shape, start in layout:
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+            view[...] = getattr(self, name)
+        return shm, {'name': shm.name, 'layout': layout}
+
+    @classmethod
+    def from_shared_memory(cls, descriptor):
+        """
+        从共享内存描述符重建单元表（数组直接引用共享内存，不复制）
+        返回 (table, shm)，table 使用期间需保持 shm 打开
+        """
+        from multiprocessing import shared_memory
+
+        shm = shared_memory.SharedMemory(name=descriptor['name'])
+        arrays = {name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+                  for name, dtype, shape, start in descriptor['layout']}
+        table = cls.__new__(cls)
+        table.__dict__.update(arrays)
+        return table, shm
+
+
+def _polygon_normals(vertices, offsets, indices):
+    """按CSR排列的多边形的面积加权法向量（Newell方法，向量化）"""
+    if len(indices) == 0:
+        return np.zeros((0, 3))
+    row_ids = csr_row_ids(offsets)
+    # 每个顶点的下一个顶点（环内循环）
+    nxt = np.arange(len(indices)) + 1
+    nxt[offsets[1:] - 1] = offsets[:-1]
+    # 以各面第一个顶点为原点，减小浮点抵消误差
+    origin = vertices[indices[offsets[:-1]]][row_ids]
+    p = vertices[indices] - origin
+    q = vertices[indices[nxt]] - origin
+    cross = np.cross(p, q)
+    normals = np.zeros((len(offsets) - 1, 3))
+    np.add.at(normals, row_ids, cross)
+    return 0.5 * normals
+
+
+def _reverse_rows(offsets, values, flags):
+    """把 flags 为真的CSR行反转（保持行内环形顺序的反向）"""
+    if not np.any(flags):
+        return values
+    row_ids = csr_row_ids(offsets)
+    pos = np.arange(len(values))
+    start = offsets[:-1][row_ids]
+    end = offsets[1:][row_ids]
+    reversed_pos = np.where(flags[row_ids], start + end - 1 - pos, pos)
+    return values[reversed_pos]
@@ -0,0 +1,204 @@
+"""
+梯度统计引擎
+按任意Z分段（断点列表或等分段数）一次性向量化统计每段的孔径分布与种子密度
+"""
+
+import numpy as np
+
+
+# 默认三层仿生结构的名称（与 DEFAULT_LAYER_BOUNDARIES 对应）
+BIOMIMETIC_LAYER_NAMES = ('皮质骨层 (0-20%)', '过渡层 (20-50%)', '松质骨层 (50-100%)')
+BIOMIMETIC_LAYER_LABELS = ('Cortical', 'Transition', 'Trabecular')
+
+# 按层编号索引的颜色查找表：LAYER_COLORS[layer_ids] 即得到每个点/单元的颜色
+LAYER_COLORS = np.array(['red', 'orange', 'blue'])
+LAYER_COLORS_HEX = np.array(['#FF4444', '#FF8844', '#4488FF'])
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+
+def biomimetic_layer_names(layer_boundaries):
+    """按实际层边界比例生成三层名称，例如 '皮质骨层 (0-20%)'"""
+    percent = np.concatenate([[0.0], np.asarray(layer_boundaries, dtype=float), [1.0]]) * 100
+    return tuple(f'{name} ({percent[i]:.0f}-{percent[i + 1]:.0f}%)'
+                 for i, name in enumerate(('皮质骨层', '过渡层', '松质骨层')))
+
+
+def z_bin_edges(z_size, breakpoints=None, n_bins=None):
+    """
+    构造Z分段边界 [0, b1, ..., z_size] (m)
+    breakpoints: 内部断点 (m)；n_bins: 等分段数（二者取其一）
+    """
+    if breakpoints is not None and n_bins is not None:
+        raise ValueError("breakpoints 与 n_bins 只能指定一个")
+    if n_bins is not None:
+        if n_bins < 1:
+            raise ValueError("n_bins 必须 ≥ 1")
+        return np.linspace(0.0, z_size, int(n_bins) + 1)
+    inner = np.sort(np.asarray([] if breakpoints is None else breakpoints, dtype=float))
+    if np.any((inner <= 0) | (inner >= z_size)):
+        raise ValueError("断点必须位于 (0, z_size) 内")
+    return np.concatenate([[0.0], inner, [z_size]])
+
+
+def assign_bins(z, edges):
+    """Z坐标 → 分段编号（左闭右开，最后一段包含 z_size）"""
+    return np.clip(np.searchsorted(edges[1:-1], z, side='right'), 0, len(edges) - 2)
+
+
+def _grouped_percentiles(values, bins, n_bins, percentiles):
+    """
+    一次排序求各分段的 min / max / 百分位数（线性插值，与 np.percentile 一致）
+    返回 (minimum, maximum, {q: array})，空分段为 NaN
+    """
+    order = np.lexsort((values, bins))
+    sorted_values = values[order]
+    counts = np.bincount(bins, minlength=n_bins)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    has = counts > 0
+
+    def at(position):
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, starts + counts - 1)
+        frac = position - lower
+        out = np.full(n_bins, np.nan)
+        out[has] = (sorted_values[lower[has]] * (1 - frac[has]) +
+                    sorted_values[upper[has]] * frac[has])
+        return out
+
+    last = starts + np.maximum(counts - 1, 0)
+    minimum = at(starts.astype(float))
+    maximum = at(last.astype(float))
+    quantiles = {q: at(starts + q / 100.0 * np.maximum(counts - 1, 0)) for q in percentiles}
+    return minimum, maximum, quantiles
+
+
+class GradientStatistics:
+    """
+    Z分段统计结果（每个字段都是长度为 n_bins 的数组）
+
+        edges            (B+1,)  分段边界 (m)
+        names / labels           中文名称 / 英文短标签
+        n_pores                  单元数
+        mean/std/min/max_pore_size_um
+        percentiles              {q: 各段第q百分位孔径 (μm)}
+        n_seeds                  种子数
+        seed_density             种子密度 (seeds/mm³)
+    """
+
+    def __init__(self, edges, names, labels, n_pores, mean, std, minimum, maximum,
+                 percentiles, n_seeds, seed_density):
+        self.edges = edges
+        self.names = list(names)
+        self.labels = list(labels)
+        self.n_pores = n_pores
+        self.mean_pore_size_um = mean
+        self.std_pore_size_um = std
+        self.min_pore_size_um = minimum
+        self.max_pore_size_um = maximum
+        self.percentiles = percentiles
+        self.n_seeds = n_seeds
+        self.seed_density = seed_density
+
+    def __len__(self):
+        return len(self.edges) - 1
+
+    @property
+    def centers(self):
+        """各分段中心Z (m)"""
+        return 0.5 * (self.edges[1:] + self.edges[:-1])
+
+    def layer_summary(self):
+        """
+        按分段名称组织的字典（与旧版 gradient_analysis 格式兼容），跳过没有单元的分段
+        """
+        summary = {}
+        for i, name in enumerate(self.names):
+            if self.n_pores[i] == 0:
+                continue
+            entry = {
+                'mean_pore_size_um': float(self.mean_pore_size_um[i]),
+                'std_pore_size_um': float(self.std_pore_size_um[i]),
+                'min_pore_size_um': float(self.min_pore_size_um[i]),
+                'max_pore_size_um': float(self.max_pore_size_um[i]),
+            }
+            for q, values in self.percentiles.items():
+                entry[f'p{q:g}_pore_size_um'] = float(values[i])
+            entry['seed_density_per_mm3'] = float(self.seed_density[i])
+            entry['n_pores'] = int(self.n_pores[i])
+            summary[name] = entry
+        return summary
+
+    def pore_gradient_ratio(self):
+        """
+        松质骨层 / 皮质骨层的平均孔径比（仿生学评估指标）
+
+        只对三层仿生分段有定义，且两层都必须有单元；
+        自定义断点 / 等分段，或任一层为空（如薄支架的皮质骨层没有完整单元）时返回 None，
+        不用其他分段顶替，避免把不同含义的比值记在同一个指标下
+        """
+        if tuple(self.labels) != BIOMIMETIC_LAYER_LABELS:
+            return None
+        if self.n_pores[0] == 0 or self.n_pores[2] == 0 or not self.mean_pore_size_um[0] > 0:
+            return None
+        return float(self.mean_pore_size_um[2] / self.mean_pore_size_um[0])
+
+    def to_dict(self):
+        """可直接写入JSON的字典"""
+        def clean(values):
+            return [None if not np.isfinite(v) else float(v) for v in values]
+
+        return {
+            'z_edges_um': [float(z * 1e6) for z in self.edges],
+            'names': self.names,
+            'labels': self.labels,
+            'n_pores': [int(n) for n in self.n_pores],
+            'mean_pore_size_um': clean(self.mean_pore_size_um),
+            'std_pore_size_um': clean(self.std_pore_size_um),
+            'min_pore_size_um': clean(self.min_pore_size_um),
+            'max_pore_size_um': clean(self.max_pore_size_um),
+            'percentiles_pore_size_um': {f'p{q:g}': clean(v) for q, v in self.percentiles.items()},
+            'n_seeds': [int(n) for n in self.n_seeds],
+            'seed_density_per_mm3': clean(self.seed_density),
+        }
+
+
+def compute_gradient_statistics(cell_z, pore_sizes, x_size, y_size, z_size, seed_z=None,
+                                seed_counts=None, breakpoints=None, n_bins=None,
+                                percentiles=DEFAULT_PERCENTILES, names=None, labels=None):
+    """
+    一次遍历计算各Z分段的孔径统计与种子密度
+
+    cell_z / pore_sizes: 单元中心Z (m) 与孔径 (μm)
+    seed_z: 种子Z坐标 (m)；也可直接给出每段种子数 seed_counts
+    breakpoints / n_bins: 分段方式，见 z_bin_edges()
+    names / labels: 分段名称，默认按Z百分比生成
+    """
+    edges = z_bin_edges(z_size, breakpoints, n_bins)
+    n = len(edges) - 1
+    cell_z = np.asarray(cell_z, dtype=float)
+    pores = np.asarray(pore_sizes, dtype=float)
+
+    bins = assign_bins(cell_z, edges)
+    counts = np.bincount(bins, minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(bins, weights=pores, minlength=n) / counts
+        # 两遍法求方差，避免大数相减的精度损失
+        std = np.sqrt(np.bincount(bins, weights=(pores - mean[bins]) ** 2, minlength=n) / counts)
+    minimum, maximum, quantiles = _grouped_percentiles(pores, bins, n, percentiles)
+
+    if seed_counts is None:
+        seed_z = np.empty(0) if seed_z is None else np.asarray(seed_z, dtype=float)
+        seed_counts = np.bincount(assign_bins(seed_z, edges), minlength=n)
+    seed_counts = np.asarray(seed_counts)
+    volume_mm3 = x_size * y_size * np.diff(edges) * 1e9
+    seed_density = seed_counts / volume_mm3
+
+    if names is None:
+        percent = edges / z_size * 100
+        names = [f'Z分段 {i + 1} ({percent[i]:.0f}-{percent[i + 1]:.0f}%)' for i in range(n)]
+    if labels is None:
+        labels = [f'{edges[i]*1e6:.0f}-{edges[i + 1]*1e6:.0f}' for i in range(n)]
+
+    return GradientStatistics(edges, names, labels, counts, mean, std, minimum, maximum,
+                              quantiles, seed_counts, seed_density)
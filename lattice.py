@@ -0,0 +1,222 @@
+"""
+支柱晶格网格生成
+把Voronoi单元的唯一棱边转换为可打印的支柱网络：每条棱为多棱柱（圆柱近似），
+节点处可加球形节点。全部几何按批次用numpy数组一次性生成
+"""
+
+import numpy as np
+
+from mesh_io import weld_points
+from seeding import assign_layers
+
+
+def unique_edges(table, tolerance=None):
+    """
+    从 CellTable 的面环中提取唯一棱边（相邻单元共享的棱只保留一条）
+
+    分块拼接的单元表在子区域之间不共享顶点，因此先按坐标合并重合顶点。
+    返回 (nodes, edges)：nodes (V, 3) 节点坐标，edges (E, 2) 节点编号对 (小, 大)
+    """
+    nodes, inverse = weld_points(table.vertices, tolerance)
+    if table.n_faces == 0:
+        return nodes, np.zeros((0, 2), dtype=np.int64)
+    # 面环上相邻顶点构成棱（环尾连回环首）
+    nxt = np.arange(len(table.face_vertices)) + 1
+    nxt[table.face_offsets[1:] - 1] = table.face_offsets[:-1]
+    a = inverse[table.face_vertices]
+    b = inverse[table.face_vertices[nxt]]
+    pairs = np.stack([np.minimum(a, b), np.maximum(a, b)], axis=1)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    keys = np.unique(pairs[:, 0] * len(nodes) + pairs[:, 1])
+    return nodes, np.stack([keys // len(nodes), keys % len(nodes)], axis=1)
+
+
+def edge_layer_ids(nodes, edges, z_boundaries):
+    """按棱中点Z确定每条棱所属的层"""
+    z_mid = 0.5 * (nodes[edges[:, 0], 2] + nodes[edges[:, 1], 2])
+    return assign_layers(z_mid, z_boundaries)
+
+
+def _icosphere(subdivisions=0):
+    """单位二十面体球（可细分），返回 (T, 3, 3) 外法向朝外的三角形"""
+    t = (1 + 5 ** 0.5) / 2
+    verts = np.array([[-1, t, 0], [1, t, 0], [-1, -t, 0], [1, -t, 0],
+                      [0, -1, t], [0, 1, t], [0, -1, -t], [0, 1, -t],
+                      [t, 0, -1], [t, 0, 1], [-t, 0, -1], [-t, 0, 1]], dtype=float)
+    faces = np.array([[0, 11, 5], [0, 5, 1], [0, 1, 7], [0, 7, 10], [0, 10, 11],
+                      [1, 5, 9], [5, 11, 4], [11, 10, 2], [10, 7, 6], [7, 1, 8],
+                      [3, 9, 4], [3, 4, 2], [3, 2, 6], [3, 6, 8], [3, 8, 9],
+                      [4, 9, 5], [2, 4, 11], [6, 2, 10], [8, 6, 7], [9, 8, 1]])
+    triangles = verts[faces]
+    triangles /= np.linalg.norm(triangles, axis=2, keepdims=True)
+    for _ in range(subdivisions):
+        a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+        ab, bc, ca = a + b, b + c, c + a
+        ab /= np.linalg.norm(ab, axis=1, keepdims=True)
+        bc /= np.linalg.norm(bc, axis=1, keepdims=True)
+        ca /= np.linalg.norm(ca, axis=1, keepdims=True)
+        triangles = np.concatenate([np.stack([a, ab, ca], axis=1), np.stack([ab, b, bc], axis=1),
+                                    np.stack([ca, bc, c], axis=1), np.stack([ab, bc, ca], axis=1)])
+    return triangles
+
+
+def strut_end_caps(nodes, edges, radius, tol=1e-12):
+    """
+    每根支柱两端是否需要端盖，返回 (cap0, cap1) 布尔数组（对应 edges[:, 0] / edges[:, 1] 端）
+
+    同一节点上共线、方向相反且半径相同的两根支柱（有界模式下沿边界面被节点分开的棱），
+    端盖完全重合、背靠背，端环顶点也重合，会形成非流形棱；
+    这一对端盖都去掉后两根棱柱直接连成一个封闭的流形壳体
+    tol: 方向余弦与相对半径的容差
+    """
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (len(edges),))
+    caps = np.ones(2 * len(edges), dtype=bool)
+    if len(edges) == 0:
+        return caps[:0], caps[:0]
+    # 每个支柱端：所在节点、从节点指向支柱内部的单位方向
+    end_node = np.concatenate([edges[:, 0], edges[:, 1]])
+    axis = nodes[edges[:, 1]] - nodes[edges[:, 0]]
+    axis /= np.maximum(np.linalg.norm(axis, axis=1, keepdims=True), 1e-300)
+    direction = np.concatenate([axis, -axis])
+    end_radius = np.concatenate([radius, radius])
+
+    # 同一节点上的全部支柱端对（按节点排序后两两组合）
+    order = np.argsort(end_node, kind='stable')
+    stops = np.searchsorted(end_node[order], end_node[order], side='right')
+    n_partners = stops - np.arange(len(order)) - 1
+    first = np.repeat(np.arange(len(order)), n_partners)
+    second = (np.arange(len(first)) - np.repeat(np.cumsum(n_partners) - n_partners, n_partners) +
+              first + 1)
+    i, j = order[first], order[second]
+
+    same_radius = (np.abs(end_radius[i] - end_radius[j]) <=
+                   tol * np.maximum(end_radius[i], end_radius[j]))
+    coincident = (np.einsum('ij,ij->i', direction[i], direction[j]) < -1 + tol) & same_radius
+    caps[i[coincident]] = False
+    caps[j[coincident]] = False
+    return caps[:len(edges)], caps[len(edges):]
+
+
+def strut_triangles(p0, p1, radius, n_facets=8, end_caps=True, return_owners=False):
+    """
+    批量生成多棱柱支柱 (E 条) 的三角形，返回 (T, 3, 3)
+
+    p0, p1: (E, 3) 两端点；radius: 标量或 (E,) 半径
+    end_caps: 是否用扇形封闭两端；也可为 (cap0, cap1) 两个 (E,) 掩码，逐端指定（见 strut_end_caps）
+    return_owners: True 时返回 (triangles, owners)，owners 为每个三角形所属支柱在输入中的行号
+                   （零长度支柱不生成三角形，去掉的端盖也没有三角形，每根支柱的三角形数不固定）
+
+    端环只取决于支柱所在的直线与端点：端点顺序按轴向符号规范化，标架由直线方向确定，
+    因此共线支柱在公共节点处的端环逐点重合；起始角偏移 0.3 个面宽，
+    轴对齐支柱的环顶点不落在坐标轴上，互相垂直的端盖不会共用辐条棱
+    """
+    p0 = np.asarray(p0, dtype=float)
+    p1 = np.asarray(p1, dtype=float)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (len(p0),))
+    if isinstance(end_caps, tuple):
+        cap0, cap1 = (np.broadcast_to(np.asarray(c, dtype=bool), (len(p0),)) for c in end_caps)
+    else:
+        cap0 = cap1 = np.full(len(p0), bool(end_caps))
+    axis = p1 - p0
+    length = np.linalg.norm(axis, axis=1)
+    keep = length > 0
+    ids = np.flatnonzero(keep)
+    p0, p1, axis, radius = p0[keep], p1[keep], axis[keep] / length[keep, None], radius[keep]
+    cap0, cap1 = cap0[keep], cap1[keep]
+
+    # 绝对值最大的分量为负时交换两端，使轴向只取决于直线
+    rows = np.arange(len(axis))
+    flip = axis[rows, np.argmax(np.abs(axis), axis=1)] < 0
+    p0, p1 = np.where(flip[:, None], p1, p0), np.where(flip[:, None], p0, p1)
+    cap0, cap1 = np.where(flip, cap1, cap0), np.where(flip, cap0, cap1)
+    axis = np.where(flip[:, None], -axis, axis)
+
+    # 每条棱的正交标架 (u, v, axis)，u × v = axis；辅助轴取绝对值最小的分量（并列时取第一个）
+    magnitude = np.abs(axis)
+    helper = np.zeros_like(axis)
+    helper[rows, np.argmax(magnitude <= magnitude.min(axis=1, keepdims=True) + 1e-9, axis=1)] = 1.0
+    u = np.cross(axis, helper)
+    u /= np.linalg.norm(u, axis=1, keepdims=True)
+    v = np.cross(axis, u)
+
+    theta = 2 * np.pi * (np.arange(n_facets) + 0.3) / n_facets
+    offsets = (np.cos(theta)[None, :, None] * u[:, None, :] +
+               np.sin(theta)[None, :, None] * v[:, None, :]) * radius[:, None, None]
+    ring0 = p0[:, None, :] + offsets           # (E, n, 3)
+    ring1 = p1[:, None, :] + offsets
+    k1 = np.roll(np.arange(n_facets), -1)
+
+    side = np.concatenate([
+        np.stack([ring0, ring0[:, k1], ring1[:, k1]], axis=2),
+        np.stack([ring0, ring1[:, k1], ring1], axis=2),
+    ], axis=1)
+    parts = [side.reshape(-1, 3, 3)]
+    c0 = np.broadcast_to(p0[:, None, :], ring0.shape)
+    c1 = np.broadcast_to(p1[:, None, :], ring1.shape)
+    parts.append(np.stack([c0, ring0[:, k1], ring0], axis=2)[cap0].reshape(-1, 3, 3))
+    parts.append(np.stack([c1, ring1, ring1[:, k1]], axis=2)[cap1].reshape(-1, 3, 3))
+    triangles = np.concatenate(parts)
+    if return_owners:
+        owners = np.concatenate([np.repeat(ids, 2 * n_facets), np.repeat(ids[cap0], n_facets),
+                                 np.repeat(ids[cap1], n_facets)])
+        return triangles, owners
+    return triangles
+
+
+def node_triangles(centers, radius, subdivisions=0):
+    """批量生成球形节点三角形 (二十面体球模板平移缩放)，返回 (T, 3, 3)"""
+    template = _icosphere(subdivisions)
+    centers = np.asarray(centers, dtype=float)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (len(centers),))
+    triangles = (template[None] * radius[:, None, None, None] +
+                 centers[:, None, None, :])
+    return triangles.reshape(-1, 3, 3)
+
+
+def node_subdivisions(n_facets):
+    """棱面数较多时节点球细分一次，使节点与支柱的分辨率相当"""
+    return 0 if n_facets <= 8 else 1
+
+
+def lattice_triangle_count(n_edges, n_nodes, n_facets=8, node_caps=True, n_open_ends=0):
+    """晶格网格的三角形总数（用于预分配）；n_open_ends 为去掉端盖的支柱端数（见 strut_end_caps）"""
+    n_triangles = n_edges * n_facets * 4 - n_open_ends * n_facets
+    if node_caps:
+        n_triangles += n_nodes * 20 * 4 ** node_subdivisions(n_facets)
+    return n_triangles
+
+
+def iter_lattice_triangles(nodes, edges, edge_radius, n_facets=8, node_caps=True,
+                           chunk_size=200000, return_owners=False):
+    """
+    逐块生成晶格三角形（每块最多 chunk_size 条棱或节点），供流式写出使用
+
+    每个节点球和每根支柱都是封闭壳体，相互重叠，由切片软件做并集；
+    共线且半径相同的相邻支柱在公共节点处不加端盖，连成一个壳体（见 strut_end_caps）
+    edge_radius: (E,) 每条棱的半径
+    node_caps: True 时在每个节点放置球（半径为相连棱的最大半径），使节点处圆滑连接
+    return_owners: True 时每块产出 (triangles, owners)：支柱三角形的 owners 为棱编号 (0..E-1)，
+                   节点球三角形为 E + 节点编号
+    """
+    edge_radius = np.broadcast_to(np.asarray(edge_radius, dtype=float), (len(edges),))
+    cap0, cap1 = strut_end_caps(nodes, edges, edge_radius)
+    for start in range(0, len(edges), chunk_size):
+        part = slice(start, start + chunk_size)
+        triangles, owners = strut_triangles(nodes[edges[part, 0]], nodes[edges[part, 1]],
+                                            edge_radius[part], n_facets=n_facets,
+                                            end_caps=(cap0[part], cap1[part]), return_owners=True)
+        yield (triangles, owners + start) if return_owners else triangles
+
+    if node_caps and len(edges):
+        node_radius = np.zeros(len(nodes))
+        np.maximum.at(node_radius, edges[:, 0], edge_radius)
+        np.maximum.at(node_radius, edges[:, 1], edge_radius)
+        used = np.flatnonzero(node_radius > 0)
+        subdivisions = node_subdivisions(n_facets)
+        for start in range(0, len(used), chunk_size):
+            ids = used[start:start + chunk_size]
+            triangles = node_triangles(nodes[ids], node_radius[ids], subdivisions)
+            if return_owners:
+                yield triangles, np.repeat(len(edges) + ids, len(triangles) // len(ids))
+            else:
+                yield triangles
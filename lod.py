@@ -0,0 +1,335 @@
+"""
+网格细节层次 (LOD)
+- 短支柱合并：长度低于分辨率的支柱两端节点合并到中点
+- 二次误差 (QEM) 网格简化：每轮批量收缩一组互不相邻的最小代价棱（向量化）
+- 偏差测量：两个网格之间的最大距离（顶点到对方表面的双向Hausdorff距离）
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.spatial import cKDTree
+
+
+# 预设细节层次（按精度从高到低）
+#   n_facets       支柱棱柱侧面数
+#   node_caps      是否放置球形节点
+#   collapse_below 短于 该比例×棱长中位数 的支柱被合并
+#   voxel_scale    sdf 模式的体素放大倍数
+#   face_fraction  QEM简化后保留的三角形比例（1.0 表示不简化）
+DEFAULT_LOD_LEVELS = {
+    'print': {'n_facets': 8, 'node_caps': True, 'collapse_below': 0.0, 'voxel_scale': 1.0,
+              'face_fraction': 1.0},
+    'review': {'n_facets': 6, 'node_caps': True, 'collapse_below': 0.2, 'voxel_scale': 1.5,
+               'face_fraction': 0.6},
+    'preview': {'n_facets': 4, 'node_caps': False, 'collapse_below': 0.4, 'voxel_scale': 2.0,
+                'face_fraction': 0.6},
+}
+
+
+def resolve_lod_level(level):
+    """细节层次名称或参数字典 → 完整参数（缺省项取 'print' 级）"""
+    if isinstance(level, str):
+        if level not in DEFAULT_LOD_LEVELS:
+            raise ValueError(f"未知的细节层次: {level}，可选 {tuple(DEFAULT_LOD_LEVELS)}")
+        return dict(DEFAULT_LOD_LEVELS[level], name=level)
+    params = dict(DEFAULT_LOD_LEVELS['print'])
+    params.update(level)
+    params.setdefault('name', 'custom')
+    return params
+
+
+def collapse_short_struts(nodes, edges, min_length, max_passes=20):
+    """
+    合并短于 min_length 的支柱：每轮在两端点处都是最短的短支柱收缩到其中点
+    （互不共享节点，避免一串短支柱被一次并成一大团），直到不再有短支柱
+
+    返回 (nodes, edges, edge_index, shift)：
+        edge_index - 保留的每条棱对应的原棱编号（用于取半径、层编号）
+        shift      - 每个原节点的位移 (m)
+    """
+    original = nodes
+    nodes = np.asarray(nodes, dtype=float).copy()
+    edge_index = np.arange(len(edges))
+    cluster = np.arange(len(nodes))                     # 原节点 → 当前节点
+    for _ in range(max_passes):
+        lengths = np.linalg.norm(nodes[edges[:, 1]] - nodes[edges[:, 0]], axis=1)
+        short = np.flatnonzero(lengths < min_length)
+        if len(short) == 0:
+            break
+        # 两端点处都是最短的短支柱（按长度排名，排名唯一）
+        rank = np.full(len(edges), len(edges))
+        rank[short[np.argsort(lengths[short], kind='stable')]] = np.arange(len(short))
+        node_best = np.full(len(nodes), len(edges))
+        np.minimum.at(node_best, edges[short, 0], rank[short])
+        np.minimum.at(node_best, edges[short, 1], rank[short])
+        a, b = edges[short, 0], edges[short, 1]
+        chosen = (node_best[a] == rank[short]) & (node_best[b] == rank[short])
+        a, b = a[chosen], b[chosen]
+
+        nodes[a] = 0.5 * (nodes[a] + nodes[b])
+        remap = np.arange(len(nodes))
+        remap[b] = a
+        # 压缩节点编号
+        used, remap = np.unique(remap, return_inverse=True)
+        nodes = nodes[used]
+        cluster = remap[cluster]
+
+        # 重映射后去掉退化棱与重复棱（保留编号最小的原棱）
+        mapped = np.sort(remap[edges], axis=1)
+        valid = np.flatnonzero(mapped[:, 0] != mapped[:, 1])
+        _, first = np.unique(mapped[valid, 0] * len(nodes) + mapped[valid, 1], return_index=True)
+        keep = valid[np.sort(first)]
+        edges, edge_index = mapped[keep], edge_index[keep]
+
+    shift = np.linalg.norm(nodes[cluster] - original, axis=1)
+    return nodes, edges, edge_index, shift
+
+
+def _face_planes(vertices, faces):
+    """每个三角形的单位法向、平面常数和面积"""
+    tri = vertices[faces]
+    normal = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    length = np.linalg.norm(normal, axis=1)
+    unit = normal / np.maximum(length, 1e-300)[:, None]
+    return unit, -np.einsum('ij,ij->i', unit, tri[:, 0]), 0.5 * length
+
+
+def vertex_quadrics(vertices, faces):
+    """每个顶点的误差二次型 (V, 4, 4)：相邻三角形平面 p·pᵀ 的面积加权和"""
+    unit, offset, area = _face_planes(vertices, faces)
+    planes = np.concatenate([unit, offset[:, None]], axis=1)
+    face_q = area[:, None, None] * planes[:, :, None] * planes[:, None, :]
+    quadrics = np.zeros((len(vertices), 4, 4))
+    for k in range(3):
+        np.add.at(quadrics, faces[:, k], face_q)
+    return quadrics
+
+
+def _quadric_error(quadrics, points):
+    """v̄ᵀ Q v̄（v̄ 为齐次坐标）"""
+    homogeneous = np.concatenate([points, np.ones((len(points), 1))], axis=1)
+    return np.einsum('ni,nij,nj->n', homogeneous, quadrics, homogeneous)
+
+
+def _edge_keys(faces, n_vertices):
+    """三角形的全部棱（未去重），无向棱压缩为 int64 键 min·n + max"""
+    pairs = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    return pairs.min(axis=1) * n_vertices + pairs.max(axis=1)
+
+
+def _collapse_costs(vertices, quadrics, a, b):
+    """棱 (a, b) 的收缩代价与收缩位置：候选位置取两端点与中点中二次误差最小者"""
+    q = quadrics[a] + quadrics[b]
+    candidates = np.stack([vertices[a], vertices[b], 0.5 * (vertices[a] + vertices[b])], axis=1)
+    errors = np.stack([_quadric_error(q, candidates[:, k]) for k in range(3)], axis=1)
+    best = np.argmin(errors, axis=1)
+    rows = np.arange(len(a))
+    return errors[rows, best], candidates[rows, best]
+
+
+def _independent_minima(cost, a, b, n_vertices):
+    """
+    在两端点处都是最小代价的棱（互不共享顶点），代价相同时编号小者优先；
+    等价于按 (代价, 编号) 排名后每个顶点取排名最小的棱，但不需要对全部棱排序
+    """
+    index = np.arange(len(cost))
+    vertex_cost = np.full(n_vertices, np.inf)
+    np.minimum.at(vertex_cost, a, cost)
+    np.minimum.at(vertex_cost, b, cost)
+    at_a, at_b = cost == vertex_cost[a], cost == vertex_cost[b]
+    vertex_edge = np.full(n_vertices, len(cost))
+    np.minimum.at(vertex_edge, a[at_a], index[at_a])
+    np.minimum.at(vertex_edge, b[at_b], index[at_b])
+    return np.flatnonzero(at_a & at_b & (vertex_edge[a] == index) & (vertex_edge[b] == index) &
+                          np.isfinite(cost))
+
+
+def quadric_decimate(vertices, faces, target_faces, max_passes=200):
+    """
+    二次误差网格简化（Garland–Heckbert），按轮批量执行
+
+    每轮从全部棱的收缩代价（候选位置取两端点与中点中误差最小者）中
+    选出在两端点处都是最小代价的棱（互不共享顶点），拒绝违反连接条件
+    （两端公共邻点多于2个）或使相邻三角形翻转的收缩，其余同时收缩。
+    棱以排序的 int64 键保存，每轮只重建、重算与被收缩顶点相连的棱和三角形；
+    被拒绝的棱在端点改变之前不再参与选择（布尔标记，与棱数组对齐）。
+    返回 (vertices, faces)，顶点已压缩
+    """
+    vertices = np.asarray(vertices, dtype=float).copy()
+    faces = np.asarray(faces, dtype=np.int64)
+    quadrics = vertex_quadrics(vertices, faces)
+    n = len(vertices)
+    keys = np.unique(_edge_keys(faces, n))
+    a, b = keys // n, keys % n
+    cost, position = _collapse_costs(vertices, quadrics, a, b)
+    blocked = np.zeros(len(keys), dtype=bool)
+
+    for _ in range(max_passes):
+        if len(faces) <= target_faces:
+            break
+        available = np.where(blocked, np.inf, cost)
+        chosen = _independent_minima(available, a, b, n)
+        # 每次收缩大约消去2个三角形，不超过目标所需数量
+        needed = max((len(faces) - target_faces + 1) // 2, 1)
+        chosen = chosen[np.argsort(available[chosen], kind='stable')[:needed]]
+
+        # 连接条件：两端点的公共邻点恰为2个（封闭流形上的内部棱）
+        adjacency = coo_matrix((np.ones(2 * len(keys)), (np.concatenate([a, b]),
+                                                       np.concatenate([b, a]))),
+                               shape=(n, n)).tocsr()
+        common = np.asarray(adjacency[a[chosen]].multiply(adjacency[b[chosen]]).sum(axis=1)).ravel()
+        blocked[chosen[common > 2]] = True
+        chosen = chosen[common <= 2]
+
+        # 只有含被收缩顶点的三角形会改变
+        touched = np.zeros(n, dtype=bool)
+        touched[a[chosen]] = touched[b[chosen]] = True
+        local = np.flatnonzero(touched[faces].any(axis=1))
+        old_unit = _face_planes(vertices, faces[local])[0]
+        for _ in range(10):
+            if len(chosen) == 0:
+                break
+            remap = np.arange(n)
+            remap[b[chosen]] = a[chosen]
+            moved = vertices.copy()
+            moved[a[chosen]] = position[chosen]
+            new_faces = remap[faces[local]]
+            alive = ((new_faces[:, 0] != new_faces[:, 1]) & (new_faces[:, 1] != new_faces[:, 2]) &
+                     (new_faces[:, 2] != new_faces[:, 0]))
+            new_unit = _face_planes(moved, new_faces)[0]
+            flipped = alive & (np.einsum('ij,ij->i', old_unit, new_unit) <= 0.2)
+            # 被翻转三角形上的收缩全部撤销后重试
+            edge_of_vertex = np.full(n, -1)
+            edge_of_vertex[a[chosen]] = np.arange(len(chosen))
+            bad = edge_of_vertex[new_faces[flipped]].ravel()
+            bad = np.unique(bad[bad >= 0])
+            if len(bad) == 0:
+                break
+            blocked[chosen[bad]] = True
+            chosen = np.delete(chosen, bad)
+        else:
+            blocked[chosen] = True
+            chosen = chosen[:0]
+        if len(chosen) == 0:
+            if np.isfinite(available).any():
+                continue
+            break
+
+        vertices = moved
+        quadrics[a[chosen]] += quadrics[b[chosen]]
+        # 去除退化三角形与重复三角形（重复的两个三角形必然都含被收缩顶点）
+        _, first = np.unique(np.sort(new_faces, axis=1), axis=0, return_index=True)
+        drop = ~alive
+        drop[np.setdiff1d(np.arange(len(local)), first)] = True
+        faces = faces.copy()
+        faces[local] = new_faces
+        faces = np.delete(faces, local[drop], axis=0)
+
+        # 与被收缩顶点相连的棱全部替换为由新三角形重新求出的棱，其余棱保持不变
+        changed = np.zeros(n, dtype=bool)
+        changed[a[chosen]] = changed[b[chosen]] = True
+        keep = ~(changed[a] | changed[b])
+        new_keys = _edge_keys(new_faces[~drop], n)
+        new_keys = np.unique(new_keys[changed[new_keys // n] | changed[new_keys % n]])
+        new_a, new_b = new_keys // n, new_keys % n
+        new_cost, new_position = _collapse_costs(vertices, quadrics, new_a, new_b)
+        slots = np.searchsorted(keys[keep], new_keys)
+        keys = np.insert(keys[keep], slots, new_keys)
+        cost = np.insert(cost[keep], slots, new_cost)
+        position = np.insert(position[keep], slots, new_position, axis=0)
+        blocked = np.insert(blocked[keep], slots, False)
+        a, b = keys // n, keys % n
+
+    used, inverse = np.unique(faces, return_inverse=True)
+    return vertices[used], inverse.reshape(-1, 3)
+
+
+def closest_points_on_triangles(points, a, b, c):
+    """点到三角形的最近点（逐对计算，Ericson 区域判定的向量化版本）"""
+    ab, ac, ap = b - a, c - a, points - a
+    d1 = np.einsum('ij,ij->i', ab, ap)
+    d2 = np.einsum('ij,ij->i', ac, ap)
+    bp = points - b
+    d3 = np.einsum('ij,ij->i', ab, bp)
+    d4 = np.einsum('ij,ij->i', ac, bp)
+    cp = points - c
+    d5 = np.einsum('ij,ij->i', ab, cp)
+    d6 = np.einsum('ij,ij->i', ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        on_ab = a + (d1 / (d1 - d3))[:, None] * ab
+        on_ac = a + (d2 / (d2 - d6))[:, None] * ac
+        on_bc = b + ((d4 - d3) / ((d4 - d3) + (d5 - d6)))[:, None] * (c - b)
+        denom = 1.0 / (va + vb + vc)
+        inside = a + (vb * denom)[:, None] * ab + (vc * denom)[:, None] * ac
+
+    conditions = [
+        (d1 <= 0) & (d2 <= 0),
+        (d3 >= 0) & (d4 <= d3),
+        (vc <= 0) & (d1 >= 0) & (d3 <= 0),
+        (d6 >= 0) & (d5 <= d6),
+        (vb <= 0) & (d2 >= 0) & (d6 <= 0),
+        (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+    ]
+    choices = [a, b, on_ab, c, on_ac, on_bc]
+    result = inside.copy()
+    # 倒序赋值，使排在前面的区域优先
+    for condition, choice in zip(conditions[::-1], choices[::-1]):
+        result[condition] = choice[condition]
+    return result
+
+
+def surface_deviation(points, vertices, faces, k=8, chunk_size=100000, refine_size=256):
+    """
+    点集到三角网格表面的最大距离 (m)
+
+    先对中心最近的 k 个三角形求精确距离得到上界 d，再对中心距离不超过
+    d + 最大外接半径 的全部三角形复核，因此结果是精确的最近距离。
+    复核按上界从大到小分小批进行，上界不超过当前最大值时即可停止
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return 0.0
+    if len(faces) == 0:
+        return np.inf
+    tri = vertices[faces]
+    centers = tri.mean(axis=1)
+    reach = np.linalg.norm(tri - centers[:, None], axis=2).max()
+    k = min(k, len(faces))
+    tree = cKDTree(centers)
+
+    def distance_to(block, candidates, owner):
+        t = tri[candidates]
+        p = block[owner]
+        closest = closest_points_on_triangles(p, t[:, 0], t[:, 1], t[:, 2])
+        distance = np.full(len(block), np.inf)
+        np.minimum.at(distance, owner, np.linalg.norm(closest - p, axis=1))
+        return distance
+
+    deviation = 0.0
+    for start in range(0, len(points), chunk_size):
+        block = points[start:start + chunk_size]
+        _, nearest = tree.query(block, k=k)
+        distance = distance_to(block, nearest.reshape(-1), np.repeat(np.arange(len(block)), k))
+        # 只有上界超过当前最大值的点需要复核
+        order = np.argsort(-distance)
+        for sub in range(0, len(order), refine_size):
+            check = order[sub:sub + refine_size]
+            check = check[distance[check] > deviation]
+            if len(check) == 0:
+                break
+            lists = tree.query_ball_point(block[check], distance[check] + reach)
+            counts = np.array([len(c) for c in lists])
+            refined = distance_to(block[check], np.concatenate(lists).astype(np.int64),
+                                  np.repeat(np.arange(len(check)), counts))
+            deviation = max(deviation, float(np.minimum(distance[check], refined).max()))
+    return deviation
+
+
+def hausdorff_deviation(vertices_a, faces_a, vertices_b, faces_b, k=8):
+    """两个网格之间的对称最大偏差（双向取顶点到对方表面距离的最大值）"""
+    return max(surface_deviation(vertices_a, vertices_b, faces_b, k),
+               surface_deviation(vertices_b, vertices_a, faces_a, k))
@@ -0,0 +1,245 @@
+"""
+网格流形与水密性检查
+基于半边索引（每个三角形3条有向半边，按无向棱键排序分组）一次性向量化统计:
+非流形棱、开放边界、退化与重复三角形、朝向不一致的棱以及整体翻转的封闭壳体，
+并可修复其中的简单情况。全部操作为排序/bincount，O(N log N)
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+def _area_tolerance(vertices, area_tol=None):
+    """退化三角形的面积阈值，默认 (包围盒对角线×1e-9)²"""
+    if area_tol is not None:
+        return area_tol
+    if len(vertices) == 0:
+        return 0.0
+    diagonal = np.linalg.norm(vertices.max(axis=0) - vertices.min(axis=0))
+    return (diagonal * 1e-9) ** 2
+
+
+def face_areas_volumes(vertices, faces, chunk_size=1000000):
+    """
+    逐块计算三角形面积与相对顶点中心的有向体积贡献（壳体内各三角形求和即壳体体积）
+    分块只为限制 (F, 3, 3) 中间数组的内存
+    """
+    centered = vertices - (vertices.mean(axis=0) if len(vertices) else 0.0)
+    # 按坐标分量存放，逐分量取数比 (F, 3, 3) 整体取数更省内存带宽
+    x, y, z = (np.ascontiguousarray(centered[:, k]) for k in range(3))
+    area = np.empty(len(faces))
+    volume = np.empty(len(faces))
+    for start in range(0, len(faces), chunk_size):
+        part = faces[start:start + chunk_size]
+        i0, i1, i2 = part[:, 0], part[:, 1], part[:, 2]
+        x0, y0, z0 = x[i0], y[i0], z[i0]
+        ux, uy, uz = x[i1] - x0, y[i1] - y0, z[i1] - z0
+        vx, vy, vz = x[i2] - x0, y[i2] - y0, z[i2] - z0
+        nx = uy * vz - uz * vy
+        ny = uz * vx - ux * vz
+        nz = ux * vy - uy * vx
+        block = slice(start, start + len(part))
+        area[block] = 0.5 * np.sqrt(nx * nx + ny * ny + nz * nz)
+        volume[block] = (x0 * nx + y0 * ny + z0 * nz) / 6.0
+    return area, volume
+
+
+def degenerate_faces(vertices, faces, area_tol=None, area=None):
+    """退化三角形掩码：顶点编号重复或面积不超过阈值（area 可传入已算好的面积）"""
+    repeated = ((faces[:, 0] == faces[:, 1]) | (faces[:, 1] == faces[:, 2]) |
+                (faces[:, 2] == faces[:, 0]))
+    if area is None:
+        area = face_areas_volumes(vertices, faces)[0]
+    return repeated | (area <= _area_tolerance(vertices, area_tol))
+
+
+def duplicate_faces(faces, candidates=None):
+    """
+    重复三角形掩码
+    返回 (same, opposed)：same 为顶点与朝向都相同的多余副本（每组保留第一个）；
+    opposed 为顶点相同但朝向相反、背靠背重合的三角形，成对标记（例如相邻单元的共享面）
+    candidates: 只在这些三角形之间比较（见 _duplicate_candidates），默认全部
+    """
+    n_faces = len(faces)
+    same = np.zeros(n_faces, dtype=bool)
+    opposed = np.zeros(n_faces, dtype=bool)
+    if candidates is not None:
+        sub_same, sub_opposed = duplicate_faces(faces[candidates])
+        same[candidates] = sub_same
+        opposed[candidates] = sub_opposed
+        return same, opposed
+    if n_faces == 0:
+        return same, opposed
+    # 朝向相关的键：把最小编号轮换到首位；朝向无关的键：三个编号排序
+    shift = np.argmin(faces, axis=1)
+    rotated = faces[np.arange(n_faces)[:, None], (shift[:, None] + np.arange(3)) % 3]
+    order = np.lexsort((rotated[:, 2], rotated[:, 1], rotated[:, 0]))
+    repeat = np.all(rotated[order[1:]] == rotated[order[:-1]], axis=1)
+    same[order[1:][repeat]] = True
+
+    # 去掉同向副本后仍然顶点相同的，只能是朝向相反
+    rest = np.flatnonzero(~same)
+    ordered = np.sort(faces[rest], axis=1)
+    order = np.lexsort((ordered[:, 2], ordered[:, 1], ordered[:, 0]))
+    repeat = np.all(ordered[order[1:]] == ordered[order[:-1]], axis=1)
+    opposed[rest[order[1:][repeat]]] = True
+    opposed[rest[order[:-1][repeat]]] = True
+    return same, opposed
+
+
+def half_edge_index(faces, n_vertices):
+    """
+    半边索引：3F 条有向半边按无向棱键排序
+    返回 dict:
+        order    - 排序后第 i 条半边的原编号（半边 h 属于三角形 h // 3）
+        forward  - 排序后每条半边是否由小编号指向大编号
+        starts   - 每条无向棱在排序数组中的起点
+        counts   - 每条无向棱的半边数（1 = 开放边界，2 = 流形，>2 = 非流形）
+        contact  - 每条无向棱是否为壳体相接棱：半边数 >2 且正反方向各占一半，
+                   可以拆成若干对方向相反的半边，即几个各自封闭的壳体在这条棱上相接
+                   （例如重叠部件的端面相交、背靠背的重合面），作为部件的并集是有效的
+    """
+    tail = faces.reshape(-1)
+    head = faces[:, [1, 2, 0]].reshape(-1)
+    lo = np.minimum(tail, head).astype(np.int64)
+    hi = np.maximum(tail, head).astype(np.int64)
+    keys = lo * n_vertices + hi
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    is_new = np.ones(len(keys), dtype=bool)
+    is_new[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    starts = np.flatnonzero(is_new)
+    counts = np.diff(np.append(starts, len(keys)))
+    forward = (tail < head)[order]
+    n_forward = (np.add.reduceat(forward.astype(np.int64), starts) if len(starts)
+                 else np.zeros(0, dtype=np.int64))
+    contact = (counts > 2) & (2 * n_forward == counts)
+    return {'order': order, 'forward': forward, 'starts': starts, 'counts': counts,
+            'contact': contact}
+
+
+def _shells(faces, index):
+    """
+    沿流形棱连接的三角形连通分量（壳体）
+    返回 (n_shells, labels, open_shell, inconsistent)：open_shell 标记含边界、非流形
+    或朝向不一致棱的壳体（壳体相接棱不算）；inconsistent 为每条流形棱两侧朝向是否相反
+    """
+    counts = index['counts']
+    pairs = index['starts'][counts == 2]
+    inconsistent = index['forward'][pairs] == index['forward'][pairs + 1]
+    f0 = index['order'][pairs] // 3
+    f1 = index['order'][pairs + 1] // 3
+    graph = coo_matrix((np.ones(len(pairs), dtype=np.int8), (f0, f1)),
+                       shape=(len(faces), len(faces)))
+    n_shells, labels = connected_components(graph, directed=False)
+
+    bad = np.repeat((counts != 2) & ~index['contact'], counts)
+    bad[np.repeat(counts == 2, counts)] = np.repeat(inconsistent, 2)
+    open_shell = np.zeros(n_shells, dtype=bool)
+    open_shell[labels[index['order'][bad] // 3]] = True
+    return n_shells, labels, open_shell, inconsistent
+
+
+def _duplicate_candidates(index, labels):
+    """
+    可能与其他三角形重合的三角形：重合的两个三角形共享全部三条棱，
+    因此要么这些棱是非流形棱，要么两者自成一个只有2个三角形的壳体
+    """
+    counts = index['counts']
+    shared = index['order'][np.repeat(counts > 2, counts)] // 3
+    pair_shell = np.flatnonzero((np.bincount(labels) == 2)[labels])
+    return np.union1d(shared, pair_shell)
+
+
+def validate_mesh(vertices, faces, area_tol=None):
+    """
+    检查索引网格的流形性与水密性
+
+    vertices: (V, 3) 已焊接的顶点；faces: (F, 3) 顶点编号
+    area_tol: 退化三角形面积阈值 (m²)，默认 (包围盒对角线×1e-9)²
+
+    返回 report 字典:
+        degenerate_triangles - 顶点重复或面积为零的三角形
+        duplicate_triangles  - 与另一三角形顶点、朝向都相同的多余副本
+        opposed_triangles    - 与另一三角形重合但朝向相反的三角形（背靠背的内壁，成对计数）
+        boundary_edges       - 只属于一个三角形的棱（开放边界）
+        non_manifold_edges   - 属于三个及以上三角形、且不能拆成方向相反的半边对的棱
+        contact_edges        - 几个封闭壳体相接的棱（重叠部件的并集有效，单独报告，不影响水密判定）
+        inconsistent_edges   - 两侧三角形朝向相反的流形棱
+        n_shells / closed_shells / inverted_shells - 壳体数、封闭壳体数、法向整体朝内的封闭壳体数
+        watertight           - 以上问题均不存在
+    退化三角形不参与棱与壳体的统计
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    area, volume = face_areas_volumes(vertices, faces)
+    degenerate = degenerate_faces(vertices, faces, area_tol, area)
+    valid = faces[~degenerate]
+
+    index = half_edge_index(valid, len(vertices))
+    counts = index['counts']
+    n_shells, labels, open_shell, inconsistent = _shells(valid, index)
+    same, opposed = duplicate_faces(valid, _duplicate_candidates(index, labels))
+    volumes = np.bincount(labels, weights=volume[~degenerate], minlength=n_shells)
+
+    report = {
+        'n_vertices': int(len(vertices)),
+        'n_triangles': int(len(faces)),
+        'degenerate_triangles': int(degenerate.sum()),
+        'duplicate_triangles': int(same.sum()),
+        'opposed_triangles': int(opposed.sum()),
+        'boundary_edges': int((counts == 1).sum()),
+        'non_manifold_edges': int(((counts > 2) & ~index['contact']).sum()),
+        'contact_edges': int(index['contact'].sum()),
+        'inconsistent_edges': int(inconsistent.sum()),
+        'n_shells': int(n_shells),
+        'closed_shells': int((~open_shell).sum()),
+        'inverted_shells': int(((volumes < 0) & ~open_shell).sum()),
+    }
+    report['watertight'] = not any(report[key] for key in (
+        'degenerate_triangles', 'duplicate_triangles', 'boundary_edges', 'non_manifold_edges',
+        'inconsistent_edges', 'inverted_shells'))
+    return report
+
+
+def repair_mesh(vertices, faces, area_tol=None, drop_opposed=False):
+    """
+    修复简单情况: 删除退化与重复三角形，翻转法向整体朝内的封闭壳体，删除未引用的顶点
+    drop_opposed: True 时把背靠背的重合三角形成对删除（合并为一个实体）
+
+    开放边界与非流形棱需要补洞或重新剖分，这里不处理，只能在检查报告中看到
+    返回 (vertices, faces, keep, fixes)：keep 为输入三角形中保留的掩码，
+    fixes 记录各类修复的数量
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    area, volume = face_areas_volumes(vertices, faces)
+    keep = ~degenerate_faces(vertices, faces, area_tol, area)
+    kept = np.flatnonzero(keep)
+    index = half_edge_index(faces[kept], len(vertices))
+    shells = _shells(faces[kept], index)
+    same, opposed = duplicate_faces(faces[kept], _duplicate_candidates(index, shells[1]))
+    fixes = {'removed_degenerate': int(len(faces) - len(kept)),
+             'removed_duplicate': int(same.sum())}
+    if drop_opposed:
+        same |= opposed
+        fixes['removed_opposed'] = int(opposed.sum())
+    if same.any():
+        keep[kept[same]] = False
+        kept = np.flatnonzero(keep)
+        index = half_edge_index(faces[kept], len(vertices))
+        shells = _shells(faces[kept], index)
+
+    faces = faces[kept]
+    n_shells, labels, open_shell, _ = shells
+    volumes = np.bincount(labels, weights=volume[kept], minlength=n_shells)
+    inverted = (volumes < 0) & ~open_shell
+    flip = inverted[labels]
+    faces[flip] = faces[flip][:, ::-1]
+    fixes['flipped_shells'] = int(inverted.sum())
+    fixes['flipped_triangles'] = int(flip.sum())
+
+    used, inverse = np.unique(faces, return_inverse=True)
+    fixes['removed_vertices'] = int(len(vertices) - len(used))
+    return vertices[used], inverse.reshape(-1, 3), keep, fixes
@@ -0,0 +1,427 @@
+"""
+网格文件读写工具
+- 增量写出二进制STL（接受三角形块的迭代器），避免在内存中保存整个网格
+- 顶点焊接（量化 + 排序去重）后导出索引网格：二进制PLY、OBJ、3MF
+- VTU 非结构网格（多面体单元 + 单元数据），二进制追加数据，可选zlib块压缩
+"""
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+import numpy as np
+
+
+# 二进制STL每个三角形的记录：法向量、三个顶点（均为float32）以及2字节属性
+STL_RECORD_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vectors', '<f4', (3, 3)),
+    ('attr', '<u2'),
+])
+
+
+def triangle_normals(triangles):
+    """批量计算三角形单位法向量 (N, 3, 3) → (N, 3)"""
+    triangles = np.asarray(triangles, dtype=float)
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals / np.where(length > 0, length, 1.0)
+
+
+def weld_points(points, tolerance=None):
+    """
+    量化-去重合并重合点（向量化，O(N log N)）
+
+    tolerance: 量化步长 (m)，默认取包围盒对角线的 1e-6 倍（远小于float32 STL的精度）
+    返回 (unique_points, inverse)，points ≈ unique_points[inverse]
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    if len(points) == 0:
+        return points.copy(), np.zeros(0, dtype=np.int64)
+    origin = points.min(axis=0)
+    if tolerance is None:
+        tolerance = max(np.linalg.norm(points.max(axis=0) - origin), 1e-300) * 1e-6
+    keys = np.round((points - origin) / tolerance).astype(np.int64)
+
+    # 三个量化坐标能装进一个int64时合并为单键排序，否则按字典序排序
+    bits = [int(k).bit_length() for k in keys.max(axis=0)]
+    if sum(bits) <= 62:
+        packed = (keys[:, 0] << (bits[1] + bits[2])) | (keys[:, 1] << bits[2]) | keys[:, 2]
+        order = np.argsort(packed)
+        sorted_packed = packed[order]
+        is_new = np.ones(len(points), dtype=bool)
+        is_new[1:] = sorted_packed[1:] != sorted_packed[:-1]
+    else:
+        order = np.lexsort((keys[:, 2], keys[:, 1], keys[:, 0]))
+        sorted_keys = keys[order]
+        is_new = np.ones(len(points), dtype=bool)
+        is_new[1:] = np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+    group = np.cumsum(is_new) - 1
+    inverse = np.empty(len(points), dtype=np.int64)
+    inverse[order] = group
+    return points[order[is_new]], inverse
+
+
+class BinarySTLWriter:
+    """
+    二进制STL流式写出器
+
+    先写入占位的文件头和三角形数，每次 write() 追加一批三角形，
+    close() 时回填实际三角形数。内存占用只与单批三角形数量有关。
+
+    用法:
+        with BinarySTLWriter('scaffold.stl') as writer:
+            writer.write(triangles)          # (N, 3, 3)
+            writer.write_chunks(chunks)      # 任意 (N, 3, 3) 块的迭代器
+    """
+
+    def __init__(self, filename, header='biomimetic voronoi scaffold'):
+        self.filename = filename
+        self.n_triangles = 0
+        self._file = open(filename, 'wb')
+        self._file.write(header.encode('ascii', 'replace')[:80].ljust(80, b' '))
+        self._file.write(struct.pack('<I', 0))
+
+    def write(self, triangles):
+        """追加一批三角形 (N, 3, 3)"""
+        triangles = np.asarray(triangles)
+        if len(triangles) == 0:
+            return
+        records = np.zeros(len(triangles), dtype=STL_RECORD_DTYPE)
+        records['normal'] = triangle_normals(triangles)
+        records['vectors'] = triangles
+        records.tofile(self._file)
+        self.n_triangles += len(triangles)
+
+    def write_chunks(self, chunks):
+        """逐块写出三角形块的迭代器（例如生成器），每块写完即可释放"""
+        for triangles in chunks:
+            self.write(triangles)
+        return self.n_triangles
+
+    def close(self):
+        """回填三角形数并关闭文件"""
+        if self._file is None:
+            return
+        self._file.seek(80)
+        self._file.write(struct.pack('<I', self.n_triangles))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_binary_stl(filename, chunks, header='biomimetic voronoi scaffold'):
+    """
+    把三角形块的迭代器流式写入二进制STL，返回三角形总数
+    峰值内存只与单块大小有关，与模型总大小无关
+    """
+    with BinarySTLWriter(filename, header=header) as writer:
+        return writer.write_chunks(chunks)
+
+
+# ----------------------------------------------------------------------
+# 索引网格导出
+# ----------------------------------------------------------------------
+# numpy类型 → PLY属性类型
+PLY_TYPES = {'i1': 'char', 'u1': 'uchar', 'i2': 'short', 'u2': 'ushort',
+             'i4': 'int', 'u4': 'uint', 'f4': 'float', 'f8': 'double'}
+
+INDEXED_FORMATS = ('.ply', '.obj', '.3mf')
+
+
+def weld_triangles(triangles, tolerance=None):
+    """
+    三角形汤 (T, 3, 3) → 索引网格，重合顶点由 weld_points 合并
+    返回 (vertices, faces, keep)：keep 为焊接后未退化的三角形掩码，faces 已按 keep 过滤
+    """
+    vertices, inverse = weld_points(np.asarray(triangles).reshape(-1, 3), tolerance)
+    faces = inverse.reshape(-1, 3)
+    keep = ((faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) &
+            (faces[:, 2] != faces[:, 0]))
+    return vertices, faces[keep], keep
+
+
+def _ply_array(values):
+    """把属性数组转换为PLY支持的小端类型（int64→int32，float64→float32，bool→uchar）"""
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return values.astype('<u1')
+    if values.dtype.kind == 'f':
+        return values.astype('<f4')
+    if values.dtype.str[1:] not in PLY_TYPES:
+        return values.astype('<i4')
+    return values.astype(values.dtype.newbyteorder('<'))
+
+
+def write_ply(filename, vertices, faces, face_data=None, vertex_data=None):
+    """
+    写出二进制（小端）PLY
+    face_data / vertex_data: {属性名: (F,) 或 (V,) 数组}，例如层编号、孔径
+    """
+    face_data = {name: _ply_array(v) for name, v in (face_data or {}).items()}
+    vertex_data = {name: _ply_array(v) for name, v in (vertex_data or {}).items()}
+
+    vertex_records = np.empty(len(vertices), dtype=[('xyz', '<f4', (3,))] +
+                              [(name, v.dtype) for name, v in vertex_data.items()])
+    vertex_records['xyz'] = vertices
+    for name, values in vertex_data.items():
+        vertex_records[name] = values
+
+    face_records = np.empty(len(faces), dtype=[('n', 'u1'), ('v', '<i4', (3,))] +
+                            [(name, v.dtype) for name, v in face_data.items()])
+    face_records['n'] = 3
+    face_records['v'] = faces
+    for name, values in face_data.items():
+        face_records[name] = values
+
+    header = ['ply', 'format binary_little_endian 1.0', 'comment biomimetic voronoi scaffold',
+              f'element vertex {len(vertices)}',
+              'property float x', 'property float y', 'property float z']
+    header += [f'property {PLY_TYPES[v.dtype.str[1:]]} {name}' for name, v in vertex_data.items()]
+    header += [f'element face {len(faces)}', 'property list uchar int vertex_indices']
+    header += [f'property {PLY_TYPES[v.dtype.str[1:]]} {name}' for name, v in face_data.items()]
+    header += ['end_header']
+
+    with open(filename, 'wb') as f:
+        f.write(('\n'.join(header) + '\n').encode('ascii'))
+        vertex_records.tofile(f)
+        face_records.tofile(f)
+
+
+def _write_rows(f, fmt, rows, block=100000):
+    """按块把二维数组格式化为文本行写出（每块一次字符串格式化）"""
+    for start in range(0, len(rows), block):
+        part = rows[start:start + block]
+        f.write((fmt * len(part)) % tuple(part.ravel().tolist()))
+
+
+def write_obj(filename, vertices, faces, face_groups=None, group_names=None):
+    """
+    写出OBJ文本网格
+    face_groups: (F,) 整数分组（例如层编号），每组写成一个 'g' 分组
+    group_names: 分组名称列表，默认 'group_<k>'
+    """
+    faces = np.asarray(faces) + 1          # OBJ 顶点编号从1开始
+    with open(filename, 'w') as f:
+        f.write('# biomimetic voronoi scaffold\n')
+        f.write(f'# {len(vertices)} vertices, {len(faces)} faces\n')
+        _write_rows(f, 'v %.9g %.9g %.9g\n', np.asarray(vertices, dtype=float))
+        if face_groups is None:
+            _write_rows(f, 'f %d %d %d\n', faces)
+            return
+        face_groups = np.asarray(face_groups)
+        order = np.argsort(face_groups, kind='stable')
+        groups, starts = np.unique(face_groups[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for group, start, end in zip(groups, starts, ends):
+            name = group_names[group] if group_names is not None else f'group_{group}'
+            f.write(f'g {name}\n')
+            _write_rows(f, 'f %d %d %d\n', faces[order[start:end]])
+
+
+def write_3mf(filename, vertices, faces, face_groups=None, group_colors=None, unit='meter'):
+    """
+    写出3MF（zip包 + 3D模型XML，流式写入压缩包）
+    face_groups: (F,) 整数分组，写为 basematerials 中的材料，切片软件中按颜色区分
+    group_colors: 每组的显示颜色 '#RRGGBB'
+    unit: 坐标单位（与顶点坐标一致，默认米）
+    """
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="model" '
+        'ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+        '</Types>')
+    relationships = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+        'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+        '</Relationships>')
+
+    faces = np.asarray(faces)
+    with zipfile.ZipFile(filename, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', content_types)
+        archive.writestr('_rels/.rels', relationships)
+        with archive.open('3D/3dmodel.model', 'w', force_zip64=True) as raw:
+            f = io.TextIOWrapper(raw, encoding='utf-8')
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    f'<model unit="{unit}" xml:lang="en-US" '
+                    'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n'
+                    '<resources>\n')
+            object_attrs = ''
+            if face_groups is not None:
+                face_groups = np.asarray(face_groups)
+                n_groups = int(face_groups.max()) + 1 if len(face_groups) else 1
+                f.write('<basematerials id="1">\n')
+                for k in range(n_groups):
+                    color = group_colors[k] if group_colors is not None else '#CCCCCC'
+                    f.write(f'<base name="group {k}" displaycolor="{color}"/>\n')
+                f.write('</basematerials>\n')
+                object_attrs = ' pid="1" pindex="0"'
+            f.write(f'<object id="2" type="model"{object_attrs}>\n<mesh>\n<vertices>\n')
+            _write_rows(f, '<vertex x="%.9g" y="%.9g" z="%.9g"/>\n',
+                        np.asarray(vertices, dtype=float))
+            f.write('</vertices>\n<triangles>\n')
+            if face_groups is None:
+                _write_rows(f, '<triangle v1="%d" v2="%d" v3="%d"/>\n', faces)
+            else:
+                _write_rows(f, '<triangle v1="%d" v2="%d" v3="%d" p1="%d"/>\n',
+                            np.column_stack([faces, face_groups]))
+            f.write('</triangles>\n</mesh>\n</object>\n</resources>\n'
+                    '<build>\n<item objectid="2"/>\n</build>\n</model>\n')
+            f.flush()
+            f.detach()
+
+
+def write_indexed_mesh(filename, vertices, faces, face_data=None, group_field='layer_id',
+                       group_names=None, group_colors=None):
+    """
+    按扩展名写出索引网格 (.ply / .obj / .3mf)
+    face_data: {属性名: (F,) 数组}；PLY 保存全部属性，
+               OBJ / 3MF 只能按 group_field 分组（OBJ 的 'g' 分组、3MF 的材料）
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    face_data = face_data or {}
+    groups = face_data.get(group_field)
+    if ext == '.ply':
+        write_ply(filename, vertices, faces, face_data=face_data)
+    elif ext == '.obj':
+        write_obj(filename, vertices, faces, face_groups=groups, group_names=group_names)
+    elif ext == '.3mf':
+        write_3mf(filename, vertices, faces, face_groups=groups, group_colors=group_colors)
+    else:
+        raise ValueError(f"不支持的索引网格格式: {ext}，可选 {INDEXED_FORMATS}")
+
+
+# numpy 类型 → VTK XML 数据类型名
+VTK_TYPES = {'i1': 'Int8', 'u1': 'UInt8', 'i2': 'Int16', 'u2': 'UInt16', 'i4': 'Int32',
+             'u4': 'UInt32', 'i8': 'Int64', 'u8': 'UInt64', 'f4': 'Float32', 'f8': 'Float64'}
+
+VTK_POLYHEDRON = 42
+
+
+class VTUArray:
+    """
+    按块提供的VTU数据数组
+    count: 元组数；chunks: 数组块的可迭代对象（按顺序拼接即完整数组）；
+    n_components: 每个元组的分量数。普通 numpy 数组可直接用 VTUArray.of(array)
+    """
+
+    def __init__(self, dtype, count, chunks, n_components=1):
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.count = int(count)
+        self.chunks = chunks
+        self.n_components = n_components
+
+    @classmethod
+    def of(cls, values, chunk_size=1 << 20):
+        values = np.asarray(values)
+        if values.dtype == bool:
+            values = values.astype(np.uint8)
+        n_components = values.shape[1] if values.ndim == 2 else 1
+        flat = values.reshape(len(values), -1)
+        return cls(values.dtype, len(values),
+                   (flat[i:i + chunk_size] for i in range(0, len(flat), chunk_size)), n_components)
+
+
+def _write_appended_array(f, array, compress, block_size):
+    """
+    把一个数组写入追加数据段，返回写入的字节数
+    raw:  UInt64 字节数 + 数据
+    zlib: UInt64 头 [块数, 块大小, 末块大小, 各块压缩后大小...] + 各压缩块
+    """
+    start = f.tell()
+    if not compress:
+        f.write(struct.pack('<Q', 0))
+        n_bytes = 0
+        for chunk in array.chunks:
+            data = np.ascontiguousarray(chunk, dtype=array.dtype).tobytes()
+            f.write(data)
+            n_bytes += len(data)
+        end = f.tell()
+        f.seek(start)
+        f.write(struct.pack('<Q', n_bytes))
+        f.seek(end)
+        return end - start
+
+    # 压缩块先写入，块数与各块大小确定后把头部插到前面
+    sizes, pending, n_bytes = [], b'', 0
+    with tempfile.TemporaryFile() as blocks:
+        for chunk in array.chunks:
+            data = memoryview(pending + np.ascontiguousarray(chunk, dtype=array.dtype).tobytes())
+            position = 0
+            while len(data) - position >= block_size:
+                packed = zlib.compress(data[position:position + block_size], 6)
+                blocks.write(packed)
+                sizes.append(len(packed))
+                position += block_size
+            n_bytes += position
+            pending = bytes(data[position:])
+        if pending or not sizes:
+            packed = zlib.compress(pending, 6)
+            blocks.write(packed)
+            sizes.append(len(packed))
+            n_bytes += len(pending)
+        f.write(struct.pack(f'<{3 + len(sizes)}Q', len(sizes), block_size,
+                            n_bytes % block_size, *sizes))
+        blocks.seek(0)
+        shutil.copyfileobj(blocks, f)
+    return f.tell() - start
+
+
+def write_vtu(filename, points, cells, cell_data=None, compress=True, block_size=1 << 20):
+    """
+    写出VTU非结构网格（XML，二进制追加数据），ParaView / VTK 可直接读取
+
+    points: VTUArray，(V, 3) 点坐标
+    cells:  {'connectivity', 'offsets', 'types', 'faces', 'faceoffsets'} → VTUArray，
+            多面体单元用 faces / faceoffsets 描述各面（无多面体时可省略这两项）
+    cell_data: {名称: VTUArray}，每个单元一个值
+    compress: True 时各数组按 block_size 字节分块 zlib 压缩，否则为原始二进制
+
+    数组按块写入临时文件并记录偏移，最后拼上XML头部，内存占用只与单块大小有关
+    """
+    cell_data = cell_data or {}
+    sections = ([('Points', None, points)] +
+                [('Cells', name, cells[name]) for name in
+                 ('connectivity', 'offsets', 'types', 'faces', 'faceoffsets') if name in cells] +
+                [('CellData', name, array) for name, array in cell_data.items()])
+
+    offsets = []
+    with tempfile.TemporaryFile() as appended:
+        for _, _, array in sections:
+            offsets.append(appended.tell())
+            _write_appended_array(appended, array, compress, block_size)
+        compressor = ' compressor="vtkZLibDataCompressor"' if compress else ''
+        lines = ['<?xml version="1.0"?>',
+                 f'<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" '
+                 f'header_type="UInt64"{compressor}>',
+                 '<UnstructuredGrid>']
+        body = {'Points': [], 'Cells': [], 'CellData': []}
+        for (section, name, array), offset in zip(sections, offsets):
+            name_attr = f' Name="{name}"' if name else ''
+            body[section].append(
+                f'<DataArray type="{VTK_TYPES[array.dtype.str[1:]]}"{name_attr} '
+                f'NumberOfComponents="{array.n_components}" format="appended" offset="{offset}"/>')
+        n_points, n_cells = points.count, cells['offsets'].count
+        lines.append(f'<Piece NumberOfPoints="{n_points}" NumberOfCells="{n_cells}">')
+        for section in ('Points', 'Cells', 'CellData'):
+            lines += [f'<{section}>'] + body[section] + [f'</{section}>']
+        lines += ['</Piece>', '</UnstructuredGrid>', '<AppendedData encoding="raw">']
+
+        with open(filename, 'wb') as f:
+            f.write(('\n'.join(lines) + '\n_').encode('ascii'))
+            appended.seek(0)
+            shutil.copyfileobj(appended, f)
+            f.write(b'\n</AppendedData>\n</VTKFile>\n')
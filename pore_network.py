@@ -0,0 +1,251 @@
+"""
+孔隙网络分析
+以Voronoi单元为孔、相邻单元的公共面（ridge）为喉道，构建稀疏邻接图:
+喉道尺寸分布（面积、等效直径、水力直径）、连通分量，以及从支架六个表面出发可到达的孔体积比例；
+以 Hagen–Poiseuille 传导组装稀疏压力方程，由预条件共轭梯度法求解得到 Darcy 渗透率。
+全部图运算使用 scipy.sparse / csgraph，规模与单元数成线性
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from gradient_stats import _grouped_percentiles
+from seeding import assign_layers
+from sparse_solver import conjugate_gradient
+
+# 1 Darcy = 9.869233e-13 m²
+DARCY = 9.869233e-13
+
+
+# 支架包围盒的六个表面：(名称, 坐标轴, 是否为上界)
+BOX_FACES = (('x-', 0, False), ('x+', 0, True), ('y-', 1, False), ('y+', 1, True),
+             ('z-', 2, False), ('z+', 2, True))
+
+
+def throat_network(table, box):
+    """
+    从单元表提取喉道与表面孔
+
+    table: CellTable；box: 支架尺寸 (x, y, z) (m)
+    返回 dict:
+        cells              (T, 2)  喉道两侧单元的行号（两侧都是表内单元的公共面）
+        faces              (T,)    对应的面编号
+        area               (T,)    喉道面积 (m²)
+        diameter           (T,)    等效直径 2·sqrt(A/π) (m)
+        hydraulic_diameter (T,)    水力直径 4A/P (m)
+        center             (T, 3)  面的顶点平均坐标 (m)
+        surface            (6, C)  单元是否位于 BOX_FACES 各表面（有朝向该表面的外露面）
+    """
+    areas, perimeters, centers = table.face_measures()
+    face_cells = table.face_cells
+    inner = np.flatnonzero((face_cells >= 0).all(axis=1))
+
+    # 外露面：只有一侧是表内单元。法向指向第1侧，因此表内单元在第1侧时外法向取反
+    outer = np.flatnonzero((face_cells >= 0).sum(axis=1) == 1)
+    owner = face_cells[outer].max(axis=1)
+    normals = table.face_normals(outer)
+    normals[face_cells[outer, 1] == owner] *= -1
+    # 每个外露面归入其外法向所朝、距离最近的表面
+    distance = np.full((len(outer), len(BOX_FACES)), np.inf)
+    for k, (_, axis, upper) in enumerate(BOX_FACES):
+        facing = normals[:, axis] > 0 if upper else normals[:, axis] < 0
+        gap = box[axis] - centers[outer, axis] if upper else centers[outer, axis]
+        distance[facing, k] = np.abs(gap[facing])
+    nearest = np.argmin(distance, axis=1)
+    valid = np.isfinite(distance[np.arange(len(outer)), nearest])
+    surface = np.zeros((len(BOX_FACES), table.n_cells), dtype=bool)
+    surface[nearest[valid], owner[valid]] = True
+
+    area = areas[inner]
+    return {
+        'cells': face_cells[inner],
+        'faces': inner,
+        'area': area,
+        'diameter': 2 * np.sqrt(area / np.pi),
+        'hydraulic_diameter': 4 * area / np.maximum(perimeters[inner], 1e-300),
+        'center': centers[inner],
+        'surface': surface,
+    }
+
+
+def adjacency_matrix(n_cells, network, weight='area', min_diameter=0.0):
+    """
+    对称稀疏邻接矩阵 (CSR)，权重为喉道面积 ('area') 或等效直径 ('diameter')
+    min_diameter: 等效直径小于该值 (m) 的喉道视为不通
+    """
+    if weight not in ('area', 'diameter'):
+        raise ValueError(f"未知的喉道权重: {weight}，可选 'area' 或 'diameter'")
+    keep = network['diameter'] >= min_diameter
+    i, j = network['cells'][keep].T
+    values = network[weight][keep]
+    graph = coo_matrix((np.concatenate([values, values]), (np.concatenate([i, j]),
+                                                            np.concatenate([j, i]))),
+                       shape=(n_cells, n_cells))
+    return graph.tocsr()
+
+
+def surface_reachability(graph, volumes, surface):
+    """
+    连通分量与表面可达性
+
+    graph: adjacency_matrix 的结果；volumes: 单元体积 (m³)；surface: throat_network 的 surface
+    返回 dict:
+        n_components / labels      连通分量数与每个单元的分量编号
+        component_volumes          各分量的孔体积 (m³)
+        touches                    (n_components, 6) 分量是否包含各表面的孔
+        reachable_fraction         (6,) 从各表面出发可到达的孔体积占总孔体积的比例
+        percolates                 {'x', 'y', 'z'}: 是否存在同时连通两侧表面的分量
+    """
+    n_components, labels = connected_components(graph, directed=False)
+    component_volumes = np.bincount(labels, weights=volumes, minlength=n_components)
+    touches = np.zeros((n_components, len(BOX_FACES)), dtype=bool)
+    for k in range(len(BOX_FACES)):
+        touches[labels[surface[k]], k] = True
+    total = max(component_volumes.sum(), 1e-300)
+    reachable = (component_volumes[:, None] * touches).sum(axis=0) / total
+    percolates = {axis: bool((touches[:, 2 * k] & touches[:, 2 * k + 1]).any())
+                  for k, axis in enumerate('xyz')}
+    return {'n_components': int(n_components), 'labels': labels,
+            'component_volumes': component_volumes, 'touches': touches,
+            'reachable_fraction': reachable, 'percolates': percolates}
+
+
+def throat_size_summary(diameters, groups=None, n_groups=1, percentiles=(10, 50, 90)):
+    """
+    喉道等效直径分布 (μm)，groups 给出时按组（例如层编号）分别统计
+    返回每组一个字典的列表，空组为 None
+    """
+    values = np.asarray(diameters, dtype=float) * 1e6
+    groups = np.zeros(len(values), dtype=np.int64) if groups is None else groups
+    counts = np.bincount(groups, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(groups, weights=values, minlength=n_groups) / counts
+        std = np.sqrt(np.bincount(groups, weights=(values - mean[groups]) ** 2,
+                                  minlength=n_groups) / counts)
+    minimum, maximum, quantiles = _grouped_percentiles(values, groups, n_groups, percentiles)
+    summary = []
+    for g in range(n_groups):
+        if counts[g] == 0:
+            summary.append(None)
+            continue
+        entry = {'n_throats': int(counts[g]),
+                 'mean_throat_um': float(mean[g]),
+                 'std_throat_um': float(std[g]),
+                 'min_throat_um': float(minimum[g]),
+                 'max_throat_um': float(maximum[g])}
+        for q, value in quantiles.items():
+            entry[f'p{q:g}_throat_um'] = float(value[g])
+        summary.append(entry)
+    return summary
+
+
+def throat_layers(network, z_boundaries):
+    """喉道所在层：按面中心的Z分层"""
+    return assign_layers(network['center'][:, 2], z_boundaries)
+
+
+def conduit_conductance(network, centroids, pore_diameters, viscosity=1.0):
+    """
+    每个喉道所在管道的水力传导 g (m³/(Pa·s))，流量 Q = g·Δp
+
+    管道由两侧的半段串联而成：每半段从孔的质心（直径取等效孔径）到喉道面中心（直径取喉道水力直径）
+    线性收缩，圆锥管的 Hagen–Poiseuille 阻力为
+        R = 128 μ l (d1² + d1·d2 + d2²) / (3π d1³ d2³)
+    centroids: 单元质心 (C, 3) (m)；pore_diameters: 等效孔径 (C,) (m)
+    viscosity: 动力黏度 (Pa·s)，渗透率与它无关，默认 1
+    """
+    throat = np.maximum(network['hydraulic_diameter'], 1e-300)
+    resistance = np.zeros(len(throat))
+    for side in range(2):
+        rows = network['cells'][:, side]
+        length = np.linalg.norm(network['center'] - centroids[rows], axis=1)
+        pore = np.maximum(pore_diameters[rows], throat)
+        resistance += (128 * viscosity * length * (pore ** 2 + pore * throat + throat ** 2) /
+                       (3 * np.pi * pore ** 3 * throat ** 3))
+    return 1.0 / np.maximum(resistance, 1e-300)
+
+
+def darcy_permeability(n_cells, network, conductance, inlet, outlet, positions, area,
+                       active=None, viscosity=1.0, rtol=1e-10):
+    """
+    施加压差（入口孔 p=1，出口孔 p=0）求解孔隙网络的压力场，返回 Darcy 渗透率
+
+    inlet / outlet: 入口与出口孔的掩码 (C,)，同时位于两侧的孔（短路）两侧都不计
+    positions: 孔沿流动方向的坐标 (C,) (m)，渗流长度取出口孔与入口孔平均坐标之差
+    area: 垂直于流动方向的截面积 (m²)
+    active: 参与计算的孔的掩码（例如某一层），默认全部
+
+    压力方程为加权图拉普拉斯矩阵 L p = 0，消去边界孔后对内部孔用 Jacobi 预条件共轭梯度法求解；
+    只有同时连通入口与出口的连通分量参与计算，其余孔没有流量。
+    返回 dict: permeability_m2 (无贯通路径时为 None)、flow_rate (m³/s)、length (m)、
+    inlet_position（入口孔平均坐标 (m)）、inlet_pores、outlet_pores、iterations、converged，以及 pressure（各孔压力，无流动的孔为 NaN）
+    """
+    active = np.ones(n_cells, dtype=bool) if active is None else np.asarray(active, dtype=bool)
+    both = inlet & outlet
+    inlet, outlet = inlet & active & ~both, outlet & active & ~both
+    i, j = network['cells'].T
+    keep = active[i] & active[j] & (conductance > 0)
+    i, j, g = i[keep], j[keep], conductance[keep]
+    graph = coo_matrix((g, (i, j)), shape=(n_cells, n_cells)).tocsr()
+    _, labels = connected_components(graph, directed=False)
+    n_labels = labels.max() + 1
+    flowing = (np.bincount(labels[inlet], minlength=n_labels) > 0) & \
+              (np.bincount(labels[outlet], minlength=n_labels) > 0)
+    flowing = flowing[labels] & active
+    inlet &= flowing
+    outlet &= flowing
+    result = {'permeability_m2': None, 'flow_rate': 0.0, 'length': 0.0, 'inlet_position': 0.0,
+              'inlet_pores': int(inlet.sum()), 'outlet_pores': int(outlet.sum()),
+              'iterations': 0, 'converged': True, 'pressure': np.full(n_cells, np.nan)}
+    if not inlet.any() or not outlet.any():
+        return result
+
+    # 加权拉普拉斯矩阵，行列限制在贯通分量内
+    pressure = inlet.astype(float)
+    free = np.flatnonzero(flowing & ~inlet & ~outlet)
+    laplacian = coo_matrix((np.concatenate([-g, -g]), (np.concatenate([i, j]), np.concatenate([j, i]))),
+                           shape=(n_cells, n_cells)).tocsr()
+    laplacian = laplacian + coo_matrix((np.bincount(i, weights=g, minlength=n_cells) +
+                                        np.bincount(j, weights=g, minlength=n_cells),
+                                        (np.arange(n_cells), np.arange(n_cells))),
+                                       shape=(n_cells, n_cells)).tocsr()
+    if len(free):
+        # 内部孔：L_ff p_f = -L_fb p_b
+        rhs = -(laplacian[free] @ pressure)
+        solution, info = conjugate_gradient(laplacian[free][:, free], rhs, rtol=rtol)
+        pressure[free] = solution
+        result['iterations'] = info['iterations']
+        result['converged'] = info['converged']
+
+    # 流量 = 从入口孔流出的净流量
+    drop = g * (pressure[i] - pressure[j])
+    flow = drop[inlet[i] & ~inlet[j]].sum() - drop[inlet[j] & ~inlet[i]].sum()
+    start = positions[inlet].mean()
+    length = positions[outlet].mean() - start
+    result['pressure'] = np.where(flowing, pressure, np.nan)
+    result['flow_rate'] = float(flow)
+    result['length'] = float(length)
+    result['inlet_position'] = float(start)
+    if length > 0:
+        result['permeability_m2'] = float(flow * viscosity * length / area)
+    return result
+
+
+def plane_pressure(network, pressure, positions, plane):
+    """
+    流动方向坐标为 plane 的截面上的平均压力：对跨过截面的喉道按两端孔的坐标线性插值，
+    以喉道两端压差（正比于流量）加权平均；没有跨过截面的流动喉道时返回 NaN
+    """
+    i, j = network['cells'].T
+    a, b = positions[i] - plane, positions[j] - plane
+    cross = (a * b < 0) & np.isfinite(pressure[i]) & np.isfinite(pressure[j])
+    if not cross.any():
+        return np.nan
+    i, j, a, b = i[cross], j[cross], a[cross], b[cross]
+    t = a / (a - b)
+    values = pressure[i] + t * (pressure[j] - pressure[i])
+    weights = np.abs(pressure[i] - pressure[j])
+    if weights.sum() <= 0:
+        return float(values.mean())
+    return float((values * weights).sum() / weights.sum())
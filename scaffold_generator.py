@@ -3,15 +3,43 @@
 在Z方向创建梯度孔隙结构（表面细孔→内层粗孔）
 """
 
+import os
+import json
+import time
 import numpy as np
 from voronoi_scaffold_generator import VoronoiScaffoldGenerator
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider, Button, TextBox
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-from scipy.spatial import ConvexHull
 import matplotlib.patches as patches
-from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.colors import LinearSegmentedColormap, to_rgba_array
 import matplotlib.cm as cm
+from scipy.spatial import cKDTree
+from seeding import (DEFAULT_GRADIENT_PARAM, DEFAULT_LAYER_BOUNDARIES, resolve_density_profile,
+                     sample_seeds_from_profile, poisson_disk_seeds, assign_layers,
+                     lloyd_relax, local_seed_spacing)
+from tessellation import tiled_voronoi, bounded_voronoi, interior_cell_table
+from mesh_io import (BinarySTLWriter, write_binary_stl, weld_triangles, write_indexed_mesh,
+                     INDEXED_FORMATS, VTUArray, VTK_POLYHEDRON, write_vtu)
+from lattice import (unique_edges, edge_layer_ids, iter_lattice_triangles,
+                     lattice_triangle_count, strut_end_caps)
+from sdf_mesh import iter_sdf_triangles, sdf_mesh
+from lod import (resolve_lod_level, collapse_short_struts, quadric_decimate,
+                 hausdorff_deviation)
+from mesh_check import validate_mesh, repair_mesh
+from slicer import iter_layer_images, write_slice_stack
+from voxelize import VOXEL_FORMATS, block_ranges, default_voxel_size, write_voxel_volume
+from porosity import (strut_neighbors, analytic_solid_volume, monte_carlo_solid_volume,
+                      confidence_factor, bisect)
+from pore_network import (BOX_FACES, DARCY, throat_network, adjacency_matrix, surface_reachability,
+                          throat_size_summary, throat_layers, conduit_conductance,
+                          darcy_permeability, plane_pressure)
+from frame import BONE_MODULUS, resolve_material, assemble_stiffness, uniaxial_compression
+from stl import mesh as stl_mesh
+from cell_table import CellTable, csr_row_ids
+from gradient_stats import (compute_gradient_statistics, DEFAULT_PERCENTILES,
+                            BIOMIMETIC_LAYER_LABELS, LAYER_COLORS, LAYER_COLORS_HEX,
+                            biomimetic_layer_names)
 
 
 class InteractiveGradientScaffoldGenerator:
@@ -220,16 +248,8 @@ class InteractiveGradientScaffoldGenerator:
         """绘制3D种子分布"""
         seeds_um = self.generator.seeds * 1e6
         
-        # 按层着色
-        z_positions = seeds_um[:, 2]
-        colors = []
-        for z in z_positions:
-            if z <= 0.2 * self.z_size * 1e6:
-                colors.append('#FF4444')  # 皮质骨层
-            elif z <= 0.5 * self.z_size * 1e6:
-                colors.append('#FF8844')  # 过渡层
-            else:
-                colors.append('#4488FF')  # 松质骨层
+        # 按层着色（层编号在种子生成时已计算）
+        colors = LAYER_COLORS_HEX[self.generator.seed_layer_ids]
         
         self.ax_seeds.scatter(seeds_um[:, 0], seeds_um[:, 1], seeds_um[:, 2],
                              c=colors, s=10, alpha=0.6)
@@ -242,52 +262,37 @@ class InteractiveGradientScaffoldGenerator:
     def plot_voronoi_3d(self):
         """绘制彩色3D Voronoi结构（多彩多面体风格）"""
         max_cells = 40
-        cells_to_show = self.generator.interior_cells[:min(max_cells, len(self.generator.interior_cells))]
+        table = self.generator.interior_cells
+        rows = np.arange(min(max_cells, len(table)))
         
         # 创建彩色映射（类似你的参考图）
-        colors_list = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', 
-                      '#F7DC6F', '#BB8FCE', '#85C1E2', '#F8B88B', '#8FD8A0',
-                      '#E74C3C', '#3498DB', '#9B59B6', '#1ABC9C', '#F39C12',
-                      '#D35400', '#C0392B', '#8E44AD', '#2980B9', '#16A085']
+        colors_list = np.array(['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', 
+                                '#F7DC6F', '#BB8FCE', '#85C1E2', '#F8B88B', '#8FD8A0',
+                                '#E74C3C', '#3498DB', '#9B59B6', '#1ABC9C', '#F39C12',
+                                '#D35400', '#C0392B', '#8E44AD', '#2980B9', '#16A085'])
+        
+        # 每个唯一的平面多边形面只绘制一次，颜色取所属单元
+        polygons, _, owners = table.cell_polygons(rows, scale=1e6)
+        if polygons:
+            self.ax_voronoi.add_collection3d(Poly3DCollection(
+                polygons,
+                facecolors=colors_list[owners % len(colors_list)],
+                alpha=0.85,
+                edgecolors='#2C3E50',
+                linewidths=1.5
+            ))
         
-        for idx, cell in enumerate(cells_to_show):
-            try:
-                vertices = cell['vertices'] * 1e6
-                center = cell['center'] * 1e6
-                
-                # 为每个单元分配不同颜色
-                color = colors_list[idx % len(colors_list)]
-                
-                if len(vertices) >= 4:
-                    try:
-                        hull = ConvexHull(vertices)
-                        # 绘制所有面
-                        for simplex in hull.simplices:
-                            triangle = vertices[simplex]
-                            poly3d = [[triangle[j] for j in range(3)]]
-                            collection = Poly3DCollection(
-                                poly3d, 
-                                facecolors=color,
-                                alpha=0.85,
-                                edgecolors='#2C3E50',
-                                linewidths=1.5
-                            )
-                            self.ax_voronoi.add_collection3d(collection)
-                        
-                        # 绘制种子点
-                        self.ax_voronoi.scatter(center[0], center[1], center[2],
-                                              c='black', s=40, marker='o', 
-                                              edgecolors='white', linewidths=1, zorder=10)
-                    except:
-                        pass
-            except:
-                continue
+        # 绘制种子点
+        centers = table.centers[rows] * 1e6
+        self.ax_voronoi.scatter(centers[:, 0], centers[:, 1], centers[:, 2],
+                                c='black', s=40, marker='o',
+                                edgecolors='white', linewidths=1, zorder=10)
         
         # 设置背景和样式
         self.ax_voronoi.set_xlabel('X (μm)', fontsize=10, fontweight='bold')
         self.ax_voronoi.set_ylabel('Y (μm)', fontsize=10, fontweight='bold')
         self.ax_voronoi.set_zlabel('Z (μm)', fontsize=10, fontweight='bold')
-        self.ax_voronoi.set_title(f'3D Colorful Voronoi Cells\n({len(cells_to_show)} cells)', 
+        self.ax_voronoi.set_title(f'3D Colorful Voronoi Cells\n({len(rows)} cells)', 
                                  fontsize=11, fontweight='bold')
         self.ax_voronoi.set_xlim(0, self.x_size*1e6)
         self.ax_voronoi.set_ylim(0, self.y_size*1e6)
@@ -354,23 +359,12 @@ class InteractiveGradientScaffoldGenerator:
     def plot_gradient_curve(self):
         """绘制Z方向梯度曲线"""
         if hasattr(self.generator, 'pore_sizes') and len(self.generator.pore_sizes) > 0:
-            z_positions = []
-            pore_sizes_z = []
-            colors = []
-            
-            for i, cell in enumerate(self.generator.interior_cells):
-                if i < len(self.generator.pore_sizes):
-                    z_pos = cell['center'][2] * 1e6
-                    z_positions.append(z_pos)
-                    pore_sizes_z.append(self.generator.pore_sizes[i])
-                    
-                    # 颜色编码
-                    if z_pos <= 0.2 * self.z_size * 1e6:
-                        colors.append('#FF4444')
-                    elif z_pos <= 0.5 * self.z_size * 1e6:
-                        colors.append('#FF8844')
-                    else:
-                        colors.append('#4488FF')
+            cells = self.generator.interior_cells
+            n_cells = min(len(cells), len(self.generator.pore_sizes))
+            z_positions = cells.centers[:n_cells, 2] * 1e6
+            pore_sizes_z = np.asarray(self.generator.pore_sizes[:n_cells])
+            # 颜色编码
+            colors = LAYER_COLORS_HEX[cells.layer_ids[:n_cells]]
             
             self.ax_gradient.scatter(z_positions, pore_sizes_z, c=colors, alpha=0.6, s=20)
             self.ax_gradient.set_xlabel('Z Position (μm)')
@@ -379,10 +373,9 @@ class InteractiveGradientScaffoldGenerator:
             self.ax_gradient.grid(True, alpha=0.3)
             
             # 添加层边界线
-            self.ax_gradient.axvline(x=0.2 * self.z_size * 1e6, color='red', 
-                                    linestyle='--', alpha=0.5, linewidth=1)
-            self.ax_gradient.axvline(x=0.5 * self.z_size * 1e6, color='orange', 
-                                    linestyle='--', alpha=0.5, linewidth=1)
+            for z_edge, color in zip(self.generator.layer_z_boundaries(), ['red', 'orange']):
+                self.ax_gradient.axvline(x=z_edge * 1e6, color=color,
+                                        linestyle='--', alpha=0.5, linewidth=1)
         
     def plot_statistics(self):
         """显示统计信息"""
@@ -474,50 +467,35 @@ Interior Cells: {len(self.generator.interior_cells)}
         ax = fig.add_subplot(111, projection='3d')
         ax.set_facecolor('#F0F0F0')
         
-        cells_to_show = self.generator.interior_cells[:min(max_cells, len(self.generator.interior_cells))]
+        table = self.generator.interior_cells
+        rows = np.arange(min(max_cells, len(table)))
         
         # 丰富的颜色列表
-        colors_list = [
+        colors_list = np.array([
             '#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', 
             '#F7DC6F', '#BB8FCE', '#85C1E2', '#F8B88B', '#8FD8A0',
             '#E74C3C', '#3498DB', '#9B59B6', '#1ABC9C', '#F39C12',
             '#D35400', '#C0392B', '#8E44AD', '#2980B9', '#16A085',
             '#F39C6B', '#6C5CE7', '#00B894', '#FDCB6E', '#E17055',
             '#74B9FF', '#A29BFE', '#FD79A8', '#FDCB6E', '#55EFC4'
-        ]
-        
-        for idx, cell in enumerate(cells_to_show):
-            try:
-                vertices = cell['vertices'] * 1e6
-                center = cell['center'] * 1e6
-                
-                # 分配颜色
-                color = colors_list[idx % len(colors_list)]
-                
-                if len(vertices) >= 4:
-                    try:
-                        hull = ConvexHull(vertices)
-                        # 绘制所有面
-                        for simplex in hull.simplices:
-                            triangle = vertices[simplex]
-                            poly3d = [[triangle[j] for j in range(3)]]
-                            collection = Poly3DCollection(
-                                poly3d,
-                                facecolors=color,
-                                alpha=0.9,
-                                edgecolors='#2C3E50',
-                                linewidths=2
-                            )
-                            ax.add_collection3d(collection)
-                        
-                        # 添加种子点
-                        ax.scatter(center[0], center[1], center[2],
-                                 c='black', s=50, marker='o',
-                                 edgecolors='white', linewidths=1.5, zorder=10)
-                    except:
-                        pass
-            except:
-                continue
+        ])
+        
+        # 每个唯一面只绘制一次（相邻单元的公共面不重复）
+        polygons, _, owners = table.cell_polygons(rows, scale=1e6)
+        if polygons:
+            ax.add_collection3d(Poly3DCollection(
+                polygons,
+                facecolors=colors_list[owners % len(colors_list)],
+                alpha=0.9,
+                edgecolors='#2C3E50',
+                linewidths=2
+            ))
+        
+        # 添加种子点
+        centers = table.centers[rows] * 1e6
+        ax.scatter(centers[:, 0], centers[:, 1], centers[:, 2],
+                   c='black', s=50, marker='o',
+                   edgecolors='white', linewidths=1.5, zorder=10)
         
         ax.set_xlabel('X (μm)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Y (μm)', fontsize=12, fontweight='bold')
@@ -558,54 +536,29 @@ Interior Cells: {len(self.generator.interior_cells)}
             (85, 0, '俯视图')
         ]
         
+        # 面表中的唯一多边形面，按面法向计算光照（与视角无关，4个视角共用）
+        max_cells_view = 60
+        table = self.generator.interior_cells
+        rows = np.arange(min(max_cells_view, len(table)))
+        polygons, faces, _ = table.cell_polygons(rows, scale=1e6)
+        light_dir = np.array([0.5, 0.5, 1.0])
+        light_dir = light_dir / np.linalg.norm(light_dir)
+        intensity = np.maximum(0.3, np.abs(table.face_normals(faces) @ light_dir))
+        # 灰度颜色（模拟SEM）
+        gray = np.repeat(intensity[:, None] * 0.9, 3, axis=1)
+        
         for idx, (ax, (elev, azim, title)) in enumerate(zip(axes.flat, views)):
             ax_3d = fig.add_subplot(2, 2, idx+1, projection='3d')
             ax_3d.set_facecolor('#1A1A1A')
             
             # 绘制支架结构（模拟SEM效果）
-            max_cells_view = 60
-            cells_to_show = self.generator.interior_cells[:min(max_cells_view, len(self.generator.interior_cells))]
-            
-            for cell in cells_to_show:
-                try:
-                    vertices = cell['vertices'] * 1e6
-                    
-                    if len(vertices) >= 4:
-                        try:
-                            hull = ConvexHull(vertices)
-                            for simplex in hull.simplices:
-                                triangle = vertices[simplex]
-                                poly3d = [[triangle[j] for j in range(3)]]
-                                
-                                # 计算面的法向量用于光照效果
-                                v1 = triangle[1] - triangle[0]
-                                v2 = triangle[2] - triangle[0]
-                                normal = np.cross(v1, v2)
-                                normal = normal / (np.linalg.norm(normal) + 1e-10)
-                                
-                                # 光照方向
-                                light_dir = np.array([0.5, 0.5, 1.0])
-                                light_dir = light_dir / np.linalg.norm(light_dir)
-                                
-                                # 计算光照强度
-                                intensity = max(0.3, abs(np.dot(normal, light_dir)))
-                                
-                                # 灰度颜色（模拟SEM）
-                                gray_val = intensity * 0.9
-                                color = (gray_val, gray_val, gray_val)
-                                
-                                collection = Poly3DCollection(
-                                    poly3d,
-                                    facecolors=color,
-                                    alpha=1.0,
-                                    edgecolors='#404040',
-                                    linewidths=0.5
-                                )
-                                ax_3d.add_collection3d(collection)
-                        except:
-                            pass
-                except:
-                    continue
+            ax_3d.add_collection3d(Poly3DCollection(
+                polygons,
+                facecolors=gray,
+                alpha=1.0,
+                edgecolors='#404040',
+                linewidths=0.5
+            ))
             
             # 设置
             ax_3d.set_xlabel('X (μm)', fontsize=9, color='white', fontweight='bold')
@@ -653,109 +606,1448 @@ Scaffold Parameters:
 class GradientVoronoiScaffoldGenerator(VoronoiScaffoldGenerator):
     """支持梯度的Voronoi支架生成器"""
     
-    def __init__(self, *args, gradient_type='linear', **kwargs):
+    def __init__(self, *args, gradient_type='linear', layer_fractions=DEFAULT_LAYER_BOUNDARIES,
+                 **kwargs):
         """
-        gradient_type: 'linear' (线性), 'exponential' (指数), 'sigmoid' (S型)
+        gradient_type: 'linear' (线性), 'exponential' (指数), 'sigmoid' (S型), 'step' (三层阶跃)
+        layer_fractions: 皮质骨|过渡层、过渡层|松质骨 的分层位置（占Z高度的比例），默认 (0.2, 0.5)
         """
         super().__init__(*args, **kwargs)
         self.gradient_type = gradient_type
+        self.layer_fractions = tuple(layer_fractions)
+        self.gradient_param = None
+        self.density_profile = None
+        self.seed_spacing = None
+        self.seed_layer_ids = None
+        self.strut_network = None
+        self.lod_records = None
+        self.mesh_report = None
+        self.voxel_volume = None
+        self.porosity_measurement = None
+        self.strut_radius_solution = None
+        self.pore_network = None
+        self.interconnectivity = None
+        self.permeability = None
+        self.stiffness = None
     
-    def generate_seeds_with_gradient(self, gradient_param=None):
+    def generate_seeds_with_gradient(self, gradient_param=None, profile=None, random_state=None,
+                                     sampling='random', min_spacing_factor=0.6):
         """
         生成具有Z方向梯度的种子点
-        表层（0-30μm）：种子密度高 → 孔隙细
-        中层（30-70μm）：种子密度中等 → 孔隙中等
-        内层（70-100μm）：种子密度低 → 孔隙粗
+        表层：种子密度高 → 孔隙细
+        中层：种子密度中等 → 孔隙中等
+        内层：种子密度低 → 孔隙粗
+
+        profile: 密度剖面 ρ(z)，默认使用 self.gradient_type；
+                 可为 'step'/'linear'/'exponential'/'sigmoid'、可调用对象 f(z) 或密度表
+                 （详见 seeding.resolve_density_profile）
+        random_state: 随机种子或 np.random.Generator，默认使用全局 np.random
+        sampling: 'random'       - 按 ρ(z) 独立随机采样（一次向量化逆CDF）
+                  'poisson_disk' - 梯度自适应泊松圆盘（蓝噪声）采样，
+                                   最小间距 = min_spacing_factor * ρ(z)^(-1/3)，避免种子过近产生碎片单元
         """
         print("[INFO] 生成具有梯度的种子点...")
         
         if gradient_param is None:
             # 仿生骨结构：外层高密度(皮质骨) → 内层低密度(松质骨)
-            gradient_param = {
-                'surface_density': 25000,    # seeds/mm³ - 皮质骨区域(高密度，小孔隙)
-                'middle_density': 12000,     # seeds/mm³ - 过渡区域(中等密度)  
-                'core_density': 6000         # seeds/mm³ - 松质骨区域(低密度，大孔隙)
-            }
+            gradient_param = dict(DEFAULT_GRADIENT_PARAM)
+        
+        if profile is None:
+            profile = self.gradient_type
+        
+        self.gradient_param = gradient_param
+        self.density_profile = resolve_density_profile(profile, gradient_param, self.z_size,
+                                                       self.layer_fractions)
+        
+        if sampling == 'random':
+            self.seeds = sample_seeds_from_profile(
+                self.density_profile, self.x_size, self.y_size, self.z_size,
+                random_state=random_state
+            )
+            self.seed_spacing = None
+        elif sampling == 'poisson_disk':
+            self.seeds, self.seed_spacing = poisson_disk_seeds(
+                self.density_profile, self.x_size, self.y_size, self.z_size,
+                min_spacing_factor=min_spacing_factor, random_state=random_state
+            )
+        else:
+            raise ValueError(f"未知的采样方式: {sampling}，可选 'random' 或 'poisson_disk'")
+        
+        self.assign_layer_ids()
+        n_surface, n_middle, n_core = np.bincount(self.seed_layer_ids, minlength=3)
+        names = self.layer_names()
+        profile_name = profile if isinstance(profile, str) else 'custom'
+        
+        print(f"[SUCCESS] 仿生梯度种子点生成完成 (剖面: {profile_name}, 采样: {sampling})")
+        print(f"  {names[0]}: {n_surface} 个种子 - 高密度，小孔隙")
+        print(f"  {names[1]}: {n_middle} 个种子 - 中等密度")
+        print(f"  {names[2]}: {n_core} 个种子 - 低密度，大孔隙")
+        print(f"  总计: {len(self.seeds)} 个种子 (仿生骨结构)")
+        
+        return self.seeds
+    
+    def relax_seeds(self, iterations=10, tol=1e-7, samples_per_seed=32, random_state=None):
+        """
+        Lloyd松弛（质心Voronoi）：在 compute_voronoi 之前使种子趋向各自单元的质心，
+        使孔隙尺寸更均匀
+
+        - 质心由按 ρ(z)^(5/3) 采样的固定点云批量估计（三维CVT中种子密度 ∝ 权重^(3/5)，
+          从而保持原有的密度梯度）
+        - 每个种子只与本层的采样点求质心，因而留在初始所在层的内部，各层种子数保持不变
+        - 平均位移低于 tol (m) 时提前停止
+
+        返回每次迭代的平均位移列表
+        """
+        if self.seeds is None or len(self.seeds) == 0:
+            raise ValueError("请先生成种子点")
+        
+        print(f"[INFO] Lloyd松弛种子点 (最多 {iterations} 次迭代)...")
         
-        seeds = []
+        profile = self.density_profile
+        if profile is None:
+            def profile(z):
+                return np.ones_like(z)
         
-        # 仿生骨结构分层 - 更符合天然骨的比例
-        z_surface = 0.2 * self.z_size   # 0-20% 皮质骨层(致密层)
-        z_middle = 0.5 * self.z_size    # 20-50% 过渡层  
-        z_core = self.z_size            # 50-100% 松质骨层(疏松层)
+        def weight(z):
+            return np.asarray(profile(z), dtype=float) ** (5.0 / 3.0)
         
-        # 表层
-        n_surface = int(gradient_param['surface_density'] * 
-                       self.x_size * self.y_size * z_surface * 1e9)
-        seeds_surface = np.random.uniform(
-            [0, 0, 0],
-            [self.x_size, self.y_size, z_surface],
-            size=(n_surface, 3)
+        sample_points = sample_seeds_from_profile(
+            weight, self.x_size, self.y_size, self.z_size,
+            n_seeds=samples_per_seed * len(self.seeds), random_state=random_state
         )
-        seeds.append(seeds_surface)
-        
-        # 中层
-        n_middle = int(gradient_param['middle_density'] * 
-                      self.x_size * self.y_size * (z_middle - z_surface) * 1e9)
-        seeds_middle = np.random.uniform(
-            [0, 0, z_surface],
-            [self.x_size, self.y_size, z_middle],
-            size=(n_middle, 3)
+        
+        # 种子与采样点按层分组：质心只取本层采样点，种子不会越过或贴在层边界上
+        layer_ids = self.assign_layer_ids()
+        sample_layers = assign_layers(sample_points[:, 2], self.layer_z_boundaries())
+        lower = np.zeros(3)
+        upper = np.array([self.x_size, self.y_size, self.z_size])
+        
+        self.seeds, history = lloyd_relax(self.seeds, sample_points, lower, upper,
+                                          iterations=iterations, tol=tol,
+                                          seed_groups=layer_ids, sample_groups=sample_layers)
+        
+        for i, displacement in enumerate(history):
+            print(f"  迭代 {i + 1}: 平均位移 {displacement * 1e6:.3f} μm")
+        if history and history[-1] < tol:
+            print(f"[SUCCESS] Lloyd松弛已收敛 ({len(history)} 次迭代)")
+        else:
+            print(f"[SUCCESS] Lloyd松弛完成 ({len(history)} 次迭代，未达到收敛阈值)")
+        
+        return history
+    
+    def compute_voronoi(self, tiles=None, ghost_margin=None, n_workers=None, bounded=False):
+        """
+        计算Voronoi剖分
+
+        tiles: None 使用整体剖分；(nx, ny) 时按XY分块、带幽灵种子边缘在进程池中并行剖分，
+               并直接拼接出与整体剖分相同的 interior_cells 和 pore_sizes，
+               适用于厘米级、数十万种子以上的支架
+        ghost_margin: 幽灵区宽度 (m)，默认平均种子间距的3倍（不足时自动加倍）
+        n_workers: 进程数，默认等于CPU核数
+        bounded: True 时把靠近六个边界面的种子镜像，使每个单元都被精确裁剪到支架内，
+                 extract_interior_cells 将保留全部单元而不是丢弃边界单元
+        """
+        self._bounded_table = None
+        if self.seed_layer_ids is None or len(self.seed_layer_ids) != len(self.seeds):
+            self.assign_layer_ids()
+        if bounded:
+            if tiles is not None:
+                raise ValueError("有界(镜像)剖分暂不支持与分块模式同时使用")
+            print("[INFO] 计算镜像种子有界Voronoi...")
+            self._stitched = False
+            self.vor, self._bounded_table = bounded_voronoi(
+                self.seeds, (self.x_size, self.y_size, self.z_size), margin=ghost_margin,
+                layer_boundaries=self.layer_z_boundaries()
+            )
+            n_mirrored = len(self.vor.points) - len(self.seeds)
+            print(f"[SUCCESS] 有界Voronoi完成: {len(self.seeds)} 个种子, {n_mirrored} 个镜像种子")
+            return self.vor
+        
+        if tiles is None:
+            self._stitched = False
+            return super().compute_voronoi()
+        
+        print(f"[INFO] 分块并行计算Voronoi ({tiles[0]} × {tiles[1]} 子区域)...")
+        
+        self.interior_cells = tiled_voronoi(
+            self.seeds, (self.x_size, self.y_size, self.z_size),
+            tiles=tiles, ghost_margin=ghost_margin, n_workers=n_workers,
+            layer_boundaries=self.layer_z_boundaries()
         )
-        seeds.append(seeds_middle)
-        
-        # 内层
-        n_core = int(gradient_param['core_density'] * 
-                    self.x_size * self.y_size * (z_core - z_middle) * 1e9)
-        seeds_core = np.random.uniform(
-            [0, 0, z_middle],
-            [self.x_size, self.y_size, z_core],
-            size=(n_core, 3)
+        
+        self.vor = None
+        self.interior_cells.layer_ids = self.seed_layer_ids[self.interior_cells.seed_index]
+        self.pore_sizes = self.interior_cells.pore_sizes
+        self._stitched = True
+        
+        print(f"[SUCCESS] 分块Voronoi完成: {len(self.interior_cells)} 个内部单元")
+        return self.interior_cells
+    
+    def extract_interior_cells(self):
+        """
+        提取内部单元，结果为 CellTable（共享顶点池 + CSR索引，兼容原有的字典列表用法）
+        分块模式下已在 compute_voronoi 中拼接完成；有界模式下保留全部（已裁剪的）单元
+        """
+        if getattr(self, '_stitched', False):
+            return self.interior_cells
+        if getattr(self, '_bounded_table', None) is not None:
+            self.interior_cells = self._bounded_table
+            self.interior_cells.layer_ids = self.seed_layer_ids[self.interior_cells.seed_index]
+            print(f"[SUCCESS] 有界模式: 保留全部 {len(self.interior_cells)} 个单元（已裁剪到边界）")
+            return self.interior_cells
+        
+        print("[INFO] 提取内部单元...")
+        self.interior_cells = interior_cell_table(
+            self.vor, (self.x_size, self.y_size, self.z_size),
+            layer_boundaries=self.layer_z_boundaries()
         )
-        seeds.append(seeds_core)
+        self.interior_cells.layer_ids = self.seed_layer_ids[self.interior_cells.seed_index]
+        print(f"[SUCCESS] 提取了 {len(self.interior_cells)} 个内部单元")
+        return self.interior_cells
+    
+    def compute_cell_statistics(self):
+        """
+        计算单元统计：体积、等效孔径、表面积、质心
+        单元表由所有面三角形与种子构成的四面体一次性批量求得，结果写入表的数组列；
+        分块模式下各子区域已并行计算完毕
+        """
+        if getattr(self, '_stitched', False):
+            return self.pore_sizes
+        if not isinstance(self.interior_cells, CellTable):
+            return super().compute_cell_statistics()
+        table = self.interior_cells.compute_statistics()
+        self.pore_sizes = table.pore_sizes
+        if table.n_cells:
+            print(f"[INFO] 单元统计: {table.n_cells} 个单元，平均孔径 {np.mean(self.pore_sizes):.1f} μm，"
+                  f"总孔隙体积 {table.volumes.sum()*1e9:.3f} mm³")
+        return self.pore_sizes
+    
+    def generate_stl_mesh(self, mode='cells', chunks=False, chunk_size=100000, lod=None,
+                          **lattice_options):
+        """
+        生成STL网格
+        mode: 'cells'   - 封闭的Voronoi单元多面体，由面表的平面多边形扇形三角化
+              'lattice' - 由唯一棱边构成的支柱晶格（可打印），参数见 generate_lattice_mesh
+              'sdf'     - 支柱网络距离场的等值面（节点处圆滑过渡），参数见 generate_sdf_mesh
+        chunks: True 时不构建 self.mesh，而是返回三角形块 (N, 3, 3) 的生成器，
+                可直接交给 mesh_io.write_binary_stl 流式写出，内存占用与模型大小无关
+        chunk_size: 每块的单元数（cells）或支柱数（lattice）
+        lod: 细节层次（'print' / 'review' / 'preview' 或参数字典），见 generate_lod_mesh
+        """
+        if mode not in ('cells', 'lattice', 'sdf'):
+            raise ValueError(f"未知的网格模式: {mode}，可选 'cells'、'lattice' 或 'sdf'")
+        if lod is not None:
+            return self.generate_lod_mesh(lod, mode=mode, chunk_size=chunk_size,
+                                          **lattice_options)[0]
+        if chunks:
+            return self.iter_stl_chunks(mode, chunk_size=chunk_size, **lattice_options)
+        if mode == 'cells':
+            return self.generate_cell_mesh(chunk_size=chunk_size)
+        if mode == 'sdf':
+            return self.generate_sdf_mesh(**lattice_options)
+        return self.generate_lattice_mesh(chunk_size=chunk_size, **lattice_options)
+    
+    def generate_cell_mesh(self, chunk_size=100000):
+        """
+        单元多面体网格：直接使用单元表中由ridge得到的平面多边形面（每个面存储一次），
+        按单元分别输出、朝向单元外，不再对每个单元做凸包三角化
+        """
+        table = self.interior_cells
+        if not isinstance(table, CellTable):
+            raise ValueError("请先提取内部单元")
+        print("[INFO] 生成单元网格...")
+        
+        # 每个面 k-2 个三角形，被其两侧的表内单元各输出一次
+        per_face = np.maximum(np.diff(table.face_offsets) - 2, 0)
+        n_triangles = int(per_face[table.cell_faces].sum())
+        self.mesh = stl_mesh.Mesh(np.zeros(n_triangles, dtype=stl_mesh.Mesh.dtype))
+        filled = 0
+        for triangles in table.iter_cell_triangles(chunk_size):
+            self.mesh.vectors[filled:filled + len(triangles)] = triangles
+            filled += len(triangles)
+        self.mesh.update_normals()
+        
+        print(f"[SUCCESS] 单元网格: {table.n_cells} 个单元, {table.n_faces} 个唯一面, "
+              f"{filled} 个三角形")
+        return self.mesh
+    
+    def iter_stl_chunks(self, mode='cells', chunk_size=100000, strut_radius=None,
+                        layer_radii=None, n_facets=8, node_caps=True, voxel_size=None,
+                        blend=None, chunk_cells=48, n_workers=None):
+        """
+        逐块生成网格三角形 (N, 3, 3)
+        cells 模式直接由单元表的面环三角化（每个单元一个封闭壳体），
+        lattice 模式的参数同 generate_lattice_mesh，sdf 模式的参数同 generate_sdf_mesh
+        （sdf 块间接缝的顶点只在浮点舍入范围内重合，需要严格拼接时用 generate_sdf_mesh）
+        """
+        if mode == 'cells':
+            if not isinstance(self.interior_cells, CellTable):
+                raise ValueError("请先提取内部单元")
+            yield from self.interior_cells.iter_cell_triangles(chunk_size)
+            return
+        network = self.build_strut_network()
+        radius = self.strut_radii(strut_radius, layer_radii)
+        if mode == 'sdf':
+            voxel_size, blend = self.sdf_resolution(radius, voxel_size, blend)
+            yield from iter_sdf_triangles(network['nodes'], network['edges'], radius, voxel_size,
+                                          blend=blend, chunk_cells=chunk_cells,
+                                          n_workers=n_workers)
+            return
+        yield from iter_lattice_triangles(network['nodes'], network['edges'], radius,
+                                          n_facets=n_facets, node_caps=node_caps,
+                                          chunk_size=chunk_size)
+    
+    def validate_mesh(self, repair=False, tolerance=None, drop_opposed=False):
+        """
+        检查 self.mesh 的流形性与水密性（generate_stl_mesh 之后的验证阶段）
+
+        三角形先按坐标焊接，再用半边索引统计非流形棱、开放边界、退化/重复三角形、
+        朝向不一致的棱和整体朝内的壳体，见 mesh_check.validate_mesh
+        repair: True 时删除退化与重复三角形、翻转朝内的封闭壳体，并替换 self.mesh
+        tolerance: 焊接量化步长 (m)，默认包围盒对角线的 1e-6 倍
+        drop_opposed: 修复时成对删除背靠背重合的三角形（cells 模式相邻单元的共享面）
+
+        报告保存在 self.mesh_report，并随 export_config_json 导出
+        """
+        if self.mesh is None:
+            raise ValueError("请先生成STL网格")
+        print("[INFO] 检查网格流形性与水密性...")
+        triangles = np.asarray(self.mesh.vectors, dtype=float)
+        vertices, faces, keep = weld_triangles(triangles, tolerance)
+        # 焊接后顶点重合的三角形已被 weld_triangles 去掉，计入退化三角形
+        collapsed = int(len(triangles) - keep.sum())
+        report = validate_mesh(vertices, faces)
+        report['n_triangles'] = int(len(triangles))
+        report['degenerate_triangles'] += collapsed
+        report['watertight'] = report['watertight'] and collapsed == 0
+        
+        if repair:
+            vertices, faces, _, fixes = repair_mesh(vertices, faces, drop_opposed=drop_opposed)
+            fixes['removed_degenerate'] += collapsed
+            self.mesh = stl_mesh.Mesh(np.zeros(len(faces), dtype=stl_mesh.Mesh.dtype))
+            self.mesh.vectors[:] = vertices[faces]
+            self.mesh.update_normals()
+            report['repairs'] = fixes
+            report['after_repair'] = validate_mesh(vertices, faces)
+        self.mesh_report = report
+        self._print_mesh_report(report)
+        return report
+    
+    def _print_mesh_report(self, report):
+        """打印网格检查结果（只列出存在的问题）"""
+        labels = {'degenerate_triangles': '退化三角形', 'duplicate_triangles': '重复三角形',
+                  'opposed_triangles': '背靠背重合三角形', 'boundary_edges': '开放边界棱',
+                  'non_manifold_edges': '非流形棱', 'inconsistent_edges': '朝向不一致的棱',
+                  'inverted_shells': '法向朝内的壳体'}
+        summary = (f"{report['n_triangles']} 个三角形, {report['n_shells']} 个壳体 "
+                   f"(封闭 {report['closed_shells']})")
+        if report['watertight']:
+            print(f"[SUCCESS] 网格水密且为流形: {summary}")
+        else:
+            print(f"[WARNING] 网格未通过检查: {summary}")
+        for key, label in labels.items():
+            if report[key]:
+                print(f"  {label}: {report[key]}")
+        if report.get('contact_edges'):
+            print(f"  壳体相接棱: {report['contact_edges']} (重叠部件相接处，并集有效)")
+        if 'repairs' in report:
+            fixes = report['repairs']
+            opposed = (f" / 背靠背 {fixes['removed_opposed']}" if 'removed_opposed' in fixes else "")
+            print(f"[INFO] 修复: 删除退化 {fixes['removed_degenerate']} / 重复 "
+                  f"{fixes['removed_duplicate']}{opposed} 个三角形, "
+                  f"翻转 {fixes['flipped_shells']} 个壳体; "
+                  f"修复后{'水密' if report['after_repair']['watertight'] else '仍未水密'}")
+    
+    def save_stl(self, filename, stream=False, mode='cells', validate=False, repair=False,
+                 **mesh_options):
+        """
+        保存STL
+        stream: False 时保存已生成的 self.mesh（原有行为）；
+                True 时跳过 self.mesh，按块生成三角形并直接写入二进制STL
+        validate / repair: 保存前检查（并修复）self.mesh，见 validate_mesh；流式写出时不检查
+        mode / mesh_options: 流式写出时的网格模式与参数，见 generate_stl_mesh
+        """
+        if not stream:
+            if validate or repair:
+                self.validate_mesh(repair=repair)
+            return super().save_stl(filename)
+        n_triangles = write_binary_stl(
+            filename, self.generate_stl_mesh(mode, chunks=True, **mesh_options))
+        print(f"[SUCCESS] 流式写出STL: {filename} ({n_triangles} 个三角形)")
+        return n_triangles
+    
+    def export_indexed_mesh(self, filename, mode='cells', tolerance=None, chunk_size=100000,
+                            validate=False, repair=False, **mesh_options):
+        """
+        导出焊接后的索引网格，格式由扩展名决定: .ply（二进制）/ .obj / .3mf
+
+        重合顶点经量化 + 排序一次性合并 (O(N log N))，文件约为STL的1/3。
+        每个三角形附带属性:
+            cells   - layer_id、pore_size_um（所属单元）
+            lattice - layer_id、strut_radius_um（所属支柱或节点球）
+            sdf     - layer_id（按三角形中心Z）
+        PLY 保存全部属性；OBJ 按层写 'g' 分组，3MF 按层写材料颜色
+        tolerance: 焊接量化步长 (m)，默认包围盒对角线的 1e-6 倍
+        validate / repair: 写出前检查（并修复）焊接后的网格，报告保存在 self.mesh_report
+        mode / mesh_options: 同 generate_stl_mesh
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in INDEXED_FORMATS:
+            raise ValueError(f"不支持的索引网格格式: {ext}，可选 {INDEXED_FORMATS}")
+        print(f"[INFO] 导出索引网格 ({mode} → {ext})...")
+        
+        if mode == 'cells':
+            table = self.interior_cells
+            parts = list(table.iter_cell_triangles(chunk_size, return_owners=True))
+            triangles = np.concatenate([t.astype(np.float32) for t, _ in parts] +
+                                       [np.zeros((0, 3, 3), np.float32)])
+            owners = np.concatenate([rows for _, rows in parts] + [np.zeros(0, np.int64)])
+            del parts
+            face_data = {'layer_id': table.layer_ids[owners],
+                         'pore_size_um': table.pore_sizes[owners]}
+        elif mode == 'lattice':
+            network = self.build_strut_network()
+            nodes, edges = network['nodes'], network['edges']
+            radius = self.strut_radii(mesh_options.get('strut_radius'),
+                                      mesh_options.get('layer_radii'))
+            # 每个三角形所属的支柱 (0..E-1) 或节点球 (E + 节点编号)；
+            # 去掉的端盖和零长度支柱使每根支柱的三角形数不固定，属性必须按归属索引
+            parts = list(iter_lattice_triangles(nodes, edges, radius,
+                                                n_facets=mesh_options.get('n_facets', 8),
+                                                node_caps=mesh_options.get('node_caps', True),
+                                                chunk_size=chunk_size, return_owners=True))
+            triangles = np.concatenate([t.astype(np.float32) for t, _ in parts] +
+                                       [np.zeros((0, 3, 3), np.float32)])
+            owners = np.concatenate([ids for _, ids in parts] + [np.zeros(0, np.int64)])
+            del parts
+            node_radius = np.zeros(len(nodes))
+            np.maximum.at(node_radius, edges[:, 0], radius)
+            np.maximum.at(node_radius, edges[:, 1], radius)
+            owner_layers = np.concatenate([network['layer_ids'],
+                                           assign_layers(nodes[:, 2], self.layer_z_boundaries())])
+            owner_radii = np.concatenate([radius, node_radius])
+            face_data = {'layer_id': owner_layers[owners],
+                         'strut_radius_um': owner_radii[owners] * 1e6}
+        elif mode == 'sdf':
+            triangles = np.concatenate([t.astype(np.float32) for t in
+                                        self.iter_stl_chunks('sdf', chunk_size, **mesh_options)])
+            face_data = {'layer_id': assign_layers(triangles[:, :, 2].mean(axis=1),
+                                                   self.layer_z_boundaries())}
+        else:
+            raise ValueError(f"未知的网格模式: {mode}，可选 'cells'、'lattice' 或 'sdf'")
+        
+        vertices, faces, keep = weld_triangles(triangles, tolerance)
+        face_data = {name: values[keep] for name, values in face_data.items()}
+        if validate or repair:
+            report = validate_mesh(vertices, faces)
+            report['n_triangles'] = int(len(triangles))
+            report['degenerate_triangles'] += int(len(triangles) - keep.sum())
+            if repair:
+                vertices, faces, kept, report['repairs'] = repair_mesh(vertices, faces)
+                report['repairs']['removed_degenerate'] += int(len(triangles) - keep.sum())
+                face_data = {name: values[kept] for name, values in face_data.items()}
+                report['after_repair'] = validate_mesh(vertices, faces)
+            report['watertight'] = bool(report['watertight'] and keep.all())
+            self.mesh_report = report
+            self._print_mesh_report(report)
+        write_indexed_mesh(filename, vertices, faces, face_data=face_data,
+                           group_names=[f'layer_{k}_{label.lower()}'
+                                        for k, label in enumerate(BIOMIMETIC_LAYER_LABELS)],
+                           group_colors=LAYER_COLORS_HEX)
+        
+        stl_bytes = 84 + 50 * len(triangles)
+        size = os.path.getsize(filename)
+        print(f"[SUCCESS] 索引网格已保存: {filename}")
+        print(f"  {len(vertices)} 个顶点 (焊接前 {3 * len(triangles)}), {len(faces)} 个三角形, "
+              f"文件 {size / 1e6:.2f} MB (二进制STL约 {stl_bytes / 1e6:.2f} MB)")
+        return vertices, faces, face_data
+    
+    def export_slice_stack(self, path, layer_height=25e-6, pixel_pitch=10e-6, mode='lattice',
+                           supersample=1, n_workers=None, **mesh_options):
+        """
+        直接输出DLP/SLA打印用的切片图像序列（不经过STL）
+
+        每层在层中心高度处光栅化：lattice / sdf 模式取支柱胶囊体的并集（sdf 为平滑并集，
+        blend 同 generate_sdf_mesh），cells 模式取内部单元（像素按最近种子归属单元）。
+        白色 (255) 为固化区域，图像覆盖整个支架 XY 范围，行方向 +Y 在上。
+        path: 以 .zip 结尾时写入单个zip，否则写入目录；均附带 manifest.json
+        layer_height / pixel_pitch: 层厚与像素间距 (m)
+        supersample: 每像素 supersample² 个子像素取覆盖率，边缘为灰度（抗锯齿）
+        n_workers: 渲染进程数，默认等于CPU核数
+        mesh_options: strut_radius / layer_radii / blend，同 generate_stl_mesh
+
+        返回 manifest（层数、层厚、像素间距、图像尺寸及每层的高度与实体面积比例）
+        """
+        if mode not in ('cells', 'lattice', 'sdf'):
+            raise ValueError(f"未知的网格模式: {mode}，可选 'cells'、'lattice' 或 'sdf'")
+        n_layers = max(int(np.ceil(self.z_size / layer_height - 1e-9)), 1)
+        shape = (max(int(np.ceil(self.x_size / pixel_pitch - 1e-9)), 1),
+                 max(int(np.ceil(self.y_size / pixel_pitch - 1e-9)), 1))
+        layer_z = (np.arange(n_layers) + 0.5) * layer_height
+        origin = np.zeros(2)
+        print(f"[INFO] 直接切片 ({mode}): {n_layers} 层 × {shape[0]}×{shape[1]} 像素, "
+              f"层厚 {layer_height*1e6:.1f} μm, 像素 {pixel_pitch*1e6:.1f} μm...")
+        
+        manifest = {'format': 'png-8bit-grayscale', 'mode': mode, 'n_layers': n_layers,
+                    'layer_height_um': layer_height * 1e6, 'pixel_pitch_um': pixel_pitch * 1e6,
+                    'width': shape[0], 'height': shape[1], 'supersample': int(supersample),
+                    'size_um': [self.x_size * 1e6, self.y_size * 1e6, self.z_size * 1e6]}
+        if mode == 'cells':
+            table = self.interior_cells
+            if not isinstance(table, CellTable):
+                raise ValueError("请先提取内部单元")
+            seed_rows = np.full(len(self.seeds), -1, dtype=np.int64)
+            seed_rows[table.seed_index] = np.arange(table.n_cells)
+            tasks = (('cells', z, origin, shape, pixel_pitch, supersample, (self.seeds, seed_rows))
+                     for z in layer_z)
+        else:
+            network = self.build_strut_network()
+            nodes, edges = network['nodes'], network['edges']
+            radius = self.strut_radii(mesh_options.get('strut_radius'),
+                                      mesh_options.get('layer_radii'))
+            blend = 0.0
+            if mode == 'sdf':
+                blend = self.sdf_resolution(radius, None, mesh_options.get('blend'))[1]
+            p0, p1 = nodes[edges[:, 0]], nodes[edges[:, 1]]
+            # 每层只携带 z 范围（含半径与平滑宽度）跨过该层的支柱
+            reach = radius + pixel_pitch + 6 * blend
+            z_low = np.minimum(p0[:, 2], p1[:, 2]) - reach
+            z_high = np.maximum(p0[:, 2], p1[:, 2]) + reach
+            manifest.update(strut_radius_um=[float(radius.min()) * 1e6, float(radius.max()) * 1e6],
+                            blend_um=blend * 1e6)
+            
+            def strut_tasks():
+                for z in layer_z:
+                    near = np.flatnonzero((z_low <= z) & (z <= z_high))
+                    yield ('struts', z, origin, shape, pixel_pitch, supersample,
+                           (p0[near], p1[near], radius[near], blend))
+            tasks = strut_tasks()
+        
+        manifest = write_slice_stack(path, iter_layer_images(tasks, n_workers), layer_z,
+                                     manifest, pixel_pitch)
+        solid = np.mean([layer['solid_fraction'] for layer in manifest['layers']])
+        print(f"[SUCCESS] 切片已保存: {path} ({n_layers} 层, 平均实体面积比例 {solid*100:.1f}%)")
+        return manifest
+    
+    def export_voxels(self, filename, voxel_size=None, mode='lattice', labelled=True,
+                      chunk_cells=64, n_workers=None, **mesh_options):
+        """
+        分块体素化并写出占据网格（CFD / 有限元用），格式由扩展名决定: .npy / .raw / .tif
+
+        网格覆盖整个支架，体素中心位于 (i+0.5)·voxel_size，数组顺序为 (z, y, x)。
+        lattice / sdf 模式为支柱胶囊体的并集（sdf 为平滑并集），cells 模式为内部单元。
+        labelled: True 时实体体素的值为 层编号+1（1 皮质骨 / 2 过渡层 / 3 松质骨），否则为 1；0 为空
+        voxel_size: 体素边长 (m)，默认 lattice / sdf 取最小支柱半径的一半，cells 取单元孔径中位数的1/10，
+                    且整个网格不超过 voxelize.DEFAULT_VOXEL_BUDGET 个体素
+        chunk_cells: 每块每个方向的体素数；每次只在内存中保留一个 Z 平板
+        mesh_options: strut_radius / layer_radii / blend，同 generate_stl_mesh
+
+        另写 <filename>.json 描述文件，可用 voxelize.load_voxel_volume 以内存映射打开；
+        描述同时保存在 self.voxel_volume
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in VOXEL_FORMATS:
+            raise ValueError(f"不支持的体素格式: {ext}，可选 {VOXEL_FORMATS}")
+        if mode not in ('cells', 'lattice', 'sdf'):
+            raise ValueError(f"未知的网格模式: {mode}，可选 'cells'、'lattice' 或 'sdf'")
+        z_boundaries = self.layer_z_boundaries()
+        size = np.array([self.x_size, self.y_size, self.z_size])
+        
+        if mode == 'cells':
+            table = self.interior_cells
+            if not isinstance(table, CellTable):
+                raise ValueError("请先提取内部单元")
+            if not voxel_size:
+                pores = table.pore_sizes[np.isfinite(table.pore_sizes)] * 1e-6
+                # 未统计孔径时按平均种子间距估计单元尺寸
+                cell_size = (np.median(pores) if len(pores)
+                             else np.cbrt(np.prod(size) / max(len(self.seeds), 1)))
+                voxel_size = default_voxel_size(cell_size / 10, size)
+            # 每个内部单元的范围：顶点到种子的最大距离
+            owner = csr_row_ids(table.cell_offsets)
+            vertex_distance = np.linalg.norm(table.vertices[table.cell_vertices] -
+                                             table.centers[owner], axis=1)
+            seed_layers = np.full(len(self.seeds), -1, dtype=np.int64)
+            seed_reach = np.zeros(len(self.seeds))
+            seed_layers[table.seed_index] = table.layer_ids
+            np.maximum.at(seed_reach, table.seed_index[owner], vertex_distance)
+            reach = seed_reach.max() if len(seed_reach) else 0.0
+            tree = cKDTree(self.seeds)
+            
+            def geometry(center, half):
+                near = np.sort(np.asarray(tree.query_ball_point(center, half + reach),
+                                          dtype=np.int64))
+                return self.seeds[near], seed_layers[near], seed_reach[near]
+            kind = 'cells'
+        else:
+            network = self.build_strut_network()
+            nodes, edges = network['nodes'], network['edges']
+            radius = self.strut_radii(mesh_options.get('strut_radius'),
+                                      mesh_options.get('layer_radii'))
+            default_voxel, blend = self.sdf_resolution(radius, voxel_size, mesh_options.get('blend'))
+            voxel_size = voxel_size or default_voxel_size(default_voxel, size)
+            if mode == 'lattice':
+                blend = 0.0
+            p0, p1 = nodes[edges[:, 0]], nodes[edges[:, 1]]
+            reach = (0.5 * np.linalg.norm(p1 - p0, axis=1).max() + radius.max() +
+                     voxel_size + 6 * blend) if len(edges) else 0.0
+            tree = cKDTree(0.5 * (p0 + p1)) if len(edges) else None
+            
+            def geometry(center, half):
+                near = (np.sort(np.asarray(tree.query_ball_point(center, half + reach),
+                                           dtype=np.int64)) if tree is not None
+                        else np.zeros(0, dtype=np.int64))
+                return p0[near], p1[near], radius[near], blend
+            kind = 'struts'
+        
+        shape = np.maximum(np.ceil(size / voxel_size - 1e-9).astype(np.int64), 1)
+        print(f"[INFO] 体素化 ({mode}): {shape[0]}×{shape[1]}×{shape[2]} 体素, "
+              f"体素 {voxel_size*1e6:.2f} μm → {filename}...")
+        
+        def tasks():
+            for lo, block in block_ranges(shape, chunk_cells):
+                center = (lo + 0.5 * block) * voxel_size
+                half = 0.5 * np.linalg.norm(block) * voxel_size
+                yield (kind, lo, block, voxel_size, geometry(center, half), labelled, z_boundaries)
+        
+        labels = ({'0': 'void', **{str(k + 1): label for k, label in enumerate(BIOMIMETIC_LAYER_LABELS)}}
+                  if labelled else {'0': 'void', '1': 'solid'})
+        metadata = {'mode': mode, 'voxel_size_um': voxel_size * 1e6, 'origin_um': [0.0, 0.0, 0.0],
+                    'size_um': (size * 1e6).tolist(), 'labels': labels,
+                    'layer_boundaries_um': (np.asarray(z_boundaries) * 1e6).tolist()}
+        metadata = write_voxel_volume(filename, shape, tasks(), chunk_cells, voxel_size, metadata,
+                                      n_workers)
+        self.voxel_volume = dict(metadata, path=filename)
+        
+        solid = sum(count for label, count in metadata['label_counts'].items() if label != '0')
+        print(f"[SUCCESS] 体素体已保存: {filename} (实体体积分数 {solid / shape.prod() * 100:.1f}%)")
+        return self.voxel_volume
+    
+    def build_strut_network(self, rebuild=False):
+        """
+        从内部单元提取唯一棱边（相邻单元共享的棱只保留一条），结果缓存在 self.strut_network:
+            nodes (V, 3)、edges (E, 2)、layer_ids (E,)、lengths (E,)
+        内部单元与分层边界不变时直接返回缓存（各细节层次共用同一拓扑）；rebuild=True 强制重算
+        """
+        if self.interior_cells is None or len(self.interior_cells) == 0:
+            raise ValueError("请先提取内部单元")
+        network = self.strut_network
+        if (not rebuild and network is not None and network['source'] is self.interior_cells
+                and np.array_equal(network['z_boundaries'], self.layer_z_boundaries())):
+            return network
+        nodes, edges = unique_edges(self.interior_cells)
+        # 求得的支柱半径只对原拓扑有效
+        self.strut_radius_solution = None
+        self.strut_network = {
+            'source': self.interior_cells,
+            'z_boundaries': self.layer_z_boundaries(),
+            'nodes': nodes,
+            'edges': edges,
+            'layer_ids': edge_layer_ids(nodes, edges, self.layer_z_boundaries()),
+            'lengths': np.linalg.norm(nodes[edges[:, 1]] - nodes[edges[:, 0]], axis=1),
+        }
+        return self.strut_network
+    
+    def strut_radii(self, strut_radius=None, layer_radii=None):
+        """
+        每条支柱的半径 (m)
+        layer_radii: 各层半径 (皮质骨, 过渡层, 松质骨)，优先于 strut_radius
+        strut_radius: 统一半径；两者都不指定时使用 solve_strut_radius() 的结果，
+                      尚未求解时取棱长中位数的 0.15 倍
+        """
+        network = self.strut_network
+        solution = self.strut_radius_solution
+        if layer_radii is None and strut_radius is None and solution is not None:
+            layer_radii = solution.get('layer_radii')
+            strut_radius = solution.get('strut_radius')
+        if layer_radii is not None:
+            return np.asarray(layer_radii, dtype=float)[network['layer_ids']]
+        if strut_radius is None:
+            strut_radius = 0.15 * np.median(network['lengths'])
+        return np.full(len(network['edges']), float(strut_radius))
+    
+    def _porosity_model(self):
+        """孔隙率计算共用的数据：缓存的支柱网络、分层边界、总体积与各层体积 (m³)"""
+        network = self.build_strut_network()
+        z_boundaries = self.layer_z_boundaries()
+        heights = np.diff(np.concatenate([[0.0], z_boundaries, [self.z_size]]))
+        box = self.x_size * self.y_size * self.z_size
+        return network, z_boundaries, box, self.x_size * self.y_size * heights
+    
+    def measure_porosity(self, strut_radius=None, layer_radii=None, samples_per_strut=64,
+                         confidence=0.95, random_state=None):
+        """
+        测量支柱晶格（胶囊体并集）的实际孔隙率 = 1 - 实体体积 / 支架包围盒体积
+        同时给出解析估计（忽略节点附近的支柱重叠，支柱粗时偏低）与分层蒙特卡罗估计及其置信区间；
+        各层孔隙率按该层的包围盒体积计算。只使用缓存的支柱网络，不重新剖分
+
+        strut_radius / layer_radii: 支柱半径 (m)，见 strut_radii()
+        samples_per_strut: 每根支柱的蒙特卡罗样本数
+        confidence: 置信区间的置信水平
+
+        结果保存在 self.porosity_measurement
+        """
+        network, z_boundaries, box, layer_boxes = self._porosity_model()
+        nodes, edges, lengths = network['nodes'], network['edges'], network['lengths']
+        radius = self.strut_radii(strut_radius, layer_radii)
+        print(f"[INFO] 测量孔隙率: {len(edges)} 根支柱 × {samples_per_strut} 个样本...")
+        
+        analytic, analytic_layers = analytic_solid_volume(nodes, edges, lengths, radius, z_boundaries)
+        volume, error, layer_volumes, layer_errors = monte_carlo_solid_volume(
+            nodes, edges, lengths, radius, strut_neighbors(nodes, edges, radius),
+            samples_per_strut, random_state, z_boundaries)
+        z = confidence_factor(confidence)
+        
+        layers = []
+        for k, name in enumerate(self.layer_names()):
+            porosity = 1 - layer_volumes[k] / layer_boxes[k]
+            half = z * layer_errors[k] / layer_boxes[k]
+            layers.append({'layer': name,
+                           'strut_radius_um': float(np.median(radius[network['layer_ids'] == k])) * 1e6
+                           if (network['layer_ids'] == k).any() else None,
+                           'porosity': float(porosity),
+                           'confidence_interval': [float(porosity - half), float(porosity + half)],
+                           'analytic_porosity': float(1 - analytic_layers[k] / layer_boxes[k])})
+        porosity = 1 - volume / box
+        half = z * error / box
+        self.porosity_measurement = {
+            'target_porosity': float(self.target_porosity),
+            'porosity': float(porosity),
+            'std_error': float(error / box),
+            'confidence': float(confidence),
+            'confidence_interval': [float(porosity - half), float(porosity + half)],
+            'analytic_porosity': float(1 - analytic / box),
+            'solid_volume_mm3': float(volume) * 1e9,
+            'samples_per_strut': int(samples_per_strut),
+            'layers': layers,
+        }
         
-        self.seeds = np.vstack(seeds)
+        print(f"[SUCCESS] 孔隙率: {porosity*100:.2f}% ± {half*100:.2f}% "
+              f"({confidence*100:.0f}% 置信区间)，解析估计 {(1 - analytic / box)*100:.2f}%，"
+              f"目标 {self.target_porosity*100:.1f}%")
+        for layer in layers:
+            print(f"  {layer['layer']}: {layer['porosity']*100:.2f}%")
+        return self.porosity_measurement
+    
+    def solve_strut_radius(self, target_porosity=None, per_layer=False, tol=0.005,
+                           samples_per_strut=16, random_state=0, max_iter=10):
+        """
+        求解使孔隙率达到目标值的支柱半径
+        先在解析模型上二分出初值，再用蒙特卡罗测量迭代修正：雅可比矩阵初值取解析模型的导数
+        （乘以蒙特卡罗/解析的体积比），之后按每轮的测量结果做 Broyden 更新（统一半径时即割线法），
+        直到测量值与目标之差不超过 tol。蒙特卡罗每轮使用相同的随机数，测量值随半径平滑变化；
+        支柱网络、棱长与候选相交支柱对都直接复用，不重新剖分
+
+        target_porosity: 目标孔隙率，默认 self.target_porosity；per_layer=True 时可为各层目标
+        per_layer: True 时同时求解各层半径（跨层支柱与节点球造成的层间耦合由雅可比矩阵处理），
+                   否则求解统一半径
+        tol: 孔隙率的容差（绝对值）
+        samples_per_strut: 每轮每根支柱的蒙特卡罗样本数
+        max_iter: 蒙特卡罗测量的最大轮数
+
+        结果保存在 self.strut_radius_solution，此后 strut_radii() 默认使用该半径
+        """
+        start_time = time.time()
+        network, z_boundaries, box, layer_boxes = self._porosity_model()
+        nodes, edges, lengths = network['nodes'], network['edges'], network['lengths']
+        layer_ids = network['layer_ids']
+        n_layers = len(layer_boxes)
+        if target_porosity is None:
+            target_porosity = self.target_porosity
+        target = np.broadcast_to(np.asarray(target_porosity, dtype=float), (n_layers,))
+        if not per_layer:
+            target = target[:1]
+            boxes = np.array([box])
+        else:
+            boxes = layer_boxes
+        target_volume = (1 - target) * boxes
+        print(f"[INFO] 求解支柱半径: 目标孔隙率 {np.round(target * 100, 1).tolist()}% "
+              f"({'分层' if per_layer else '统一'})...")
+        
+        def expand(radii):
+            return radii[layer_ids] if per_layer else np.full(len(edges), radii[0])
+        
+        def analytic(radii):
+            if per_layer:
+                return analytic_solid_volume(nodes, edges, lengths, expand(radii), z_boundaries)[1]
+            return np.array([analytic_solid_volume(nodes, edges, lengths, expand(radii))])
+        
+        neighbors = [None, 0.0]
+        
+        def measure(radii):
+            # 候选对按 1.25 倍半径建立，半径在此范围内变化时直接复用
+            if radii.max() > neighbors[1]:
+                neighbors[1] = 1.25 * radii.max()
+                neighbors[0] = strut_neighbors(nodes, edges, neighbors[1])
+            volume, _, layer_volumes, _ = monte_carlo_solid_volume(
+                nodes, edges, lengths, expand(radii), neighbors[0], samples_per_strut,
+                random_state, z_boundaries)
+            return layer_volumes if per_layer else np.array([volume])
+        
+        # 初值：在解析模型上依次二分各层半径，上限取最长支柱长度（此时解析体积远超包围盒）
+        high = float(lengths.max())
+        radii = np.full(len(target), 0.15 * float(np.median(lengths)))
+        bisections = 0
+        for k in range(len(target)):
+            def layer_volume(r):
+                trial = radii.copy()
+                trial[k] = r
+                return analytic(trial)[k]
+            radii[k], steps = bisect(layer_volume, target_volume[k], 0.0, high, tol=1e-4 * high)
+            bisections += steps
+        
+        measured = measure(radii)
+        base = analytic(radii)
+        jacobian = np.empty((len(target), len(target)))
+        for k in range(len(target)):
+            step = np.zeros(len(target))
+            step[k] = 1e-3 * radii[k]
+            jacobian[:, k] = (analytic(radii + step) - base) / step[k]
+        jacobian *= (measured / np.maximum(base, 1e-300))[:, None]
+        
+        for iteration in range(1, max_iter + 1):
+            residual = target_volume - measured
+            if np.abs(residual / boxes).max() <= tol or iteration == max_iter:
+                break
+            # 每轮半径变化限制在 0.5-2 倍之内，防止远离初值时的线性外推失真
+            new_radii = np.clip(radii + np.linalg.lstsq(jacobian, residual, rcond=None)[0],
+                                0.5 * radii, 2.0 * radii)
+            new_measured = measure(new_radii)
+            dr, dv = new_radii - radii, new_measured - measured
+            if dr @ dr > 0:
+                jacobian += np.outer(dv - jacobian @ dr, dr) / (dr @ dr)
+            radii, measured = new_radii, new_measured
+        
+        porosity = 1 - measured / boxes
+        converged = bool(np.abs(porosity - target).max() <= tol)
+        self.strut_radius_solution = {
+            'target_porosity': target.tolist() if per_layer else float(target[0]),
+            'porosity': porosity.tolist() if per_layer else float(porosity[0]),
+            'converged': converged,
+            'iterations': iteration,
+            'bisection_steps': bisections,
+            'samples_per_strut': int(samples_per_strut),
+            'elapsed_s': time.time() - start_time,
+        }
+        if per_layer:
+            self.strut_radius_solution['layer_radii'] = radii.tolist()
+        else:
+            self.strut_radius_solution['strut_radius'] = float(radii[0])
+        
+        message = (f"半径 {np.round(radii * 1e6, 2).tolist()} µm，孔隙率 "
+                   f"{np.round(porosity * 100, 2).tolist()}%，{iteration} 轮测量，"
+                   f"{self.strut_radius_solution['elapsed_s']:.2f} s")
+        if converged:
+            print(f"[SUCCESS] {message}")
+        else:
+            print(f"[WARNING] 未在 {max_iter} 轮内达到容差 {tol}: {message}")
+        return self.strut_radius_solution
+    
+    def estimate_stiffness(self, material='Ti6Al4V', strut_radius=None, layer_radii=None,
+                           axes='xyz', strain=1e-3, min_length=None, rtol=1e-5, maxiter=None,
+                           n_aggregates=1000, chunk_size=100000):
+        """
+        支柱晶格的等效杨氏模量（三维梁单元框架模型，代替外部有限元软件做初筛）
+        每根唯一棱为圆截面 Timoshenko 梁，刚度矩阵向量化组装为稀疏矩阵，
+        沿各轴做单轴压缩（两端节点与压板粘结），以节点块 Jacobi 加刚体模态粗空间的
+        两层预条件共轭梯度法求解
+
+        material: frame.MATERIALS 中的名称或 (E (Pa), ν)
+        strut_radius / layer_radii: 支柱半径 (m)，见 strut_radii()
+        axes: 加载方向，'x'、'y'、'z' 的组合
+        strain: 名义压缩应变
+        min_length: 短于该长度的支柱先合并到节点（极短支柱刚度极大，使方程病态），
+                    默认棱长中位数的 0.2 倍
+        rtol / maxiter: 共轭梯度法的相对残差与最大迭代次数
+        n_aggregates: 粗空间的节点聚合数，0 为只用块 Jacobi
+        chunk_size: 组装时每块的单元数
+
+        结果保存在 self.stiffness
+        """
+        start_time = time.time()
+        network = self.build_strut_network()
+        youngs_modulus, poisson_ratio = resolve_material(material)
+        radius = self.strut_radii(strut_radius, layer_radii)
+        if min_length is None:
+            min_length = 0.2 * float(np.median(network['lengths']))
+        nodes, edges, edge_index, _ = collapse_short_struts(network['nodes'], network['edges'],
+                                                            min_length)
+        radius = radius[edge_index]
+        print(f"[INFO] 梁单元刚度分析: {len(edges)} 根支柱, {len(nodes)} 个节点, "
+              f"E = {youngs_modulus/1e9:.1f} GPa, ν = {poisson_ratio:.2f}...")
+        
+        stiffness = assemble_stiffness(nodes, edges, radius, youngs_modulus, poisson_ratio,
+                                       chunk_size=chunk_size)
+        assembly_time = time.time() - start_time
+        results = {}
+        for axis_name in axes:
+            result = uniaxial_compression(nodes, edges, radius, youngs_modulus, poisson_ratio,
+                                          'xyz'.index(axis_name), strain=strain,
+                                          stiffness=stiffness, rtol=rtol, maxiter=maxiter,
+                                          n_aggregates=n_aggregates)
+            modulus = result['modulus']
+            results[axis_name] = {
+                'modulus_gpa': None if modulus is None else modulus / 1e9,
+                'relative_modulus': None if modulus is None else modulus / youngs_modulus,
+                'force_n': result['force'], 'length_um': result['length'] * 1e6,
+                'area_mm2': result['area'] * 1e6, 'loaded_nodes': result['loaded_nodes'],
+                'cg_iterations': result['iterations'], 'converged': result['converged'],
+            }
+            if modulus is not None:
+                print(f"  E_{axis_name} = {modulus/1e9:.3f} GPa (E/Es = {modulus/youngs_modulus:.4f})，"
+                      f"CG {result['iterations']} 次迭代")
+        
+        self.stiffness = {
+            'material': material if isinstance(material, str) else None,
+            'youngs_modulus_gpa': youngs_modulus / 1e9,
+            'poisson_ratio': poisson_ratio,
+            'n_struts': int(len(edges)),
+            'n_nodes': int(len(nodes)),
+            'strain': float(strain),
+            'axes': results,
+            'assembly_s': assembly_time,
+            'elapsed_s': time.time() - start_time,
+        }
+        for bone, (low, high) in BONE_MODULUS.items():
+            print(f"  参考 {bone} 骨: {low/1e9:g}-{high/1e9:g} GPa")
+        print(f"[SUCCESS] 刚度分析完成 ({self.stiffness['elapsed_s']:.2f} s)")
+        return self.stiffness
+    
+    def generate_lattice_mesh(self, strut_radius=None, layer_radii=None, n_facets=8,
+                              node_caps=True, chunk_size=200000):
+        """
+        支柱晶格网格：每条唯一棱生成一个 n_facets 棱柱，节点处可加球形节点
+
+        strut_radius / layer_radii: 支柱半径 (m)，见 strut_radii()
+        n_facets: 棱柱侧面数（圆柱近似精度）
+        node_caps: True 时在节点处放置球（半径为相连支柱的最大半径）；
+                   支柱两端封闭，每个部件都是封闭壳体（共线相接的支柱连成一个壳体）
+        三角形按 chunk_size 条棱一批向量化生成，直接填入预分配的网格
+        """
+        print("[INFO] 生成支柱晶格网格...")
+        network = self.build_strut_network()
+        nodes, edges = network['nodes'], network['edges']
+        radius = self.strut_radii(strut_radius, layer_radii)
+        
+        n_open_ends = sum(int((~caps).sum()) for caps in strut_end_caps(nodes, edges, radius))
+        n_triangles = lattice_triangle_count(len(edges), len(np.unique(edges)),
+                                             n_facets=n_facets, node_caps=node_caps,
+                                             n_open_ends=n_open_ends)
+        
+        self.mesh = stl_mesh.Mesh(np.zeros(n_triangles, dtype=stl_mesh.Mesh.dtype))
+        filled = 0
+        for triangles in iter_lattice_triangles(nodes, edges, radius, n_facets=n_facets,
+                                                node_caps=node_caps, chunk_size=chunk_size):
+            self.mesh.vectors[filled:filled + len(triangles)] = triangles
+            filled += len(triangles)
+        self.mesh.update_normals()
+        
+        counts = np.bincount(network['layer_ids'], minlength=3)
+        print(f"[SUCCESS] 支柱晶格: {len(nodes)} 个节点, {len(edges)} 根支柱 "
+              f"(各层 {counts[0]}/{counts[1]}/{counts[2]}), {filled} 个三角形")
+        print(f"  支柱半径: {radius.min()*1e6:.1f}-{radius.max()*1e6:.1f} μm, "
+              f"棱长中位数 {np.median(network['lengths'])*1e6:.1f} μm")
+        return self.mesh
+    
+    def generate_lod_mesh(self, level='preview', mode='lattice', reference=None, chunk_size=200000,
+                          **mesh_options):
+        """
+        按细节层次生成网格（支柱网络取自缓存，不重新剖分）
+
+        level: 'print' / 'review' / 'preview' 或参数字典，见 lod.DEFAULT_LOD_LEVELS
+            n_facets / node_caps - 支柱棱柱侧面数与节点球（lattice）
+            collapse_below       - 合并短于 该比例×棱长中位数 的支柱（lattice / sdf）
+            voxel_scale          - 体素放大倍数（sdf）
+            face_fraction        - QEM简化后保留的三角形比例（lattice / sdf）
+        reference: (vertices, faces) 参考网格，给出时记录本层与它的最大偏差；
+                   默认与同一模式的 'print' 级网格比较，为 False 时不测量
+        mesh_options: strut_radius / layer_radii / voxel_size / blend 等，同 generate_stl_mesh
+
+        返回 (mesh, record)，record 记录三角形预算、实际三角形数与最大偏差 (μm)
+        """
+        level = resolve_lod_level(level)
+        print(f"[INFO] 生成细节层次 '{level['name']}' ({mode})...")
+        triangles, record = self._lod_triangles(level, mode, chunk_size, mesh_options)
+        vertices, faces, _ = weld_triangles(triangles)
+        # 单元模式的面本身就是平面多边形的最少三角形，且相邻单元的共面反向壳体
+        # 独立简化会互相错开，因此不做简化
+        fraction = 1.0 if mode == 'cells' else level['face_fraction']
+        budget = int(np.ceil(fraction * len(faces)))
+        if budget < len(faces):
+            vertices, faces = quadric_decimate(vertices, faces, budget)
+        record.update(triangle_budget=budget, n_triangles=int(len(faces)),
+                      n_vertices=int(len(vertices)))
+        
+        if reference is None:
+            reference = weld_triangles(self._lod_triangles(resolve_lod_level('print'), mode,
+                                                           chunk_size, mesh_options)[0])[:2]
+        if reference is not False:
+            deviation = hausdorff_deviation(reference[0], reference[1], vertices, faces)
+            record['max_deviation_um'] = max(deviation, record['node_shift_um'] * 1e-6) * 1e6
+        
+        self.mesh = stl_mesh.Mesh(np.zeros(len(faces), dtype=stl_mesh.Mesh.dtype))
+        self.mesh.vectors[:] = vertices[faces]
+        self.mesh.update_normals()
+        
+        deviation_text = (f", 最大偏差 {record['max_deviation_um']:.2f} μm"
+                          if 'max_deviation_um' in record else "")
+        print(f"[SUCCESS] 细节层次 '{level['name']}': {record['n_triangles']} 个三角形 "
+              f"(预算 {budget}){deviation_text}")
+        return self.mesh, record
+    
+    def generate_lod_meshes(self, levels=('print', 'review', 'preview'), mode='lattice',
+                            chunk_size=200000, **mesh_options):
+        """
+        一次生成多个细节层次，全部共用缓存的支柱网络
+        第一个层次作为参考网格，其余层次记录与它的最大偏差
+
+        返回 {名称: mesh}；每层的记录保存在 self.lod_records，并随 export_config_json 导出
+        """
+        meshes = {}
+        records = []
+        reference = None
+        for level in levels:
+            mesh, record = self.generate_lod_mesh(level, mode=mode,
+                                                  reference=False if reference is None else reference,
+                                                  chunk_size=chunk_size, **mesh_options)
+            if reference is None:
+                # 网格已按顶点焊接，直接取回索引形式作为参考
+                reference = weld_triangles(mesh.vectors.astype(float))[:2]
+                record['max_deviation_um'] = 0.0
+            meshes[record['level']] = mesh
+            records.append(record)
+        self.lod_records = records
+        return meshes
+    
+    def _lod_triangles(self, level, mode, chunk_size, mesh_options):
+        """某一细节层次简化前的三角形汤，以及该层次的拓扑记录"""
+        record = {'level': level['name'], 'mode': mode, 'node_shift_um': 0.0}
+        if mode == 'cells':
+            parts = list(self.interior_cells.iter_cell_triangles(chunk_size))
+            return np.concatenate(parts + [np.zeros((0, 3, 3))]), record
+        
+        network = self.build_strut_network()
+        nodes, edges = network['nodes'], network['edges']
+        radius = self.strut_radii(mesh_options.get('strut_radius'), mesh_options.get('layer_radii'))
+        collapse_length = level['collapse_below'] * np.median(network['lengths'])
+        if collapse_length > 0:
+            nodes, edges, kept, shift = collapse_short_struts(nodes, edges, collapse_length)
+            radius = radius[kept]
+            record['node_shift_um'] = float(shift.max()) * 1e6
+        record.update(collapse_length_um=float(collapse_length) * 1e6, n_struts=int(len(edges)))
+        
+        if mode == 'lattice':
+            record.update(n_facets=level['n_facets'], node_caps=level['node_caps'])
+            parts = list(iter_lattice_triangles(nodes, edges, radius, n_facets=level['n_facets'],
+                                                node_caps=level['node_caps'],
+                                                chunk_size=chunk_size))
+        elif mode == 'sdf':
+            voxel_size, blend = self.sdf_resolution(radius, mesh_options.get('voxel_size'),
+                                                    mesh_options.get('blend'))
+            voxel_size *= level['voxel_scale']
+            record['voxel_size_um'] = voxel_size * 1e6
+            parts = list(iter_sdf_triangles(nodes, edges, radius, voxel_size, blend=blend,
+                                            chunk_cells=mesh_options.get('chunk_cells', 48),
+                                            n_workers=mesh_options.get('n_workers')))
+        else:
+            raise ValueError(f"未知的网格模式: {mode}，可选 'cells'、'lattice' 或 'sdf'")
+        return np.concatenate(parts + [np.zeros((0, 3, 3))]), record
+    
+    def sdf_resolution(self, radius, voxel_size=None, blend=None):
+        """
+        距离场网格的体素边长与节点圆角宽度 (m)
+        默认体素取最小支柱半径的一半（直径方向约4个体素），圆角宽度取最小半径的一半
+        """
+        if voxel_size is None:
+            voxel_size = 0.5 * radius.min()
+        if blend is None:
+            blend = 0.5 * radius.min()
+        return float(voxel_size), float(blend)
+    
+    def generate_sdf_mesh(self, strut_radius=None, layer_radii=None, voxel_size=None, blend=None,
+                          chunk_cells=48, n_workers=None):
+        """
+        隐式曲面网格：在体素网格上计算支柱网络的有符号距离场并提取等值面
+
+        支柱为胶囊体，节点处用平滑并集融合，得到圆滑的过渡圆角（无需单独的节点球）
+        strut_radius / layer_radii: 支柱半径 (m)，见 strut_radii()
+        voxel_size / blend: 体素边长与圆角宽度 (m)，见 sdf_resolution()
+        chunk_cells: 每块每个方向的体素数，块在进程池中独立计算，块间接缝最后焊接
+        n_workers: 进程数，默认等于CPU核数
+        """
+        print("[INFO] 生成隐式曲面网格...")
+        network = self.build_strut_network()
+        radius = self.strut_radii(strut_radius, layer_radii)
+        voxel_size, blend = self.sdf_resolution(radius, voxel_size, blend)
+        
+        vertices, faces = sdf_mesh(network['nodes'], network['edges'], radius, voxel_size,
+                                   blend=blend, chunk_cells=chunk_cells, n_workers=n_workers)
+        
+        self.mesh = stl_mesh.Mesh(np.zeros(len(faces), dtype=stl_mesh.Mesh.dtype))
+        self.mesh.vectors[:] = vertices[faces]
+        self.mesh.update_normals()
+        
+        print(f"[SUCCESS] 隐式曲面: {len(network['edges'])} 根支柱, {len(vertices)} 个顶点, "
+              f"{len(faces)} 个三角形")
+        print(f"  体素 {voxel_size*1e6:.2f} μm, 圆角宽度 {blend*1e6:.2f} μm, "
+              f"支柱半径 {radius.min()*1e6:.1f}-{radius.max()*1e6:.1f} μm")
+        return self.mesh
+    
+    def layer_z_boundaries(self):
+        """分层Z边界 (m)：皮质骨 | 过渡层 | 松质骨"""
+        return np.asarray(self.layer_fractions, dtype=float) * self.z_size
+    
+    def layer_names(self):
+        """三层名称（含实际比例），例如 '皮质骨层 (0-20%)'"""
+        return biomimetic_layer_names(self.layer_fractions)
+    
+    def assign_layer_ids(self):
+        """
+        按当前分层边界计算每个种子的层编号 (0 皮质骨, 1 过渡层, 2 松质骨)
+        结果保存在 self.seed_layer_ids，单元的层编号由其种子编号直接索引得到，
+        所有按层着色的绘图都用它索引颜色查找表
+        """
+        self.seed_layer_ids = assign_layers(self.seeds[:, 2], self.layer_z_boundaries())
+        return self.seed_layer_ids
+    
+    def generate_streaming_stl(self, stl_file, gradient_param=None, profile=None,
+                               slab_thickness=None, overlap=None, random_state=None):
+        """
+        有界内存的Z向分层流式生成：种子 → Voronoi → 内部单元 → 统计 → STL
+
+        支架沿Z方向被划分为若干厚度为 slab_thickness 的层片，每个层片连同上下 overlap
+        范围内的幽灵种子一起由一个子生成器按原有流程处理（compute_voronoi →
+        extract_interior_cells → compute_cell_statistics → generate_stl_mesh），
+        只保留种子位于本层片内的单元，三角形直接追加写入STL后即释放该层片。
+        峰值内存只取决于层片厚度，与总种子数无关。
+
+        slab_thickness: 层片厚度 (m)，默认约为 z_size / 4，且不小于幽灵区厚度
+        overlap: 幽灵区厚度 (m)，默认在每个层片边界处取局部平均种子间距的3倍
+                 （边界附近最稀疏处）；幽灵区不小于层片厚度时峰值内存不再受层片厚度约束，会给出警告
+        random_state: 整数随机种子；各层片的种子由 (random_state, 层片编号) 确定，
+                      相邻层片重新生成的幽灵种子与其本身完全一致
+
+        返回各层孔隙统计（格式同 analyze_gradient_properties）
+        """
+        print("[INFO] Z向分层流式生成支架...")
         
-        print(f"[SUCCESS] 仿生梯度种子点生成完成")
-        print(f"  皮质骨层(0-20%): {n_surface} 个种子 - 高密度，小孔隙")
-        print(f"  过渡层(20-50%): {n_middle} 个种子 - 中等密度")
-        print(f"  松质骨层(50-100%): {n_core} 个种子 - 低密度，大孔隙")
-        print(f"  总计: {len(self.seeds)} 个种子 (仿生骨结构)")
+        if gradient_param is None:
+            gradient_param = dict(DEFAULT_GRADIENT_PARAM)
+        if profile is None:
+            profile = self.gradient_type
+        self.gradient_param = gradient_param
+        self.density_profile = resolve_density_profile(profile, gradient_param, self.z_size)
+        
+        if random_state is None:
+            random_state = int(np.random.randint(2**31 - 1))
+        
+        def boundary_overlap(z):
+            # 边界两侧3个局部间距内最稀疏处的间距的3倍
+            if overlap is not None:
+                return np.full(len(z), float(overlap))
+            spacing = local_seed_spacing(self.density_profile, z, self.z_size)
+            return 3 * local_seed_spacing(self.density_profile, z, self.z_size, window=3 * spacing)
+        
+        if slab_thickness is None:
+            # 层片比幽灵区还薄时每个层片都要剖分大半个支架，不如加厚层片
+            z_probe = np.linspace(0, self.z_size, 65)[1:-1]
+            slab_thickness = max(self.z_size / 4, boundary_overlap(z_probe).max())
+        
+        n_slabs = int(np.ceil(self.z_size / slab_thickness - 1e-9))
+        z_edges = np.linspace(0, self.z_size, n_slabs + 1)
+        # 每个层片边界各自的幽灵区厚度（支架上下表面不需要）
+        overlaps = np.zeros(n_slabs + 1)
+        overlaps[1:-1] = boundary_overlap(z_edges[1:-1])
+        if n_slabs > 1 and overlaps[1:-1].max() >= slab_thickness:
+            print(f"[WARNING] 幽灵区 ({overlaps[1:-1].max()*1e6:.1f} μm) 不小于层片厚度 "
+                  f"({slab_thickness*1e6:.1f} μm)，峰值内存不再受层片厚度约束，建议增大 slab_thickness")
+        slab_cache = {}
+        
+        def slab_seeds(k):
+            # 只缓存相邻几个层片的种子，保证内存有界
+            if k not in slab_cache:
+                slab_cache[k] = sample_seeds_from_profile(
+                    self.density_profile, self.x_size, self.y_size, self.z_size,
+                    z_range=(z_edges[k], z_edges[k + 1]),
+                    random_state=np.random.default_rng([random_state, k])
+                )
+            return slab_cache[k]
+        
+        # 各层统计只需保留每个单元的Z与孔径，以及各层种子数
+        layer_bounds = self.layer_z_boundaries()
+        n_layers = len(layer_bounds) + 1
+        cell_z_parts = []
+        pore_parts = []
+        seed_counts = np.zeros(n_layers, dtype=int)
+        n_seeds_total = 0
+        n_inexact = 0
+        
+        with BinarySTLWriter(stl_file) as writer:
+            for k in range(n_slabs):
+                z_lo, z_hi = z_edges[k], z_edges[k + 1]
+                ext_lo = max(0.0, z_lo - overlaps[k])
+                ext_hi = min(self.z_size, z_hi + overlaps[k + 1])
+                
+                for old in [key for key in slab_cache if z_edges[key + 1] < ext_lo]:
+                    del slab_cache[old]
+                neighbours = [j for j in range(n_slabs)
+                              if z_edges[j] <= ext_hi and z_edges[j + 1] >= ext_lo]
+                seeds = np.vstack([slab_seeds(j) for j in neighbours])
+                seeds = seeds[(seeds[:, 2] >= ext_lo) & (seeds[:, 2] <= ext_hi)]
+                n_seeds_total += len(slab_seeds(k))
+                seed_counts += np.bincount(assign_layers(slab_seeds(k)[:, 2], layer_bounds),
+                                           minlength=n_layers)
+                
+                # 子生成器在局部坐标系中处理 [ext_lo, ext_hi] 范围
+                slab = GradientVoronoiScaffoldGenerator(
+                    x_size=self.x_size, y_size=self.y_size, z_size=ext_hi - ext_lo,
+                    target_porosity=self.target_porosity, gradient_type=self.gradient_type
+                )
+                slab.seeds = seeds - [0.0, 0.0, ext_lo]
+                # 层编号按全局Z坐标确定
+                slab.seed_layer_ids = assign_layers(seeds[:, 2], layer_bounds)
+                slab.compute_voronoi()
+                slab.extract_interior_cells()
+                
+                # 只保留种子位于本层片内的单元
+                cells = slab.interior_cells
+                z_centers = cells.centers[:, 2] + ext_lo
+                owned_mask = (z_centers >= z_lo) & (z_centers < z_hi)
+                if k == n_slabs - 1:
+                    owned_mask |= z_centers == z_hi
+                owned = cells.subset(owned_mask)
+                z_centers = z_centers[owned_mask]
+                
+                # 幽灵区是否足够：单元每个顶点的空球都应落在已知种子范围内
+                row_ids = csr_row_ids(owned.cell_offsets)
+                vertex_xyz = owned.vertices[owned.cell_vertices]
+                radius = np.linalg.norm(vertex_xyz - owned.centers[row_ids], axis=1)
+                escaped = np.zeros(len(radius), dtype=bool)
+                if ext_lo > 0:
+                    escaped |= vertex_xyz[:, 2] - radius < 0
+                if ext_hi < self.z_size:
+                    escaped |= vertex_xyz[:, 2] + radius > slab.z_size
+                n_inexact += len(np.unique(row_ids[escaped]))
+                
+                slab.interior_cells = owned
+                if len(owned):
+                    slab.compute_cell_statistics()
+                    for triangles in slab.generate_stl_mesh(chunks=True):
+                        triangles[..., 2] += ext_lo
+                        writer.write(triangles)
+                    
+                    cell_z_parts.append(z_centers)
+                    pore_parts.append(np.asarray(slab.pore_sizes, dtype=float))
+                
+                print(f"  层片 {k + 1}/{n_slabs} [{z_lo*1e6:.1f}-{z_hi*1e6:.1f} μm]: "
+                      f"{len(seeds)} 个种子, {len(owned)} 个内部单元")
+                del slab, seeds, cells, owned
+        
+        if n_inexact:
+            print(f"[WARNING] {n_inexact} 个单元可能受层片边界影响，建议增大 overlap")
+        
+        stats = compute_gradient_statistics(
+            np.concatenate(cell_z_parts + [np.empty(0)]),
+            np.concatenate(pore_parts + [np.empty(0)]),
+            self.x_size, self.y_size, self.z_size, seed_counts=seed_counts,
+            breakpoints=layer_bounds, names=self.layer_names(), labels=BIOMIMETIC_LAYER_LABELS)
+        gradient_analysis = stats.layer_summary()
+        self.gradient_stats = stats
+        self.gradient_analysis = gradient_analysis
         
-        return self.seeds
+        print(f"[SUCCESS] 流式生成完成: {n_seeds_total} 个种子, {stats.n_pores.sum()} 个内部单元, "
+              f"{writer.n_triangles} 个三角形")
+        print(f"  STL: {stl_file}")
+        return gradient_analysis
     
-    def analyze_gradient_properties(self):
-        """分析梯度特性"""
-        print("[INFO] 分析梯度特性...")
+    def build_pore_network(self, rebuild=False):
+        """
+        以内部单元为孔、相邻单元的公共面为喉道的孔隙网络（见 pore_network.throat_network），
+        结果缓存在 self.pore_network；内部单元不变时直接返回缓存，rebuild=True 强制重算
+        """
+        table = self.interior_cells
+        if not isinstance(table, CellTable) or table.n_cells == 0:
+            raise ValueError("请先提取内部单元")
+        network = self.pore_network
+        if not rebuild and network is not None and network['source'] is table:
+            return network
+        # 基于旧孔隙网络的分析结果随之失效
+        self.interconnectivity = None
+        self.permeability = None
+        if np.isnan(table.volumes).any():
+            table.compute_statistics()
+        self.pore_network = dict(throat_network(table, (self.x_size, self.y_size, self.z_size)),
+                                 source=table)
+        return self.pore_network
+    
+    def analyze_interconnectivity(self, min_throat_um=0.0, percentiles=DEFAULT_PERCENTILES):
+        """
+        孔隙连通性分析：喉道（相邻孔之间的窗口）尺寸分布、连通分量与表面可达性
         
-        # 按仿生骨结构分层分析孔隙大小
-        z_layers = [
-            (0, 0.2 * self.z_size),                    # 皮质骨层
-            (0.2 * self.z_size, 0.5 * self.z_size),   # 过渡层
-            (0.5 * self.z_size, self.z_size)          # 松质骨层
-        ]
-        layer_names = ['皮质骨层 (0-20%)', '过渡层 (20-50%)', '松质骨层 (50-100%)']
+        min_throat_um: 等效直径小于该值 (μm) 的喉道视为细胞无法通过，连通性只沿更大的喉道计算
+        percentiles: 喉道尺寸的百分位数
         
-        gradient_analysis = {}
+        reachable_fraction 为从支架各表面 (x-, x+, y-, y+, z-, z+) 出发可到达的孔体积比例；
+        z- 为皮质骨表面，percolates['z'] 表示孔隙从皮质骨表面贯通到松质骨一侧。
+        结果保存在 self.interconnectivity
+        """
+        print(f"[INFO] 孔隙连通性分析 (最小喉道 {min_throat_um:.1f} μm)...")
+        network = self.build_pore_network()
+        table = self.interior_cells
+        graph = adjacency_matrix(table.n_cells, network, weight='diameter',
+                                 min_diameter=min_throat_um * 1e-6)
+        reach = surface_reachability(graph, table.volumes, network['surface'])
+        
+        names = self.layer_names()
+        overall = throat_size_summary(network['diameter'], percentiles=percentiles)[0]
+        layers = throat_size_summary(network['diameter'],
+                                     throat_layers(network, self.layer_z_boundaries()),
+                                     len(names), percentiles)
+        largest = int(np.argmax(reach['component_volumes']))
+        total = max(table.volumes.sum(), 1e-300)
+        self.interconnectivity = {
+            'min_throat_um': float(min_throat_um),
+            'n_pores': int(table.n_cells),
+            'n_throats': int(len(network['diameter'])),
+            'open_throats': int(graph.nnz // 2),
+            'mean_coordination': float(graph.nnz / table.n_cells),
+            'throat_size': overall,
+            'layer_throat_size': {name: entry for name, entry in zip(names, layers) if entry},
+            'n_components': reach['n_components'],
+            'largest_component_fraction': float(reach['component_volumes'][largest] / total),
+            'isolated_pores': int((np.bincount(reach['labels']) == 1).sum()),
+            'reachable_fraction': {name: float(f) for (name, _, _), f in
+                                   zip(BOX_FACES, reach['reachable_fraction'])},
+            'percolates': reach['percolates'],
+        }
         
-        for (z_min, z_max), name in zip(z_layers, layer_names):
-            layer_pores = []
-            
-            for idx, pore_size in enumerate(self.pore_sizes):
-                # 根据pore_size关联到相应层
-                cell_center_z = self.interior_cells[idx]['center'][2]
-                
-                if z_min <= cell_center_z < z_max:
-                    layer_pores.append(pore_size)
-            
-            if layer_pores:
-                gradient_analysis[name] = {
-                    'mean_pore_size_um': np.mean(layer_pores),
-                    'std_pore_size_um': np.std(layer_pores),
-                    'min_pore_size_um': np.min(layer_pores),
-                    'max_pore_size_um': np.max(layer_pores),
-                    'n_pores': len(layer_pores)
-                }
+        result = self.interconnectivity
+        print(f"  喉道: {result['n_throats']} 个，连通 {result['open_throats']} 个，"
+              f"平均配位数 {result['mean_coordination']:.2f}")
+        if overall:
+            print(f"  喉道等效直径: 平均 {overall['mean_throat_um']:.1f} μm，"
+                  f"范围 {overall['min_throat_um']:.1f}-{overall['max_throat_um']:.1f} μm")
+        print(f"  连通分量: {result['n_components']} 个，最大分量占孔体积 "
+              f"{result['largest_component_fraction']*100:.1f}%")
+        print("  表面可达孔体积: " + ", ".join(f"{name} {f*100:.1f}%" for name, f in
+                                               result['reachable_fraction'].items()))
+        if result['percolates']['z']:
+            print("[SUCCESS] 孔隙从皮质骨表面 (z-) 贯通至松质骨一侧 (z+)")
+        else:
+            print("[WARNING] 孔隙未从皮质骨表面 (z-) 贯通至松质骨一侧 (z+)")
+        return self.interconnectivity
+    
+    def estimate_permeability(self, axes='xyz', rtol=1e-10):
+        """
+        孔隙网络渗透率估计（代替耗时的CFD做初筛）
+        孔为节点，喉道为 Hagen–Poiseuille 圆锥管传导（见 pore_network.conduit_conductance），
+        沿各轴在两侧表面孔之间施加压差，稀疏组装压力方程并用预条件共轭梯度法求解，得到 Darcy 渗透率
+
+        axes: 计算的流动方向，'x'、'y'、'z' 的组合
+        rtol: 共轭梯度法的相对残差
+
+        各层分别计算：X/Y 方向只保留该层的孔（各层并联）；Z 方向各层串联，由整体求解的压力场
+        在层边界截面上插值出各层的压降，k_层 = Q·μ·层厚 / (A·Δp_层)。
+        结果保存在 self.permeability，各层结果同时写入 self.gradient_analysis（若已分析）
+        """
+        print(f"[INFO] 孔隙网络渗透率估计 (方向 {', '.join(axes)})...")
+        network = self.build_pore_network()
+        table = self.interior_cells
+        conductance = conduit_conductance(network, table.centroids, table.pore_sizes * 1e-6)
+        box = np.array([self.x_size, self.y_size, self.z_size])
+        heights = np.diff(np.concatenate([[0.0], self.layer_z_boundaries(), [self.z_size]]))
+        names = self.layer_names()
+        layer_ids = table.layer_ids.astype(np.int64)
+        
+        def summary(result):
+            k = result['permeability_m2']
+            return {'permeability_m2': k, 'permeability_darcy': None if k is None else k / DARCY,
+                    'length_um': result['length'] * 1e6, 'inlet_pores': result['inlet_pores'],
+                    'outlet_pores': result['outlet_pores'], 'cg_iterations': result['iterations'],
+                    'converged': result['converged']}
+        
+        overall, layers = {}, {name: {} for name in names}
+        for axis_name in axes:
+            axis = 'xyz'.index(axis_name)
+            inlet, outlet = network['surface'][2 * axis], network['surface'][2 * axis + 1]
+            area = box.prod() / box[axis]
+            positions = table.centroids[:, axis]
+            result = darcy_permeability(table.n_cells, network, conductance, inlet, outlet,
+                                        positions, area, rtol=rtol)
+            overall[axis_name] = summary(result)
+            if axis == 2:
+                # 串联：入口孔平均高度处 p=1、出口孔平均高度处 p=0，层边界处插值
+                start = result['inlet_position']
+                planes = np.concatenate([[start], self.layer_z_boundaries(), [start + result['length']]])
+                pressure = [1.0] + [plane_pressure(network, result['pressure'], positions, z)
+                                    for z in planes[1:-1]] + [0.0]
+                for k, name in enumerate(names):
+                    span, drop = planes[k + 1] - planes[k], pressure[k] - pressure[k + 1]
+                    layer = dict(summary(result), length_um=span * 1e6)
+                    layer['permeability_m2'] = (result['flow_rate'] * span / (area * drop)
+                                                if result['length'] > 0 and span > 0 and drop > 0
+                                                else None)
+                    layer['permeability_darcy'] = (None if layer['permeability_m2'] is None
+                                                   else layer['permeability_m2'] / DARCY)
+                    layers[name][axis_name] = layer
+                continue
+            for k, name in enumerate(names):
+                # 并联：只保留该层的孔，截面积按层厚计算
+                layers[name][axis_name] = summary(darcy_permeability(
+                    table.n_cells, network, conductance, inlet, outlet, positions,
+                    area / self.z_size * heights[k], active=layer_ids == k, rtol=rtol))
+        self.permeability = {'axes': overall, 'layers': layers}
+        self._merge_permeability()
+        
+        for axis_name, result in overall.items():
+            if result['permeability_m2'] is None:
+                print(f"  {axis_name}: 无贯通的孔隙路径")
+            else:
+                print(f"  k_{axis_name} = {result['permeability_m2']:.3e} m² "
+                      f"({result['permeability_darcy']:.3f} D)，CG {result['cg_iterations']} 次迭代")
+        for name, values in layers.items():
+            print(f"  {name}: " + ", ".join(
+                f"k_{axis_name} = " + ('-' if result['permeability_m2'] is None
+                                       else f"{result['permeability_m2']:.3e} m²")
+                for axis_name, result in values.items()))
+        print("[SUCCESS] 渗透率估计完成")
+        return self.permeability
+    
+    def _merge_permeability(self):
+        """把各层渗透率写入 gradient_analysis 中同名分层的条目"""
+        analysis = getattr(self, 'gradient_analysis', None)
+        if not analysis or not self.permeability:
+            return
+        for name, values in self.permeability['layers'].items():
+            if name in analysis:
+                for axis_name, result in values.items():
+                    analysis[name][f'permeability_{axis_name}_m2'] = result['permeability_m2']
+    
+    def analyze_gradient_properties(self, breakpoints=None, n_bins=None,
+                                    percentiles=DEFAULT_PERCENTILES):
+        """
+        分析梯度特性：按Z分段一次性统计孔径分布与种子密度
+
+        breakpoints: Z断点列表 (m)；n_bins: Z等分段数；都不指定时使用三层仿生结构
+        percentiles: 需要计算的孔径百分位数
+
+        完整结果保存在 self.gradient_stats（GradientStatistics），
+        self.gradient_analysis 为按分段名称组织的字典
+        """
+        print("[INFO] 分析梯度特性...")
+        
+        names = labels = None
+        if breakpoints is None and n_bins is None:
+            # 按仿生骨结构分层分析孔隙大小
+            breakpoints = self.layer_z_boundaries()
+            names, labels = self.layer_names(), BIOMIMETIC_LAYER_LABELS
+        
+        stats = compute_gradient_statistics(
+            self.interior_cells.centers[:, 2], self.pore_sizes,
+            self.x_size, self.y_size, self.z_size, seed_z=self.seeds[:, 2],
+            breakpoints=breakpoints, n_bins=n_bins, percentiles=percentiles,
+            names=names, labels=labels)
+        gradient_analysis = stats.layer_summary()
         
         print("\n========== 仿生骨结构孔隙分析 ==========")
         for layer, data in gradient_analysis.items():
@@ -763,12 +2055,10 @@ class GradientVoronoiScaffoldGenerator(VoronoiScaffoldGenerator):
             for key, value in data.items():
                 print(f"  {key:25s}: {value:.2f}" if isinstance(value, float) else f"  {key:25s}: {value}")
         
-        # 添加仿生学评估
+        # 添加仿生学评估（仅三层仿生分段，且皮质骨层与松质骨层都有单元时）
         print(f"\n========== 仿生学评估 ==========")
-        if '皮质骨层 (0-20%)' in gradient_analysis and '松质骨层 (50-100%)' in gradient_analysis:
-            cortical_pore = gradient_analysis['皮质骨层 (0-20%)']['mean_pore_size_um']
-            trabecular_pore = gradient_analysis['松质骨层 (50-100%)']['mean_pore_size_um'] 
-            pore_ratio = trabecular_pore / cortical_pore if cortical_pore > 0 else 0
+        pore_ratio = stats.pore_gradient_ratio()
+        if pore_ratio is not None:
             print(f"  孔隙梯度比: {pore_ratio:.2f} (松质骨/皮质骨)")
             print(f"  参考范围: 2.0-5.0 (天然骨)")
             
@@ -777,15 +2067,83 @@ class GradientVoronoiScaffoldGenerator(VoronoiScaffoldGenerator):
             else:
                 print(f"  ⚠️  建议调整密度参数以获得更好的梯度")
         
+        self.gradient_stats = stats
         self.gradient_analysis = gradient_analysis
+        if self.permeability and self.pore_network['source'] is self.interior_cells:
+            self._merge_permeability()
         return gradient_analysis
     
+    def export_config_json(self, filename):
+        """导出配置JSON，并附加梯度统计结果、各细节层次的记录、网格检查报告、孔隙率测量/求解结果、连通性分析、渗透率与刚度"""
+        result = super().export_config_json(filename)
+        stats = getattr(self, 'gradient_stats', None)
+        if (stats is not None or self.lod_records or self.mesh_report or self.porosity_measurement
+                or self.strut_radius_solution or self.interconnectivity or self.permeability
+                or self.stiffness):
+            with open(filename, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            if stats is not None:
+                config['gradient_statistics'] = stats.to_dict()
+            if self.lod_records:
+                config['lod_levels'] = self.lod_records
+            if self.mesh_report:
+                config['mesh_validation'] = self.mesh_report
+            if self.porosity_measurement:
+                config['porosity_measurement'] = self.porosity_measurement
+            if self.strut_radius_solution:
+                config['strut_radius_solution'] = self.strut_radius_solution
+            if self.interconnectivity:
+                config['interconnectivity'] = self.interconnectivity
+            if self.permeability:
+                config['permeability'] = self.permeability
+            if self.stiffness:
+                config['stiffness'] = self.stiffness
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+        return result
+    
+    def export_vtu(self, filename, compress=True, chunk_size=100000):
+        """
+        导出VTU非结构网格（ParaView 直接打开）：每个内部单元一个多面体单元 (VTK_POLYHEDRON)
+        单元数据: layer_id、pore_size_um、volume (m³)、seed_index；坐标单位为米
+
+        多面体的面流由单元表的CSR数组按块生成并直接写入文件，不构建逐单元的Python对象
+        compress: True 时为 zlib 压缩的二进制追加数据，否则为原始二进制
+        chunk_size: 每块的单元数
+        """
+        table = self.interior_cells
+        if not isinstance(table, CellTable):
+            raise ValueError("请先提取内部单元")
+        if table.n_cells and np.isnan(table.volumes).any():
+            table.compute_statistics()
+        print(f"[INFO] 导出VTU: {table.n_cells} 个多面体单元...")
+        
+        sizes = table.polyhedron_sizes()
+        blocks = range(0, table.n_cells, chunk_size)
+        faces = VTUArray(np.int64, sizes.sum(),
+                         (table.polyhedron_faces(np.arange(start, min(start + chunk_size, table.n_cells)))
+                          for start in blocks))
+        cells = {'connectivity': VTUArray.of(table.cell_vertices),
+                 'offsets': VTUArray.of(table.cell_offsets[1:]),
+                 'types': VTUArray.of(np.full(table.n_cells, VTK_POLYHEDRON, dtype=np.uint8)),
+                 'faces': faces,
+                 'faceoffsets': VTUArray.of(np.cumsum(sizes))}
+        cell_data = {'layer_id': VTUArray.of(table.layer_ids),
+                     'pore_size_um': VTUArray.of(table.pore_sizes),
+                     'volume': VTUArray.of(table.volumes),
+                     'seed_index': VTUArray.of(table.seed_index)}
+        write_vtu(filename, VTUArray.of(table.vertices), cells, cell_data, compress=compress)
+        
+        print(f"[SUCCESS] VTU已保存: {filename} ({len(table.vertices)} 个点, "
+              f"{os.path.getsize(filename) / 1e6:.2f} MB)")
+        return filename
+    
     def visualize_gradient_structure(self, save_path=None):
         """
         生成梯度支架结构的专门可视化图
         """
         
-        if not hasattr(self, 'gradient_analysis') or not self.gradient_analysis:
+        if getattr(self, 'gradient_stats', None) is None:
             print("请先运行 analyze_gradient_properties()")
             return
         
@@ -797,15 +2155,7 @@ class GradientVoronoiScaffoldGenerator(VoronoiScaffoldGenerator):
         seeds_um = self.seeds * 1e6
         
         # 按层着色种子点
-        z_positions = seeds_um[:, 2]
-        colors = []
-        for z in z_positions:
-            if z <= 0.2 * self.z_size * 1e6:
-                colors.append('red')      # 皮质骨层
-            elif z <= 0.5 * self.z_size * 1e6:
-                colors.append('orange')   # 过渡层
-            else:
-                colors.append('blue')     # 松质骨层
+        colors = LAYER_COLORS[self.seed_layer_ids]
         
         ax1.scatter(seeds_um[:, 0], seeds_um[:, 1], seeds_um[:, 2], 
                    c=colors, s=15, alpha=0.7)
@@ -823,29 +2173,17 @@ class GradientVoronoiScaffoldGenerator(VoronoiScaffoldGenerator):
         
         # 2. 梯度密度分布
         ax2 = fig.add_subplot(2, 4, 2)
-        layer_names_short = ['Cortical\\n(0-20%)', 'Transition\\n(20-50%)', 'Trabecular\\n(50-100%)']
-        
-        # 计算各层种子密度
-        z_layers = [
-            (0, 0.2 * self.z_size),
-            (0.2 * self.z_size, 0.5 * self.z_size), 
-            (0.5 * self.z_size, self.z_size)
-        ]
-        
-        layer_densities = []
-        layer_colors = ['red', 'orange', 'blue']
+        stats = self.gradient_stats
+        bin_labels = list(stats.labels)
+        if len(stats) == 3:
+            layer_colors = ['red', 'orange', 'blue']
+        else:
+            layer_colors = list(cm.coolwarm_r(np.linspace(0, 1, len(stats))))
         
-        for (z_min, z_max) in z_layers:
-            layer_seeds = 0
-            for seed in self.seeds:
-                if z_min <= seed[2] < z_max:
-                    layer_seeds += 1
-            
-            volume = self.x_size * self.y_size * (z_max - z_min) * 1e9  # mm³
-            density = layer_seeds / volume if volume > 0 else 0
-            layer_densities.append(density)
+        # 各层种子密度（由统计引擎一次性计算）
+        layer_densities = stats.seed_density
         
-        bars = ax2.bar(layer_names_short, layer_densities, color=layer_colors, alpha=0.7)
+        bars = ax2.bar(bin_labels, layer_densities, color=layer_colors, alpha=0.7)
         ax2.set_ylabel('Seed Density (seeds/mm³)')
         ax2.set_title('Seed Density Gradient')
         ax2.grid(True, alpha=0.3)
@@ -859,23 +2197,18 @@ class GradientVoronoiScaffoldGenerator(VoronoiScaffoldGenerator):
         # 3. 各层孔隙大小对比
         ax3 = fig.add_subplot(2, 4, 3)
         
-        layer_pore_data = []
-        layer_labels = []
-        
-        for layer_name, data in self.gradient_analysis.items():
-            if 'mean_pore_size_um' in data:
-                layer_pore_data.append(data['mean_pore_size_um'])
-                if '皮质骨' in layer_name:
-                    layer_labels.append('Cortical')
-                elif '过渡' in layer_name:
-                    layer_labels.append('Transition') 
-                else:
-                    layer_labels.append('Trabecular')
+        filled = stats.n_pores > 0
+        layer_pore_data = stats.mean_pore_size_um[filled]
+        layer_labels = [label for label, has in zip(bin_labels, filled) if has]
         
-        bars = ax3.bar(layer_labels, layer_pore_data, color=layer_colors[:len(layer_pore_data)], alpha=0.7)
+        bars = ax3.bar(layer_labels, layer_pore_data, yerr=stats.std_pore_size_um[filled],
+                       color=[c for c, has in zip(layer_colors, filled) if has], alpha=0.7)
         ax3.set_ylabel('Mean Pore Size (um)')
         ax3.set_title('Pore Size by Layer')
         ax3.grid(True, alpha=0.3)
+        if len(stats) > 3:
+            ax2.tick_params(axis='x', rotation=45)
+            ax3.tick_params(axis='x', rotation=45)
         
         # 显示数值
         for bar, pore_size in zip(bars, layer_pore_data):
@@ -886,34 +2219,30 @@ class GradientVoronoiScaffoldGenerator(VoronoiScaffoldGenerator):
         # 4. Z方向孔隙大小变化趋势
         ax4 = fig.add_subplot(2, 4, 4)
         
-        z_positions = []
-        pore_sizes_z = []
+        n_cells = min(len(self.interior_cells), len(self.pore_sizes))
+        z_positions = self.interior_cells.centers[:n_cells, 2] * 1e6  # 转换为微米
+        pore_sizes_z = np.asarray(self.pore_sizes[:n_cells])
         
-        for i, cell in enumerate(self.interior_cells):
-            if i < len(self.pore_sizes):
-                z_pos = cell['center'][2] * 1e6  # 转换为微米
-                z_positions.append(z_pos)
-                pore_sizes_z.append(self.pore_sizes[i])
-        
-        # 按Z位置分层着色
-        colors_z = []
-        for z in z_positions:
-            if z <= 0.2 * self.z_size * 1e6:
-                colors_z.append('red')
-            elif z <= 0.5 * self.z_size * 1e6:
-                colors_z.append('orange')
-            else:
-                colors_z.append('blue')
+        # 按单元所在层着色
+        colors_z = LAYER_COLORS[self.interior_cells.layer_ids[:n_cells]]
         
         ax4.scatter(z_positions, pore_sizes_z, c=colors_z, alpha=0.7, s=30)
+        # 各分段的中位数与10-90%范围
+        z_mid = stats.centers * 1e6
+        if 50 in stats.percentiles:
+            ax4.plot(z_mid[filled], stats.percentiles[50][filled], 'k-o', linewidth=1.5,
+                     markersize=4, label='Median')
+        if 10 in stats.percentiles and 90 in stats.percentiles:
+            ax4.fill_between(z_mid[filled], stats.percentiles[10][filled],
+                             stats.percentiles[90][filled], color='gray', alpha=0.2, label='P10-P90')
         ax4.set_xlabel('Z Position (um)')
         ax4.set_ylabel('Pore Size (um)')
         ax4.set_title('Pore Size vs Z Position')
         ax4.grid(True, alpha=0.3)
         
         # 添加层边界线
-        ax4.axvline(x=0.2 * self.z_size * 1e6, color='gray', linestyle='--', alpha=0.7)
-        ax4.axvline(x=0.5 * self.z_size * 1e6, color='gray', linestyle='--', alpha=0.7)
+        for z_edge in stats.edges[1:-1]:
+            ax4.axvline(x=z_edge * 1e6, color='gray', linestyle='--', alpha=0.7)
         
         # 5. 支架横截面示意图
         ax5 = fig.add_subplot(2, 4, 5)
@@ -921,9 +2250,8 @@ class GradientVoronoiScaffoldGenerator(VoronoiScaffoldGenerator):
         ax5.set_ylim(0, self.z_size * 1e6)
         
         # 绘制分层区域
-        cortical_height = 0.2 * self.z_size * 1e6
-        transition_height = 0.3 * self.z_size * 1e6  
-        trabecular_height = 0.5 * self.z_size * 1e6
+        z_edges_um = np.concatenate([[0.0], self.layer_z_boundaries(), [self.z_size]]) * 1e6
+        cortical_height, transition_height, trabecular_height = np.diff(z_edges_um)
         
         # 皮质骨层
         rect1 = patches.Rectangle((0, 0), self.x_size * 1e6, cortical_height, 
@@ -1007,13 +2335,10 @@ Biomimetic Features:
         """
         
         # 添加层级信息
-        if hasattr(self, 'gradient_analysis'):
-            stats_text += "\\n\\nLayer Details:\\n"
-            for layer_name, data in self.gradient_analysis.items():
-                short_name = layer_name.split('(')[0].strip()
-                mean_pore = data.get('mean_pore_size_um', 0)
-                n_pores = data.get('n_pores', 0)
-                stats_text += f"├─ {short_name}: {mean_pore:.1f} μm ({n_pores} pores)\\n"
+        stats_text += "\\n\\nLayer Details:\\n"
+        for label, mean_pore, n_pores in zip(stats.labels, stats.mean_pore_size_um, stats.n_pores):
+            if n_pores:
+                stats_text += f"├─ {label}: {mean_pore:.1f} μm ({n_pores} pores)\\n"
         
         ax7.text(0.05, 0.95, stats_text, transform=ax7.transAxes, 
                 fontsize=9, verticalalignment='top', fontfamily='monospace',
@@ -1049,37 +2374,20 @@ Biomimetic Features:
         ax2 = fig.add_subplot(1, 3, 2, projection='3d')  # 3D整体
         ax3 = fig.add_subplot(1, 3, 3, projection='3d')  # 3D分层
         
-        cells_to_show = self.interior_cells[:min(max_cells, len(self.interior_cells))]
+        table = self.interior_cells
+        rows = np.arange(min(max_cells, len(table)))
         
-        # 定义仿生骨结构的颜色
-        layer_colors = {
-            'cortical': '#FF4444',    # 红色 - 皮质骨
-            'transition': '#FF8844',  # 橙色 - 过渡层  
-            'trabecular': '#4488FF'   # 蓝色 - 松质骨
-        }
-        
-        # 分层阈值
-        z_cortical = 0.2 * self.z_size
-        z_transition = 0.5 * self.z_size
+        # 仿生骨结构的颜色（按层编号索引）：红色 - 皮质骨，橙色 - 过渡层，蓝色 - 松质骨
+        layer_colors = LAYER_COLORS_HEX
+        layer_alphas = (0.8, 0.7, 0.6)
         
         # === 2D切片视图（显示梯度） ===
         z_slice = self.z_size / 2  # 中间切片
         
-        seeds_2d = []
-        colors_2d = []
-        
-        for cell in cells_to_show:
-            center = cell['center']
-            if abs(center[2] - z_slice) < self.z_size * 0.15:
-                seeds_2d.append(center[:2] * 1e6)
-                
-                # 根据Z位置确定颜色
-                if center[2] <= z_cortical:
-                    colors_2d.append(layer_colors['cortical'])
-                elif center[2] <= z_transition:
-                    colors_2d.append(layer_colors['transition'])
-                else:
-                    colors_2d.append(layer_colors['trabecular'])
+        centers = table.centers[rows]
+        near_slice = np.abs(centers[:, 2] - z_slice) < self.z_size * 0.15
+        seeds_2d = centers[near_slice, :2] * 1e6
+        colors_2d = layer_colors[table.layer_ids[rows][near_slice]]
         
         if len(seeds_2d) >= 3:
             seeds_2d = np.array(seeds_2d)
@@ -1097,7 +2405,6 @@ Biomimetic Features:
                 for pointidx, simplex in zip(vor_2d.ridge_points, vor_2d.ridge_vertices):
                     simplex = np.asarray(simplex)
                     if np.all(simplex >= 0):
-                        vertices = vor_2d.vertices[simplex]
                         # 简化的区域着色
                         pass
                         
@@ -1120,51 +2427,25 @@ Biomimetic Features:
         # 添加图例
         from matplotlib.patches import Patch
         legend_elements = [
-            Patch(facecolor=layer_colors['cortical'], label='Cortical Layer'),
-            Patch(facecolor=layer_colors['transition'], label='Transition Layer'),
-            Patch(facecolor=layer_colors['trabecular'], label='Trabecular Layer')
+            Patch(facecolor=layer_colors[0], label='Cortical Layer'),
+            Patch(facecolor=layer_colors[1], label='Transition Layer'),
+            Patch(facecolor=layer_colors[2], label='Trabecular Layer')
         ]
         ax1.legend(handles=legend_elements, loc='upper right')
         
         # === 3D整体视图 ===
         print(f"[INFO] 渲染3D整体结构...")
         
-        for i, cell in enumerate(cells_to_show):
-            try:
-                vertices = cell['vertices'] * 1e6
-                center = cell['center'] * 1e6
-                
-                # 根据Z位置确定颜色
-                if cell['center'][2] <= z_cortical:
-                    color = layer_colors['cortical']
-                    alpha = 0.8
-                elif cell['center'][2] <= z_transition:
-                    color = layer_colors['transition'] 
-                    alpha = 0.7
-                else:
-                    color = layer_colors['trabecular']
-                    alpha = 0.6
-                
-                if len(vertices) >= 4:
-                    try:
-                        hull = ConvexHull(vertices)
-                        for simplex in hull.simplices:
-                            triangle = vertices[simplex]
-                            poly3d = [[triangle[j] for j in range(3)]]
-                            ax2.add_collection3d(Poly3DCollection(poly3d,
-                                                                facecolors=color,
-                                                                alpha=alpha,
-                                                                edgecolors='black',
-                                                                linewidth=0.3))
-                    except:
-                        ax2.scatter(center[0], center[1], center[2],
-                                  c=color, s=80, alpha=alpha, edgecolors='black')
-                else:
-                    ax2.scatter(center[0], center[1], center[2],
-                              c=color, s=80, alpha=alpha, edgecolors='black')
-                              
-            except Exception as e:
-                continue
+        # 每个唯一面只绘制一次，颜色与透明度取所属单元的层
+        polygons, _, owners = table.cell_polygons(rows, scale=1e6)
+        if polygons:
+            owner_layers = table.layer_ids[owners]
+            face_colors = to_rgba_array(layer_colors[owner_layers])
+            face_colors[:, 3] = np.asarray(layer_alphas)[owner_layers]
+            ax2.add_collection3d(Poly3DCollection(polygons,
+                                                  facecolors=face_colors,
+                                                  edgecolors='black',
+                                                  linewidth=0.3))
         
         ax2.set_xlabel('X (μm)')
         ax2.set_ylabel('Y (μm)')
@@ -1179,49 +2460,20 @@ Biomimetic Features:
         print(f"[INFO] 渲染3D分层结构...")
         
         # 分层显示，每层略微分离
-        z_offset = {'cortical': 0, 'transition': 5, 'trabecular': 10}  # 微米偏移
+        z_offset = (0, 5, 10)  # 各层微米偏移
         
-        for i, cell in enumerate(cells_to_show):
-            try:
-                vertices = cell['vertices'] * 1e6
-                center = cell['center'] * 1e6
-                
-                # 确定层级和偏移
-                if cell['center'][2] <= z_cortical:
-                    layer = 'cortical'
-                elif cell['center'][2] <= z_transition:
-                    layer = 'transition'
-                else:
-                    layer = 'trabecular'
-                
-                color = layer_colors[layer]
-                
-                # 应用Z偏移
-                vertices_offset = vertices.copy()
-                vertices_offset[:, 2] += z_offset[layer]
-                center_offset = center.copy()
-                center_offset[2] += z_offset[layer]
-                
-                if len(vertices) >= 4:
-                    try:
-                        hull = ConvexHull(vertices_offset)
-                        for simplex in hull.simplices:
-                            triangle = vertices_offset[simplex]
-                            poly3d = [[triangle[j] for j in range(3)]]
-                            ax3.add_collection3d(Poly3DCollection(poly3d,
-                                                                facecolors=color,
-                                                                alpha=0.7,
-                                                                edgecolors='darkgray',
-                                                                linewidth=0.4))
-                    except:
-                        ax3.scatter(center_offset[0], center_offset[1], center_offset[2],
-                                  c=color, s=100, alpha=0.8, edgecolors='black')
-                else:
-                    ax3.scatter(center_offset[0], center_offset[1], center_offset[2],
-                              c=color, s=100, alpha=0.8, edgecolors='black')
-                              
-            except Exception:
+        # 各层分别取面（层间的公共面在两侧各绘制一次，以便分离显示）
+        for layer in range(len(z_offset)):
+            layer_rows = rows[table.layer_ids[rows] == layer]
+            if len(layer_rows) == 0:
                 continue
+            polygons, _, _ = table.cell_polygons(layer_rows, scale=1e6)
+            offset = np.array([0.0, 0.0, z_offset[layer]])
+            ax3.add_collection3d(Poly3DCollection([polygon + offset for polygon in polygons],
+                                                  facecolors=layer_colors[layer],
+                                                  alpha=0.7,
+                                                  edgecolors='darkgray',
+                                                  linewidth=0.4))
         
         ax3.set_xlabel('X (μm)')
         ax3.set_ylabel('Y (μm)')
@@ -0,0 +1,290 @@
+"""
+隐式曲面（有符号距离场）网格生成
+支柱网络的距离场在体素网格上分块计算，每块只考虑KD树筛选出的邻近支柱；
+各块独立用 marching tetrahedra 提取等值面，最后焊接块间接缝。
+节点处用指数平滑最小值融合相邻支柱，得到圆滑的过渡圆角
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial import cKDTree
+
+from mesh_io import weld_triangles
+
+
+# 立方体8个角点的偏移（角点编号的二进制位依次对应 x, y, z）
+CUBE_CORNERS = np.array([[(c >> 0) & 1, (c >> 1) & 1, (c >> 2) & 1] for c in range(8)])
+
+# 沿主对角线 0→7 的6个四面体（Kuhn剖分）：相邻立方体在公共面上的剖分一致，等值面不会开裂
+CUBE_TETRAHEDRA = np.array([[0, 1 << a, (1 << a) | (1 << b), 7]
+                            for a, b in ((0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1))])
+
+
+def _tetrahedron_cases():
+    """
+    16种符号组合 → 等值面三角形（每个三角形由3条四面体棱给出）
+    棱的两个端点按角点编号排序，保证相邻块在公共棱上的插值方向相同
+    """
+    cases = []
+    for code in range(16):
+        outside = [i for i in range(4) if code >> i & 1]
+        inside = [i for i in range(4) if not code >> i & 1]
+        if len(outside) in (1, 3):
+            lone, others = (outside, inside) if len(outside) == 1 else (inside, outside)
+            triangles = [[(lone[0], o) for o in others]]
+        elif len(outside) == 2:
+            (a, b), (c, d) = outside, inside
+            triangles = [[(a, c), (a, d), (b, d)], [(a, c), (b, d), (b, c)]]
+        else:
+            triangles = []
+        cases.append([[tuple(sorted(edge)) for edge in tri] for tri in triangles])
+    return cases
+
+
+TETRAHEDRON_CASES = _tetrahedron_cases()
+
+
+def marching_tetrahedra(values, origin, spacing, level=0.0):
+    """
+    从规则网格标量场提取等值面（纯numpy实现，不依赖 scikit-image）
+
+    values: (nx, ny, nz) 网格点上的场值，大于 level 为外部
+    origin: 网格点 [0, 0, 0] 的坐标；spacing: 网格间距
+    返回 (T, 3, 3) 三角形，法向朝向场值增大的方向（外侧）
+    """
+    values = np.asarray(values, dtype=float)
+    nx, ny, nz = values.shape
+    if min(nx, ny, nz) < 2:
+        return np.zeros((0, 3, 3))
+
+    # 只处理跨越等值面的立方体
+    corners = np.stack([values[i:nx - 1 + i, j:ny - 1 + j, k:nz - 1 + k]
+                        for i, j, k in CUBE_CORNERS], axis=-1)
+    outside = corners > level
+    crossing = outside.any(axis=-1) & ~outside.all(axis=-1)
+    cube_index = np.argwhere(crossing)
+    if len(cube_index) == 0:
+        return np.zeros((0, 3, 3))
+    cube_values = corners[crossing]                                      # (C, 8)
+
+    tet_values = cube_values[:, CUBE_TETRAHEDRA].reshape(-1, 4)         # (C*6, 4)
+    tet_corners = np.repeat(cube_index, 6, axis=0)[:, None, :] + \
+        np.tile(CUBE_CORNERS[CUBE_TETRAHEDRA], (len(cube_index), 1, 1))  # (C*6, 4, 3)
+    tet_outside = tet_values > level
+    codes = (tet_outside * (1 << np.arange(4))).sum(axis=1)
+
+    parts = []
+    tet_ids = []
+    for code, triangles in enumerate(TETRAHEDRON_CASES):
+        if not triangles:
+            continue
+        ids = np.flatnonzero(codes == code)
+        if len(ids) == 0:
+            continue
+        f = tet_values[ids]
+        g = tet_corners[ids]
+        for tri in triangles:
+            vertices = []
+            for i, j in tri:
+                t = (level - f[:, i]) / (f[:, j] - f[:, i])
+                p = g[:, i] + t[:, None] * (g[:, j] - g[:, i])
+                vertices.append(p)
+            parts.append(np.stack(vertices, axis=1))
+            tet_ids.append(ids)
+    triangles = np.concatenate(parts)
+    tet_ids = np.concatenate(tet_ids)
+
+    # 统一朝向：法向与"内部角点 → 外部角点"方向一致
+    weight = np.where(tet_outside[tet_ids], 1.0 / tet_outside[tet_ids].sum(axis=1, keepdims=True),
+                      -1.0 / (~tet_outside[tet_ids]).sum(axis=1, keepdims=True))
+    direction = np.einsum('ti,tij->tj', weight, tet_corners[tet_ids].astype(float))
+    normal = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    flip = np.einsum('ij,ij->i', normal, direction) < 0
+    triangles[flip] = triangles[flip][:, ::-1]
+
+    return np.asarray(origin, dtype=float) + triangles * spacing
+
+
+def block_field(lo, shape, origin, spacing, p0, p1, radius, blend=0.0, band=np.inf, brick=4,
+                max_pairs=4000000):
+    """
+    一个网格块上支柱网络的有符号距离场（外部为正），返回形状为 shape 的数组
+
+    每根支柱是半径为 radius 的胶囊体；blend > 0 时用指数平滑最小值
+        d = -blend·log Σ exp(-d_i / blend)
+    融合相邻支柱，节点处形成约 blend 大小的圆角。
+
+    支柱先切成不超过两个砖块（brick³ 个网格点）边长的小段，每段只分发给
+    其影响范围（半径 + band）覆盖的砖块，因此每个网格点只与附近几段计算距离；
+    每个 (网格点, 支柱) 只由包含投影点的那一段计入，切段不改变平滑并集
+    band: 场值上限，超出 band 的支柱贡献忽略
+    max_pairs: 每批 网格点×小段 的上限，限制临时内存
+    """
+    lo = np.asarray(lo)
+    shape = tuple(int(n) for n in shape)
+    field = np.full(shape, float(band))
+    if len(p0) == 0:
+        return field
+    block_origin = np.asarray(origin, dtype=float) + lo * spacing
+    axis = p1 - p0
+    length2 = np.maximum(np.einsum('ij,ij->i', axis, axis), 1e-300)
+
+    # 切段：第k段覆盖投影参数 [t0, t1)，最后一段包含 t = 1
+    n_split = np.maximum(np.ceil(np.sqrt(length2) / (2 * brick * spacing)), 1).astype(np.int64)
+    owner = np.repeat(np.arange(len(p0)), n_split)
+    k = np.arange(len(owner)) - np.repeat(np.cumsum(n_split) - n_split, n_split)
+    t0 = k / n_split[owner]
+    t1 = np.where(k == n_split[owner] - 1, np.inf, (k + 1) / n_split[owner])
+    a = p0[owner] + t0[:, None] * axis[owner]
+    b = p0[owner] + np.minimum(t1, 1.0)[:, None] * axis[owner]
+
+    # 每段影响范围覆盖的砖块区间
+    reach = (radius[owner] + band)[:, None]
+    last = np.asarray(shape) - 1
+    first_sample = np.clip(np.ceil((np.minimum(a, b) - reach - block_origin) / spacing), 0, last)
+    last_sample = np.clip(np.floor((np.maximum(a, b) + reach - block_origin) / spacing), -1, last)
+    valid = np.all(last_sample >= first_sample, axis=1)
+    brick_lo = first_sample[valid].astype(np.int64) // brick
+    brick_n = last_sample[valid].astype(np.int64) // brick - brick_lo + 1
+    pieces = np.flatnonzero(valid)
+
+    # 展开为 (小段, 砖块) 对
+    counts = brick_n.prod(axis=1)
+    pair_piece = np.repeat(np.arange(len(pieces)), counts)
+    local = np.arange(len(pair_piece)) - np.repeat(np.cumsum(counts) - counts, counts)
+    dims = brick_n[pair_piece]
+    pair_brick = np.stack([local // (dims[:, 1] * dims[:, 2]), local // dims[:, 2] % dims[:, 1],
+                           local % dims[:, 2]], axis=1) + brick_lo[pair_piece]
+    pair_piece = pieces[pair_piece]
+
+    offsets = np.stack(np.meshgrid(*[np.arange(brick)] * 3, indexing='ij'), -1).reshape(-1, 3)
+    batch = max(1, max_pairs // len(offsets))
+    sample_ids, distances = [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+    for start in range(0, len(pair_piece), batch):
+        bricks = pair_brick[start:start + batch]
+        piece = np.repeat(pair_piece[start:start + batch], len(offsets))
+        idx = (bricks * brick)[:, None, :] + offsets[None]
+        idx = idx.reshape(-1, 3)
+        inside = np.all(idx <= last, axis=1)
+        piece, idx = piece[inside], idx[inside]
+        edge = owner[piece]
+        rel = block_origin + idx * spacing - p0[edge]
+        t = np.clip(np.einsum('ij,ij->i', rel, axis[edge]) / length2[edge], 0.0, 1.0)
+        own = (t >= t0[piece]) & (t < t1[piece])
+        rel -= t[:, None] * axis[edge]
+        d = np.sqrt(np.einsum('ij,ij->i', rel, rel)) - radius[edge]
+        keep = own & (d < band)
+        sample_ids.append(np.ravel_multi_index(tuple(idx[keep].T), shape))
+        distances.append(d[keep])
+    sample_ids = np.concatenate(sample_ids)
+    distances = np.concatenate(distances)
+
+    flat = field.reshape(-1)
+    np.minimum.at(flat, sample_ids, distances)
+    if blend > 0 and len(sample_ids):
+        total = np.bincount(sample_ids, weights=np.exp(-(distances - flat[sample_ids]) / blend),
+                            minlength=flat.size)
+        touched = total > 0
+        flat[touched] = np.minimum(flat[touched] - blend * np.log(total[touched]), band)
+    return field
+
+
+def _mesh_block(task):
+    """
+    计算一个网格块的距离场并提取等值面（在进程池中执行）
+
+    task: (lo, hi, last, origin, spacing, p0, p1, radius, blend, band)
+        lo, hi   - 块的网格点编号范围 [lo, hi]（含端点，与相邻块共享边界网格点）
+        last     - 整个网格最后一个网格点的编号，网格最外层的场值强制为正（外部），
+                   即使实体意外触及网格边界，等值面也在边界处封口而不是被截开
+        p0, p1, radius - 已由KD树筛选到本块附近的支柱
+        band     - 需要精确场值的等值面邻域宽度
+    """
+    lo, hi, last, origin, spacing, p0, p1, radius, blend, band = task
+    lo, hi = np.asarray(lo), np.asarray(hi)
+    if len(p0) == 0:
+        return np.zeros((0, 3, 3))
+    values = block_field(lo, hi - lo + 1, origin, spacing, p0, p1, radius,
+                         blend=blend, band=band)
+    for axis in range(3):
+        for index, at_border in ((0, lo[axis] == 0), (-1, hi[axis] == last[axis])):
+            if at_border:
+                face = [slice(None)] * 3
+                face[axis] = index
+                values[tuple(face)] = np.maximum(values[tuple(face)], 0.5 * spacing)
+    return marching_tetrahedra(values, origin + lo * spacing, spacing)
+
+
+def sdf_grid(nodes, edges, edge_radius, voxel_size, blend=0.0):
+    """
+    覆盖整个支柱网络的网格原点与网格点数
+    外扩 最大半径 + 平滑并集的膨胀量 + 两个体素：k 根支柱在节点处的平滑最小值
+    比最近距离小至多 blend·ln(k)，k 取最大节点度数
+    """
+    degree = np.bincount(edges.ravel(), minlength=len(nodes)).max() if len(edges) else 1
+    pad = np.max(edge_radius) + blend * np.log(max(degree, 1)) + 2 * voxel_size
+    origin = nodes.min(axis=0) - pad
+    shape = np.ceil((nodes.max(axis=0) + pad - origin) / voxel_size).astype(int) + 1
+    return origin, shape
+
+
+def iter_sdf_triangles(nodes, edges, edge_radius, voxel_size, blend=0.0, chunk_cells=48,
+                       n_workers=None):
+    """
+    分块并行生成隐式曲面三角形，每块产出一批 (T, 3, 3)（块间接缝尚未焊接）
+
+    nodes, edges, edge_radius: 支柱网络与每根支柱半径 (m)
+    voxel_size: 体素边长 (m)
+    blend: 节点圆角的平滑宽度 (m)，0 为普通并集
+    chunk_cells: 每块每个方向的体素数；单块内存约 chunk_cells³ 个场值
+    n_workers: 进程数，默认等于CPU核数
+    """
+    edge_radius = np.broadcast_to(np.asarray(edge_radius, dtype=float), (len(edges),))
+    if len(edges) == 0:
+        return
+    p0, p1 = nodes[edges[:, 0]], nodes[edges[:, 1]]
+    origin, shape = sdf_grid(nodes, edges, edge_radius, voxel_size, blend)
+    # 场值在等值面附近两个体素内必须精确；平滑并集还需要额外的支柱影响范围
+    band = 2 * voxel_size + 6 * blend
+
+    middle = 0.5 * (p0 + p1)
+    reach = 0.5 * np.linalg.norm(p1 - p0, axis=1).max() + edge_radius.max() + band
+    tree = cKDTree(middle)
+
+    def tasks():
+        for i in range(0, shape[0] - 1, chunk_cells):
+            for j in range(0, shape[1] - 1, chunk_cells):
+                for k in range(0, shape[2] - 1, chunk_cells):
+                    lo = np.array([i, j, k])
+                    hi = np.minimum(lo + chunk_cells, shape - 1)
+                    center = origin + 0.5 * (lo + hi) * voxel_size
+                    half = 0.5 * np.linalg.norm(hi - lo) * voxel_size
+                    near = np.sort(np.asarray(tree.query_ball_point(center, half + reach),
+                                                  dtype=np.int64))
+                    yield (lo, hi, shape - 1, origin, voxel_size, p0[near], p1[near],
+                           edge_radius[near], blend, band)
+
+    # 同时提交的任务数有上限，每个任务只携带本块附近的支柱，内存与模型大小无关
+    n_workers = n_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        max_pending = 2 * n_workers
+        pending = []
+        for task in tasks():
+            pending.append(pool.submit(_mesh_block, task))
+            if len(pending) >= max_pending:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def sdf_mesh(nodes, edges, edge_radius, voxel_size, blend=0.0, chunk_cells=48, n_workers=None):
+    """
+    隐式曲面网格：分块生成后焊接接缝，返回索引网格 (vertices, faces)
+    参数同 iter_sdf_triangles
+    """
+    parts = list(iter_sdf_triangles(nodes, edges, edge_radius, voxel_size, blend=blend,
+                                    chunk_cells=chunk_cells, n_workers=n_workers))
+    triangles = np.concatenate(parts + [np.zeros((0, 3, 3))])
+    vertices, faces, _ = weld_triangles(triangles, tolerance=1e-6 * voxel_size)
+    return vertices, faces
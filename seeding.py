@@ -0,0 +1,312 @@
+"""
+梯度种子采样工具
+提供连续的Z向密度剖面 ρ(z) 以及一次性向量化的逆CDF种子采样
+"""
+
+import numpy as np
+
+
+# 仿生骨结构默认分层边界（占Z方向高度的比例）：皮质骨 | 过渡层 | 松质骨
+DEFAULT_LAYER_BOUNDARIES = (0.2, 0.5)
+
+# 默认密度参数 (seeds/mm³)
+DEFAULT_GRADIENT_PARAM = {
+    'surface_density': 25000,    # 皮质骨区域(高密度，小孔隙)
+    'middle_density': 12000,     # 过渡区域(中等密度)
+    'core_density': 6000         # 松质骨区域(低密度，大孔隙)
+}
+
+# 支持的命名剖面
+PROFILE_TYPES = ('step', 'linear', 'exponential', 'sigmoid')
+
+
+def get_rng(random_state=None):
+    """
+    返回随机数生成器
+    random_state为None（或 np.random 模块本身）时使用全局 np.random（兼容 np.random.seed 的用法）；
+    已有的 Generator / RandomState 原样返回，因此得到的 rng 可以继续作为 random_state 传递；
+    否则返回 np.random.default_rng(random_state)
+    """
+    if random_state is None or random_state is np.random:
+        return np.random
+    if isinstance(random_state, (np.random.Generator, np.random.RandomState)):
+        return random_state
+    return np.random.default_rng(random_state)
+
+
+def build_density_profile(gradient_type, gradient_param, z_size,
+                          layer_boundaries=DEFAULT_LAYER_BOUNDARIES):
+    """
+    根据三层密度参数构造连续密度剖面 ρ(z)，返回 f(z) -> seeds/mm³ (z单位: m)
+
+    gradient_type:
+        'step'        - 三层阶跃（旧版行为）
+        'linear'      - 经过各层中点密度的分段线性插值
+        'exponential' - 对数空间插值（层间按比例平滑变化）
+        'sigmoid'     - 在层边界处用S型曲线平滑过渡
+    gradient_param 可额外包含 'transition_width'（S型过渡宽度，占z_size的比例，默认0.05）
+    """
+    densities = np.array([gradient_param['surface_density'],
+                          gradient_param['middle_density'],
+                          gradient_param['core_density']], dtype=float)
+    if np.any(densities <= 0):
+        raise ValueError("种子密度必须为正数")
+
+    b1, b2 = layer_boundaries
+    # 各层中点作为插值锚点
+    anchors = np.array([b1 / 2, (b1 + b2) / 2, (b2 + 1) / 2])
+
+    if gradient_type == 'step':
+        def profile(z):
+            t = np.asarray(z, dtype=float) / z_size
+            return densities[np.searchsorted([b1, b2], t, side='right')]
+    elif gradient_type == 'linear':
+        def profile(z):
+            t = np.asarray(z, dtype=float) / z_size
+            return np.interp(t, anchors, densities)
+    elif gradient_type == 'exponential':
+        log_densities = np.log(densities)
+
+        def profile(z):
+            t = np.asarray(z, dtype=float) / z_size
+            return np.exp(np.interp(t, anchors, log_densities))
+    elif gradient_type == 'sigmoid':
+        width = gradient_param.get('transition_width', 0.05)
+
+        def profile(z):
+            t = np.asarray(z, dtype=float) / z_size
+            s1 = 0.5 * (1 + np.tanh((t - b1) / width))
+            s2 = 0.5 * (1 + np.tanh((t - b2) / width))
+            return (densities[0] + (densities[1] - densities[0]) * s1
+                    + (densities[2] - densities[1]) * s2)
+    else:
+        raise ValueError(f"未知的梯度类型: {gradient_type}，可选 {PROFILE_TYPES}")
+
+    return profile
+
+
+def resolve_density_profile(profile, gradient_param, z_size,
+                            layer_boundaries=DEFAULT_LAYER_BOUNDARIES):
+    """
+    把各种形式的密度剖面统一为 f(z) -> seeds/mm³
+
+    profile 可以是:
+        - 字符串: 'step' / 'linear' / 'exponential' / 'sigmoid'
+        - 可调用对象: f(z)，z为Z坐标数组(m)，返回密度数组(seeds/mm³)
+        - 一维数组: 在 [0, z_size] 上等间距采样的密度表
+        - (z_points, densities) 元组: 任意采样位置的密度表（线性插值）
+    """
+    if isinstance(profile, str):
+        if gradient_param is None:
+            gradient_param = DEFAULT_GRADIENT_PARAM
+        return build_density_profile(profile, gradient_param, z_size, layer_boundaries)
+
+    if callable(profile):
+        return profile
+
+    if isinstance(profile, tuple) and len(profile) == 2:
+        z_points = np.asarray(profile[0], dtype=float)
+        table = np.asarray(profile[1], dtype=float)
+    else:
+        table = np.asarray(profile, dtype=float)
+        if table.ndim != 1 or len(table) < 2:
+            raise ValueError("密度表必须是长度≥2的一维数组")
+        z_points = np.linspace(0, z_size, len(table))
+
+    if np.any(table < 0):
+        raise ValueError("密度表不能包含负值")
+
+    def tabulated(z):
+        return np.interp(np.asarray(z, dtype=float), z_points, table)
+
+    return tabulated
+
+
+def tabulate_cdf(profile, z_range, resolution=4096):
+    """
+    在 z_range 上离散化密度剖面并累积（梯形积分）
+    返回 (z_grid, cdf)，cdf单位为 seeds/mm³·m
+    """
+    z_grid = np.linspace(z_range[0], z_range[1], resolution + 1)
+    rho = np.broadcast_to(np.asarray(profile(z_grid), dtype=float), z_grid.shape)
+    if np.any(rho < 0) or not np.all(np.isfinite(rho)):
+        raise ValueError("密度剖面必须为非负有限值")
+    cdf = np.concatenate([[0.0], np.cumsum(0.5 * (rho[1:] + rho[:-1]) * np.diff(z_grid))])
+    return z_grid, cdf
+
+
+def expected_seed_count(profile, x_size, y_size, z_range, resolution=4096):
+    """剖面在给定Z范围内对应的种子数（∫ρ dV，体积换算为mm³）"""
+    _, cdf = tabulate_cdf(profile, z_range, resolution)
+    return cdf[-1] * x_size * y_size * 1e9
+
+
+def sample_seeds_from_profile(profile, x_size, y_size, z_size, z_range=None,
+                              n_seeds=None, random_state=None, resolution=4096):
+    """
+    按密度剖面 ρ(z) 一次性采样全部种子（向量化逆CDF，O(N)）
+
+    z_range: 只在该Z区间内采样（默认整个 [0, z_size]）
+    n_seeds: 指定种子数；默认取 int(∫ρ dV)
+    """
+    if z_range is None:
+        z_range = (0.0, z_size)
+    rng = get_rng(random_state)
+
+    z_grid, cdf = tabulate_cdf(profile, z_range, resolution)
+    if n_seeds is None:
+        n_seeds = int(cdf[-1] * x_size * y_size * 1e9)
+    if n_seeds <= 0 or cdf[-1] <= 0:
+        return np.empty((0, 3))
+
+    # 逆CDF：均匀随机数映射到Z坐标
+    u = rng.random(n_seeds) * cdf[-1]
+    seeds = np.empty((n_seeds, 3))
+    seeds[:, 0] = rng.random(n_seeds) * x_size
+    seeds[:, 1] = rng.random(n_seeds) * y_size
+    seeds[:, 2] = np.interp(u, cdf, z_grid)
+    return seeds
+
+
+def local_seed_spacing(profile, z, z_size, window=0.0, resolution=64):
+    """
+    剖面在 z 处的平均种子间距 ρ^(-1/3) (m)；window（标量或逐点）> 0 时取 [z - window, z + window]
+    （截取到 [0, z_size]）范围内最稀疏处的间距，梯度剖面下幽灵区需要覆盖边界两侧的单元
+    """
+    z = np.atleast_1d(np.asarray(z, dtype=float))
+    window = np.broadcast_to(np.asarray(window, dtype=float), z.shape)
+    probes = np.clip(z[:, None] + window[:, None] * np.linspace(-1, 1, resolution + 1)[None, :],
+                     0.0, z_size)
+    rho = np.asarray(profile(probes.ravel()), dtype=float).reshape(probes.shape) * 1e9
+    return np.cbrt(1.0 / np.maximum(rho.min(axis=1), 1e-12))
+
+
+def assign_layers(z, z_boundaries):
+    """
+    Z坐标 → 层编号 (int8)，层区间左闭右开：[0, b1) → 0, [b1, b2) → 1, [b2, z_size] → 2
+    z_boundaries: 层边界的绝对Z坐标 (m)
+    """
+    return np.searchsorted(np.asarray(z_boundaries), z, side='right').astype(np.int8)
+
+
+def count_per_layer(z, z_size, layer_boundaries=DEFAULT_LAYER_BOUNDARIES):
+    """统计各层的点数（向量化）"""
+    layer_ids = assign_layers(z, np.asarray(layer_boundaries) * z_size)
+    return np.bincount(layer_ids, minlength=len(layer_boundaries) + 1)
+
+
+def poisson_disk_seeds(profile, x_size, y_size, z_size, min_spacing_factor=0.6,
+                       oversample=4, n_seeds=None, random_state=None):
+    """
+    梯度自适应的泊松圆盘（蓝噪声）种子采样
+
+    最小间距随局部密度变化: r(z) = min_spacing_factor * ρ(z)^(-1/3)
+    先按 ρ(z) 逆CDF采样 oversample 倍的候选点，再用 cKDTree 找出所有冲突点对，
+    按随机优先级向量化地逐轮求极大独立集（等价于按优先级顺序的飞镖投掷），
+    最后取优先级最高的 n_seeds 个被接受点
+
+    返回 (seeds, min_spacing)，min_spacing为每个种子的最小间距(m)
+    """
+    from scipy.spatial import cKDTree
+
+    rng = get_rng(random_state)
+    if n_seeds is None:
+        n_seeds = int(expected_seed_count(profile, x_size, y_size, (0.0, z_size)))
+    if n_seeds <= 0:
+        return np.empty((0, 3)), np.empty(0)
+
+    candidates = sample_seeds_from_profile(profile, x_size, y_size, z_size,
+                                           n_seeds=int(n_seeds * oversample),
+                                           random_state=rng)
+    # ρ 单位 seeds/mm³ → seeds/m³
+    rho = np.asarray(profile(candidates[:, 2]), dtype=float) * 1e9
+    radius = min_spacing_factor * np.cbrt(1.0 / np.maximum(rho, 1e-12))
+
+    # 空间加速结构中查询所有可能冲突的点对，再按各自的间距筛选
+    tree = cKDTree(candidates)
+    pairs = tree.query_pairs(radius.max(), output_type='ndarray')
+    if len(pairs):
+        dist = np.linalg.norm(candidates[pairs[:, 0]] - candidates[pairs[:, 1]], axis=1)
+        pairs = pairs[dist < np.maximum(radius[pairs[:, 0]], radius[pairs[:, 1]])]
+    src = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    dst = np.concatenate([pairs[:, 1], pairs[:, 0]])
+
+    # 随机优先级（数值越小越先投掷）
+    priority = rng.permutation(len(candidates))
+    state = np.zeros(len(candidates), dtype=np.int8)   # 0 待定, 1 接受, -1 拒绝
+
+    while True:
+        undecided = state == 0
+        if not undecided.any():
+            break
+        # 只保留两端都待定的冲突边
+        keep = undecided[src] & undecided[dst]
+        src, dst = src[keep], dst[keep]
+        # 每个点在待定邻居中的最高优先级
+        best_neighbor = np.full(len(candidates), len(candidates))
+        np.minimum.at(best_neighbor, src, priority[dst])
+        accept = undecided & (priority < best_neighbor)
+        state[accept] = 1
+        # 与新接受点冲突的邻居全部拒绝
+        state[dst[accept[src]]] = -1
+
+    accepted = np.flatnonzero(state == 1)
+    accepted = accepted[np.argsort(priority[accepted])]
+    if len(accepted) < n_seeds:
+        print(f"[WARNING] 泊松圆盘采样已饱和: {len(accepted)}/{n_seeds} 个种子，"
+              f"可减小 min_spacing_factor 或增大 oversample")
+    accepted = accepted[:n_seeds]
+
+    return candidates[accepted], radius[accepted]
+
+
+def lloyd_relax(seeds, sample_points, lower, upper, iterations=10, tol=1e-7,
+                seed_groups=None, sample_groups=None):
+    """
+    批量（离散）Lloyd松弛：把每个种子移动到其Voronoi单元的质心
+
+    质心由固定的采样点云估计：每个采样点用 cKDTree 归属到最近种子，
+    再用 np.bincount 一次性求出所有单元的质心，无需逐单元 ConvexHull。
+    lower/upper: 允许的坐标范围，(3,) 或每个种子一行 (N, 3)
+    seed_groups / sample_groups: 种子与采样点的分组编号（如所属层）。给出时每组种子只与同组采样点
+        求质心，质心是组内采样点的凸组合，因此种子自然留在本组区域内部，
+        不会像截断到边界那样堆积在分组边界面上
+    tol: 平均位移(m)低于该值时提前停止
+
+    返回 (seeds, displacement_history)
+    """
+    from scipy.spatial import cKDTree
+
+    seeds = np.array(seeds, dtype=float)
+    n_seeds = len(seeds)
+    history = []
+    if seed_groups is None or sample_groups is None:
+        seed_groups = np.zeros(n_seeds, dtype=np.int64)
+        sample_groups = np.zeros(len(sample_points), dtype=np.int64)
+    groups = [(np.flatnonzero(seed_groups == g), np.flatnonzero(sample_groups == g))
+              for g in np.unique(seed_groups)]
+
+    for _ in range(iterations):
+        counts = np.zeros(n_seeds)
+        sums = np.zeros((n_seeds, 3))
+        for seed_ids, sample_ids in groups:
+            if len(sample_ids) == 0:
+                continue
+            _, nearest = cKDTree(seeds[seed_ids]).query(sample_points[sample_ids], workers=-1)
+            labels = seed_ids[nearest]
+            counts += np.bincount(labels, minlength=n_seeds)
+            for axis in range(3):
+                sums[:, axis] += np.bincount(labels, weights=sample_points[sample_ids, axis],
+                                             minlength=n_seeds)
+        centroids = seeds.copy()
+        has_samples = counts > 0
+        centroids[has_samples] = sums[has_samples] / counts[has_samples, None]
+        centroids = np.clip(centroids, lower, upper)
+
+        displacement = np.linalg.norm(centroids - seeds, axis=1).mean()
+        seeds = centroids
+        history.append(displacement)
+        if displacement < tol:
+            break
+
+    return seeds, history
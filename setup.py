@@ -57,6 +57,7 @@ setup(
         "console_scripts": [
             "scaffold-generator=demo:main",
             "biomimetic-scaffold=demo:main",
+            "scaffold-sweep=sweep:main",
         ],
     },
     keywords=[
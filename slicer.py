@@ -0,0 +1,146 @@
+"""
+直接切片输出（DLP/SLA 光固化打印）
+按打印层高逐层把支柱网络（胶囊体并集或平滑并集）或Voronoi单元光栅化为灰度图，
+多进程并行渲染，写出PNG序列或带清单的zip，不经过STL与外部切片软件
+"""
+
+import io
+import os
+import json
+import struct
+import zlib
+import zipfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial import cKDTree
+
+from sdf_mesh import block_field
+
+
+def png_bytes(image, pixel_pitch=None):
+    """
+    8位灰度图 (H, W) → PNG字节串（zlib压缩，不依赖图像库）
+    pixel_pitch: 像素间距 (m)，给出时写入 pHYs 块，切片软件可据此还原物理尺寸
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape
+    # 每行前置一个字节的滤波类型 0（不滤波）
+    raw = np.zeros((height, width + 1), dtype=np.uint8)
+    raw[:, 1:] = image
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    parts = [b'\x89PNG\r\n\x1a\n', chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))]
+    if pixel_pitch:
+        per_meter = int(round(1.0 / pixel_pitch))
+        parts.append(chunk(b'pHYs', struct.pack('>IIB', per_meter, per_meter, 1)))
+    parts.append(chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+    parts.append(chunk(b'IEND', b''))
+    return b''.join(parts)
+
+
+def strut_layer_mask(z, origin, shape, pitch, p0, p1, radius, blend=0.0):
+    """
+    高度 z 处支柱网络截面的占据掩码 (nx, ny)，像素中心位于 origin + i·pitch
+    blend > 0 时为 sdf 模式的平滑并集，否则为胶囊体的普通并集
+    """
+    band = pitch + 6 * blend
+    field = block_field(np.zeros(3, dtype=np.int64), (shape[0], shape[1], 1),
+                        np.array([origin[0], origin[1], z]), pitch, p0, p1, radius,
+                        blend=blend, band=band)
+    return field[:, :, 0] <= 0
+
+
+def cell_layer_labels(z, origin, shape, pitch, seeds, seed_rows):
+    """
+    高度 z 处每个像素所在的Voronoi单元（即最近的种子），返回单元表行号 (nx, ny)
+    seed_rows: 每个种子对应的单元表行号，不在表中的种子为 -1（像素不属于任何内部单元）
+    """
+    x = origin[0] + np.arange(shape[0]) * pitch
+    y = origin[1] + np.arange(shape[1]) * pitch
+    gx, gy = np.meshgrid(x, y, indexing='ij')
+    points = np.stack([gx.ravel(), gy.ravel(), np.full(gx.size, z)], axis=1)
+    _, nearest = cKDTree(seeds).query(points)
+    return seed_rows[nearest].reshape(shape)
+
+
+def render_layer(task):
+    """
+    渲染一层灰度图（在进程池中执行）
+
+    task: (kind, z, origin, shape, pitch, supersample, geometry)
+        kind = 'struts': geometry = (p0, p1, radius, blend)，已筛选到与本层相交的支柱
+        kind = 'cells' : geometry = (seeds, seed_rows)
+    supersample > 1 时每个像素按 supersample² 个子像素的覆盖率给出灰度（抗锯齿）
+    返回 (H, W) uint8 图像，行从 +Y 到 -Y、列从 -X 到 +X（与俯视图一致）
+    """
+    kind, z, origin, shape, pitch, supersample, geometry = task
+    s = int(supersample)
+    fine_pitch = pitch / s
+    fine_origin = np.asarray(origin, dtype=float)[:2] + 0.5 * fine_pitch
+    fine_shape = (shape[0] * s, shape[1] * s)
+    if kind == 'struts':
+        p0, p1, radius, blend = geometry
+        if len(p0):
+            mask = strut_layer_mask(z, fine_origin, fine_shape, fine_pitch, p0, p1, radius, blend)
+        else:
+            mask = np.zeros(fine_shape, dtype=bool)
+    else:
+        seeds, seed_rows = geometry
+        mask = cell_layer_labels(z, fine_origin, fine_shape, fine_pitch, seeds, seed_rows) >= 0
+    coverage = mask.reshape(shape[0], s, shape[1], s).mean(axis=(1, 3))
+    return np.round(coverage * 255).astype(np.uint8).T[::-1]
+
+
+def iter_layer_images(tasks, n_workers=None):
+    """按层顺序并行渲染，同时在途的任务数有上限，逐层产出图像"""
+    n_workers = n_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        max_pending = 2 * n_workers
+        pending = []
+        for task in tasks:
+            pending.append(pool.submit(render_layer, task))
+            if len(pending) >= max_pending:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def write_slice_stack(path, images, layer_z, manifest, pixel_pitch):
+    """
+    写出切片序列：path 以 .zip 结尾时写入单个zip，否则写入目录
+    每层一个 layer_00000.png，另附 manifest.json（含每层文件名、高度与实体面积比例）
+    images / layer_z: 逐层图像的迭代器与对应的层中心高度 (m)
+    返回补全了 layers 列表的 manifest
+    """
+    as_zip = path.lower().endswith('.zip')
+    if as_zip:
+        archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED)
+    else:
+        os.makedirs(path, exist_ok=True)
+    layers = []
+    try:
+        for k, (image, z) in enumerate(zip(images, layer_z)):
+            name = f'layer_{k:05d}.png'
+            data = png_bytes(image, pixel_pitch)
+            if as_zip:
+                # PNG 已经压缩，zip 内直接存储
+                archive.writestr(name, data)
+            else:
+                with open(os.path.join(path, name), 'wb') as f:
+                    f.write(data)
+            layers.append({'file': name, 'z_um': float(z) * 1e6,
+                           'solid_fraction': float(image.mean()) / 255})
+        manifest = dict(manifest, layers=layers)
+        text = json.dumps(manifest, indent=2, ensure_ascii=False)
+        if as_zip:
+            archive.writestr('manifest.json', text)
+        else:
+            with io.open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as f:
+                f.write(text)
+    finally:
+        if as_zip:
+            archive.close()
+    return manifest
@@ -0,0 +1,53 @@
+"""
+稀疏对称正定方程组的预条件共轭梯度法
+不依赖 scipy.sparse.linalg.cg 的参数名（tol / rtol 随 scipy 版本变化），
+孔隙网络渗透率等分析共用
+"""
+
+import numpy as np
+
+
+def jacobi_preconditioner(matrix):
+    """对角（Jacobi）预条件：返回 r → D⁻¹ r 的函数"""
+    diagonal = matrix.diagonal()
+    inverse = np.where(diagonal > 0, 1.0 / np.where(diagonal > 0, diagonal, 1.0), 1.0)
+    return lambda residual: inverse * residual
+
+
+def conjugate_gradient(matrix, rhs, preconditioner=None, x0=None, rtol=1e-8, maxiter=None):
+    """
+    预条件共轭梯度法求解 matrix · x = rhs（matrix 对称正定，可为稀疏矩阵或带 @ 的线性算子）
+
+    preconditioner: r → M⁻¹ r 的函数，默认 Jacobi 预条件
+    rtol: 收敛条件 ‖r‖ ≤ rtol·‖rhs‖
+    maxiter: 最大迭代次数，默认 10·n
+    返回 (x, info)：info 含 iterations、residual（相对残差）与 converged
+    """
+    rhs = np.asarray(rhs, dtype=float)
+    if preconditioner is None:
+        preconditioner = jacobi_preconditioner(matrix)
+    maxiter = 10 * len(rhs) if maxiter is None else maxiter
+    x = np.zeros_like(rhs) if x0 is None else np.array(x0, dtype=float)
+    residual = rhs - matrix @ x if x0 is not None else rhs.copy()
+    norm_rhs = np.linalg.norm(rhs)
+    if norm_rhs == 0:
+        return np.zeros_like(rhs), {'iterations': 0, 'residual': 0.0, 'converged': True}
+    target = rtol * norm_rhs
+
+    z = preconditioner(residual)
+    direction = z.copy()
+    rz = residual @ z
+    iteration = 0
+    norm = np.linalg.norm(residual)
+    while norm > target and iteration < maxiter:
+        product = matrix @ direction
+        alpha = rz / (direction @ product)
+        x += alpha * direction
+        residual -= alpha * product
+        norm = np.linalg.norm(residual)
+        z = preconditioner(residual)
+        rz, rz_old = residual @ z, rz
+        direction = z + (rz / rz_old) * direction
+        iteration += 1
+    return x, {'iterations': iteration, 'residual': float(norm / norm_rhs),
+               'converged': bool(norm <= target)}
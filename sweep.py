@@ -0,0 +1,380 @@
+"""
+参数扫描 / 试验设计（DoE）
+把网格、拉丁超立方或参数表给出的一组设计在进程池中逐个运行
+generate_seeds_with_gradient → compute_voronoi → compute_cell_statistics → analyze_gradient_properties，
+每个设计使用由 (基础种子, 设计编号) 派生的独立随机种子，结果与执行顺序、进程数无关。
+结果逐行追加到一个CSV结果文件（每列一个参数或指标），中断后以相同参数再次运行即从断点继续
+
+命令行:
+    scaffold-sweep grid -p surface_density=15000,25000,35000 -p target_porosity=0.6,0.7 -o sweep.csv
+    scaffold-sweep lhs -r surface_density=10000:40000 -r core_density=2000:8000 -n 100 -o sweep.csv
+    scaffold-sweep list designs.csv -o sweep.csv
+"""
+
+import os
+import io
+import csv
+import json
+import time
+import argparse
+import itertools
+import contextlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from gradient_stats import DEFAULT_PERCENTILES
+from scaffold_generator import GradientVoronoiScaffoldGenerator
+
+
+# 可扫描的参数及默认值（尺寸单位 m，密度单位 seeds/mm³）
+SWEEP_DEFAULTS = {
+    'surface_density': 25000,
+    'middle_density': 12000,
+    'core_density': 6000,
+    'target_porosity': 0.68,
+    'gradient_type': 'linear',
+    'sampling': 'random',
+    'x_size': 800e-6,
+    'y_size': 800e-6,
+    'z_size': 100e-6,
+}
+
+# 每个分层记录的指标（对应 GradientStatistics 的数组属性）
+LAYER_METRICS = ('n_pores', 'mean_pore_size_um', 'std_pore_size_um', 'seed_density')
+N_LAYERS = 3
+
+
+def result_columns(parameters):
+    """结果文件的列：编号与种子、参数、状态、整体指标、各层指标、耗时与错误信息"""
+    columns = ['job_id', 'seed'] + list(parameters) + [
+        'status', 'n_seeds', 'n_cells', 'mean_pore_size_um', 'std_pore_size_um',
+        'pore_gradient_ratio']
+    for k in range(N_LAYERS):
+        columns += [f'layer{k}_{name}' for name in LAYER_METRICS]
+        columns += [f'layer{k}_p{q:g}_pore_size_um' for q in DEFAULT_PERCENTILES]
+    return columns + ['elapsed_s', 'error']
+
+
+def parse_value(text):
+    """命令行 / 参数表中的取值：能转为整数或浮点数时转换，否则保留字符串"""
+    text = text.strip()
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _check_parameters(names):
+    unknown = [name for name in names if name not in SWEEP_DEFAULTS]
+    if unknown:
+        raise ValueError(f"未知的扫描参数: {unknown}，可选 {list(SWEEP_DEFAULTS)}")
+
+
+def grid_design(values):
+    """全因子网格：values 为 {参数: 取值列表}，返回全部组合的参数字典列表"""
+    _check_parameters(values)
+    names = list(values)
+    return [dict(zip(names, combination))
+            for combination in itertools.product(*(values[name] for name in names))]
+
+
+def latin_hypercube_design(bounds, n_samples, random_state=None, fixed=None):
+    """
+    拉丁超立方设计：bounds 为 {参数: (下限, 上限)}，每个参数的取值范围等分为 n_samples 段，
+    每段恰好取一个随机点，各参数的分段顺序独立随机打乱
+    fixed: 所有设计共用的其他参数 {参数: 取值}
+    """
+    _check_parameters(list(bounds) + list(fixed or {}))
+    rng = np.random.default_rng(random_state)
+    n_samples = int(n_samples)
+    columns = {}
+    for name, (low, high) in bounds.items():
+        strata = (rng.permutation(n_samples) + rng.random(n_samples)) / n_samples
+        columns[name] = low + strata * (high - low)
+    return [dict(fixed or {}, **{name: float(columns[name][i]) for name in bounds})
+            for i in range(n_samples)]
+
+
+def load_design(filename):
+    """从参数表读取设计列表：CSV（首行为参数名）或 JSON（参数字典的列表）"""
+    if filename.lower().endswith('.json'):
+        with open(filename, 'r', encoding='utf-8') as f:
+            design = json.load(f)
+    else:
+        with open(filename, 'r', encoding='utf-8', newline='') as f:
+            design = [{name: parse_value(value) for name, value in row.items()}
+                      for row in csv.DictReader(f)]
+    for parameters in design:
+        _check_parameters(parameters)
+    return design
+
+
+def job_seed(base_seed, job_id):
+    """设计 job_id 的随机种子：由 (base_seed, job_id) 派生，与执行顺序无关，可用于单独复现"""
+    sequence = np.random.SeedSequence(base_seed, spawn_key=(int(job_id),))
+    return int(sequence.generate_state(1, dtype=np.uint32)[0])
+
+
+def run_job(task):
+    """
+    运行一个设计（在进程池中执行），返回结果行字典
+
+    task: (job_id, seed, parameters, bounded, quiet)
+        parameters 已补全为 SWEEP_DEFAULTS 的全部参数；quiet 时屏蔽生成器的输出
+    失败的设计记为 status='failed'，error 列保存异常信息，不会中断整个扫描
+    """
+    job_id, seed, parameters, bounded, quiet = task
+    row = {'job_id': job_id, 'seed': seed}
+    row.update(parameters)
+    start_time = time.time()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            generator = GradientVoronoiScaffoldGenerator(
+                x_size=parameters['x_size'], y_size=parameters['y_size'],
+                z_size=parameters['z_size'], target_porosity=parameters['target_porosity'],
+                gradient_type=parameters['gradient_type'])
+            gradient_param = {name: parameters[name]
+                              for name in ('surface_density', 'middle_density', 'core_density')}
+            generator.generate_seeds_with_gradient(gradient_param,
+                                                   random_state=np.random.default_rng(seed),
+                                                   sampling=parameters['sampling'])
+            generator.compute_voronoi(bounded=bounded)
+            generator.extract_interior_cells()
+            generator.compute_cell_statistics()
+            generator.analyze_gradient_properties()
+    except Exception as e:
+        row.update(status='failed', error=f"{type(e).__name__}: {e}",
+                   elapsed_s=time.time() - start_time)
+        return row
+
+    stats = generator.gradient_stats
+    pore_sizes = np.asarray(generator.pore_sizes, dtype=float)
+    row.update(status='ok', n_seeds=len(generator.seeds), n_cells=len(pore_sizes),
+               mean_pore_size_um=float(pore_sizes.mean()) if len(pore_sizes) else None,
+               std_pore_size_um=float(pore_sizes.std()) if len(pore_sizes) else None,
+               pore_gradient_ratio=stats.pore_gradient_ratio())
+    for k in range(min(N_LAYERS, len(stats.n_pores))):
+        for name in LAYER_METRICS:
+            row[f'layer{k}_{name}'] = getattr(stats, name)[k]
+        for q, values in stats.percentiles.items():
+            row[f'layer{k}_p{q:g}_pore_size_um'] = values[k]
+    row['elapsed_s'] = time.time() - start_time
+    return {name: _clean(value) for name, value in row.items()}
+
+
+def _clean(value):
+    """结果值转为可写入CSV的Python标量，NaN 记为空"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _read_completed(filename, columns, parameters):
+    """
+    读取已有结果文件，返回 {job_id: 参数字符串元组} 与失败的 job_id 集合
+    截掉中断时写了一半的末行；列或参数与当前设计不一致时报错，避免把两次扫描混在一个文件里
+    """
+    with open(filename, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            print("[WARNING] 结果文件末行不完整（上次中断），已截断")
+            f.truncate(end)
+    with open(filename, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return None, set()
+        if header != columns:
+            raise ValueError(f"结果文件 {filename} 的列与当前扫描参数不一致，请换用新文件或 overwrite=True")
+        index = [header.index(name) for name in parameters]
+        completed, failed = {}, set()
+        for row in reader:
+            job_id = int(row[0])
+            completed[job_id] = tuple(row[i] for i in index)
+            if row[header.index('status')] == 'ok':
+                failed.discard(job_id)
+            else:
+                failed.add(job_id)
+    return completed, failed
+
+
+def run_sweep(design, results_file, base_seed=0, n_workers=None, bounded=False,
+              retry_failed=False, overwrite=False, quiet=True):
+    """
+    并行运行一组设计，结果逐行追加到 CSV 结果文件
+
+    design: 参数字典列表（grid_design / latin_hypercube_design / load_design 的结果），
+            未给出的参数取 SWEEP_DEFAULTS；列表中的位置即 job_id
+    base_seed: 基础随机种子，每个设计的种子为 job_seed(base_seed, job_id)
+    n_workers: 进程数，默认等于CPU核数；为 1 时在当前进程中顺序运行
+    bounded: 使用镜像种子有界剖分（见 compute_voronoi），保留边界单元
+    retry_failed: 断点续跑时重新运行失败的设计（追加新行，load_results 取最后一行）
+    overwrite: 删除已有结果文件重新开始；否则跳过文件中已有的设计
+    quiet: 屏蔽各设计的生成器输出，只打印进度
+
+    返回本次运行的结果行列表
+    """
+    design = [dict(parameters) for parameters in design]
+    for parameters in design:
+        _check_parameters(parameters)
+    # 参数列：设计中出现过的参数按默认表顺序排列，其余参数固定为默认值
+    swept = [name for name in SWEEP_DEFAULTS if any(name in p for p in design)]
+    columns = result_columns(swept)
+    jobs = []
+    for job_id, parameters in enumerate(design):
+        jobs.append((job_id, job_seed(base_seed, job_id), dict(SWEEP_DEFAULTS, **parameters)))
+
+    if overwrite and os.path.exists(results_file):
+        os.remove(results_file)
+    completed, failed = {}, set()
+    if os.path.exists(results_file):
+        completed, failed = _read_completed(results_file, columns, swept)
+        if completed is None:
+            os.remove(results_file)
+            completed = {}
+    for job_id, _, parameters in jobs:
+        recorded = completed.get(job_id)
+        if recorded is not None and recorded != tuple(str(parameters[name]) for name in swept):
+            raise ValueError(f"结果文件 {results_file} 中设计 {job_id} 的参数与当前设计不一致，"
+                             f"请换用新文件或 overwrite=True")
+    skip = set(completed) - (failed if retry_failed else set())
+    pending = [job for job in jobs if job[0] not in skip]
+
+    n_workers = n_workers or os.cpu_count() or 1
+    print(f"[INFO] 参数扫描: {len(jobs)} 个设计 ({len(swept)} 个参数), 已完成 {len(skip)} 个, "
+          f"待运行 {len(pending)} 个, {n_workers} 个进程")
+    start_time = time.time()
+    rows = []
+    new_file = not os.path.exists(results_file)
+    with open(results_file, 'a', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        if new_file:
+            writer.writeheader()
+            f.flush()
+        tasks = ((job_id, seed, parameters, bounded, quiet) for job_id, seed, parameters in pending)
+        for row in _iter_jobs(tasks, n_workers):
+            writer.writerow(row)
+            f.flush()
+            rows.append(row)
+            message = (f"平均孔径 {row['mean_pore_size_um']:.1f} μm" if row['status'] == 'ok' and
+                       row['mean_pore_size_um'] is not None else row.get('error') or row['status'])
+            print(f"  [{len(rows)}/{len(pending)}] 设计 {row['job_id']}: {message} "
+                  f"({row['elapsed_s']:.1f} s)")
+
+    n_failed = sum(row['status'] != 'ok' for row in rows)
+    if n_failed:
+        print(f"[WARNING] {n_failed} 个设计失败，见结果文件的 error 列")
+    print(f"[SUCCESS] 参数扫描完成: 本次 {len(rows)} 个设计, 用时 {time.time() - start_time:.1f} s, "
+          f"结果: {results_file}")
+    return rows
+
+
+def _iter_jobs(tasks, n_workers):
+    """按完成顺序产出结果；进程池中同时在途的任务数有上限"""
+    if n_workers == 1:
+        for task in tasks:
+            yield run_job(task)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        max_pending = 2 * n_workers
+        running = set()
+        for task in tasks:
+            running.add(pool.submit(run_job, task))
+            if len(running) >= max_pending:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def load_results(filename):
+    """
+    以列的形式读取结果文件，返回 {列名: np.ndarray}
+    同一设计有多行（重试失败的设计）时取最后一行；行按 job_id 排序，空值读为 NaN（数值列）或 ''
+    """
+    with open(filename, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        latest = {}
+        for row in reader:
+            if len(row) == len(header):
+                latest[int(row[0])] = row
+    rows = [latest[job_id] for job_id in sorted(latest)]
+    results = {}
+    for k, name in enumerate(header):
+        values = [row[k] for row in rows]
+        try:
+            results[name] = np.array([float(v) if v != '' else np.nan for v in values])
+        except ValueError:
+            results[name] = np.array(values, dtype=object)
+    results['job_id'] = results['job_id'].astype(np.int64)
+    return results
+
+
+def _parse_assignments(items, separator):
+    """把 'name=a,b,c' 或 'name=low:high' 形式的命令行参数解析为字典"""
+    parsed = {}
+    for item in items or []:
+        name, _, text = item.partition('=')
+        if not text:
+            raise ValueError(f"参数格式应为 name=value: {item}")
+        parsed[name.strip()] = [parse_value(v) for v in text.split(separator)]
+    return parsed
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        prog='scaffold-sweep',
+        description="梯度Voronoi支架的并行参数扫描，结果写入可断点续跑的CSV文件。"
+                    f"可扫描的参数: {', '.join(SWEEP_DEFAULTS)}")
+    subparsers = parser.add_subparsers(dest='design', required=True)
+
+    grid = subparsers.add_parser('grid', help="全因子网格")
+    grid.add_argument('-p', '--param', action='append', required=True,
+                      help="参数取值列表，如 surface_density=15000,25000,35000（可重复）")
+
+    lhs = subparsers.add_parser('lhs', help="拉丁超立方抽样")
+    lhs.add_argument('-r', '--range', action='append', required=True,
+                     help="参数范围，如 core_density=2000:8000（可重复）")
+    lhs.add_argument('-n', '--samples', type=int, required=True, help="设计数")
+    lhs.add_argument('-p', '--param', action='append', help="固定参数，如 gradient_type=sigmoid")
+
+    listed = subparsers.add_parser('list', help="从参数表（CSV 或 JSON）读取设计")
+    listed.add_argument('table', help="参数表文件")
+
+    for sub in (grid, lhs, listed):
+        sub.add_argument('-o', '--output', required=True, help="结果CSV文件（已存在时断点续跑）")
+        sub.add_argument('-s', '--seed', type=int, default=0, help="基础随机种子 (默认 0)")
+        sub.add_argument('-j', '--workers', type=int, default=None, help="进程数 (默认CPU核数)")
+        sub.add_argument('--bounded', action='store_true', help="使用有界（镜像种子）剖分")
+        sub.add_argument('--retry-failed', action='store_true', help="重新运行失败的设计")
+        sub.add_argument('--overwrite', action='store_true', help="覆盖已有结果文件")
+        sub.add_argument('--verbose', action='store_true', help="显示每个设计的生成器输出")
+
+    args = parser.parse_args(argv)
+    if args.design == 'grid':
+        design = grid_design(_parse_assignments(args.param, ','))
+    elif args.design == 'lhs':
+        bounds = {name: (float(values[0]), float(values[1]))
+                  for name, values in _parse_assignments(args.range, ':').items()}
+        fixed = {name: values[0] for name, values in _parse_assignments(args.param, ',').items()}
+        design = latin_hypercube_design(bounds, args.samples, random_state=args.seed, fixed=fixed)
+    else:
+        design = load_design(args.table)
+
+    run_sweep(design, args.output, base_seed=args.seed, n_workers=args.workers,
+              bounded=args.bounded, retry_failed=args.retry_failed, overwrite=args.overwrite,
+              quiet=not args.verbose)
+
+
+if __name__ == "__main__":
+    main()
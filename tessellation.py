@@ -0,0 +1,245 @@
+"""
+Voronoi剖分工具
+- 内部单元提取（向量化判断单元是否有界且位于支架内）
+- 区域分解（XY分块 + 幽灵种子）并行计算大尺寸支架的Voronoi单元
+- 镜像种子有界剖分：每个单元都被精确裁剪到支架边界
+所有结果均以 CellTable 返回
+"""
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial import Voronoi, cKDTree
+
+from cell_table import CellTable, csr_from_lists, csr_row_ids
+
+
+def interior_point_mask(vor, box, points=None, tol=0.0):
+    """
+    判断 vor.points 中哪些点的单元为内部单元：有界且全部顶点位于支架 [0, box] 内
+    points: 只判断这些下标（默认全部）
+    tol: 允许的越界距离 (m)
+    """
+    if points is None:
+        points = np.arange(len(vor.points))
+    offsets, indices = csr_from_lists([vor.regions[r] for r in vor.point_region[points]])
+    vertex_in_box = np.all((vor.vertices >= -tol) & (vor.vertices <= box + tol), axis=1)
+    bad = (indices < 0) | ~vertex_in_box[indices]
+    n_bad = np.bincount(csr_row_ids(offsets), weights=bad, minlength=len(points))
+    return (n_bad == 0) & (np.diff(offsets) > 0)
+
+
+def interior_cell_table(vor, box, layer_boundaries=None):
+    """从整体剖分中提取全部内部单元，返回 CellTable"""
+    box = np.asarray(box, dtype=float)
+    cell_points = np.flatnonzero(interior_point_mask(vor, box))
+    return CellTable.from_voronoi(vor, cell_points, layer_boundaries=layer_boundaries)
+
+
+def _tessellate_tile(task):
+    """
+    子区域Voronoi计算（在进程池中执行）
+
+    task: (points, global_ids, owned, bounds, box, layer_boundaries)
+        points    - 子区域种子 + 幽灵种子
+        global_ids - 对应的全局种子编号
+        owned     - 本子区域负责输出的种子掩码
+        bounds    - 幽灵区外边界 (x0, x1, y0, y1)，位于全局边界处为 ±inf
+        box       - 支架尺寸 (x_size, y_size, z_size)
+        layer_boundaries - 分层Z边界 (m)
+
+    一个Voronoi顶点v（到生成种子距离为R）在全局剖分中同样成立的充分条件是：
+    以v为球心、R为半径的球完全落在已知种子的区域内（空球性质）。
+    单元的全部顶点都满足时，局部单元与全局单元完全相同。
+
+    返回 (table, uncertain_ids)，table 为已确认的内部单元（含体积、孔径等统计列）
+    """
+    points, global_ids, owned, bounds, box, layer_boundaries = task
+    vor = Voronoi(points)
+    box = np.asarray(box)
+    x0, x1, y0, y1 = bounds
+
+    # 每个Voronoi顶点的空球半径 = 到最近种子的距离
+    radius, _ = cKDTree(points).query(vor.vertices)
+    vv = vor.vertices
+    vertex_exact = ((vv[:, 0] - radius >= x0) & (vv[:, 0] + radius <= x1) &
+                    (vv[:, 1] - radius >= y0) & (vv[:, 1] + radius <= y1))
+    vertex_in_box = np.all((vv >= 0) & (vv <= box), axis=1)
+
+    interior = []
+    unresolved = []
+    fully_known = np.all(np.isinf(bounds))
+
+    for local_idx in np.flatnonzero(owned):
+        region = vor.regions[vor.point_region[local_idx]]
+        finite = np.array([v for v in region if v != -1], dtype=int)
+
+        # 已确认的顶点落在支架外 → 全局单元同样触及边界，不是内部单元
+        if np.any(vertex_exact[finite] & ~vertex_in_box[finite]):
+            continue
+        if len(region) == 0 or -1 in region or not np.all(vertex_exact[finite]):
+            if not fully_known:
+                unresolved.append(local_idx)
+            continue
+
+        interior.append(local_idx)
+
+    # 对仍不确定的单元，把种子投影到六个面外侧作为探针：
+    # 若探针最近的种子仍是自己且其空球已知，则全局单元延伸到支架外
+    uncertain_ids = []
+    if unresolved:
+        unresolved = np.asarray(unresolved)
+        eps = 1e-9 * box.max()
+        probes = np.repeat(points[unresolved], 6, axis=0)
+        axis = np.tile(np.repeat([0, 1, 2], 2), len(unresolved))
+        value = np.tile([-eps, box[0] + eps, -eps, box[1] + eps, -eps, box[2] + eps],
+                        len(unresolved))
+        probes[np.arange(len(probes)), axis] = value
+        dist, nearest = cKDTree(points).query(probes)
+        probe_known = ((probes[:, 0] - dist >= x0) & (probes[:, 0] + dist <= x1) &
+                       (probes[:, 1] - dist >= y0) & (probes[:, 1] + dist <= y1))
+        outside = (nearest == np.repeat(unresolved, 6)) & probe_known
+        resolved = outside.reshape(-1, 6).any(axis=1)
+        uncertain_ids = list(global_ids[unresolved[~resolved]])
+
+    table = CellTable.from_voronoi(vor, interior, point_ids=global_ids,
+                                   layer_boundaries=layer_boundaries)
+    return table.compute_statistics(), uncertain_ids
+
+
+def _tile_tasks(seeds, box, tiles, margin, candidates, layer_boundaries):
+    """为 candidates 中的种子按XY分块构造计算任务"""
+    x_size, y_size, _ = box
+    nx, ny = tiles
+    x_edges = np.linspace(0, x_size, nx + 1)
+    y_edges = np.linspace(0, y_size, ny + 1)
+    # 种子所属子区域（边界上的种子归入最后一块）
+    tile_x = np.clip(np.searchsorted(x_edges, seeds[:, 0], side='right') - 1, 0, nx - 1)
+    tile_y = np.clip(np.searchsorted(y_edges, seeds[:, 1], side='right') - 1, 0, ny - 1)
+
+    tasks = []
+    for ix in range(nx):
+        for iy in range(ny):
+            owned_mask = candidates & (tile_x == ix) & (tile_y == iy)
+            if not owned_mask.any():
+                continue
+            ex0, ex1 = x_edges[ix] - margin, x_edges[ix + 1] + margin
+            ey0, ey1 = y_edges[iy] - margin, y_edges[iy + 1] + margin
+            in_ext = ((seeds[:, 0] >= ex0) & (seeds[:, 0] <= ex1) &
+                      (seeds[:, 1] >= ey0) & (seeds[:, 1] <= ey1))
+            ids = np.flatnonzero(in_ext)
+            # 全局边界外没有种子，对应方向视为无限远
+            bounds = (-np.inf if ex0 <= 0 else ex0, np.inf if ex1 >= x_size else ex1,
+                      -np.inf if ey0 <= 0 else ey0, np.inf if ey1 >= y_size else ey1)
+            tasks.append((seeds[ids], ids, owned_mask[ids], bounds, tuple(box), layer_boundaries))
+    return tasks
+
+
+def tiled_voronoi(seeds, box, tiles=(2, 2), ghost_margin=None, n_workers=None,
+                  layer_boundaries=None):
+    """
+    区域分解Voronoi：XY分块 + 幽灵种子边缘，进程池并行剖分后拼接内部单元
+
+    seeds: (N, 3) 种子坐标 (m)
+    box: (x_size, y_size, z_size)
+    tiles: XY方向的分块数 (nx, ny)
+    ghost_margin: 幽灵区宽度 (m)，默认取平均种子间距的3倍；
+                  无法确认精确性的单元会自动加倍幽灵区重新计算
+    n_workers: 进程数，默认等于CPU核数
+    layer_boundaries: 分层Z边界 (m)
+
+    返回按种子编号排序的 CellTable（含孔隙尺寸），
+    与整体剖分 + 边界单元剔除的结果一致（仅有浮点舍入差异）
+    """
+    seeds = np.asarray(seeds, dtype=float)
+    box = np.asarray(box, dtype=float)
+    if ghost_margin is None:
+        ghost_margin = 3 * (np.prod(box) / len(seeds)) ** (1 / 3)
+
+    tables = []
+    candidates = np.ones(len(seeds), dtype=bool)
+    margin = ghost_margin
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        while candidates.any():
+            tasks = _tile_tasks(seeds, box, tiles, margin, candidates, layer_boundaries)
+            candidates = np.zeros(len(seeds), dtype=bool)
+            for table, uncertain in pool.map(_tessellate_tile, tasks):
+                tables.append(table)
+                candidates[uncertain] = True
+            if candidates.any():
+                print(f"[INFO] {candidates.sum()} 个单元需要更大的幽灵区，重新计算...")
+                margin *= 2
+
+    return CellTable.concatenate(tables)
+
+
+def local_spacing(seeds, k=8):
+    """每个种子到最近 k 个种子的平均距离 (m)，反映梯度密度下的局部种子间距"""
+    seeds = np.asarray(seeds, dtype=float)
+    k = min(k, len(seeds) - 1)
+    if k < 1:
+        return np.full(len(seeds), np.inf)
+    distances, _ = cKDTree(seeds).query(seeds, k + 1)
+    return distances[:, 1:].mean(axis=1)
+
+
+def mirror_seeds(seeds, box, margin):
+    """
+    把距离六个边界面小于 margin 的种子关于该面镜像（向量化）
+    margin: 标量或 (N,) 逐种子的镜像带宽度
+
+    镜像点与原种子的平分面就是边界面本身，因此原种子的Voronoi单元被边界面精确裁剪。
+    返回 [原种子; 镜像种子]，前 len(seeds) 个点为原种子
+    """
+    seeds = np.asarray(seeds, dtype=float)
+    mirrored = [seeds]
+    for axis in range(3):
+        for face in (0.0, box[axis]):
+            near = np.abs(seeds[:, axis] - face) < margin
+            reflected = seeds[near].copy()
+            reflected[:, axis] = 2 * face - reflected[:, axis]
+            mirrored.append(reflected)
+    return np.vstack(mirrored)
+
+
+def bounded_voronoi(seeds, box, margin=None, tol=1e-12, layer_boundaries=None):
+    """
+    镜像种子有界Voronoi：所有种子都得到被裁剪到支架内的有界单元，不再丢弃边界单元
+
+    margin: 镜像带宽度 (m)，标量或 (N,) 逐种子；默认取每个种子的局部间距（见 local_spacing），
+            只有靠近边界的种子被镜像。单元越出边界的种子其镜像带自动加倍，
+            直到覆盖整个支架仍越界时报错
+    tol: 判断顶点越界的相对容差
+
+    镜像点在支架内永远不会比其原种子更近，所以只要所有单元都落在支架内，
+    结果就与"整体剖分后裁剪到支架"严格一致；
+    种子单元的边界面只由它自己的镜像点决定，因此越界时只需扩大该种子的镜像带
+
+    返回 (vor, table)，table 按种子顺序包含全部单元；
+    位于支架边界上的面其外侧种子编号为 -1
+    """
+    seeds = np.asarray(seeds, dtype=float)
+    box = np.asarray(box, dtype=float)
+    n_seeds = len(seeds)
+    if margin is None:
+        margin = local_spacing(seeds)
+    margin = np.minimum(np.broadcast_to(np.asarray(margin, dtype=float), (n_seeds,)), box.max())
+    slack = tol * box.max()
+
+    while True:
+        vor = Voronoi(mirror_seeds(seeds, box, margin))
+        inside = interior_point_mask(vor, box, np.arange(n_seeds), tol=slack)
+        if inside.all():
+            break
+        if np.all(margin[~inside] >= box.max()):
+            raise ValueError(f"{np.count_nonzero(~inside)} 个单元在镜像全部边界后仍越出支架，"
+                             f"请检查种子是否都位于支架内")
+        margin = np.where(inside, margin, np.minimum(2 * margin, box.max()))
+        print(f"[INFO] {np.count_nonzero(~inside)} 个单元的镜像带不足，加倍后重新计算...")
+
+    point_ids = np.concatenate([np.arange(n_seeds), np.full(len(vor.points) - n_seeds, -1)])
+    table = CellTable.from_voronoi(vor, np.arange(n_seeds), point_ids=point_ids,
+                                   layer_boundaries=layer_boundaries)
+    # 消除浮点误差造成的微小越界
+    np.clip(table.vertices, 0, box, out=table.vertices)
+    return vor, table
@@ -0,0 +1,201 @@
+import pickle
+
+import numpy as np
+import pytest
+from scipy.spatial import Voronoi
+
+from cell_table import CellTable, csr_from_lists, csr_row_ids, csr_take
+from tessellation import interior_point_mask
+
+
+BOX = np.array([200e-6, 200e-6, 100e-6])
+BOUNDARIES = [20e-6, 50e-6]
+
+
+@pytest.fixture(scope="module")
+def voronoi():
+    seeds = np.random.default_rng(0).uniform(0, 1, (200, 3)) * BOX
+    vor = Voronoi(seeds)
+    return vor, np.flatnonzero(interior_point_mask(vor, BOX))
+
+
+def test_csr_helpers():
+    offsets, values = csr_from_lists([[1, 2], [], [3, 4, 5]])
+    np.testing.assert_array_equal(offsets, [0, 2, 2, 5])
+    np.testing.assert_array_equal(csr_row_ids(offsets), [0, 0, 2, 2, 2])
+    taken_offsets, taken = csr_take(offsets, values, [2, 0])
+    np.testing.assert_array_equal(taken_offsets, [0, 3, 5])
+    np.testing.assert_array_equal(taken, [3, 4, 5, 1, 2])
+
+
+def test_from_voronoi_matches_regions(voronoi):
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points, layer_boundaries=BOUNDARIES)
+    assert len(table) == table.n_cells == len(points)
+    np.testing.assert_array_equal(table.seed_index, points)
+    np.testing.assert_array_equal(table.centers, vor.points[points])
+    np.testing.assert_array_equal(table.layer_ids,
+                                  np.searchsorted(BOUNDARIES, vor.points[points, 2], side='right'))
+    for row in range(0, len(points), 7):
+        region = vor.regions[vor.point_region[points[row]]]
+        np.testing.assert_array_equal(np.sort(table.cell_vertex_coords(row), axis=0),
+                                      np.sort(vor.vertices[region], axis=0))
+    # 每个面只存一次：两侧都是收录单元的面被两个单元引用
+    sides = table.face_cells
+    references = np.bincount(table.cell_faces, minlength=table.n_faces)
+    np.testing.assert_array_equal(references, (sides >= 0).sum(axis=1))
+    # 单元的面数等于其 Voronoi 邻居数
+    neighbours = np.bincount(np.asarray(vor.ridge_points).ravel(), minlength=len(vor.points))
+    np.testing.assert_array_equal(np.diff(table.cell_face_offsets), neighbours[points])
+
+
+def test_legacy_dict_view(voronoi):
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points).compute_statistics()
+    cell = table[3]
+    assert set(cell) >= {'vertices', 'center', 'seed_index', 'layer_id', 'pore_size'}
+    np.testing.assert_array_equal(cell['center'], vor.points[points[3]])
+    assert table[-1]['seed_index'] == points[-1]
+    assert len(table[2:5]) == 3
+    assert sum(1 for _ in table) == len(points)
+    with pytest.raises(IndexError):
+        table[len(points)]
+
+
+def test_subset_and_concatenate_round_trip(voronoi):
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points).compute_statistics()
+    odd = np.arange(len(points)) % 2 == 1
+    first, second = table.subset(~odd), table.subset(odd)
+    assert len(first) + len(second) == len(table)
+    np.testing.assert_array_equal(second.seed_index, points[odd])
+    np.testing.assert_allclose(second.compute_statistics().volumes, table.volumes[odd])
+
+    merged = CellTable.concatenate([second, first])
+    np.testing.assert_array_equal(merged.seed_index, table.seed_index)
+    assert merged.n_faces == table.n_faces
+    np.testing.assert_allclose(merged.compute_statistics().volumes, table.volumes)
+    assert len(CellTable.concatenate([])) == 0
+
+
+def test_pickle_and_shared_memory(voronoi):
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points).compute_statistics()
+    restored = pickle.loads(pickle.dumps(table))
+    for name in CellTable.ARRAY_FIELDS:
+        np.testing.assert_array_equal(getattr(restored, name), getattr(table, name))
+
+    shm, descriptor = table.to_shared_memory()
+    try:
+        shared, handle = CellTable.from_shared_memory(descriptor)
+        for name in CellTable.ARRAY_FIELDS:
+            np.testing.assert_array_equal(getattr(shared, name), getattr(table, name))
+        del shared
+        handle.close()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_statistics_match_convex_hull(voronoi):
+    from scipy.spatial import ConvexHull
+
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points).compute_statistics()
+    for row in range(len(points)):
+        hull = ConvexHull(table.cell_vertex_coords(row))
+        np.testing.assert_allclose(table.volumes[row], hull.volume, rtol=1e-9)
+        np.testing.assert_allclose(table.surface_areas[row], hull.area, rtol=1e-9)
+        # 凸包质心：以内点为顶点的四面体体积加权
+        simplices = hull.points[hull.simplices]
+        apex = hull.points.mean(axis=0)
+        volumes = np.abs(np.einsum('ij,ij->i', simplices[:, 0] - apex,
+                                   np.cross(simplices[:, 1] - apex, simplices[:, 2] - apex))) / 6
+        centroid = ((simplices.sum(axis=1) + apex) / 4 * volumes[:, None]).sum(axis=0) / volumes.sum()
+        np.testing.assert_allclose(table.centroids[row], centroid, rtol=1e-9, atol=1e-15)
+    np.testing.assert_allclose(table.pore_sizes, np.cbrt(6 * table.volumes / np.pi) * 1e6)
+
+
+def test_statistics_of_empty_table():
+    table = CellTable.empty().compute_statistics()
+    assert table.n_cells == 0 and len(table.volumes) == 0
+
+
+def test_cell_triangles_are_closed_and_outward(voronoi):
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points).compute_statistics()
+    chunks = list(table.iter_cell_triangles(chunk_size=17, return_owners=True))
+    triangles = np.concatenate([tri for tri, _ in chunks])
+    owners = np.concatenate([rows for _, rows in chunks])
+    np.testing.assert_array_equal(np.unique(owners), np.arange(len(points)))
+    # 外法向 → 散度定理给出的带符号体积等于单元体积
+    signed = np.einsum('ij,ij->i', triangles[:, 0],
+                       np.cross(triangles[:, 1], triangles[:, 2])) / 6
+    np.testing.assert_allclose(np.bincount(owners, weights=signed), table.volumes,
+                               rtol=1e-9)
+    # 每个单元闭合：有向边两两抵消
+    for row in range(0, len(points), 11):
+        cell = triangles[owners == row]
+        edges = np.concatenate([cell[:, [0, 1]], cell[:, [1, 2]], cell[:, [2, 0]]])
+        forward = {tuple(map(tuple, e)) for e in edges}
+        assert {tuple(map(tuple, e[::-1])) for e in edges} == forward
+    # 分块与否结果一致
+    np.testing.assert_allclose(
+        np.concatenate(list(table.iter_cell_triangles(chunk_size=len(points)))), triangles)
+
+
+def test_face_measures(voronoi):
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points).compute_statistics()
+    areas, perimeters, centers = table.face_measures()
+    np.testing.assert_allclose(np.bincount(table.cell_faces, minlength=table.n_faces)
+                               @ areas, table.surface_areas.sum(), rtol=1e-9)
+    for face in range(0, table.n_faces, 13):
+        ring = table.vertices[table.face_vertices[table.face_offsets[face]:
+                                                  table.face_offsets[face + 1]]]
+        np.testing.assert_allclose(perimeters[face],
+                                   np.linalg.norm(np.roll(ring, -1, axis=0) - ring, axis=1).sum(),
+                                   rtol=1e-12)
+        np.testing.assert_allclose(centers[face], ring.mean(axis=0), rtol=1e-12)
+    normals = table.face_normals()
+    np.testing.assert_allclose(np.linalg.norm(normals, axis=1), 1.0)
+    # 法向指向第1侧种子
+    toward = vor.points[table.face_seeds[:, 1]] - vor.points[table.face_seeds[:, 0]]
+    assert np.all(np.einsum('ij,ij->i', normals, toward) > 0)
+
+
+def test_cell_polygons_draw_shared_faces_once(voronoi):
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points)
+    rows = np.arange(0, len(points), 2)
+    polygons, faces, owners = table.cell_polygons(rows, scale=1e6)
+    assert len(np.unique(faces)) == len(faces) == len(polygons)
+    _, expected = csr_take(table.cell_face_offsets, table.cell_faces, rows)
+    np.testing.assert_array_equal(faces, np.unique(expected))
+    assert np.all(np.isin(owners, rows))
+    np.testing.assert_array_equal(np.isin(table.face_cells[faces], owners).any(axis=1), True)
+    first = table.face_offsets[faces[0]]
+    np.testing.assert_allclose(polygons[0][0], table.vertices[table.face_vertices[first]] * 1e6)
+
+
+def test_polyhedron_face_stream(voronoi):
+    vor, points = voronoi
+    table = CellTable.from_voronoi(vor, points).compute_statistics()
+    rows = np.arange(3, len(points), 4)
+    stream = table.polyhedron_faces(rows)
+    assert len(stream) == table.polyhedron_sizes()[rows].sum()
+    position = 0
+    for row in rows:
+        n_faces = stream[position]
+        position += 1
+        volume = 0.0
+        for _ in range(n_faces):
+            n = stream[position]
+            ring = table.vertices[stream[position + 1:position + 1 + n]]
+            position += 1 + n
+            # 扇形三角化的散度定理体积，面环朝外时为正
+            volume += np.einsum('ij,ij->i', np.broadcast_to(ring[0], ring[1:-1].shape),
+                                np.cross(ring[1:-1], ring[2:])).sum() / 6
+        assert n_faces == table.cell_face_offsets[row + 1] - table.cell_face_offsets[row]
+        np.testing.assert_allclose(volume, table.volumes[row], rtol=1e-9)
+    assert position == len(stream)
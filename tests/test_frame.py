@@ -0,0 +1,154 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from frame import (MATERIALS, assemble_stiffness, element_stiffness, resolve_material,
+                   rigid_body_prolongator, uniaxial_compression)
+
+E, NU = 110e9, 0.31
+
+
+def cubic_lattice(n=4, spacing=100e-6):
+    """n×n×n 节点的简单立方晶格，另加每个单元格的一条体对角线"""
+    index = np.array(list(itertools.product(range(n), repeat=3)))
+    nodes = index * spacing
+    lookup = {tuple(i): k for k, i in enumerate(index)}
+    edges = []
+    for i, k in lookup.items():
+        for step in ((1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 1)):
+            other = tuple(np.add(i, step))
+            if other in lookup:
+                edges.append((k, lookup[other]))
+    return nodes, np.array(edges)
+
+
+def rigid_modes(nodes):
+    """(6V, 6) 整体刚体模态：3 个平移与绕原点的 3 个转动"""
+    modes = np.zeros((len(nodes), 6, 6))
+    modes[:, np.arange(6), np.arange(6)] = 1.0
+    for k in range(3):
+        omega = np.eye(3)[k]
+        modes[:, :3, 3 + k] = np.cross(omega, nodes)
+    return modes.reshape(-1, 6)
+
+
+def test_resolve_material():
+    assert resolve_material('Ti6Al4V') == MATERIALS['Ti6Al4V']
+    assert resolve_material((2e9, 0.3)) == (2e9, 0.3)
+    with pytest.raises(ValueError):
+        resolve_material('balsa')
+
+
+def test_element_stiffness_rigid_modes():
+    rng = np.random.default_rng(0)
+    p0 = rng.normal(size=(5, 3)) * 1e-4
+    p1 = p0 + rng.normal(size=(5, 3)) * 1e-4
+    matrices = element_stiffness(p0, p1, np.full(5, 8e-6), E, NU)
+    np.testing.assert_allclose(matrices, np.swapaxes(matrices, 1, 2), rtol=1e-12,
+                               atol=1e-12 * np.abs(matrices).max())
+    # 刚体平移与转动不产生内力
+    for e in range(5):
+        modes = rigid_modes(np.stack([p0[e], p1[e]]))
+        scale = np.abs(matrices[e]).max()
+        np.testing.assert_allclose(matrices[e] @ modes, 0.0, atol=1e-9 * scale * 1e-4)
+        # 转角乘以单元长度后与位移同量纲，再统计非零特征值个数
+        scaling = np.tile(np.repeat([1.0, 1.0 / np.linalg.norm(p1[e] - p0[e])], 3), 2)
+        eigenvalues = np.linalg.eigvalsh(scaling[:, None] * matrices[e] * scaling)
+        assert np.count_nonzero(eigenvalues > 1e-9 * eigenvalues.max()) == 6
+
+
+def test_cantilever_matches_timoshenko_beam():
+    length, radius = 300e-6, 10e-6
+    direction = np.array([1.0, 2.0, -0.5]) / np.linalg.norm([1.0, 2.0, -0.5])
+    transverse = np.cross(direction, [0.0, 0.0, 1.0])
+    transverse /= np.linalg.norm(transverse)
+    k = element_stiffness(np.zeros((1, 3)), length * direction[None], np.array([radius]), E, NU)[0]
+    free = k[6:, 6:]                                       # 端点0固支
+    compliance = np.linalg.inv(free)
+    area, inertia = np.pi * radius ** 2, np.pi * radius ** 4 / 4
+    shear = E / (2 * (1 + NU))
+    kappa = 6 * (1 + NU) / (7 + 6 * NU)
+    # 端部横向力：弯曲 + 剪切挠度
+    force = np.concatenate([transverse, np.zeros(3)])
+    np.testing.assert_allclose(transverse @ (compliance @ force)[:3],
+                               length ** 3 / (3 * E * inertia) + length / (kappa * shear * area),
+                               rtol=1e-9)
+    # 轴向拉伸与扭转
+    axial = np.concatenate([direction, np.zeros(3)])
+    np.testing.assert_allclose(direction @ (compliance @ axial)[:3], length / (E * area), rtol=1e-9)
+    torque = np.concatenate([np.zeros(3), direction])
+    np.testing.assert_allclose(direction @ (compliance @ torque)[3:],
+                               length / (shear * 2 * inertia), rtol=1e-9)
+
+
+def test_assemble_stiffness_in_chunks():
+    nodes, edges = cubic_lattice(3)
+    radius = np.linspace(5e-6, 10e-6, len(edges))
+    matrix, diagonal = assemble_stiffness(nodes, edges, radius, E, NU)
+    chunked, chunked_diagonal = assemble_stiffness(nodes, edges, radius, E, NU, chunk_size=7)
+    np.testing.assert_allclose(chunked.toarray(), matrix.toarray(), rtol=1e-12, atol=0)
+    np.testing.assert_allclose(chunked_diagonal, diagonal, rtol=1e-12)
+    dense = matrix.toarray()
+    for node in range(len(nodes)):
+        np.testing.assert_allclose(diagonal[node], dense[6 * node:6 * node + 6, 6 * node:6 * node + 6])
+    # 整体刚体模态
+    np.testing.assert_allclose(matrix @ rigid_modes(nodes), 0.0,
+                               atol=1e-9 * np.abs(dense).max() * 1e-4)
+
+
+def test_prolongator_columns_are_rigid_motions():
+    positions = np.random.default_rng(1).uniform(0, 1e-3, (300, 3))
+    prolongator = rigid_body_prolongator(positions, 20).tocsc()
+    assert prolongator.shape[1] % 6 == 0 and prolongator.shape[1] > 6
+    aggregates = set()
+    for column in range(prolongator.shape[1]):
+        values = prolongator[:, column].toarray().reshape(-1, 6)
+        members = np.flatnonzero(np.abs(values).sum(axis=1) > 0)
+        if column % 6 == 0:
+            aggregates.add(tuple(members))
+        # u_i = t + ω × x_i，θ_i = ω：转角在组内相同，扣除转动后的平移在组内相同
+        omega = values[members, 3:]
+        np.testing.assert_allclose(omega, omega[:1].repeat(len(members), axis=0))
+        shift = values[members, :3] - np.cross(omega, positions[members])
+        np.testing.assert_allclose(shift, shift[:1].repeat(len(members), axis=0),
+                                   atol=1e-9 * np.abs(values).max())
+    # 每个节点恰属于一个聚合组
+    assert sorted(node for group in aggregates for node in group) == list(range(len(positions)))
+
+
+def test_column_array_modulus():
+    # 3×3 根竖直柱，每根由 3 段组成；轴向压缩下各柱只受轴力
+    spacing, height, radius = 100e-6, 300e-6, 10e-6
+    columns = np.array(list(itertools.product(range(3), repeat=2))) * spacing
+    nodes = np.array([[x, y, z] for x, y in columns for z in np.linspace(0, height, 4)])
+    edges = np.array([(4 * c + s, 4 * c + s + 1) for c in range(9) for s in range(3)])
+    # 一团不与压板相连的支柱不影响结果
+    nodes = np.concatenate([nodes, [[50e-6, 50e-6, 100e-6], [50e-6, 50e-6, 200e-6]]])
+    edges = np.concatenate([edges, [[36, 37]]])
+    result = uniaxial_compression(nodes, edges, np.full(len(edges), radius), E, NU, axis=2,
+                                  rtol=1e-10, n_aggregates=2)
+    assert result['converged'] and result['loaded_nodes'] == 9
+    np.testing.assert_allclose(result['length'], height)
+    np.testing.assert_allclose(result['area'], (2 * spacing) ** 2)
+    np.testing.assert_allclose(result['force'], 9 * E * np.pi * radius ** 2 * 1e-3, rtol=1e-8)
+    np.testing.assert_allclose(result['modulus'], 9 * E * np.pi * radius ** 2 / (2 * spacing) ** 2,
+                               rtol=1e-8)
+
+
+def test_two_level_preconditioner_gives_the_same_modulus():
+    nodes, edges = cubic_lattice(6)
+    radius = np.full(len(edges), 12e-6)
+    stiffness = assemble_stiffness(nodes, edges, radius, E, NU)
+    jacobi = uniaxial_compression(nodes, edges, radius, E, NU, axis=0, stiffness=stiffness,
+                                  rtol=1e-9, n_aggregates=0)
+    two_level = uniaxial_compression(nodes, edges, radius, E, NU, axis=0, stiffness=stiffness,
+                                     rtol=1e-9, n_aggregates=8)
+    assert jacobi['converged'] and two_level['converged']
+    assert two_level['iterations'] < jacobi['iterations']
+    np.testing.assert_allclose(two_level['modulus'], jacobi['modulus'], rtol=1e-6)
+    # 模量与应变无关（线性）
+    half = uniaxial_compression(nodes, edges, radius, E, NU, axis=0, stiffness=stiffness,
+                                strain=5e-4, rtol=1e-9, n_aggregates=8)
+    np.testing.assert_allclose(half['modulus'], two_level['modulus'], rtol=1e-6)
+    assert 0 < two_level['modulus'] < E
@@ -0,0 +1,56 @@
+import numpy as np
+
+from gradient_stats import (BIOMIMETIC_LAYER_LABELS, _grouped_percentiles, assign_bins,
+                            compute_gradient_statistics, z_bin_edges)
+
+
+def test_grouped_percentiles_match_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.gamma(3.0, 20.0, 500)
+    bins = rng.integers(0, 5, 500)
+    bins[bins == 3] = 4          # 空分段
+    minimum, maximum, quantiles = _grouped_percentiles(values, bins, 5, (10, 50, 90))
+    for b in range(5):
+        group = values[bins == b]
+        if len(group) == 0:
+            assert np.isnan(minimum[b]) and np.isnan(maximum[b])
+            continue
+        assert minimum[b] == group.min() and maximum[b] == group.max()
+        for q in (10, 50, 90):
+            np.testing.assert_allclose(quantiles[q][b], np.percentile(group, q))
+
+
+def test_statistics_match_per_bin_loop():
+    rng = np.random.default_rng(1)
+    z_size = 300e-6
+    cell_z = rng.uniform(0, z_size, 400)
+    pores = rng.uniform(50, 200, 400)
+    seed_z = rng.uniform(0, z_size, 900)
+    stats = compute_gradient_statistics(cell_z, pores, 1e-3, 1e-3, z_size, seed_z=seed_z, n_bins=4)
+    edges = z_bin_edges(z_size, n_bins=4)
+    bins = assign_bins(cell_z, edges)
+    for b in range(4):
+        np.testing.assert_allclose(stats.mean_pore_size_um[b], pores[bins == b].mean())
+        np.testing.assert_allclose(stats.std_pore_size_um[b], pores[bins == b].std())
+    assert stats.n_seeds.sum() == 900
+    np.testing.assert_allclose(stats.seed_density * np.diff(edges) * 1e9 * 1e-6, stats.n_seeds)
+
+
+def test_pore_gradient_ratio_needs_cortical_and_trabecular_layers():
+    z_size = 100e-6
+    boundaries = np.array([0.2, 0.5]) * z_size
+    cell_z = np.array([10e-6, 30e-6, 70e-6, 90e-6])
+    pores = np.array([40.0, 60.0, 100.0, 140.0])
+    stats = compute_gradient_statistics(cell_z, pores, 1e-3, 1e-3, z_size, breakpoints=boundaries,
+                                        labels=BIOMIMETIC_LAYER_LABELS)
+    np.testing.assert_allclose(stats.pore_gradient_ratio(), 120.0 / 40.0)
+
+    # 皮质骨层没有单元：不能用过渡层顶替
+    stats = compute_gradient_statistics(cell_z[1:], pores[1:], 1e-3, 1e-3, z_size,
+                                        breakpoints=boundaries, labels=BIOMIMETIC_LAYER_LABELS)
+    assert stats.n_pores[1] > 0 and stats.n_pores[2] > 0
+    assert stats.pore_gradient_ratio() is None
+
+    # 自定义分段没有皮质骨 / 松质骨的含义
+    stats = compute_gradient_statistics(cell_z, pores, 1e-3, 1e-3, z_size, n_bins=3)
+    assert stats.pore_gradient_ratio() is None
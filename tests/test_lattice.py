@@ -0,0 +1,105 @@
+import numpy as np
+
+from lattice import iter_lattice_triangles, lattice_triangle_count, strut_end_caps
+from mesh_check import validate_mesh
+from mesh_io import weld_triangles
+
+
+def corner_lattice():
+    """
+    边界角点处的支柱：沿 X 的一条棱被节点 1 分成两根共线支柱（两种端点顺序都有），
+    另有沿 Y、Z 的支柱在节点 0、1 处与它们垂直相接
+    """
+    nodes = np.array([[0, 0, 0], [40, 0, 0], [80, 0, 0], [120, 0, 0],
+                      [0, 40, 0], [0, 0, 40], [40, 40, 0], [40, 0, 40]], dtype=float) * 1e-6
+    edges = np.array([[0, 1], [2, 1], [2, 3], [0, 4], [0, 5], [1, 6], [1, 7]])
+    return nodes, edges
+
+
+def test_strut_end_caps_marks_collinear_pairs():
+    nodes, edges = corner_lattice()
+    cap0, cap1 = strut_end_caps(nodes, edges, 5e-6)
+    np.testing.assert_array_equal(cap0, [True, False, False, True, True, True, True])
+    np.testing.assert_array_equal(cap1, [False, False, True, True, True, True, True])
+    # 半径不同的共线支柱端盖不重合，保留
+    radius = np.array([5, 6, 6, 5, 5, 5, 5]) * 1e-6
+    cap0, cap1 = strut_end_caps(nodes, edges, radius)
+    assert cap1[0] and cap1[1]
+    assert not cap0[1] and not cap0[2]
+
+
+def test_lattice_joints_are_manifold():
+    nodes, edges = corner_lattice()
+    for n_facets in (5, 8):
+        triangles = np.concatenate(list(iter_lattice_triangles(nodes, edges, 5e-6,
+                                                               n_facets=n_facets,
+                                                               node_caps=False)))
+        n_open = sum(int((~caps).sum()) for caps in strut_end_caps(nodes, edges, 5e-6))
+        assert len(triangles) == lattice_triangle_count(len(edges), 8, n_facets, False, n_open)
+        vertices, faces, _ = weld_triangles(triangles)
+        report = validate_mesh(vertices, faces)
+        assert report['watertight'], report
+        assert report['opposed_triangles'] == 0
+        assert report['inverted_shells'] == 0
+
+
+def test_lattice_triangle_owners():
+    nodes, edges = corner_lattice()
+    # 零长度支柱不生成三角形，属性仍按归属对应到原编号
+    nodes = np.vstack([nodes, nodes[3]])
+    edges = np.vstack([edges, [3, 8]])
+    radius = np.arange(1, len(edges) + 1) * 1e-6
+    parts = list(iter_lattice_triangles(nodes, edges, radius, n_facets=6, chunk_size=3,
+                                        return_owners=True))
+    triangles = np.concatenate([t for t, _ in parts])
+    owners = np.concatenate([ids for _, ids in parts])
+    assert len(owners) == len(triangles)
+    np.testing.assert_array_equal(
+        triangles, np.concatenate(list(iter_lattice_triangles(nodes, edges, radius, n_facets=6,
+                                                                chunk_size=3))))
+    struts = owners < len(edges)
+    counts = np.bincount(owners[struts], minlength=len(edges))
+    cap0, cap1 = strut_end_caps(nodes, edges, radius)
+    expected = 6 * (2 + cap0.astype(int) + cap1.astype(int))
+    expected[-1] = 0
+    np.testing.assert_array_equal(counts, expected)
+    # 每个支柱三角形的顶点都在该支柱的半径范围内
+    p0, p1 = nodes[edges[owners[struts], 0]], nodes[edges[owners[struts], 1]]
+    axis = (p1 - p0) / np.linalg.norm(p1 - p0, axis=1, keepdims=True)
+    offset = triangles[struts] - p0[:, None]
+    along = np.einsum('tkj,tj->tk', offset, axis)
+    distance = np.linalg.norm(offset - along[..., None] * axis[:, None], axis=2)
+    assert np.all(distance <= radius[owners[struts], None] * (1 + 1e-9))
+    # 节点球三角形归属 E + 节点编号，以节点为中心
+    node_ids = owners[~struts] - len(edges)
+    centers = triangles[~struts].mean(axis=1)
+    assert np.all(np.linalg.norm(centers - nodes[node_ids], axis=1) < radius.max())
+
+
+def test_unique_edges_from_cell_table():
+    from scipy.spatial import Voronoi
+
+    from cell_table import CellTable
+    from lattice import edge_layer_ids, unique_edges
+    from tessellation import interior_cell_table, tiled_voronoi
+
+    box = np.array([200e-6, 200e-6, 100e-6])
+    seeds = np.random.default_rng(1).uniform(0, 1, (250, 3)) * box
+    table = interior_cell_table(Voronoi(seeds), box)
+    nodes, edges = unique_edges(table)
+    assert np.all(edges[:, 0] < edges[:, 1])
+    assert len(np.unique(edges, axis=0)) == len(edges)
+    # 每个面环上的相邻顶点对都是一条棱，且每条棱至少属于两个面（凸多面体）
+    pairs = set()
+    for face in np.split(table.face_vertices, table.face_offsets[1:-1]):
+        for a, b in zip(face, np.roll(face, -1)):
+            pairs.add(tuple(sorted((a, b))))
+    assert len(pairs) == len(edges)
+    # 分块表的顶点不共享，按坐标合并后得到相同的棱网络
+    tiled = tiled_voronoi(seeds, box, tiles=(2, 2), n_workers=2)
+    tiled_nodes, tiled_edges = unique_edges(tiled)
+    assert len(tiled_edges) == len(edges) and len(tiled_nodes) == len(nodes)
+    layers = edge_layer_ids(nodes, edges, [20e-6, 50e-6])
+    z_mid = nodes[edges].mean(axis=1)[:, 2]
+    np.testing.assert_array_equal(layers, np.searchsorted([20e-6, 50e-6], z_mid, side='right'))
+    assert len(unique_edges(CellTable.empty())[1]) == 0
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from lod import (DEFAULT_LOD_LEVELS, closest_points_on_triangles, collapse_short_struts,
+                 hausdorff_deviation, quadric_decimate, resolve_lod_level, surface_deviation)
+from mesh_check import validate_mesh
+from mesh_io import weld_triangles
+from sdf_mesh import marching_tetrahedra
+
+
+@pytest.fixture(scope="module")
+def sphere():
+    spacing = 0.1
+    axis = np.arange(-1.3, 1.3 + 1e-9, spacing)
+    x, y, z = np.meshgrid(axis, axis, axis, indexing='ij')
+    triangles = marching_tetrahedra(np.sqrt(x ** 2 + y ** 2 + z ** 2) - 1.0,
+                                    np.full(3, axis[0]), spacing)
+    vertices, faces, _ = weld_triangles(triangles)
+    return vertices, faces
+
+
+def test_resolve_lod_level():
+    assert resolve_lod_level('review') == dict(DEFAULT_LOD_LEVELS['review'], name='review')
+    custom = resolve_lod_level({'n_facets': 5})
+    assert custom['n_facets'] == 5 and custom['name'] == 'custom'
+    assert custom['face_fraction'] == DEFAULT_LOD_LEVELS['print']['face_fraction']
+    with pytest.raises(ValueError):
+        resolve_lod_level('draft')
+
+
+def test_collapse_short_struts():
+    # 0-1-2-3 折线，1-2 段很短；另有一条与 0-3 重合的棱在合并后不应重复
+    nodes = np.array([[0, 0, 0], [1, 0, 0], [1.05, 0, 0], [2, 0, 0], [1, 1, 0]], dtype=float)
+    edges = np.array([[0, 1], [1, 2], [2, 3], [1, 4], [2, 4]])
+    merged, kept, edge_index, shift = collapse_short_struts(nodes, edges, 0.2)
+    assert len(merged) == 4
+    np.testing.assert_allclose(merged[1], [1.025, 0, 0])
+    # 1-4 与 2-4 合并为同一条棱，保留编号较小的原棱
+    np.testing.assert_array_equal(edge_index, [0, 2, 3])
+    np.testing.assert_allclose(shift, [0, 0.025, 0.025, 0, 0])
+    lengths = np.linalg.norm(merged[kept[:, 1]] - merged[kept[:, 0]], axis=1)
+    assert lengths.min() >= 0.2
+    # 没有短支柱时原样返回
+    same, same_edges, same_index, zero = collapse_short_struts(nodes, edges, 0.01)
+    np.testing.assert_array_equal(same, nodes)
+    np.testing.assert_array_equal(same_edges, edges)
+    assert not zero.any()
+
+
+def test_quadric_decimate_keeps_sphere_closed(sphere):
+    vertices, faces = sphere
+    target = len(faces) // 4
+    reduced, reduced_faces = quadric_decimate(vertices, faces, target)
+    assert len(reduced_faces) <= target * 1.05
+    assert validate_mesh(reduced, reduced_faces)['watertight']
+    assert reduced_faces.max() == len(reduced) - 1
+    assert hausdorff_deviation(vertices, faces, reduced, reduced_faces) < 0.02
+
+
+def test_quadric_decimate_flat_faces_have_no_error():
+    # 每面细分为 n×n 网格的闭合立方体：平面内的收缩误差为零，形状与体积不变
+    n = 8
+    u, v = np.meshgrid(np.arange(n + 1.0) / n, np.arange(n + 1.0) / n, indexing='ij')
+    index = np.arange(u.size).reshape(n + 1, n + 1)
+    a, b = index[:-1, :-1].ravel(), index[1:, :-1].ravel()
+    c, d = index[1:, 1:].ravel(), index[:-1, 1:].ravel()
+    quads = np.concatenate([np.stack([a, b, c], 1), np.stack([a, c, d], 1)])
+    plane = np.stack([u.ravel(), v.ravel()], axis=1)
+    triangles = []
+    for axis in range(3):
+        for side in (0.0, 1.0):
+            points = np.insert(plane, axis, side, axis=1)
+            tri = points[quads]
+            outward = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])[:, axis]
+            flip = (outward > 0) != (side > 0)
+            tri[flip] = tri[flip][:, ::-1]
+            triangles.append(tri)
+    vertices, faces, _ = weld_triangles(np.concatenate(triangles))
+    reduced, reduced_faces = quadric_decimate(vertices, faces, len(faces) // 5)
+    assert len(reduced_faces) < len(faces) // 2
+    assert validate_mesh(reduced, reduced_faces)['watertight']
+    assert hausdorff_deviation(vertices, faces, reduced, reduced_faces) < 1e-9
+    tri = reduced[reduced_faces]
+    volume = np.einsum('ij,ij->i', tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6
+    np.testing.assert_allclose(volume, 1.0)
+
+
+def test_surface_deviation_is_exact(sphere):
+    vertices, faces = sphere
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(60, 3)) * 0.7
+    tri = vertices[faces]
+    # 暴力：每个点对全部三角形求最近点
+    p = np.repeat(points, len(faces), axis=0)
+    t = np.tile(tri, (len(points), 1, 1))
+    closest = closest_points_on_triangles(p, t[:, 0], t[:, 1], t[:, 2])
+    brute = np.linalg.norm(closest - p, axis=1).reshape(len(points), -1).min(axis=1)
+    np.testing.assert_allclose(surface_deviation(points, vertices, faces, k=1, refine_size=7),
+                               brute.max(), rtol=1e-12)
+    assert hausdorff_deviation(vertices, faces, vertices, faces) == 0.0
+
+
+def test_closest_points_on_triangle_regions():
+    a, b, c = np.array([0.0, 0, 0]), np.array([1.0, 0, 0]), np.array([0.0, 1, 0])
+    points = np.array([[-1, -1, 0], [2, -0.5, 0], [0.5, -1, 0], [0.2, 0.2, 3],
+                       [-1, 0.5, 0], [1, 1, 0], [0, 2, 0]], dtype=float)
+    expected = np.array([[0, 0, 0], [1, 0, 0], [0.5, 0, 0], [0.2, 0.2, 0],
+                         [0, 0.5, 0], [0.5, 0.5, 0], [0, 1, 0]])
+    n = len(points)
+    np.testing.assert_allclose(
+        closest_points_on_triangles(points, np.tile(a, (n, 1)), np.tile(b, (n, 1)),
+                                    np.tile(c, (n, 1))), expected, atol=1e-15)
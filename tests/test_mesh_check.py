@@ -0,0 +1,91 @@
+import numpy as np
+
+from mesh_check import face_areas_volumes, repair_mesh, validate_mesh
+
+# 单位立方体的 12 个外法向三角形（顶点编号的二进制位依次对应 x, y, z）
+CUBE_FACES = np.array([[0, 2, 3], [0, 3, 1], [4, 5, 7], [4, 7, 6], [0, 1, 5], [0, 5, 4],
+                       [2, 6, 7], [2, 7, 3], [0, 4, 6], [0, 6, 2], [1, 3, 7], [1, 7, 5]])
+CUBE_VERTICES = np.array([[(c >> 0) & 1, (c >> 1) & 1, (c >> 2) & 1] for c in range(8)], float)
+
+
+def two_cubes(offset):
+    """两个立方体，第二个平移 offset；共享的顶点按坐标合并"""
+    points = np.concatenate([CUBE_VERTICES, CUBE_VERTICES + offset])
+    vertices, inverse = np.unique(points, axis=0, return_inverse=True)
+    faces = inverse.ravel()[np.concatenate([CUBE_FACES, CUBE_FACES + 8])]
+    return vertices, faces
+
+
+def test_single_cube_is_watertight():
+    report = validate_mesh(CUBE_VERTICES, CUBE_FACES)
+    assert report['watertight']
+    assert report['closed_shells'] == 1 and report['contact_edges'] == 0
+
+
+def test_shells_touching_along_an_edge_are_contact_not_defect():
+    vertices, faces = two_cubes([1.0, 1.0, 0.0])
+    report = validate_mesh(vertices, faces)
+    assert report['contact_edges'] == 1
+    assert report['non_manifold_edges'] == 0
+    assert report['closed_shells'] == report['n_shells'] == 2
+    assert report['watertight']
+
+
+def test_back_to_back_faces_are_reported_separately():
+    vertices, faces = two_cubes([1.0, 0.0, 0.0])
+    report = validate_mesh(vertices, faces)
+    assert report['opposed_triangles'] == 4
+    assert report['non_manifold_edges'] == 0
+    assert report['contact_edges'] > 0
+    assert report['watertight']
+
+
+def test_flap_is_non_manifold():
+    vertices = np.concatenate([CUBE_VERTICES, [[0.5, -1.0, -1.0]]])
+    faces = np.concatenate([CUBE_FACES, [[0, 1, 8]]])
+    report = validate_mesh(vertices, faces)
+    assert report['non_manifold_edges'] == 1
+    assert report['contact_edges'] == 0
+    assert not report['watertight']
+
+
+def test_open_and_inverted_shells():
+    report = validate_mesh(CUBE_VERTICES, CUBE_FACES[:-1])
+    assert report['boundary_edges'] == 3 and report['closed_shells'] == 0
+    assert not report['watertight']
+    report = validate_mesh(CUBE_VERTICES, CUBE_FACES[:, ::-1])
+    assert report['inverted_shells'] == 1 and not report['watertight']
+    faces = CUBE_FACES.copy()
+    faces[0] = faces[0, ::-1]
+    assert validate_mesh(CUBE_VERTICES, faces)['inconsistent_edges'] == 3
+
+
+def test_face_areas_volumes_chunked():
+    area, volume = face_areas_volumes(CUBE_VERTICES * 2, CUBE_FACES, chunk_size=5)
+    np.testing.assert_allclose(area.sum(), 24.0)
+    np.testing.assert_allclose(volume.sum(), 8.0)
+
+
+def test_repair_mesh_fixes_simple_defects():
+    # 反向的第二个立方体 + 一个重复三角形 + 一个退化三角形 + 一个未引用顶点
+    vertices, faces = two_cubes([3.0, 0.0, 0.0])
+    faces[12:] = faces[12:, ::-1]
+    vertices = np.concatenate([vertices, [[9.0, 9.0, 9.0]]])
+    broken = np.concatenate([faces, faces[:1], [[0, 1, 1]]])
+    assert not validate_mesh(vertices, broken)['watertight']
+    fixed_vertices, fixed_faces, keep, fixes = repair_mesh(vertices, broken)
+    assert fixes == {'removed_degenerate': 1, 'removed_duplicate': 1, 'flipped_shells': 1,
+                     'flipped_triangles': 12, 'removed_vertices': 1}
+    np.testing.assert_array_equal(keep, np.arange(len(broken)) < 24)
+    report = validate_mesh(fixed_vertices, fixed_faces)
+    assert report['watertight'] and report['closed_shells'] == 2
+    np.testing.assert_allclose(face_areas_volumes(fixed_vertices, fixed_faces)[1].sum(), 2.0)
+
+
+def test_repair_mesh_drops_opposed_pairs():
+    vertices, faces = two_cubes([1.0, 0.0, 0.0])
+    fixed_vertices, fixed_faces, keep, fixes = repair_mesh(vertices, faces, drop_opposed=True)
+    assert fixes['removed_opposed'] == 4 and (~keep).sum() == 4
+    report = validate_mesh(fixed_vertices, fixed_faces)
+    assert report['opposed_triangles'] == 0 and report['n_shells'] == 1 and report['watertight']
+    np.testing.assert_allclose(face_areas_volumes(fixed_vertices, fixed_faces)[1].sum(), 2.0)
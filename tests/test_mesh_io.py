@@ -0,0 +1,208 @@
+import re
+import zlib
+
+import numpy as np
+import pytest
+
+from mesh_io import (STL_RECORD_DTYPE, VTK_POLYHEDRON, VTK_TYPES, BinarySTLWriter, VTUArray,
+                     triangle_normals, weld_points, weld_triangles, write_binary_stl,
+                     write_indexed_mesh, write_vtu)
+
+
+def random_triangles(n, seed=0):
+    return np.random.default_rng(seed).uniform(0, 1e-3, (n, 3, 3))
+
+
+def read_stl(filename):
+    with open(filename, 'rb') as f:
+        header = f.read(80)
+        count = int(np.frombuffer(f.read(4), '<u4')[0])
+        records = np.fromfile(f, dtype=STL_RECORD_DTYPE)
+    return header, count, records
+
+
+def test_streaming_stl_matches_numpy_stl(tmp_path):
+    mesh = pytest.importorskip("stl.mesh")
+    triangles = random_triangles(1000)
+    chunks = (triangles[start:start + 137] for start in range(0, len(triangles), 137))
+    n_written = write_binary_stl(str(tmp_path / "stream.stl"), chunks)
+    assert n_written == len(triangles)
+
+    header, count, records = read_stl(str(tmp_path / "stream.stl"))
+    assert header.startswith(b'biomimetic voronoi scaffold') and len(header) == 80
+    assert count == len(records) == len(triangles)
+    np.testing.assert_array_equal(records['vectors'], triangles.astype(np.float32))
+
+    reference = mesh.Mesh(np.zeros(len(triangles), dtype=mesh.Mesh.dtype))
+    reference.vectors[:] = triangles
+    reference.update_normals()
+    loaded = mesh.Mesh.from_file(str(tmp_path / "stream.stl"))
+    np.testing.assert_array_equal(loaded.vectors, reference.vectors)
+    # numpy-stl 的法向量未归一化（且按 float32 顶点计算），方向一致
+    unit = reference.normals / np.linalg.norm(reference.normals, axis=1, keepdims=True)
+    np.testing.assert_allclose(records['normal'], unit, atol=1e-4)
+
+
+def test_writer_counts_and_empty_chunks(tmp_path):
+    filename = str(tmp_path / "empty.stl")
+    with BinarySTLWriter(filename) as writer:
+        writer.write(np.zeros((0, 3, 3)))
+        writer.write(random_triangles(3))
+        writer.write_chunks(iter([random_triangles(2, 1), np.zeros((0, 3, 3))]))
+    _, count, records = read_stl(filename)
+    assert count == writer.n_triangles == len(records) == 5
+    assert write_binary_stl(str(tmp_path / "none.stl"), iter([])) == 0
+    assert read_stl(str(tmp_path / "none.stl"))[1] == 0
+
+
+def test_triangle_normals_handle_degenerate_triangles():
+    triangles = np.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]],
+                          [[0, 0, 0], [1, 1, 1], [2, 2, 2]]], dtype=float)
+    np.testing.assert_array_equal(triangle_normals(triangles), [[0, 0, 1], [0, 0, 0]])
+
+
+def cube_triangles(offset=0.0):
+    """单位立方体的12个外法向三角形 (m)"""
+    corners = np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=float)
+    quads = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    faces = [tri for a, b, c, d in quads for tri in ((a, b, c), (a, c, d))]
+    return (corners[np.array(faces)] + offset) * 1e-4
+
+
+def read_ply(filename):
+    """读取 write_ply 写出的二进制PLY，返回 (header_lines, vertices, face_records)"""
+    raw = open(filename, 'rb').read()
+    end = raw.index(b'end_header\n') + len(b'end_header\n')
+    header = raw[:end].decode('ascii').splitlines()
+    n_vertices = int(next(line for line in header if line.startswith('element vertex')).split()[-1])
+    n_faces = int(next(line for line in header if line.startswith('element face')).split()[-1])
+    types = {'char': 'i1', 'uchar': 'u1', 'int': '<i4', 'float': '<f4'}
+    face_fields = [('n', 'u1'), ('v', '<i4', (3,))]
+    face_fields += [(line.split()[2], types[line.split()[1]]) for line in
+                    header[header.index(f'element face {n_faces}') + 2:-1]]
+    vertices = np.frombuffer(raw, '<f4', 3 * n_vertices, end).reshape(-1, 3)
+    faces = np.frombuffer(raw, np.dtype(face_fields), n_faces, end + 12 * n_vertices)
+    return header, vertices, faces
+
+
+def test_weld_points_merges_within_tolerance():
+    points = np.array([[0, 0, 0], [1e-12, 0, 0], [1, 0, 0], [1, 1e-12, 0], [0, 0, 0]], dtype=float)
+    unique, inverse = weld_points(points)
+    assert len(unique) == 2
+    np.testing.assert_array_equal(inverse, [0, 0, 1, 1, 0])
+    np.testing.assert_allclose(unique[inverse], points, atol=1e-11)
+    # 量化键超过62位时改用字典序排序
+    far = np.vstack([points, [[1e9, 1e9, 1e9]]])
+    unique, inverse = weld_points(far, tolerance=1e-9)
+    assert len(unique) == 3 and inverse[-1] == 2
+
+
+def test_weld_triangles_drops_collapsed_faces():
+    triangles = np.concatenate([cube_triangles(), [[[0, 0, 0], [1e-15, 0, 0], [0, 1e-4, 0]]]])
+    vertices, faces, keep = weld_triangles(triangles)
+    assert len(vertices) == 8 and len(faces) == 12
+    np.testing.assert_array_equal(keep, [True] * 12 + [False])
+    np.testing.assert_allclose(vertices[faces], triangles[keep], atol=1e-12)
+
+
+def test_indexed_formats_round_trip(tmp_path):
+    import xml.etree.ElementTree as ET
+    import zipfile
+
+    triangles = np.concatenate([cube_triangles(), cube_triangles(offset=2.0)])
+    vertices, faces, _ = weld_triangles(triangles)
+    face_data = {'layer_id': np.repeat(np.array([0, 2], dtype=np.int8), 12),
+                 'pore_size_um': np.linspace(50, 80, 24)}
+
+    write_indexed_mesh(str(tmp_path / "m.ply"), vertices, faces, face_data)
+    header, ply_vertices, ply_faces = read_ply(str(tmp_path / "m.ply"))
+    assert 'property char layer_id' in header and 'property float pore_size_um' in header
+    np.testing.assert_array_equal(ply_vertices, vertices.astype(np.float32))
+    np.testing.assert_array_equal(ply_faces['v'], faces)
+    np.testing.assert_array_equal(ply_faces['layer_id'], face_data['layer_id'])
+    np.testing.assert_allclose(ply_faces['pore_size_um'], face_data['pore_size_um'], rtol=1e-6)
+
+    write_indexed_mesh(str(tmp_path / "m.obj"), vertices, faces, face_data,
+                       group_names=['cortical', 'transition', 'trabecular'])
+    lines = open(tmp_path / "m.obj").read().splitlines()
+    assert [line for line in lines if line.startswith('g ')] == ['g cortical', 'g trabecular']
+    obj_vertices = np.array([line.split()[1:] for line in lines if line.startswith('v ')], float)
+    obj_faces = np.array([line.split()[1:] for line in lines if line.startswith('f ')], int) - 1
+    np.testing.assert_allclose(obj_vertices, vertices, rtol=1e-8)
+    np.testing.assert_array_equal(obj_faces, faces)
+
+    write_indexed_mesh(str(tmp_path / "m.3mf"), vertices, faces, face_data,
+                       group_colors=['#FF0000', '#00FF00', '#0000FF'])
+    with zipfile.ZipFile(tmp_path / "m.3mf") as archive:
+        assert {'[Content_Types].xml', '_rels/.rels', '3D/3dmodel.model'} <= set(archive.namelist())
+        root = ET.fromstring(archive.read('3D/3dmodel.model'))
+    ns = {'m': 'http://schemas.microsoft.com/3dmanufacturing/core/2015/02'}
+    model_vertices = np.array([[float(v.get(k)) for k in 'xyz'] for v in root.iterfind('.//m:vertex', ns)])
+    model_faces = np.array([[int(t.get(k)) for k in ('v1', 'v2', 'v3', 'p1')]
+                            for t in root.iterfind('.//m:triangle', ns)])
+    np.testing.assert_allclose(model_vertices, vertices, rtol=1e-8)
+    np.testing.assert_array_equal(model_faces[:, :3], faces)
+    np.testing.assert_array_equal(model_faces[:, 3], face_data['layer_id'])
+    assert len(root.findall('.//m:base', ns)) == 3
+
+    with pytest.raises(ValueError):
+        write_indexed_mesh(str(tmp_path / "m.stl"), vertices, faces)
+
+
+def read_vtu(filename):
+    """读取 write_vtu 写出的追加数据VTU，返回 {(段, 名称): 数组}"""
+    raw = open(filename, 'rb').read()
+    start = raw.index(b'<AppendedData encoding="raw">\n_') + len(b'<AppendedData encoding="raw">\n_')
+    header = raw[:start].decode('ascii')
+    compressed = 'vtkZLibDataCompressor' in header
+    types = {name: '<' + code for code, name in VTK_TYPES.items()}
+    arrays = {}
+    for section, content in re.findall(r'<(Points|Cells|CellData)>(.*?)</\1>', header, re.S):
+        for attributes in re.findall(r'<DataArray (.*?)/>', content):
+            fields = dict(re.findall(r'(\w+)="([^"]*)"', attributes))
+            position = start + int(fields['offset'])
+            if compressed:
+                n_blocks, = np.frombuffer(raw, '<u8', 1, position)
+                sizes = np.frombuffer(raw, '<u8', 3 + int(n_blocks), position)[3:]
+                position += 8 * (3 + int(n_blocks))
+                data = b''
+                for size in sizes:
+                    data += zlib.decompress(raw[position:position + int(size)])
+                    position += int(size)
+            else:
+                n_bytes, = np.frombuffer(raw, '<u8', 1, position)
+                data = raw[position + 8:position + 8 + int(n_bytes)]
+            values = np.frombuffer(data, types[fields['type']])
+            arrays[section, fields.get('Name')] = values.reshape(-1, int(fields['NumberOfComponents']))
+    return header, arrays
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_vtu_polyhedra_round_trip(tmp_path, compress):
+    # 两个相邻的立方体多面体（共享4个顶点）
+    points = np.array([[x, y, z] for z in (0, 1) for y in (0, 1) for x in (0, 1, 2)], dtype=float)
+    left = [[0, 3, 4, 1], [6, 7, 10, 9], [0, 1, 7, 6], [3, 9, 10, 4], [0, 6, 9, 3], [1, 4, 10, 7]]
+    right = [[1, 4, 5, 2], [7, 8, 11, 10], [1, 2, 8, 7], [4, 10, 11, 5], [1, 7, 10, 4],
+             [2, 5, 11, 8]]
+    streams = [np.concatenate([[6]] + [[4] + face for face in cell]) for cell in (left, right)]
+    cells = {'connectivity': VTUArray.of(np.array([0, 1, 3, 4, 6, 7, 9, 10,
+                                                   1, 2, 4, 5, 7, 8, 10, 11])),
+             'offsets': VTUArray.of(np.array([8, 16])),
+             'types': VTUArray.of(np.full(2, VTK_POLYHEDRON, dtype=np.uint8)),
+             # 面流按块给出
+             'faces': VTUArray(np.int64, 62, iter(streams)),
+             'faceoffsets': VTUArray.of(np.array([31, 62]))}
+    cell_data = {'layer_id': VTUArray.of(np.array([0, 2])),
+                 'inside': VTUArray.of(np.array([True, False]))}
+    filename = str(tmp_path / "cells.vtu")
+    # 很小的压缩块，检验跨块拼接
+    write_vtu(filename, VTUArray.of(points, chunk_size=5), cells, cell_data,
+              compress=compress, block_size=40)
+    header, arrays = read_vtu(filename)
+    assert 'NumberOfPoints="12" NumberOfCells="2"' in header
+    np.testing.assert_array_equal(arrays['Points', None], points)
+    np.testing.assert_array_equal(arrays['Cells', 'faces'].ravel(), np.concatenate(streams))
+    np.testing.assert_array_equal(arrays['Cells', 'types'].ravel(), [VTK_POLYHEDRON] * 2)
+    np.testing.assert_array_equal(arrays['CellData', 'layer_id'].ravel(), [0, 2])
+    np.testing.assert_array_equal(arrays['CellData', 'inside'].ravel(), [1, 0])
+    assert open(filename, 'rb').read().endswith(b'\n</AppendedData>\n</VTKFile>\n')
@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+from scipy.sparse import coo_matrix
+
+from pore_network import (BOX_FACES, adjacency_matrix, conduit_conductance, darcy_permeability,
+                          plane_pressure, surface_reachability, throat_layers, throat_network,
+                          throat_size_summary)
+from tessellation import bounded_voronoi
+
+SPACING = 10e-6
+SHAPE = (4, 3, 2)
+
+
+@pytest.fixture(scope="module")
+def grid_cells():
+    """规则网格种子的有界剖分：每个单元是边长 SPACING 的立方体"""
+    index = np.stack(np.meshgrid(*[np.arange(n) for n in SHAPE], indexing='ij'), -1).reshape(-1, 3)
+    box = np.array(SHAPE) * SPACING
+    _, table = bounded_voronoi((index + 0.5) * SPACING, box)
+    return index, box, table.compute_statistics()
+
+
+@pytest.fixture(scope="module")
+def random_cells():
+    box = np.array([200e-6, 150e-6, 100e-6])
+    seeds = np.random.default_rng(0).uniform(0, 1, (250, 3)) * box
+    _, table = bounded_voronoi(seeds, box)
+    return box, table.compute_statistics()
+
+
+def test_grid_throats(grid_cells):
+    index, box, table = grid_cells
+    network = throat_network(table, box)
+    # 每对面相邻的立方体之间一个正方形喉道
+    steps = np.abs(index[network['cells'][:, 0]] - index[network['cells'][:, 1]])
+    np.testing.assert_array_equal(steps.sum(axis=1), 1)
+    nx, ny, nz = SHAPE
+    assert len(network['faces']) == (nx - 1) * ny * nz + nx * (ny - 1) * nz + nx * ny * (nz - 1)
+    np.testing.assert_allclose(network['area'], SPACING ** 2)
+    np.testing.assert_allclose(network['diameter'], 2 * SPACING / np.sqrt(np.pi))
+    np.testing.assert_allclose(network['hydraulic_diameter'], SPACING)
+    # 喉道中心位于两孔中点
+    np.testing.assert_allclose(network['center'],
+                               (index[network['cells']].mean(axis=1) + 0.5) * SPACING)
+    for k, (_, axis, upper) in enumerate(BOX_FACES):
+        expected = index[:, axis] == (SHAPE[axis] - 1 if upper else 0)
+        np.testing.assert_array_equal(network['surface'][k], expected)
+
+
+def test_random_surface_cells_own_a_boundary_face(random_cells):
+    box, table = random_cells
+    network = throat_network(table, box)
+    sides = table.face_cells
+    assert len(network['faces']) == np.count_nonzero((sides >= 0).all(axis=1))
+    owner = sides.max(axis=1)
+    for k, (_, axis, upper) in enumerate(BOX_FACES):
+        coordinate = table.vertices[table.face_vertices, axis]
+        on_plane = np.isclose(coordinate, box[axis] if upper else 0.0, rtol=0, atol=1e-12)
+        flat = np.bincount(np.repeat(np.arange(table.n_faces), np.diff(table.face_offsets)),
+                           weights=~on_plane, minlength=table.n_faces) == 0
+        expected = np.zeros(table.n_cells, dtype=bool)
+        expected[owner[flat & (sides < 0).any(axis=1)]] = True
+        np.testing.assert_array_equal(network['surface'][k], expected)
+
+
+def test_adjacency_matrix(grid_cells):
+    index, box, table = grid_cells
+    network = throat_network(table, box)
+    graph = adjacency_matrix(table.n_cells, network)
+    assert (graph != graph.T).nnz == 0
+    np.testing.assert_allclose(graph.sum(), 2 * network['area'].sum())
+    # 等效直径 2·SPACING/√π ≈ 1.13·SPACING
+    assert adjacency_matrix(table.n_cells, network, min_diameter=SPACING).nnz == graph.nnz
+    assert adjacency_matrix(table.n_cells, network, min_diameter=1.2 * SPACING).nnz == 0
+    diameters = adjacency_matrix(table.n_cells, network, weight='diameter')
+    np.testing.assert_allclose(diameters.data, 2 * SPACING / np.sqrt(np.pi))
+    with pytest.raises(ValueError):
+        adjacency_matrix(table.n_cells, network, weight='length')
+
+
+def test_surface_reachability():
+    # 0-1-2 贯通 x 方向；3 孤立且只接触 z+；4 不接触任何表面
+    graph = coo_matrix((np.ones(4), ([0, 1, 1, 2], [1, 0, 2, 1])), shape=(5, 5)).tocsr()
+    volumes = np.array([1.0, 2.0, 1.0, 4.0, 2.0])
+    surface = np.zeros((6, 5), dtype=bool)
+    surface[0, 0] = surface[1, 2] = surface[5, 3] = True
+    result = surface_reachability(graph, volumes, surface)
+    assert result['n_components'] == 3
+    labels = result['labels']
+    assert labels[0] == labels[1] == labels[2] and len({labels[0], labels[3], labels[4]}) == 3
+    np.testing.assert_allclose(result['component_volumes'][labels[[0, 3, 4]]], [4, 4, 2])
+    np.testing.assert_allclose(result['reachable_fraction'], [0.4, 0.4, 0, 0, 0, 0.4])
+    assert result['percolates'] == {'x': True, 'y': False, 'z': False}
+
+
+def test_grid_is_fully_reachable(grid_cells):
+    index, box, table = grid_cells
+    network = throat_network(table, box)
+    result = surface_reachability(adjacency_matrix(table.n_cells, network), table.volumes,
+                                  network['surface'])
+    assert result['n_components'] == 1
+    np.testing.assert_allclose(result['reachable_fraction'], 1.0)
+    assert all(result['percolates'].values())
+    # 把 x 方向中间的喉道全部去掉后 x 向不再贯通
+    keep = ~((network['center'][:, 0] > 1.5 * SPACING) & (network['center'][:, 0] < 2.5 * SPACING))
+    cut = {key: value[keep] if key != 'surface' else value for key, value in network.items()}
+    result = surface_reachability(adjacency_matrix(table.n_cells, cut), table.volumes,
+                                  network['surface'])
+    assert result['n_components'] == 2
+    assert result['percolates'] == {'x': False, 'y': True, 'z': True}
+    np.testing.assert_allclose(result['reachable_fraction'][:2], 0.5)
+
+
+def test_throat_size_summary(random_cells):
+    box, table = random_cells
+    network = throat_network(table, box)
+    boundaries = (30e-6, 60e-6)
+    groups = throat_layers(network, boundaries)
+    np.testing.assert_array_equal(groups, np.searchsorted(boundaries, network['center'][:, 2],
+                                                          side='right'))
+    summary = throat_size_summary(network['diameter'], groups, n_groups=4, percentiles=(25, 50))
+    assert summary[3] is None
+    for g in range(3):
+        values = network['diameter'][groups == g] * 1e6
+        entry = summary[g]
+        assert entry['n_throats'] == len(values)
+        np.testing.assert_allclose(entry['mean_throat_um'], values.mean())
+        np.testing.assert_allclose(entry['std_throat_um'], values.std())
+        np.testing.assert_allclose(entry['min_throat_um'], values.min())
+        np.testing.assert_allclose(entry['max_throat_um'], values.max())
+        np.testing.assert_allclose([entry['p25_throat_um'], entry['p50_throat_um']],
+                                   np.percentile(values, [25, 50]))
+    overall, = throat_size_summary(network['diameter'])
+    assert overall['n_throats'] == len(network['diameter'])
+
+
+def test_conduit_conductance_of_a_cylinder(grid_cells):
+    index, box, table = grid_cells
+    network = throat_network(table, box)
+    # 孔径等于喉道水力直径时每个管道是直径 SPACING、长 SPACING 的圆管
+    conductance = conduit_conductance(network, table.centroids,
+                                      np.full(table.n_cells, SPACING), viscosity=1e-3)
+    np.testing.assert_allclose(conductance, np.pi * SPACING ** 4 / (128 * 1e-3 * SPACING))
+    # 孔更大时两端锥段的阻力变小
+    wider = conduit_conductance(network, table.centroids, np.full(table.n_cells, 2 * SPACING),
+                                viscosity=1e-3)
+    assert np.all(wider > conductance)
+
+
+def test_grid_permeability_is_analytic(grid_cells):
+    index, box, table = grid_cells
+    network = throat_network(table, box)
+    g = 3e-15
+    conductance = np.full(len(network['faces']), g)
+    positions = table.centroids[:, 0]
+    inlet, outlet = network['surface'][0], network['surface'][1]
+    area = box[1] * box[2]
+    result = darcy_permeability(table.n_cells, network, conductance, inlet, outlet, positions,
+                                area, viscosity=2.0, rtol=1e-12)
+    # ny·nz 条串联 (nx-1) 段的并联通道：k = g·μ / SPACING，压力沿 x 线性下降
+    assert result['converged']
+    np.testing.assert_allclose(result['permeability_m2'], g * 2.0 / SPACING, rtol=1e-9)
+    np.testing.assert_allclose(result['length'], (SHAPE[0] - 1) * SPACING)
+    np.testing.assert_allclose(result['pressure'], 1 - index[:, 0] / (SHAPE[0] - 1), atol=1e-10)
+    np.testing.assert_allclose(plane_pressure(network, result['pressure'], positions,
+                                              0.5 * box[0]), 0.5, atol=1e-10)
+    assert np.isnan(plane_pressure(network, result['pressure'], positions, 2 * box[0]))
+    # 只保留 z 方向第一层的孔：截面积减半，渗透率不变
+    half = darcy_permeability(table.n_cells, network, conductance, inlet, outlet, positions,
+                              area / 2, active=index[:, 2] == 0, viscosity=2.0, rtol=1e-12)
+    np.testing.assert_allclose(half['permeability_m2'], result['permeability_m2'], rtol=1e-9)
+    assert np.isnan(half['pressure'][index[:, 2] == 1]).all()
+
+
+def test_permeability_without_a_path(grid_cells):
+    index, box, table = grid_cells
+    network = throat_network(table, box)
+    conductance = np.where(np.abs(network['center'][:, 0] - 2 * SPACING) < 1e-12, 0.0, 1.0)
+    result = darcy_permeability(table.n_cells, network, conductance, network['surface'][0],
+                                network['surface'][1], table.centroids[:, 0], 1.0)
+    assert result['permeability_m2'] is None and result['flow_rate'] == 0.0
+    assert result['inlet_pores'] == result['outlet_pores'] == 0
+    # 同时位于入口与出口的孔（短路）两侧都不计
+    everywhere = np.ones(table.n_cells, dtype=bool)
+    result = darcy_permeability(table.n_cells, network, np.ones(len(conductance)), everywhere,
+                                everywhere, table.centroids[:, 0], 1.0)
+    assert result['inlet_pores'] == 0 and result['permeability_m2'] is None
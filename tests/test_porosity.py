@@ -0,0 +1,112 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from porosity import (analytic_solid_volume, bisect, confidence_factor,
+                      monte_carlo_solid_volume, node_spheres, strut_neighbors)
+
+
+def lattice(size=100e-6):
+    """立方体框架加体对角线（与 test_sdf_mesh 相同）"""
+    nodes = np.array(list(itertools.product([0.0, size], repeat=3)))
+    edges = np.array([(i, j) for i, j in itertools.combinations(range(8), 2)
+                      if np.count_nonzero(nodes[i] != nodes[j]) in (1, 3)])
+    return nodes, edges, np.linalg.norm(nodes[edges[:, 1]] - nodes[edges[:, 0]], axis=1)
+
+
+def segment_distance(a0, a1, b0, b1, n=200):
+    """两线段的距离上界（沿两段密集取点）"""
+    t = np.linspace(0, 1, n)[:, None]
+    pa, pb = a0 + t * (a1 - a0), b0 + t * (b1 - b0)
+    return np.sqrt(((pa[:, None] - pb[None]) ** 2).sum(axis=2).min())
+
+
+def test_monte_carlo_is_exact_for_capsules():
+    r, length = 5e-6, 60e-6
+    capsule = np.pi * r ** 2 * length + 4 / 3 * np.pi * r ** 3
+    # 单个胶囊：每个样本的权重只取决于是否在胶囊内，体积无偏
+    nodes = np.array([[0, 0, 0], [length, 0, 0], [2 * length, 0, 0]])
+    one = np.array([[0, 1]])
+    volume, error, _, _ = monte_carlo_solid_volume(nodes, one, np.array([length]), r,
+                                                   strut_neighbors(nodes, one, r), 4096,
+                                                   random_state=0)
+    assert abs(volume - capsule) < 4 * error
+    # 共线的两段：接头处的两个半球重合，只计一次
+    two = np.array([[0, 1], [1, 2]])
+    lengths = np.full(2, length)
+    volume, error, _, _ = monte_carlo_solid_volume(nodes, two, lengths, r,
+                                                   strut_neighbors(nodes, two, r), 4096,
+                                                   random_state=0)
+    exact = np.pi * r ** 2 * 2 * length + 4 / 3 * np.pi * r ** 3
+    assert abs(volume - exact) < 4 * error
+    assert error / exact < 0.005
+
+
+def test_monte_carlo_matches_uniform_sampling():
+    nodes, edges, lengths = lattice()
+    radius = np.linspace(6e-6, 12e-6, len(edges))
+    z_boundaries = (30e-6, 70e-6)
+    volume, error, layer_volumes, _ = monte_carlo_solid_volume(
+        nodes, edges, lengths, radius, strut_neighbors(nodes, edges, radius), 2048,
+        random_state=1, z_boundaries=z_boundaries, chunk_pairs=7)
+    np.testing.assert_allclose(layer_volumes.sum(), volume, rtol=1e-12)
+
+    # 包围盒内均匀采样：点到最近支柱轴线的距离不超过该支柱半径
+    rng = np.random.default_rng(2)
+    low, high = nodes.min(axis=0) - radius.max(), nodes.max(axis=0) + radius.max()
+    points = rng.uniform(low, high, (200000, 3))
+    p0, axis = nodes[edges[:, 0]], nodes[edges[:, 1]] - nodes[edges[:, 0]]
+    inside = np.zeros(len(points), dtype=bool)
+    for e in range(len(edges)):
+        t = np.clip((points - p0[e]) @ axis[e] / (axis[e] @ axis[e]), 0, 1)
+        inside |= np.linalg.norm(points - p0[e] - t[:, None] * axis[e], axis=1) <= radius[e]
+    box = np.prod(high - low)
+    reference = inside.mean() * box
+    reference_error = np.sqrt(inside.mean() * (1 - inside.mean()) / len(points)) * box
+    assert abs(volume - reference) < 4 * np.hypot(error, reference_error)
+    layer = np.searchsorted(z_boundaries, points[:, 2], side='right')
+    for k in range(3):
+        np.testing.assert_allclose(layer_volumes[k], (inside & (layer == k)).mean() * box,
+                                   rtol=0.05)
+
+
+def test_strut_neighbors_cover_intersecting_pairs():
+    rng = np.random.default_rng(3)
+    nodes = rng.uniform(0, 100e-6, (30, 3))
+    edges = np.array([(i, j) for i, j in rng.integers(0, 30, (40, 2)) if i != j])
+    radius = rng.uniform(3e-6, 8e-6, len(edges))
+    offsets, values = strut_neighbors(nodes, edges, radius)
+    pairs = {(e, f) for e in range(len(edges)) for f in values[offsets[e]:offsets[e + 1]]}
+    assert all((f, e) in pairs and e != f for e, f in pairs)
+    for e, f in itertools.combinations(range(len(edges)), 2):
+        gap = segment_distance(nodes[edges[e, 0]], nodes[edges[e, 1]],
+                               nodes[edges[f, 0]], nodes[edges[f, 1]])
+        if gap <= radius[e] + radius[f]:
+            assert (e, f) in pairs
+    empty_offsets, empty_values = strut_neighbors(nodes, np.zeros((0, 2), dtype=int), 1e-6)
+    assert list(empty_offsets) == [0] and len(empty_values) == 0
+
+
+def test_analytic_volume_formula():
+    nodes, edges, lengths = lattice()
+    radius = np.linspace(6e-6, 12e-6, len(edges))
+    node_radius = node_spheres(len(nodes), edges, radius)
+    for node in range(len(nodes)):
+        touching = (edges == node).any(axis=1)
+        assert node_radius[node] == radius[touching].max()
+    expected = (np.pi * radius ** 2 * (lengths - node_radius[edges].sum(axis=1))).sum() + \
+        (4 / 3 * np.pi * node_radius ** 3).sum()
+    total, layers = analytic_solid_volume(nodes, edges, lengths, radius, (50e-6,))
+    np.testing.assert_allclose(total, expected)
+    np.testing.assert_allclose(layers.sum(), total)
+    assert analytic_solid_volume(nodes, edges, lengths, radius) == total
+
+
+def test_bisect_and_confidence_factor():
+    root, iterations = bisect(lambda x: x ** 3, 8.0, 0.0, 10.0, tol=1e-9)
+    np.testing.assert_allclose(root, 2.0, atol=1e-9)
+    assert iterations < 60
+    np.testing.assert_allclose(confidence_factor(0.95), 1.959964, atol=1e-6)
+    with pytest.raises(ZeroDivisionError):
+        bisect(lambda x: 1 / (x - 1), 0.0, 1.0, 1.0, tol=1e-9)
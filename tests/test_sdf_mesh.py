@@ -0,0 +1,91 @@
+import itertools
+
+import numpy as np
+
+from mesh_check import validate_mesh
+from mesh_io import weld_triangles
+from sdf_mesh import block_field, marching_tetrahedra, sdf_grid, sdf_mesh
+
+
+def cube_frame(size=100e-6):
+    """立方体框架加体对角线：角点处 4 根支柱汇交，平滑并集在角点向外膨胀"""
+    nodes = np.array(list(itertools.product([0.0, size], repeat=3)))
+    edges = [(i, j) for i, j in itertools.combinations(range(8), 2)
+             if np.count_nonzero(nodes[i] != nodes[j]) in (1, 3)]
+    return nodes, np.array(edges)
+
+
+def test_sdf_grid_pads_for_blend():
+    nodes, edges = cube_frame()
+    plain, _ = sdf_grid(nodes, edges, 10e-6, 5e-6)
+    blended, _ = sdf_grid(nodes, edges, 10e-6, 5e-6, blend=5e-6)
+    np.testing.assert_allclose(plain - blended, 5e-6 * np.log(4))
+
+
+def test_blended_sdf_mesh_is_watertight():
+    nodes, edges = cube_frame()
+    vertices, faces = sdf_mesh(nodes, edges, 10e-6, 4e-6, blend=10e-6, n_workers=1)
+    report = validate_mesh(vertices, faces)
+    assert report['watertight'], report
+    assert report['n_shells'] == report['closed_shells'] == 1
+
+
+def capsule_distance(points, p0, p1, radius):
+    """逐支柱的胶囊体有符号距离 (P, E)"""
+    axis = p1 - p0
+    rel = points[:, None] - p0[None]
+    t = np.clip(np.einsum('pej,ej->pe', rel, axis) / np.einsum('ej,ej->e', axis, axis), 0, 1)
+    return np.linalg.norm(rel - t[..., None] * axis[None], axis=2) - radius[None]
+
+
+def test_block_field_matches_brute_force():
+    nodes, edges = cube_frame()
+    p0, p1 = nodes[edges[:, 0]], nodes[edges[:, 1]]
+    radius = np.linspace(6e-6, 12e-6, len(edges))
+    origin = np.full(3, -20e-6)
+    spacing = 7e-6
+    shape = (21, 20, 19)
+    grid = origin + np.stack(np.meshgrid(*[np.arange(n) for n in shape], indexing='ij'),
+                             -1).reshape(-1, 3) * spacing
+    distance = capsule_distance(grid, p0, p1, radius)
+    field = block_field(np.zeros(3, dtype=np.int64), shape, origin, spacing, p0, p1, radius)
+    np.testing.assert_allclose(field.ravel(), distance.min(axis=1), atol=1e-15)
+
+    blend = 5e-6
+    smooth = -blend * np.log(np.exp(-distance / blend).sum(axis=1))
+    field = block_field(np.zeros(3, dtype=np.int64), shape, origin, spacing, p0, p1, radius,
+                        blend=blend)
+    np.testing.assert_allclose(field.ravel(), smooth, rtol=1e-9, atol=1e-15)
+    # band 以外的场值截断
+    banded = block_field(np.zeros(3, dtype=np.int64), shape, origin, spacing, p0, p1, radius,
+                         band=10e-6)
+    near = distance.min(axis=1) < 10e-6
+    np.testing.assert_allclose(banded.ravel()[near], distance.min(axis=1)[near], atol=1e-15)
+    assert np.all(banded.ravel()[~near] == 10e-6)
+
+
+def test_marching_tetrahedra_sphere():
+    spacing = 0.05
+    axis = np.arange(-1.2, 1.2 + 1e-9, spacing)
+    x, y, z = np.meshgrid(axis, axis, axis, indexing='ij')
+    values = np.sqrt(x ** 2 + y ** 2 + z ** 2) - 1.0
+    triangles = marching_tetrahedra(values, np.full(3, axis[0]), spacing)
+    vertices, faces, _ = weld_triangles(triangles)
+    report = validate_mesh(vertices, faces)
+    assert report['watertight'] and report['n_shells'] == 1
+    volume = np.einsum('ij,ij->i', triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])).sum() / 6
+    np.testing.assert_allclose(volume, 4 / 3 * np.pi, rtol=0.02)
+    np.testing.assert_allclose(np.linalg.norm(triangles, axis=2), 1.0, atol=spacing)
+
+
+def test_tiled_mesh_matches_single_block():
+    nodes, edges = cube_frame()
+    single = sdf_mesh(nodes, edges, 10e-6, 5e-6, blend=3e-6, chunk_cells=1000, n_workers=1)
+    tiled = sdf_mesh(nodes, edges, 10e-6, 5e-6, blend=3e-6, chunk_cells=9, n_workers=2)
+    assert len(tiled[1]) == len(single[1]) and len(tiled[0]) == len(single[0])
+    assert validate_mesh(*tiled)['watertight']
+
+    def volume(vertices, faces):
+        t = vertices[faces]
+        return np.einsum('ij,ij->i', t[:, 0], np.cross(t[:, 1], t[:, 2])).sum() / 6
+    np.testing.assert_allclose(volume(*tiled), volume(*single), rtol=1e-9)
@@ -0,0 +1,185 @@
+import numpy as np
+
+import pytest
+
+from seeding import (DEFAULT_GRADIENT_PARAM, DEFAULT_LAYER_BOUNDARIES, PROFILE_TYPES,
+                     assign_layers, build_density_profile, count_per_layer, expected_seed_count,
+                     get_rng, lloyd_relax, poisson_disk_seeds, local_seed_spacing,
+                     resolve_density_profile, sample_seeds_from_profile, tabulate_cdf)
+
+
+SIZE = (400e-6, 400e-6, 100e-6)
+
+
+def make_profile():
+    return build_density_profile('linear', DEFAULT_GRADIENT_PARAM, SIZE[2])
+
+
+@pytest.mark.parametrize("gradient_type", PROFILE_TYPES)
+def test_profiles_hit_layer_densities(gradient_type):
+    profile = build_density_profile(gradient_type, DEFAULT_GRADIENT_PARAM, SIZE[2])
+    # 各层中点处的密度等于该层参数（sigmoid 只在远离边界处近似相等）
+    midpoints = np.array([0.1, 0.35, 0.75]) * SIZE[2]
+    expected = [DEFAULT_GRADIENT_PARAM[name]
+                for name in ('surface_density', 'middle_density', 'core_density')]
+    np.testing.assert_allclose(profile(midpoints), expected, rtol=0.02)
+    assert np.all(np.diff(profile(np.linspace(0, SIZE[2], 101))) <= 1e-9)
+
+
+def test_step_profile_matches_layer_counts():
+    profile = build_density_profile('step', DEFAULT_GRADIENT_PARAM, SIZE[2])
+    seeds = sample_seeds_from_profile(profile, *SIZE, random_state=0)
+    volume_mm3 = SIZE[0] * SIZE[1] * np.diff([0.0, 0.2, 0.5, 1.0]) * SIZE[2] * 1e9
+    expected = volume_mm3 * [DEFAULT_GRADIENT_PARAM[name]
+                             for name in ('surface_density', 'middle_density', 'core_density')]
+    assert len(seeds) == int(expected.sum())
+    assert abs(len(seeds) - expected_seed_count(profile, SIZE[0], SIZE[1], (0.0, SIZE[2]))) < 1
+    counts = count_per_layer(seeds[:, 2], SIZE[2])
+    # 多项分布：每层数目在期望值的 4 个标准差内
+    assert np.all(np.abs(counts - expected) < 4 * np.sqrt(expected) + 1)
+
+
+def test_inverse_cdf_sampling_follows_profile():
+    profile = make_profile()
+    seeds = sample_seeds_from_profile(profile, *SIZE, n_seeds=20000, random_state=5)
+    assert seeds.shape == (20000, 3)
+    assert np.all((seeds >= 0) & (seeds <= SIZE))
+    # Kolmogorov-Smirnov 距离：样本经验分布与剖面CDF
+    z_grid, cdf = tabulate_cdf(profile, (0.0, SIZE[2]))
+    z = np.sort(seeds[:, 2])
+    model = np.interp(z, z_grid, cdf / cdf[-1])
+    empirical = np.arange(1, len(z) + 1) / len(z)
+    assert np.max(np.abs(model - empirical)) < 1.63 / np.sqrt(len(z))
+
+
+def test_z_range_samples_stay_in_range():
+    profile = make_profile()
+    seeds = sample_seeds_from_profile(profile, *SIZE, z_range=(20e-6, 50e-6), random_state=1)
+    assert np.all((seeds[:, 2] >= 20e-6) & (seeds[:, 2] <= 50e-6))
+    assert abs(len(seeds) - expected_seed_count(profile, SIZE[0], SIZE[1], (20e-6, 50e-6))) < 1
+
+
+def test_resolve_density_profile_forms():
+    z = np.linspace(0, SIZE[2], 7)
+    table = resolve_density_profile(np.array([30000.0, 10000.0]), None, SIZE[2])
+    np.testing.assert_allclose(table(z), np.linspace(30000, 10000, 7))
+    pairs = resolve_density_profile(([0.0, 50e-6, 100e-6], [1.0, 3.0, 2.0]), None, SIZE[2])
+    np.testing.assert_allclose(pairs([25e-6, 75e-6]), [2.0, 2.5])
+    function = resolve_density_profile(lambda z: np.full_like(z, 5.0), None, SIZE[2])
+    np.testing.assert_allclose(function(z), 5.0)
+    np.testing.assert_allclose(resolve_density_profile('linear', None, SIZE[2])(z),
+                               make_profile()(z))
+    with pytest.raises(ValueError):
+        resolve_density_profile(np.array([1.0, -1.0]), None, SIZE[2])
+    with pytest.raises(ValueError):
+        build_density_profile('cubic', DEFAULT_GRADIENT_PARAM, SIZE[2])
+
+
+def test_get_rng_passes_generators_through():
+    generator = np.random.default_rng(1)
+    legacy = np.random.RandomState(1)
+    assert get_rng(None) is np.random
+    assert get_rng(np.random) is np.random
+    assert get_rng(generator) is generator
+    assert get_rng(legacy) is legacy
+
+
+def test_poisson_disk_seeds_default_random_state():
+    np.random.seed(0)
+    seeds, spacing = poisson_disk_seeds(make_profile(), *SIZE, random_state=None)
+    assert len(seeds) > 0
+    assert len(spacing) == len(seeds)
+    assert np.all((seeds >= 0) & (seeds <= SIZE))
+
+
+def test_poisson_disk_seeds_reproducible_with_seed():
+    first, _ = poisson_disk_seeds(make_profile(), *SIZE, random_state=3)
+    second, _ = poisson_disk_seeds(make_profile(), *SIZE, random_state=3)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_sample_seeds_accepts_random_state_instance():
+    seeds = sample_seeds_from_profile(make_profile(), *SIZE, random_state=np.random.RandomState(2))
+    assert len(seeds) > 0
+
+
+def test_lloyd_relax_keeps_seeds_off_layer_planes():
+    profile = make_profile()
+    boundaries = np.asarray(DEFAULT_LAYER_BOUNDARIES) * SIZE[2]
+    seeds = sample_seeds_from_profile(profile, *SIZE, random_state=0)
+    samples = sample_seeds_from_profile(lambda z: profile(z) ** (5.0 / 3.0), *SIZE,
+                                        n_seeds=32 * len(seeds), random_state=1)
+    seed_layers = assign_layers(seeds[:, 2], boundaries)
+    relaxed, _ = lloyd_relax(seeds, samples, np.zeros(3), np.array(SIZE), iterations=20,
+                             tol=0.0, seed_groups=seed_layers,
+                             sample_groups=assign_layers(samples[:, 2], boundaries))
+    assert not np.isin(relaxed[:, 2], boundaries).any()
+    assert np.min(np.abs(relaxed[:, 2, None] - boundaries)) > 1e-7
+    np.testing.assert_array_equal(assign_layers(relaxed[:, 2], boundaries), seed_layers)
+
+
+def test_local_seed_spacing_follows_profile():
+    profile = make_profile()
+    z = np.array([0.0, 50e-6, 100e-6])
+    spacing = local_seed_spacing(profile, z, SIZE[2])
+    np.testing.assert_allclose(spacing, np.cbrt(1.0 / (profile(z) * 1e9)))
+    # 窗口内取最稀疏处：线性剖面下为窗口的上端
+    windowed = local_seed_spacing(profile, z, SIZE[2], window=20e-6)
+    np.testing.assert_allclose(windowed, np.cbrt(1.0 / (profile(np.minimum(z + 20e-6, SIZE[2])) * 1e9)))
+
+
+def test_poisson_disk_respects_local_spacing():
+    profile = make_profile()
+    seeds, spacing = poisson_disk_seeds(profile, *SIZE, min_spacing_factor=0.6, random_state=2)
+    np.testing.assert_allclose(spacing, 0.6 * np.cbrt(1.0 / (profile(seeds[:, 2]) * 1e9)))
+    distance = np.linalg.norm(seeds[:, None] - seeds[None], axis=2)
+    np.fill_diagonal(distance, np.inf)
+    # 任意两个种子的距离不小于二者间距中较大者
+    assert np.all(distance >= np.maximum(spacing[:, None], spacing[None]) * (1 - 1e-12))
+    # 蓝噪声：最近邻距离比同数目的独立随机采样更均匀
+    random = sample_seeds_from_profile(profile, *SIZE, n_seeds=len(seeds), random_state=2)
+    nearest_random = np.linalg.norm(random[:, None] - random[None], axis=2)
+    np.fill_diagonal(nearest_random, np.inf)
+    assert distance.min(axis=1).min() > nearest_random.min(axis=1).min()
+    # 密度梯度保留：皮质骨层单位体积的种子多于松质骨层
+    counts = count_per_layer(seeds[:, 2], SIZE[2]) / np.diff([0.0, 0.2, 0.5, 1.0])
+    assert counts[0] > counts[2]
+
+
+def test_lloyd_relax_converges_to_centroids():
+    rng = np.random.default_rng(4)
+    box = np.array(SIZE)
+    seeds = rng.uniform(0, 1, (40, 3)) * box
+    samples = rng.uniform(0, 1, (40000, 3)) * box
+    relaxed, history = lloyd_relax(seeds, samples, np.zeros(3), box, iterations=50, tol=1e-8)
+    assert len(history) <= 50
+    assert history[-1] < history[0]
+    # 收敛后每个种子接近其（采样估计的）单元质心
+    from scipy.spatial import cKDTree
+    _, nearest = cKDTree(relaxed).query(samples)
+    centroids = np.stack([np.bincount(nearest, weights=samples[:, k], minlength=len(relaxed))
+                          for k in range(3)], axis=1) / np.bincount(nearest)[:, None]
+    assert np.linalg.norm(centroids - relaxed, axis=1).max() < 2e-6
+    # 松弛让单元更均匀：最近邻距离的变异系数下降
+    def spread(points):
+        distance, _ = cKDTree(points).query(points, 2)
+        return distance[:, 1].std() / distance[:, 1].mean()
+    assert spread(relaxed) < spread(seeds)
+
+
+def test_lloyd_relax_stops_at_tolerance():
+    rng = np.random.default_rng(5)
+    box = np.array(SIZE)
+    seeds = rng.uniform(0, 1, (20, 3)) * box
+    samples = rng.uniform(0, 1, (5000, 3)) * box
+    _, history = lloyd_relax(seeds, samples, np.zeros(3), box, iterations=100, tol=1e-6)
+    assert history[-1] < 1e-6 and all(step >= 1e-6 for step in history[:-1])
+
+
+def test_assign_layers_uses_half_open_intervals():
+    boundaries = np.asarray(DEFAULT_LAYER_BOUNDARIES) * SIZE[2]
+    z = np.array([0.0, boundaries[0] - 1e-12, boundaries[0], boundaries[1], SIZE[2]])
+    layers = assign_layers(z, boundaries)
+    assert layers.dtype == np.int8
+    np.testing.assert_array_equal(layers, [0, 0, 1, 2, 2])
+    np.testing.assert_array_equal(count_per_layer(z, SIZE[2]), [2, 1, 2])
@@ -0,0 +1,97 @@
+import json
+import struct
+import zipfile
+import zlib
+
+import numpy as np
+
+from slicer import iter_layer_images, png_bytes, render_layer, write_slice_stack
+
+
+def read_png(data):
+    """解析 png_bytes 写出的 8 位灰度 PNG（滤波类型 0），返回 (image, pixels_per_meter)"""
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    position, chunks = 8, {}
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        tag = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        crc, = struct.unpack('>I', data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(tag + body) & 0xffffffff
+        chunks[tag] = body
+        position += 12 + length
+    width, height = struct.unpack('>II', chunks[b'IHDR'][:8])
+    raw = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8)
+    raw = raw.reshape(height, width + 1)
+    assert not raw[:, 0].any()
+    per_meter = struct.unpack('>I', chunks[b'pHYs'][:4])[0] if b'pHYs' in chunks else None
+    return raw[:, 1:], per_meter
+
+
+def test_png_round_trip():
+    image = np.random.default_rng(0).integers(0, 256, (7, 11)).astype(np.uint8)
+    decoded, per_meter = read_png(png_bytes(image, pixel_pitch=50e-6))
+    np.testing.assert_array_equal(decoded, image)
+    assert per_meter == 20000
+    assert read_png(png_bytes(image))[1] is None
+
+
+def strut_task(z, pitch=2e-6, supersample=2, blend=0.0):
+    """以 (50, 30) µm 为轴线的竖直支柱，半径 20 µm，画布 100×80 µm"""
+    p0 = np.array([[50e-6, 30e-6, -100e-6]])
+    p1 = np.array([[50e-6, 30e-6, 100e-6]])
+    return ('struts', z, np.zeros(3), (50, 40), pitch, supersample,
+            (p0, p1, np.array([20e-6]), blend))
+
+
+def test_render_strut_layer_area_and_orientation():
+    image = render_layer(strut_task(0.0, supersample=4))
+    assert image.shape == (40, 50)
+    # 覆盖面积 ≈ πr²
+    area = image.sum() / 255 * (2e-6) ** 2
+    np.testing.assert_allclose(area, np.pi * (20e-6) ** 2, rtol=0.01)
+    # 行从 +Y 到 -Y：圆心 y = 30 µm 位于第 40 - 15 行附近
+    rows, cols = np.nonzero(image)
+    np.testing.assert_allclose(np.average(rows, weights=image[rows, cols]), 40 - 15 - 0.5, atol=0.1)
+    np.testing.assert_allclose(np.average(cols, weights=image[rows, cols]), 25 - 0.5, atol=0.1)
+    # 支柱以外的层为空
+    assert not render_layer(strut_task(150e-6)).any()
+    empty = ('struts', 0.0, np.zeros(3), (5, 4), 1e-6, 1, (np.zeros((0, 3)), np.zeros((0, 3)),
+                                                           np.zeros(0), 0.0))
+    assert not render_layer(empty).any()
+
+
+def test_render_cell_layer():
+    # 两个种子，只有左侧种子属于单元表：左半画布为实体
+    seeds = np.array([[25e-6, 20e-6, 0.0], [75e-6, 20e-6, 0.0]])
+    task = ('cells', 0.0, np.zeros(3), (50, 40), 2e-6, 1, (seeds, np.array([0, -1])))
+    image = render_layer(task)
+    assert np.all(image[:, :25] == 255) and not image[:, 25:].any()
+
+
+def test_iter_layer_images_keeps_order():
+    heights = np.linspace(-120e-6, 120e-6, 9)
+    images = list(iter_layer_images((strut_task(z) for z in heights), n_workers=2))
+    for z, image in zip(heights, images):
+        np.testing.assert_array_equal(image, render_layer(strut_task(z)))
+
+
+def test_write_slice_stack_directory_and_zip(tmp_path):
+    images = [np.full((4, 6), value, dtype=np.uint8) for value in (0, 51, 255)]
+    heights = [5e-6, 15e-6, 25e-6]
+    for target in (str(tmp_path / 'stack'), str(tmp_path / 'stack.zip')):
+        manifest = write_slice_stack(target, iter(images), heights, {'layer_height_um': 10.0},
+                                     pixel_pitch=10e-6)
+        assert [layer['file'] for layer in manifest['layers']] == \
+            ['layer_00000.png', 'layer_00001.png', 'layer_00002.png']
+        np.testing.assert_allclose([layer['solid_fraction'] for layer in manifest['layers']],
+                                   [0.0, 0.2, 1.0])
+        np.testing.assert_allclose([layer['z_um'] for layer in manifest['layers']], [5, 15, 25])
+        if target.endswith('.zip'):
+            with zipfile.ZipFile(target) as archive:
+                files = {name: archive.read(name) for name in archive.namelist()}
+        else:
+            files = {path.name: path.read_bytes() for path in (tmp_path / 'stack').iterdir()}
+        assert json.loads(files['manifest.json'].decode('utf-8')) == manifest
+        for image, layer in zip(images, manifest['layers']):
+            np.testing.assert_array_equal(read_png(files[layer['file']])[0], image)
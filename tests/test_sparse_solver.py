@@ -0,0 +1,44 @@
+import numpy as np
+from scipy.sparse import diags, random as sparse_random
+from scipy.sparse.linalg import spsolve
+
+from sparse_solver import conjugate_gradient, jacobi_preconditioner
+
+
+def spd_matrix(n=200, seed=0):
+    """对角占优的稀疏对称正定矩阵（对角线跨越多个数量级，检验 Jacobi 预条件）"""
+    rng = np.random.default_rng(seed)
+    off = sparse_random(n, n, density=0.02, random_state=seed)
+    off = -(off + off.T)
+    scale = 10 ** rng.uniform(0, 4, n)
+    return (off + diags(np.asarray(abs(off).sum(axis=1)).ravel() + scale)).tocsr()
+
+
+def test_matches_direct_solve():
+    matrix = spd_matrix()
+    rhs = np.random.default_rng(1).normal(size=matrix.shape[0])
+    exact = spsolve(matrix.tocsc(), rhs)
+    x, info = conjugate_gradient(matrix, rhs, rtol=1e-12)
+    assert info['converged'] and info['residual'] <= 1e-12
+    np.testing.assert_allclose(x, exact, rtol=1e-9)
+    # 未预条件时迭代次数更多
+    _, plain = conjugate_gradient(matrix, rhs, preconditioner=lambda r: r, rtol=1e-12)
+    assert plain['converged'] and plain['iterations'] > info['iterations']
+
+
+def test_warm_start_zero_rhs_and_iteration_limit():
+    matrix = spd_matrix(seed=2)
+    rhs = np.ones(matrix.shape[0])
+    exact = spsolve(matrix.tocsc(), rhs)
+    _, info = conjugate_gradient(matrix, rhs, x0=exact, rtol=1e-8)
+    assert info['iterations'] == 0 and info['converged']
+    x, info = conjugate_gradient(matrix, np.zeros(matrix.shape[0]))
+    assert not x.any() and info == {'iterations': 0, 'residual': 0.0, 'converged': True}
+    _, info = conjugate_gradient(matrix, rhs, rtol=1e-14, maxiter=2)
+    assert info['iterations'] == 2 and not info['converged'] and info['residual'] > 1e-14
+
+
+def test_jacobi_preconditioner_ignores_empty_rows():
+    matrix = diags([4.0, 0.0, 2.0]).tocsr()
+    np.testing.assert_allclose(jacobi_preconditioner(matrix)(np.array([4.0, 3.0, 1.0])),
+                               [1.0, 3.0, 0.5])
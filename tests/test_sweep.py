@@ -0,0 +1,123 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("voronoi_scaffold_generator")
+from sweep import (grid_design, job_seed, latin_hypercube_design, load_design,  # noqa: E402
+                   load_results, main, parse_value, result_columns, run_sweep)
+
+# 小尺寸支架，每个设计只需几十毫秒
+SMALL = {'x_size': 200e-6, 'y_size': 200e-6, 'z_size': 100e-6}
+
+
+def small_design(densities):
+    return [dict(SMALL, surface_density=density) for density in densities]
+
+
+def test_designs():
+    design = grid_design({'surface_density': [1, 2], 'gradient_type': ['linear', 'sigmoid']})
+    assert design == [{'surface_density': 1, 'gradient_type': 'linear'},
+                      {'surface_density': 1, 'gradient_type': 'sigmoid'},
+                      {'surface_density': 2, 'gradient_type': 'linear'},
+                      {'surface_density': 2, 'gradient_type': 'sigmoid'}]
+    with pytest.raises(ValueError):
+        grid_design({'pore_count': [1]})
+
+    design = latin_hypercube_design({'core_density': (1000, 2000), 'target_porosity': (0.5, 0.7)},
+                                    20, random_state=0, fixed={'sampling': 'poisson'})
+    assert all(d['sampling'] == 'poisson' for d in design)
+    # 每个参数在每个等分区间中恰有一个点
+    for name, (low, high) in {'core_density': (1000, 2000), 'target_porosity': (0.5, 0.7)}.items():
+        strata = np.floor((np.array([d[name] for d in design]) - low) / (high - low) * 20)
+        np.testing.assert_array_equal(np.sort(strata), np.arange(20))
+    assert latin_hypercube_design({'core_density': (0, 1)}, 5, random_state=3) == \
+        latin_hypercube_design({'core_density': (0, 1)}, 5, random_state=3)
+
+
+def test_load_design_and_values(tmp_path):
+    assert parse_value(' 12 ') == 12 and parse_value('1e-4') == 1e-4
+    assert parse_value('sigmoid') == 'sigmoid'
+    table = tmp_path / "designs.csv"
+    table.write_text("surface_density,gradient_type\n20000,linear\n30000,sigmoid\n", encoding='utf-8')
+    expected = [{'surface_density': 20000, 'gradient_type': 'linear'},
+                {'surface_density': 30000, 'gradient_type': 'sigmoid'}]
+    assert load_design(str(table)) == expected
+    listed = tmp_path / "designs.json"
+    listed.write_text(json.dumps(expected), encoding='utf-8')
+    assert load_design(str(listed)) == expected
+    listed.write_text(json.dumps([{'radius': 1}]), encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_design(str(listed))
+
+
+def test_job_seed_is_per_job():
+    seeds = [job_seed(7, job_id) for job_id in range(50)]
+    assert len(set(seeds)) == 50
+    assert seeds == [job_seed(7, job_id) for job_id in range(50)]
+    assert job_seed(8, 0) != seeds[0]
+
+
+def test_resume_skips_completed_jobs_and_truncates_partial_line(tmp_path, capsys):
+    results_file = str(tmp_path / "sweep.csv")
+    design = small_design([15000, 20000, 25000, 30000])
+    first = run_sweep(design[:3], results_file, base_seed=1, n_workers=1)
+    assert [row['job_id'] for row in first] == [0, 1, 2]
+    assert all(row['status'] == 'ok' for row in first)
+    # 模拟中断：末行只写了一半
+    with open(results_file, 'a', encoding='utf-8', newline='') as f:
+        f.write('3,12345,30000,0.0002')
+    capsys.readouterr()
+
+    second = run_sweep(design, results_file, base_seed=1, n_workers=1)
+    output = capsys.readouterr().out
+    assert "末行不完整" in output and "已完成 3 个, 待运行 1 个" in output
+    assert [row['job_id'] for row in second] == [3]
+    lines = open(results_file, encoding='utf-8').read().splitlines()
+    assert len(lines) == 5 and lines[0].split(',') == result_columns(
+        ['surface_density', 'x_size', 'y_size', 'z_size'])
+    results = load_results(results_file)
+    np.testing.assert_array_equal(results['job_id'], [0, 1, 2, 3])
+    np.testing.assert_array_equal(results['seed'], [job_seed(1, k) for k in range(4)])
+    # 续跑的结果与一次性运行一致
+    fresh = run_sweep(design, str(tmp_path / "fresh.csv"), base_seed=1, n_workers=2)
+    fresh = {row['job_id']: row for row in fresh}
+    for name in ('n_seeds', 'n_cells', 'mean_pore_size_um', 'layer0_n_pores'):
+        np.testing.assert_allclose(results[name], [fresh[k][name] for k in range(4)])
+    assert run_sweep(design, results_file, base_seed=1, n_workers=1) == []
+
+
+def test_resume_rejects_a_different_design(tmp_path):
+    results_file = str(tmp_path / "sweep.csv")
+    run_sweep(small_design([15000]), results_file, n_workers=1)
+    with pytest.raises(ValueError):
+        run_sweep(small_design([16000]), results_file, n_workers=1)
+    with pytest.raises(ValueError):
+        run_sweep([dict(SMALL, core_density=5000)], results_file, n_workers=1)
+    rows = run_sweep(small_design([16000]), results_file, n_workers=1, overwrite=True)
+    assert len(rows) == 1 and len(load_results(results_file)['job_id']) == 1
+
+
+def test_failed_jobs_are_recorded_and_retried(tmp_path):
+    results_file = str(tmp_path / "sweep.csv")
+    design = [dict(SMALL, gradient_type='linear'), dict(SMALL, gradient_type='spiral')]
+    rows = run_sweep(design, results_file, n_workers=1)
+    assert [row['status'] for row in rows] == ['ok', 'failed']
+    assert rows[1]['error']
+    assert run_sweep(design, results_file, n_workers=1) == []
+    retried = run_sweep(design, results_file, n_workers=1, retry_failed=True)
+    assert [row['job_id'] for row in retried] == [1]
+    results = load_results(results_file)
+    np.testing.assert_array_equal(results['job_id'], [0, 1])
+    assert list(results['status']) == ['ok', 'failed']
+    assert np.isnan(results['mean_pore_size_um'][1])
+
+
+def test_command_line_grid(tmp_path):
+    results_file = str(tmp_path / "cli.csv")
+    main(['grid', '-p', 'surface_density=15000,30000', '-p', 'x_size=0.0002',
+          '-p', 'y_size=0.0002', '-o', results_file, '-j', '1', '-s', '4'])
+    results = load_results(results_file)
+    np.testing.assert_array_equal(results['surface_density'], [15000, 30000])
+    np.testing.assert_array_equal(results['seed'], [job_seed(4, 0), job_seed(4, 1)])
+    assert set(results['status']) == {'ok'}
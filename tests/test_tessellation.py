@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from scipy.spatial import ConvexHull
+
+from tessellation import bounded_voronoi, local_spacing
+
+
+BOX = np.array([300e-6, 200e-6, 100e-6])
+
+
+def gradient_seeds(n=300, seed=0):
+    """Z方向密度递减的种子（靠近 z=0 更密）"""
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 1, (n, 3))
+    points[:, 2] **= 2
+    return points * BOX
+
+
+def test_bounded_cells_tile_the_box():
+    seeds = gradient_seeds()
+    vor, table = bounded_voronoi(seeds, BOX)
+    table.compute_statistics()
+    assert table.n_cells == len(seeds)
+    np.testing.assert_array_equal(table.seed_index, np.arange(len(seeds)))
+    np.testing.assert_allclose(table.volumes.sum(), np.prod(BOX), rtol=1e-9)
+    assert np.all(table.vertices >= 0) and np.all(table.vertices <= BOX)
+    # 单元是凸多面体：体积与顶点凸包一致
+    for i in range(0, len(seeds), 17):
+        np.testing.assert_allclose(table.volumes[i], ConvexHull(table.cell_vertex_coords(i)).volume,
+                                   rtol=1e-9)
+
+
+def test_bounded_mirrors_only_near_boundary_seeds():
+    seeds = gradient_seeds()
+    vor, _ = bounded_voronoi(seeds, BOX)
+    spacing = local_spacing(seeds)
+    distance = np.minimum(seeds, BOX - seeds)
+    # 离全部边界面都超过两倍局部间距的种子不会被镜像
+    far = np.all(distance >= 2 * spacing[:, None], axis=1)
+    assert far.any()
+    mirrored = vor.points[len(seeds):]
+    assert len(mirrored) < 3 * len(seeds)
+    for point in seeds[far]:
+        reflections = np.concatenate([np.where(np.eye(3, dtype=bool)[k], -point, point)[None]
+                                      for k in range(3)])
+        assert not np.any(np.all(np.isclose(mirrored[:, None], reflections[None]), axis=2))
+
+
+def test_bounded_matches_explicit_full_mirror():
+    seeds = gradient_seeds(120, seed=4)
+    _, table = bounded_voronoi(seeds, BOX)
+    _, reference = bounded_voronoi(seeds, BOX, margin=BOX.max())
+    table.compute_statistics()
+    reference.compute_statistics()
+    np.testing.assert_allclose(table.volumes, reference.volumes, rtol=1e-9)
+
+
+def test_bounded_raises_when_cells_stay_outside():
+    seeds = gradient_seeds(50)
+    seeds[0] = [-50e-6, 100e-6, 50e-6]          # 支架外的种子
+    with pytest.raises(ValueError):
+        bounded_voronoi(seeds, BOX)
+
+
+def test_tiled_voronoi_matches_single_domain():
+    from scipy.spatial import Voronoi
+    from tessellation import interior_cell_table, tiled_voronoi
+
+    box = np.array([400e-6, 300e-6, 100e-6])
+    rng = np.random.default_rng(2)
+    seeds = rng.uniform(0, 1, (500, 3)) * box
+    boundaries = [20e-6, 50e-6]
+    reference = interior_cell_table(Voronoi(seeds), box, layer_boundaries=boundaries)
+    reference.compute_statistics()
+    # 幽灵区故意取得很窄，迫使不确定的单元加倍幽灵区重新计算
+    tiled = tiled_voronoi(seeds, box, tiles=(3, 2), ghost_margin=10e-6, n_workers=2,
+                          layer_boundaries=boundaries)
+    np.testing.assert_array_equal(tiled.seed_index, reference.seed_index)
+    np.testing.assert_array_equal(tiled.layer_ids, reference.layer_ids)
+    np.testing.assert_allclose(tiled.volumes, reference.volumes, rtol=1e-9)
+    np.testing.assert_allclose(tiled.pore_sizes, reference.pore_sizes, rtol=1e-9)
+    np.testing.assert_allclose(tiled.centroids, reference.centroids, rtol=1e-9)
+    # 子区域之间的公共面只保留一个
+    assert tiled.n_faces == reference.n_faces
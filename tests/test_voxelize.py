@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from voxelize import (DEFAULT_VOXEL_BUDGET, block_ranges, default_voxel_size, load_voxel_volume,
+                      voxel_block, write_voxel_volume)
+
+
+SIZE = np.array([60e-6, 40e-6, 30e-6])
+VOXEL = 2e-6
+P0 = np.array([[5e-6, 20e-6, 15e-6], [30e-6, 5e-6, 2e-6]])
+P1 = np.array([[55e-6, 20e-6, 15e-6], [30e-6, 35e-6, 28e-6]])
+RADIUS = np.array([6e-6, 4e-6])
+Z_BOUNDARIES = [10e-6, 20e-6]
+
+
+def strut_tasks(shape, chunk_cells):
+    for lo, block in block_ranges(shape, chunk_cells):
+        yield ('struts', lo, block, VOXEL, (P0, P1, RADIUS, 0.0), True, Z_BOUNDARIES)
+
+
+def test_default_voxel_size_respects_budget():
+    assert default_voxel_size(1e-6, SIZE) == 1e-6
+    size = np.array([400e-6, 400e-6, 100e-6])
+    voxel = default_voxel_size(1e-9, size)
+    assert np.prod(np.ceil(size / voxel)) <= 1.01 * DEFAULT_VOXEL_BUDGET
+
+
+@pytest.mark.parametrize("ext", [".npy", ".raw", ".tif"])
+def test_chunked_volume_matches_single_block(tmp_path, ext):
+    shape = np.ceil(SIZE / VOXEL).astype(np.int64)
+    filename = str(tmp_path / f"volume{ext}")
+    metadata = write_voxel_volume(filename, shape, strut_tasks(shape, 8), 8, VOXEL,
+                                  {'voxel_size_um': VOXEL * 1e6}, n_workers=2)
+    _, expected = voxel_block(('struts', np.zeros(3, dtype=np.int64), shape, VOXEL,
+                               (P0, P1, RADIUS, 0.0), True, Z_BOUNDARIES))
+    volume, loaded = load_voxel_volume(filename)
+    assert loaded['shape_zyx'] == list(shape[::-1])
+    np.testing.assert_array_equal(volume, expected)
+    counts = np.bincount(expected.ravel())
+    assert metadata['label_counts'] == {str(k): int(c) for k, c in enumerate(counts) if c}
+    # 三层标签都出现，且体积与两根胶囊体之和接近
+    assert set(np.unique(expected)) == {0, 1, 2, 3}
+    solid = (expected > 0).sum() * VOXEL ** 3
+    capsules = np.sum(np.pi * RADIUS ** 2 * np.linalg.norm(P1 - P0, axis=1) +
+                      4 / 3 * np.pi * RADIUS ** 3)
+    assert 0.8 * capsules < solid < capsules
+
+    if ext == ".tif":
+        Image = pytest.importorskip("PIL.Image")
+        with Image.open(filename) as image:
+            assert image.n_frames == shape[2]
+            image.seek(shape[2] // 2)
+            np.testing.assert_array_equal(np.asarray(image), expected[shape[2] // 2])
+
+
+def test_cell_voxels_follow_nearest_seed():
+    rng = np.random.default_rng(0)
+    seeds = rng.uniform(0, 1, (30, 3)) * SIZE
+    layers = np.array([-1] + [1] * 29)
+    shape = np.ceil(SIZE / VOXEL).astype(np.int64)
+    reach = np.full(len(seeds), np.inf)
+    _, labels = voxel_block(('cells', np.zeros(3, dtype=np.int64), shape, VOXEL,
+                             (seeds, layers, reach), False, Z_BOUNDARIES))
+    centers = (np.stack(np.meshgrid(*[np.arange(n) + 0.5 for n in shape[::-1]], indexing='ij'),
+                        axis=-1)[..., ::-1] * VOXEL)
+    nearest = np.argmin(np.linalg.norm(centers[..., None, :] - seeds, axis=-1), axis=-1)
+    np.testing.assert_array_equal(labels, (nearest != 0).astype(np.uint8))
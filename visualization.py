@@ -11,6 +11,8 @@ from scipy.spatial import ConvexHull
 import matplotlib.cm as cm
 from matplotlib.colors import LinearSegmentedColormap
 
+from gradient_stats import LAYER_COLORS_HEX, BIOMIMETIC_LAYER_LABELS
+
 
 def create_realistic_scaffold_visualization(generator, output_path=None, max_cells=50):
     """
@@ -48,64 +50,28 @@ def create_realistic_scaffold_visualization(generator, output_path=None, max_cel
         (0, 0, '侧视图')
     ]
     
-    cells_to_show = generator.interior_cells[:min(max_cells, len(generator.interior_cells))]
+    table = generator.interior_cells
+    rows = np.arange(min(max_cells, len(table)))
     z_size = generator.z_size
     
+    # 面表中的唯一多边形面（相邻单元的公共面只绘制一次），6个视角共用
+    polygons, _, owners = table.cell_polygons(rows, scale=1e6)
+    # 根据所属单元的Z位置计算颜色（归一化到0-1）
+    face_colors = cmap(table.centers[owners, 2] / z_size)
+    # 计算透明度（过渡层稍微透明一些以显示内部结构）
+    face_colors[:, 3] = np.where(table.layer_ids[owners] == 1, 0.75, 0.85)
+    
     for idx, (elev, azim, title) in enumerate(views):
         ax = fig.add_subplot(2, 3, idx+1, projection='3d')
         ax.set_facecolor('#FFFFFF')
         
-        # 为每个单元绘制
-        for cell_idx, cell in enumerate(cells_to_show):
-            try:
-                vertices = cell['vertices'] * 1e6
-                center_z = cell['center'][2]
-                
-                # 根据Z位置计算颜色（归一化到0-1）
-                z_normalized = center_z / z_size
-                color_value = cmap(z_normalized)
-                
-                # 计算透明度（中间层稍微透明一些以显示内部结构）
-                if 0.2 <= z_normalized <= 0.5:
-                    alpha = 0.75
-                else:
-                    alpha = 0.85
-                
-                if len(vertices) >= 4:
-                    try:
-                        hull = ConvexHull(vertices)
-                        
-                        # 绘制每个三角形面
-                        for simplex in hull.simplices:
-                            triangle = vertices[simplex]
-                            poly3d = [[triangle[j] for j in range(3)]]
-                            
-                            collection = Poly3DCollection(
-                                poly3d,
-                                facecolors=color_value,
-                                alpha=alpha,
-                                edgecolors='#333333',
-                                linewidths=0.5
-                            )
-                            
-                            # 添加光泽效果（设置更高的光照强度）
-                            collection.set_edgecolor('#333333')
-                            ax.add_collection3d(collection)
-                            
-                    except:
-                        # 如果ConvexHull失败，绘制点
-                        center = cell['center'] * 1e6
-                        ax.scatter(center[0], center[1], center[2],
-                                 c=[color_value], s=100, alpha=alpha, 
-                                 edgecolors='black', linewidths=1)
-                else:
-                    center = cell['center'] * 1e6
-                    ax.scatter(center[0], center[1], center[2],
-                             c=[color_value], s=100, alpha=alpha,
-                             edgecolors='black', linewidths=1)
-                             
-            except Exception as e:
-                continue
+        # 所有面一次性加入同一个集合
+        ax.add_collection3d(Poly3DCollection(
+            polygons,
+            facecolors=face_colors,
+            edgecolors='#333333',
+            linewidths=0.5
+        ))
         
         # 设置坐标轴
         ax.set_xlabel('X (μm)', fontsize=10, fontweight='bold')
@@ -141,14 +107,13 @@ def create_realistic_scaffold_visualization(generator, output_path=None, max_cel
                    fontsize=11, fontweight='bold', rotation=270, labelpad=25)
     
     # 添加层标记
-    cbar_ax.axhline(y=0.2*z_size*1e6, color='red', linestyle='--', linewidth=2, alpha=0.7)
-    cbar_ax.axhline(y=0.5*z_size*1e6, color='orange', linestyle='--', linewidth=2, alpha=0.7)
-    cbar_ax.text(1.5, 0.1*z_size*1e6, 'Cortical', fontsize=9, color='red', 
-                fontweight='bold', transform=cbar_ax.transData)
-    cbar_ax.text(1.5, 0.35*z_size*1e6, 'Transition', fontsize=9, color='orange',
-                fontweight='bold', transform=cbar_ax.transData)
-    cbar_ax.text(1.5, 0.75*z_size*1e6, 'Trabecular', fontsize=9, color='blue',
-                fontweight='bold', transform=cbar_ax.transData)
+    z_edges_um = np.concatenate([[0.0], generator.layer_z_boundaries(), [z_size]]) * 1e6
+    for z_edge, color in zip(z_edges_um[1:-1], ['red', 'orange']):
+        cbar_ax.axhline(y=z_edge, color=color, linestyle='--', linewidth=2, alpha=0.7)
+    for z_mid, label, color in zip(0.5 * (z_edges_um[1:] + z_edges_um[:-1]),
+                                   BIOMIMETIC_LAYER_LABELS, ['red', 'orange', 'blue']):
+        cbar_ax.text(1.5, z_mid, label, fontsize=9, color=color,
+                    fontweight='bold', transform=cbar_ax.transData)
     
     # 总标题
     fig.suptitle('3D Biomimetic Gradient Voronoi Scaffold - Multi-View Visualization',
@@ -159,7 +124,7 @@ def create_realistic_scaffold_visualization(generator, output_path=None, max_cel
     Scaffold Info:
     • Dimensions: {generator.x_size*1e6:.0f} × {generator.y_size*1e6:.0f} × {generator.z_size*1e6:.0f} μm
     • Total Cells: {len(generator.interior_cells)}
-    • Displayed: {len(cells_to_show)} cells
+    • Displayed: {len(rows)} cells
     • Porosity: {generator.target_porosity*100:.1f}%
     • Layer Structure: Cortical (0-20%) → Transition (20-50%) → Trabecular (50-100%)
     """
@@ -192,6 +157,11 @@ def create_cross_section_views(generator, output_path=None):
     # 6个不同深度的切片
     z_slices = [0.1, 0.25, 0.4, 0.55, 0.7, 0.9]
     
+    cells = generator.interior_cells
+    z_boundaries = generator.layer_z_boundaries()
+    # 每个单元的颜色由其层编号索引查找表得到
+    cell_colors = LAYER_COLORS_HEX[cells.layer_ids]
+    
     for idx, z_ratio in enumerate(z_slices):
         ax = axes[idx // 3, idx % 3]
         ax.set_facecolor('#FFFFFF')
@@ -200,27 +170,17 @@ def create_cross_section_views(generator, output_path=None):
         tolerance = 0.05 * generator.z_size
         
         # 找到该切片上的单元
-        slice_cells = []
-        for cell in generator.interior_cells:
-            if abs(cell['center'][2] - z_slice) < tolerance:
-                slice_cells.append(cell)
+        slice_rows = np.flatnonzero(np.abs(cells.centers[:, 2] - z_slice) < tolerance)
         
         # 绘制单元
-        for cell in slice_cells:
+        for row in slice_rows:
             try:
+                cell = cells[row]
                 # 投影到XY平面
                 vertices_2d = cell['vertices'][:, :2] * 1e6
                 
                 # 颜色根据层
-                if z_ratio <= 0.2:
-                    color = '#FF4444'
-                    label = 'Cortical'
-                elif z_ratio <= 0.5:
-                    color = '#FF8844'
-                    label = 'Transition'
-                else:
-                    color = '#4488FF'
-                    label = 'Trabecular'
+                color = cell_colors[row]
                 
                 # 绘制Voronoi单元边界
                 if len(vertices_2d) >= 3:
@@ -247,21 +207,14 @@ def create_cross_section_views(generator, output_path=None):
         ax.set_aspect('equal')
         ax.set_xlabel('X (μm)', fontsize=9)
         ax.set_ylabel('Y (μm)', fontsize=9)
-        ax.set_title(f'Z = {z_slice*1e6:.1f} μm ({z_ratio*100:.0f}%)\n{len(slice_cells)} cells',
+        ax.set_title(f'Z = {z_slice*1e6:.1f} μm ({z_ratio*100:.0f}%)\n{len(slice_rows)} cells',
                     fontsize=10, fontweight='bold')
         ax.grid(True, alpha=0.3, linestyle='--')
         
         # 添加层标签
-        layer_text = ""
-        if z_ratio <= 0.2:
-            layer_text = "Cortical Layer"
-            color_bg = '#FF444440'
-        elif z_ratio <= 0.5:
-            layer_text = "Transition Layer"
-            color_bg = '#FF884440'
-        else:
-            layer_text = "Trabecular Layer"
-            color_bg = '#4488FF40'
+        slice_layer = int(np.searchsorted(z_boundaries, z_slice, side='right'))
+        layer_text = f"{BIOMIMETIC_LAYER_LABELS[slice_layer]} Layer"
+        color_bg = LAYER_COLORS_HEX[slice_layer] + '40'
         
         ax.text(0.5, 0.95, layer_text, transform=ax.transAxes,
                fontsize=9, fontweight='bold', ha='center', va='top',
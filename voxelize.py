@@ -0,0 +1,243 @@
+"""
+分块体素化导出
+把支柱网络（胶囊体并集或平滑并集）或Voronoi单元按块填入二值/层编号占据网格，
+按Z平板顺序写入内存映射 .npy、裸数据 .raw 或多页 TIFF，体素网格可以远大于内存。
+每个文件旁附 <文件名>.json 描述形状、体素尺寸与标签含义，load_voxel_volume 据此以只读映射打开
+"""
+
+import os
+import json
+import struct
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial import cKDTree
+
+from sdf_mesh import block_field
+from seeding import assign_layers
+
+
+VOXEL_FORMATS = ('.npy', '.raw', '.tif', '.tiff')
+
+# 默认体素尺寸下整个网格的体素数上限（uint8 约 64 MB）
+DEFAULT_VOXEL_BUDGET = 2 ** 26
+
+
+def default_voxel_size(feature_size, size, budget=DEFAULT_VOXEL_BUDGET):
+    """
+    默认体素边长 (m)：按特征尺寸取值（支柱半径或单元孔径的一个分数），
+    但整个网格不超过 budget 个体素
+    """
+    return float(max(feature_size, np.cbrt(np.prod(size) / budget)))
+
+
+def voxel_block(task):
+    """
+    计算一个体素块的标签（在进程池中执行），返回 (lo, labels)
+
+    task: (kind, lo, shape, voxel_size, geometry, labelled, z_boundaries)
+        lo / shape - 块在整个网格中的起点与大小，顺序均为 (x, y, z)
+        kind = 'struts': geometry = (p0, p1, radius, blend)，已筛选到本块附近的支柱
+        kind = 'cells' : geometry = (seeds, seed_layers, seed_reach)，已筛选到本块附近的种子；
+                         seed_layers 为种子所在单元的层编号（非内部单元为 -1），
+                         seed_reach 为单元顶点到种子的最大距离
+    labels: (nz, ny, nx) uint8，0 为空；labelled 时实体为 层编号+1，否则为 1。
+    支柱按体素中心的Z分层，单元按所属单元的层
+    """
+    kind, lo, shape, voxel_size, geometry, labelled, z_boundaries = task
+    lo = np.asarray(lo)
+    centers = [(lo[k] + np.arange(shape[k]) + 0.5) * voxel_size for k in range(3)]
+    if kind == 'struts':
+        p0, p1, radius, blend = geometry
+        if len(p0) == 0:
+            return lo, np.zeros(shape[::-1], dtype=np.uint8)
+        origin = np.array([centers[0][0], centers[1][0], centers[2][0]])
+        field = block_field(np.zeros(3, dtype=np.int64), shape, origin, voxel_size, p0, p1, radius,
+                            blend=blend, band=voxel_size + 6 * blend)
+        solid = field.transpose(2, 1, 0) <= 0
+        if not labelled:
+            return lo, solid.astype(np.uint8)
+        layer = assign_layers(centers[2], z_boundaries).astype(np.uint8) + 1
+        return lo, np.where(solid, layer[:, None, None], 0).astype(np.uint8)
+
+    seeds, seed_layers, seed_reach = geometry
+    gz, gy, gx = np.meshgrid(centers[2], centers[1], centers[0], indexing='ij')
+    if len(seeds) == 0:
+        return lo, np.zeros(gz.shape, dtype=np.uint8)
+    distance, nearest = cKDTree(seeds).query(np.stack([gx.ravel(), gy.ravel(), gz.ravel()], axis=1))
+    # 只传入了附近的种子：离最近种子超过其单元范围的体素不在任何内部单元中
+    inside = (seed_layers[nearest] >= 0) & (distance <= seed_reach[nearest])
+    layer = np.where(inside, seed_layers[nearest], -1).reshape(gz.shape)
+    labels = np.where(layer >= 0, layer + 1 if labelled else 1, 0)
+    return lo, labels.astype(np.uint8)
+
+
+class VoxelVolumeWriter:
+    """
+    按Z平板顺序写出 (nz, ny, nx) uint8 体素体，格式由扩展名决定
+        .npy        - numpy 内存映射文件（np.load(mmap_mode='r') 可直接打开）
+        .raw        - 无文件头的裸数据，C顺序 (z, y, x)
+        .tif/.tiff  - 多页8位灰度TIFF，每个Z切片一页；全部图像数据连续存放在文件头之后，
+                      页目录写在文件末尾，因此同样可以按偏移量做内存映射。
+                      超过4 GB时自动使用 BigTIFF（64位偏移）
+    只持有当前平板，内存占用与网格大小无关
+    """
+
+    def __init__(self, filename, shape, voxel_size=None):
+        self.filename = filename
+        self.shape = tuple(int(n) for n in shape)
+        self.voxel_size = voxel_size
+        self.ext = os.path.splitext(filename)[1].lower()
+        if self.ext not in VOXEL_FORMATS:
+            raise ValueError(f"不支持的体素格式: {self.ext}，可选 {VOXEL_FORMATS}")
+        self.data_offset = 0
+        self._written = 0
+        if self.ext == '.npy':
+            self._array = np.lib.format.open_memmap(filename, mode='w+', dtype=np.uint8,
+                                                    shape=self.shape)
+        else:
+            self._file = open(filename, 'wb')
+            if self.ext in ('.tif', '.tiff'):
+                # 小端TIFF文件头，首个页目录的偏移在 close() 时回填
+                nz, ny, nx = self.shape
+                self.bigtiff = nz * ny * nx + nz * 200 >= 2 ** 32
+                if self.bigtiff:
+                    self._file.write(b'II' + struct.pack('<HHHQ', 43, 8, 0, 0))
+                    self.data_offset = 16
+                else:
+                    self._file.write(b'II' + struct.pack('<HI', 42, 0))
+                    self.data_offset = 8
+
+    def write_slab(self, slab):
+        """追加一个Z平板 (dz, ny, nx)"""
+        slab = np.ascontiguousarray(slab, dtype=np.uint8)
+        if self.ext == '.npy':
+            self._array[self._written:self._written + len(slab)] = slab
+        else:
+            self._file.write(slab.tobytes())
+        self._written += len(slab)
+
+    def _write_tiff_directories(self):
+        """在文件末尾写出每页的页目录（IFD），依次链接"""
+        nz, ny, nx = self.shape
+        page_bytes = ny * nx
+        per_cm = (int(round(0.01 / self.voxel_size)), 1) if self.voxel_size else (1, 1)
+        position = self._file.tell()
+        if position % 2:
+            self._file.write(b'\0')
+            position += 1
+        # 分辨率（有理数）与页目录：12 个标签，BigTIFF 的计数、标签值与偏移均为 8 字节
+        resolution = position
+        self._file.write(struct.pack('<II', *per_cm))
+        first = position + 8
+        count_fmt, entry_fmt, next_fmt = ('<Q', '<HHQQ', '<Q') if self.bigtiff else ('<H', '<HHII', '<I')
+        offset_type = 16 if self.bigtiff else 4
+        if self.bigtiff:
+            # BigTIFF 的8字节值字段能直接容纳一个有理数
+            resolution = struct.unpack('<Q', struct.pack('<II', *per_cm))[0]
+        ifd_size = struct.calcsize(count_fmt) + 12 * struct.calcsize(entry_fmt) + struct.calcsize(next_fmt)
+        for z in range(nz):
+            offset = first + z * ifd_size
+            next_ifd = offset + ifd_size if z + 1 < nz else 0
+            tags = [(256, 4, 1, nx), (257, 4, 1, ny), (258, 3, 1, 8), (259, 3, 1, 1),
+                    (262, 3, 1, 1), (273, offset_type, 1, self.data_offset + z * page_bytes),
+                    (277, 3, 1, 1), (278, 4, 1, ny), (279, 4, 1, page_bytes),
+                    (282, 5, 1, resolution), (283, 5, 1, resolution), (296, 3, 1, 3)]
+            entries = b''.join(struct.pack(entry_fmt, tag, kind, count, value)
+                               for tag, kind, count, value in tags)
+            self._file.write(struct.pack(count_fmt, len(tags)) + entries +
+                             struct.pack(next_fmt, next_ifd))
+        self._file.seek(8 if self.bigtiff else 4)
+        self._file.write(struct.pack(next_fmt, first))
+
+    def close(self):
+        if self._written != self.shape[0]:
+            raise ValueError(f"体素体只写入了 {self._written}/{self.shape[0]} 个Z切片")
+        if self.ext == '.npy':
+            self._array.flush()
+            del self._array
+            return
+        if self.ext in ('.tif', '.tiff'):
+            self._write_tiff_directories()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.ext == '.npy':
+            del self._array
+        else:
+            self._file.close()
+
+
+def iter_voxel_blocks(tasks, n_workers=None):
+    """按任务顺序并行计算体素块，同时在途的任务数有上限"""
+    n_workers = n_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        max_pending = 2 * n_workers
+        pending = []
+        for task in tasks:
+            pending.append(pool.submit(voxel_block, task))
+            if len(pending) >= max_pending:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def block_ranges(shape, chunk_cells):
+    """按 Z 平板优先的顺序列出所有块 (lo, size)，均为 (x, y, z) 顺序"""
+    shape = np.asarray(shape)
+    for k in range(0, shape[2], chunk_cells):
+        for j in range(0, shape[1], chunk_cells):
+            for i in range(0, shape[0], chunk_cells):
+                lo = np.array([i, j, k])
+                yield lo, np.minimum(lo + chunk_cells, shape) - lo
+
+
+def write_voxel_volume(filename, shape, tasks, chunk_cells, voxel_size, metadata, n_workers=None):
+    """
+    并行计算全部体素块并按Z平板写出，另写 <filename>.json 描述文件
+
+    shape: 网格大小 (nx, ny, nz)；tasks: 按 block_ranges 顺序的 voxel_block 任务
+    返回补全了形状、数据偏移与各标签体素数的 metadata
+    """
+    nx, ny, nz = (int(n) for n in shape)
+    counts = np.zeros(256, dtype=np.int64)
+    with VoxelVolumeWriter(filename, (nz, ny, nx), voxel_size) as writer:
+        slab, slab_z = None, -1
+        for lo, labels in iter_voxel_blocks(tasks, n_workers):
+            if lo[2] != slab_z:
+                if slab is not None:
+                    writer.write_slab(slab)
+                slab_z = lo[2]
+                slab = np.zeros((min(chunk_cells, nz - slab_z), ny, nx), dtype=np.uint8)
+            dz, dy, dx = labels.shape
+            slab[:dz, lo[1]:lo[1] + dy, lo[0]:lo[0] + dx] = labels
+            counts += np.bincount(labels.ravel(), minlength=256)
+        if slab is not None:
+            writer.write_slab(slab)
+        data_offset = writer.data_offset
+
+    metadata = dict(metadata, shape_zyx=[nz, ny, nx], axis_order='zyx', dtype='uint8',
+                    format=os.path.splitext(filename)[1].lower().lstrip('.'),
+                    data_offset=data_offset,
+                    label_counts={str(k): int(c) for k, c in enumerate(counts) if c})
+    with open(filename + '.json', 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    return metadata
+
+
+def load_voxel_volume(filename):
+    """
+    以只读内存映射打开 write_voxel_volume 写出的体素体，返回 (volume, metadata)
+    volume 形状为 (nz, ny, nx)，按需从磁盘读取
+    """
+    with open(filename + '.json', 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    if metadata['format'] == 'npy':
+        return np.load(filename, mmap_mode='r'), metadata
+    volume = np.memmap(filename, dtype=np.uint8, mode='r', offset=metadata['data_offset'],
+                       shape=tuple(metadata['shape_zyx']))
+    return volume, metadata